@@ -0,0 +1,55 @@
+"""Convert attribute and marketplace_data columns to JSONB with GIN indexes
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# (table, column, index)
+JSONB_COLUMNS = [
+    ("products", "specifications", "ix_products_specifications"),
+    ("products", "attributes", "ix_products_attributes"),
+    ("listings", "marketplace_data", "ix_listings_marketplace_data"),
+    ("orders", "marketplace_data", "ix_orders_marketplace_data"),
+]
+
+
+def upgrade():
+    for table, column, _ in JSONB_COLUMNS:
+        op.execute(
+            f"ALTER TABLE {table} ALTER COLUMN {column} "
+            f"TYPE JSONB USING {column}::jsonb"
+        )
+
+    # jsonb_path_ops indexes only support @> but are smaller and faster than
+    # the default jsonb_ops, which is all the attribute filters use
+    with op.get_context().autocommit_block():
+        for table, column, index in JSONB_COLUMNS:
+            op.create_index(
+                index,
+                table,
+                [column],
+                postgresql_using="gin",
+                postgresql_ops={column: "jsonb_path_ops"},
+                postgresql_concurrently=True,
+                if_not_exists=True
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for table, _, index in JSONB_COLUMNS:
+            op.drop_index(index, table_name=table, postgresql_concurrently=True, if_exists=True)
+
+    for table, column, _ in JSONB_COLUMNS:
+        op.execute(
+            f"ALTER TABLE {table} ALTER COLUMN {column} "
+            f"TYPE JSON USING {column}::json"
+        )
@@ -0,0 +1,159 @@
+"""Range-partition orders, order_items and reviews by month
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+
+from datetime import datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.services.partitions import month_start, partition_name
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+PREMAKE_MONTHS = 3
+
+# (table, partition key); order_items gets placed_at from its order
+TABLES = [
+    ("orders", "placed_at"),
+    ("order_items", "placed_at"),
+    ("reviews", "review_date"),
+]
+
+
+def _create_partitions(table: str, key: str):
+    """Monthly partitions from the oldest legacy row to PREMAKE_MONTHS ahead"""
+    bind = op.get_bind()
+    source = "orders_legacy" if table == "order_items" else f"{table}_legacy"
+    oldest = bind.execute(sa.text(f"SELECT min({key}) FROM {source}")).scalar()
+    today = datetime.now(timezone.utc).date()
+
+    month = month_start(oldest.date() if oldest else today)
+    last = month_start(today, PREMAKE_MONTHS)
+    while month <= last:
+        op.execute(
+            f"CREATE TABLE {partition_name(table, month)} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{month_start(month, 1).isoformat()}')"
+        )
+        month = month_start(month, 1)
+    op.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+
+
+def upgrade():
+    for table, _ in TABLES:
+        op.execute(f"ALTER TABLE {table} RENAME TO {table}_legacy")
+
+    op.execute(
+        "CREATE TABLE orders (LIKE orders_legacy INCLUDING DEFAULTS) "
+        "PARTITION BY RANGE (placed_at)"
+    )
+    op.execute(
+        "CREATE TABLE order_items (LIKE order_items_legacy INCLUDING DEFAULTS, "
+        "placed_at TIMESTAMP WITH TIME ZONE NOT NULL) "
+        "PARTITION BY RANGE (placed_at)"
+    )
+    op.execute(
+        "CREATE TABLE reviews (LIKE reviews_legacy INCLUDING DEFAULTS) "
+        "PARTITION BY RANGE (review_date)"
+    )
+
+    for table, key in TABLES:
+        _create_partitions(table, key)
+
+    op.execute("INSERT INTO orders SELECT * FROM orders_legacy")
+    op.execute(
+        "INSERT INTO order_items SELECT i.*, o.placed_at "
+        "FROM order_items_legacy i JOIN orders_legacy o ON o.id = i.order_id"
+    )
+    op.execute("INSERT INTO reviews SELECT * FROM reviews_legacy")
+
+    # Drop the legacy tables before recreating constraints so the original
+    # constraint and index names are free again
+    for table in ("order_items", "reviews", "orders"):
+        op.execute(f"DROP TABLE {table}_legacy CASCADE")
+
+    op.create_primary_key("pk_orders", "orders", ["id", "placed_at"])
+    op.create_primary_key("pk_order_items", "order_items", ["id", "placed_at"])
+    op.create_primary_key("pk_reviews", "reviews", ["id", "review_date"])
+
+    op.create_foreign_key(
+        "fk_order_items_order_id_orders", "order_items", "orders",
+        ["order_id", "placed_at"], ["id", "placed_at"]
+    )
+    op.create_foreign_key(
+        "fk_order_items_product_id_products", "order_items", "products",
+        ["product_id"], ["id"]
+    )
+    op.create_foreign_key(
+        "fk_reviews_listing_id_listings", "reviews", "listings",
+        ["listing_id"], ["id"]
+    )
+
+    op.create_index("ix_orders_marketplace_external", "orders", ["marketplace", "external_order_id"])
+    op.create_index("ix_orders_status_placed", "orders", ["status", "placed_at"])
+    op.create_index(
+        "ix_orders_marketplace_data",
+        "orders",
+        ["marketplace_data"],
+        postgresql_using="gin",
+        postgresql_ops={"marketplace_data": "jsonb_path_ops"}
+    )
+    op.create_index("ix_order_items_order", "order_items", ["order_id"])
+    op.create_index("ix_reviews_listing_rating", "reviews", ["listing_id", "rating"])
+    op.create_index("ix_reviews_sentiment", "reviews", ["sentiment"])
+
+    for table, _ in TABLES:
+        op.execute(f"ANALYZE {table}")
+
+
+def downgrade():
+    for table, _ in TABLES:
+        op.execute(f"ALTER TABLE {table} RENAME TO {table}_partitioned")
+
+    op.execute("CREATE TABLE orders (LIKE orders_partitioned INCLUDING DEFAULTS)")
+    op.execute("CREATE TABLE order_items (LIKE order_items_partitioned INCLUDING DEFAULTS)")
+    op.execute("CREATE TABLE reviews (LIKE reviews_partitioned INCLUDING DEFAULTS)")
+
+    op.execute("INSERT INTO orders SELECT * FROM orders_partitioned")
+    op.execute("INSERT INTO order_items SELECT * FROM order_items_partitioned")
+    op.execute("INSERT INTO reviews SELECT * FROM reviews_partitioned")
+
+    for table in ("order_items", "reviews", "orders"):
+        op.execute(f"DROP TABLE {table}_partitioned CASCADE")
+    op.drop_column("order_items", "placed_at")
+
+    op.create_primary_key("pk_orders", "orders", ["id"])
+    op.create_primary_key("pk_order_items", "order_items", ["id"])
+    op.create_primary_key("pk_reviews", "reviews", ["id"])
+
+    op.create_foreign_key(
+        "fk_order_items_order_id_orders", "order_items", "orders",
+        ["order_id"], ["id"]
+    )
+    op.create_foreign_key(
+        "fk_order_items_product_id_products", "order_items", "products",
+        ["product_id"], ["id"]
+    )
+    op.create_foreign_key(
+        "fk_reviews_listing_id_listings", "reviews", "listings",
+        ["listing_id"], ["id"]
+    )
+
+    op.create_index("ix_orders_marketplace_external", "orders", ["marketplace", "external_order_id"])
+    op.create_index("ix_orders_status_placed", "orders", ["status", "placed_at"])
+    op.create_index(
+        "ix_orders_marketplace_data",
+        "orders",
+        ["marketplace_data"],
+        postgresql_using="gin",
+        postgresql_ops={"marketplace_data": "jsonb_path_ops"}
+    )
+    op.create_index("ix_order_items_order", "order_items", ["order_id"])
+    op.create_index("ix_reviews_listing_rating", "reviews", ["listing_id", "rating"])
+    op.create_index("ix_reviews_sentiment", "reviews", ["sentiment"])
@@ -0,0 +1,40 @@
+"""Add the listing counter flush ledger
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "listing_counter_flushes",
+        sa.Column("flush_id", sa.String(36), nullable=False),
+        sa.Column("listings", sa.Integer(), nullable=False),
+        sa.Column("applied_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint("flush_id", name="pk_listing_counter_flushes"),
+    )
+    op.create_index(
+        "ix_listing_counter_flushes_applied_at",
+        "listing_counter_flushes",
+        ["applied_at"]
+    )
+
+    # Leave free space on each page so counter flushes (which touch no
+    # indexed column) can be HOT updates instead of new row versions
+    # on other pages; applies to pages written from now on
+    op.execute("ALTER TABLE listings SET (fillfactor = 85)")
+
+
+def downgrade():
+    op.execute("ALTER TABLE listings RESET (fillfactor)")
+    op.drop_index("ix_listing_counter_flushes_applied_at", table_name="listing_counter_flushes")
+    op.drop_table("listing_counter_flushes")
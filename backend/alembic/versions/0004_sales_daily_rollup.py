@@ -0,0 +1,60 @@
+"""Add the daily sales rollup and the indexes that maintain it
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    marketplace = postgresql.ENUM(name="marketplacetype", create_type=False)
+
+    op.create_table(
+        "sales_daily",
+        sa.Column("product_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("marketplace", marketplace, nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("units", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("revenue", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("orders", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("views", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("clicks", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("review_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("rating_sum", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint("product_id", "marketplace", "day", name="pk_sales_daily"),
+        sa.ForeignKeyConstraint(
+            ["product_id"], ["products.id"],
+            name="fk_sales_daily_product_id_products",
+            ondelete="CASCADE"
+        ),
+    )
+
+    op.create_table(
+        "rollup_watermarks",
+        sa.Column("name", sa.String(50), nullable=False),
+        sa.Column("value", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("name", name="pk_rollup_watermarks"),
+    )
+
+    # Change scans for the incremental refresh, and per-product recomputes
+    op.create_index("ix_orders_changed_at", "orders", [sa.text("coalesce(updated_at, created_at)")])
+    op.create_index("ix_order_items_product_placed", "order_items", ["product_id", "placed_at"])
+    op.create_index("ix_reviews_created_at", "reviews", ["created_at"])
+
+
+def downgrade():
+    op.drop_index("ix_reviews_created_at", table_name="reviews")
+    op.drop_index("ix_order_items_product_placed", table_name="order_items")
+    op.drop_index("ix_orders_changed_at", table_name="orders")
+    op.drop_table("rollup_watermarks")
+    op.drop_table("sales_daily")
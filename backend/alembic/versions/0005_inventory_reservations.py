@@ -0,0 +1,59 @@
+"""Add inventory reservations
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    status = postgresql.ENUM("HELD", "COMMITTED", "RELEASED", name="reservationstatus")
+    status.create(op.get_bind(), checkfirst=True)
+
+    op.create_table(
+        "inventory_reservations",
+        sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("order_ref", sa.String(100), nullable=False),
+        sa.Column("inventory_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("product_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("warehouse", sa.String(100), nullable=False),
+        sa.Column("quantity", sa.Integer(), nullable=False),
+        sa.Column(
+            "status",
+            postgresql.ENUM(name="reservationstatus", create_type=False),
+            nullable=False
+        ),
+        sa.Column("expires_at", sa.DateTime(timezone=True)),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+        sa.PrimaryKeyConstraint("id", name="pk_inventory_reservations"),
+        sa.ForeignKeyConstraint(
+            ["inventory_id"], ["inventory.id"],
+            name="fk_inventory_reservations_inventory_id_inventory"
+        ),
+        sa.ForeignKeyConstraint(
+            ["product_id"], ["products.id"],
+            name="fk_inventory_reservations_product_id_products"
+        ),
+    )
+    op.create_index("ix_inventory_reservations_order_ref", "inventory_reservations", ["order_ref"])
+    op.create_index(
+        "ix_inventory_reservations_held_expiry",
+        "inventory_reservations",
+        ["expires_at"],
+        postgresql_where=sa.text("status = 'HELD'")
+    )
+
+
+def downgrade():
+    op.drop_table("inventory_reservations")
+    postgresql.ENUM(name="reservationstatus").drop(op.get_bind(), checkfirst=True)
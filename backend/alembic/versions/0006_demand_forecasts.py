@@ -0,0 +1,44 @@
+"""Add demand forecasts
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "demand_forecasts",
+        sa.Column("product_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("model", sa.String(20), nullable=False),
+        sa.Column("daily_demand", sa.Float(), nullable=False),
+        sa.Column("demand_std", sa.Float(), nullable=False),
+        sa.Column("reorder_point", sa.Integer(), nullable=False),
+        sa.Column("order_quantity", sa.Integer(), nullable=False),
+        sa.Column("history_days", sa.Integer(), nullable=False),
+        sa.Column("computed_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint("product_id", name="pk_demand_forecasts"),
+        sa.ForeignKeyConstraint(
+            ["product_id"], ["products.id"], ondelete="CASCADE",
+            name="fk_demand_forecasts_product_id_products"
+        ),
+    )
+    op.create_index(
+        "ix_demand_forecasts_reorder",
+        "demand_forecasts",
+        ["order_quantity"],
+        postgresql_where=sa.text("order_quantity > 0")
+    )
+
+
+def downgrade():
+    op.drop_table("demand_forecasts")
@@ -0,0 +1,40 @@
+"""Track which review content has been analysed
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+PENDING = "sentiment IS NULL OR analyzed_hash IS DISTINCT FROM content_hash"
+
+
+def upgrade():
+    op.add_column(
+        "reviews",
+        sa.Column(
+            "content_hash",
+            sa.String(32),
+            sa.Computed("md5(coalesce(title, '') || E'\\n' || coalesce(body, ''))", persisted=True)
+        )
+    )
+    op.add_column("reviews", sa.Column("analyzed_hash", sa.String(32)))
+    op.create_index(
+        "ix_reviews_pending_analysis",
+        "reviews",
+        ["review_date"],
+        postgresql_where=sa.text(PENDING)
+    )
+
+
+def downgrade():
+    op.drop_index("ix_reviews_pending_analysis", table_name="reviews")
+    op.drop_column("reviews", "analyzed_hash")
+    op.drop_column("reviews", "content_hash")
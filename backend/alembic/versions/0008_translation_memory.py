@@ -0,0 +1,31 @@
+"""Add the translation memory
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "translation_memory",
+        sa.Column("source_lang", sa.String(5), nullable=False),
+        sa.Column("target_lang", sa.String(5), nullable=False),
+        sa.Column("source_hash", sa.String(32), nullable=False),
+        sa.Column("source_text", sa.Text(), nullable=False),
+        sa.Column("target_text", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint("source_lang", "target_lang", "source_hash", name="pk_translation_memory"),
+    )
+
+
+def downgrade():
+    op.drop_table("translation_memory")
@@ -0,0 +1,41 @@
+"""Add streamed product assets
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "product_assets",
+        sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("product_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("filename", sa.String(255), nullable=False),
+        sa.Column("storage_key", sa.String(500), nullable=False),
+        sa.Column("url", sa.String(1000), nullable=False),
+        sa.Column("content_type", sa.String(100), nullable=False),
+        sa.Column("size", sa.BigInteger(), nullable=False),
+        sa.Column("sha256", sa.String(64), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint("id", name="pk_product_assets"),
+        sa.ForeignKeyConstraint(
+            ["product_id"], ["products.id"], ondelete="CASCADE",
+            name="fk_product_assets_product_id_products"
+        ),
+        sa.UniqueConstraint("storage_key", name="uq_product_assets_storage_key"),
+    )
+    op.create_index("ix_product_assets_product_id", "product_assets", ["product_id"])
+
+
+def downgrade():
+    op.drop_table("product_assets")
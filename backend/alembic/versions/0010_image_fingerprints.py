@@ -0,0 +1,47 @@
+"""Add perceptual image fingerprints
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "image_fingerprints",
+        sa.Column("content_hash", sa.String(64), nullable=False),
+        sa.Column("url", sa.String(1000), nullable=False),
+        sa.Column("product_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("phash", sa.BigInteger(), nullable=False),
+        sa.Column("dhash", sa.BigInteger(), nullable=False),
+        sa.Column("phash_0", sa.Integer(), nullable=False),
+        sa.Column("phash_1", sa.Integer(), nullable=False),
+        sa.Column("phash_2", sa.Integer(), nullable=False),
+        sa.Column("phash_3", sa.Integer(), nullable=False),
+        sa.Column("width", sa.Integer(), nullable=False),
+        sa.Column("height", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint("content_hash", name="pk_image_fingerprints"),
+        sa.ForeignKeyConstraint(
+            ["product_id"], ["products.id"], ondelete="SET NULL",
+            name="fk_image_fingerprints_product_id_products"
+        ),
+    )
+    op.create_index("ix_image_fingerprints_url", "image_fingerprints", ["url"])
+    op.create_index("ix_image_fingerprints_product_id", "image_fingerprints", ["product_id"])
+    # One index per pHash chunk: near-duplicate candidates are an OR of four index lookups
+    for n in range(4):
+        op.create_index(f"ix_image_fingerprints_phash_{n}", "image_fingerprints", [f"phash_{n}"])
+
+
+def downgrade():
+    op.drop_table("image_fingerprints")
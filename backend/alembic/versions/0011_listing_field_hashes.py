@@ -0,0 +1,23 @@
+"""Store per-field hashes of the last marketplace sync on listings
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0011"
+down_revision = "0010"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("listings", sa.Column("synced_field_hashes", postgresql.JSONB()))
+
+
+def downgrade():
+    op.drop_column("listings", "synced_field_hashes")
@@ -0,0 +1,68 @@
+"""Map image URLs to fingerprints, including failed fetches
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0012"
+down_revision = "0011"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "image_fingerprint_urls",
+        sa.Column("url", sa.String(1000), nullable=False),
+        sa.Column("content_hash", sa.String(64), nullable=True),
+        sa.Column("product_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("error", sa.String(500), nullable=True),
+        sa.Column("checked_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.PrimaryKeyConstraint("url", name="pk_image_fingerprint_urls"),
+        sa.ForeignKeyConstraint(
+            ["content_hash"], ["image_fingerprints.content_hash"], ondelete="CASCADE",
+            name="fk_image_fingerprint_urls_content_hash_image_fingerprints"
+        ),
+        sa.ForeignKeyConstraint(
+            ["product_id"], ["products.id"], ondelete="SET NULL",
+            name="fk_image_fingerprint_urls_product_id_products"
+        ),
+    )
+    op.create_index("ix_image_fingerprint_urls_content_hash", "image_fingerprint_urls", ["content_hash"])
+    op.create_index("ix_image_fingerprint_urls_product_id", "image_fingerprint_urls", ["product_id"])
+    op.execute(
+        "INSERT INTO image_fingerprint_urls (url, content_hash, product_id) "
+        "SELECT url, content_hash, product_id FROM image_fingerprints "
+        "ON CONFLICT (url) DO NOTHING"
+    )
+    op.drop_index("ix_image_fingerprints_url", table_name="image_fingerprints")
+    op.drop_index("ix_image_fingerprints_product_id", table_name="image_fingerprints")
+    op.drop_constraint("fk_image_fingerprints_product_id_products", "image_fingerprints", type_="foreignkey")
+    op.drop_column("image_fingerprints", "url")
+    op.drop_column("image_fingerprints", "product_id")
+
+
+def downgrade():
+    op.add_column("image_fingerprints", sa.Column("url", sa.String(1000), nullable=True))
+    op.add_column("image_fingerprints", sa.Column("product_id", postgresql.UUID(as_uuid=True), nullable=True))
+    op.execute(
+        "UPDATE image_fingerprints f SET url = u.url, product_id = u.product_id "
+        "FROM (SELECT DISTINCT ON (content_hash) content_hash, url, product_id "
+        "      FROM image_fingerprint_urls WHERE content_hash IS NOT NULL "
+        "      ORDER BY content_hash, checked_at) u "
+        "WHERE u.content_hash = f.content_hash"
+    )
+    op.execute("DELETE FROM image_fingerprints WHERE url IS NULL")
+    op.alter_column("image_fingerprints", "url", nullable=False)
+    op.create_foreign_key(
+        "fk_image_fingerprints_product_id_products", "image_fingerprints", "products",
+        ["product_id"], ["id"], ondelete="SET NULL"
+    )
+    op.create_index("ix_image_fingerprints_url", "image_fingerprints", ["url"])
+    op.create_index("ix_image_fingerprints_product_id", "image_fingerprints", ["product_id"])
+    op.drop_table("image_fingerprint_urls")
@@ -0,0 +1,47 @@
+"""Materialized top-K product neighbors and embedding change stamps
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0013"
+down_revision = "0012"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # NULL neighbors_updated_at queues every embedded product for the first recompute
+    op.add_column("products", sa.Column("embedding_updated_at", sa.DateTime(timezone=True), nullable=True))
+    op.add_column("products", sa.Column("neighbors_updated_at", sa.DateTime(timezone=True), nullable=True))
+
+    op.create_table(
+        "product_neighbors",
+        sa.Column("product_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("rank", sa.Integer(), nullable=False),
+        sa.Column("neighbor_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("similarity", sa.Float(), nullable=False),
+        sa.Column("computed_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.PrimaryKeyConstraint("product_id", "rank", name="pk_product_neighbors"),
+        sa.ForeignKeyConstraint(
+            ["product_id"], ["products.id"], ondelete="CASCADE",
+            name="fk_product_neighbors_product_id_products"
+        ),
+        sa.ForeignKeyConstraint(
+            ["neighbor_id"], ["products.id"], ondelete="CASCADE",
+            name="fk_product_neighbors_neighbor_id_products"
+        ),
+    )
+    op.create_index("ix_product_neighbors_neighbor", "product_neighbors", ["neighbor_id"])
+
+
+def downgrade():
+    op.drop_index("ix_product_neighbors_neighbor", table_name="product_neighbors")
+    op.drop_table("product_neighbors")
+    op.drop_column("products", "neighbors_updated_at")
+    op.drop_column("products", "embedding_updated_at")
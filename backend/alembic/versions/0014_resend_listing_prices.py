@@ -0,0 +1,26 @@
+"""Resend listing prices as purchasable_offer
+
+Revision ID: 0014
+Revises: 0013
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+
+revision = "0014"
+down_revision = "0013"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Delta updates sent price and currency as list_price; without their
+    # hashes the next update sends them again as the selling price
+    op.execute(
+        "UPDATE listings SET synced_field_hashes = synced_field_hashes - 'price' - 'currency' "
+        "WHERE synced_field_hashes IS NOT NULL"
+    )
+
+
+def downgrade():
+    pass
@@ -1,7 +1,7 @@
 """Amazon SP-API adapter implementation"""
 
 import asyncio
-import boto3
+import gzip
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 import json
@@ -12,6 +12,7 @@ from app.adapters.base import (
     MarketplaceCredentials,
     ListingData,
     InventoryUpdate,
+    PriceUpdate,
     OrderData,
     ReviewData,
     AdCampaignData
@@ -19,12 +20,26 @@ from app.adapters.base import (
 from app.models.database import MarketplaceType
 from app.core.config import settings
 from app.core.exceptions import MarketplaceException
+from app.core.resilience import is_transient
 
 
 class AmazonAdapter(MarketplaceAdapter):
     """Amazon SP-API adapter"""
     
     BASE_URL = "https://sellingpartnerapi-eu.amazon.com"
+    supports_price_feed = True
+    
+    # Listings API attributes each ListingData field is sent in; fields not
+    # listed (category, attributes, compliance_flags) are not sent at all
+    FIELD_ATTRIBUTES = {
+        "title": ("item_name",),
+        "description": ("description",),
+        "bullet_points": ("bullet_point",),
+        "keywords": ("generic_keyword",),
+        "images": ("main_image_url", "other_image_url"),
+        "price": ("purchasable_offer",),
+        "currency": ("purchasable_offer",),
+    }
     
     def __init__(self, credentials: MarketplaceCredentials):
         super().__init__(credentials)
@@ -32,6 +47,7 @@ class AmazonAdapter(MarketplaceAdapter):
         self.client_secret = credentials.credentials.get("client_secret")
         self.refresh_token = credentials.credentials.get("refresh_token")
         self.marketplace_id = credentials.credentials.get("marketplace_id", settings.AMAZON_MARKETPLACE_ID)
+        self.seller_id = credentials.credentials.get("seller_id")
         self._access_token = None
         self._token_expires_at = None
     
@@ -71,10 +87,9 @@ class AmazonAdapter(MarketplaceAdapter):
             url = f"{self.BASE_URL}/listings/2021-08-01/items/{self.marketplace_id}"
             headers = await self._get_headers()
             
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, headers=headers, params={"limit": 1})
-                return response.status_code == 200
-                
+            response = await self._send("GET", url, headers=headers, params={"limit": 1})
+            return response.status_code == 200
+            
         except Exception:
             return False
     
@@ -88,38 +103,50 @@ class AmazonAdapter(MarketplaceAdapter):
         url = f"{self.BASE_URL}/listings/2021-08-01/items/{self.marketplace_id}"
         headers = await self._get_headers()
         
-        async with httpx.AsyncClient() as client:
-            response = await client.put(
-                url,
-                headers=headers,
-                json=amazon_listing
-            )
-            
-            if response.status_code not in [200, 201]:
-                raise MarketplaceException("Amazon", f"Failed to publish listing: {response.text}")
-            
-            return response.json()
+        response = await self._send("PUT", url, headers=headers, json=amazon_listing)
+        
+        if response.status_code not in [200, 201]:
+            raise MarketplaceException("Amazon", f"Failed to publish listing: {response.text}")
+        
+        return response.json()
     
-    async def update_listing(self, external_id: str, listing_data: ListingData) -> Dict[str, Any]:
-        """Update Amazon listing"""
+    async def update_listing(
+        self,
+        external_id: str,
+        listing_data: ListingData,
+        synced_hashes: Optional[Dict[str, str]] = None
+    ) -> Dict[str, Any]:
+        """Update Amazon listing with a JSON patch of the attributes whose fields changed
+        
+        Without synced_hashes every attribute is sent. When no sent field
+        changed the API is not called and the status is "UNCHANGED".
+        """
+        hashes = listing_data.field_hashes()
+        changed = [field for field, digest in hashes.items() if (synced_hashes or {}).get(field) != digest]
+        paths = sorted({attribute for field in changed for attribute in self.FIELD_ATTRIBUTES.get(field, ())})
+        if not paths:
+            return {"sku": external_id, "status": "UNCHANGED", "changed_fields": changed, "field_hashes": hashes}
+        
         await self._ensure_authenticated()
         
-        amazon_listing = self._convert_to_amazon_format(listing_data)
+        attributes = self._amazon_attributes(listing_data)
+        patches = [
+            {"op": "replace", "path": f"/attributes/{name}", "value": attributes[name]}
+            if attributes[name] else {"op": "delete", "path": f"/attributes/{name}"}
+            for name in paths
+        ]
         
         url = f"{self.BASE_URL}/listings/2021-08-01/items/{self.marketplace_id}/{external_id}"
         headers = await self._get_headers()
         
-        async with httpx.AsyncClient() as client:
-            response = await client.patch(
-                url,
-                headers=headers,
-                json=amazon_listing
-            )
-            
-            if response.status_code != 200:
-                raise MarketplaceException("Amazon", f"Failed to update listing: {response.text}")
-            
-            return response.json()
+        response = await self._send(
+            "PATCH", url, headers=headers, json={"productType": "PRODUCT", "patches": patches}
+        )
+        
+        if response.status_code != 200:
+            raise MarketplaceException("Amazon", f"Failed to update listing: {response.text}")
+        
+        return {**response.json(), "changed_fields": changed, "field_hashes": hashes}
     
     async def delete_listing(self, external_id: str) -> bool:
         """Delete Amazon listing"""
@@ -128,25 +155,25 @@ class AmazonAdapter(MarketplaceAdapter):
         url = f"{self.BASE_URL}/listings/2021-08-01/items/{self.marketplace_id}/{external_id}"
         headers = await self._get_headers()
         
-        async with httpx.AsyncClient() as client:
-            response = await client.delete(url, headers=headers)
-            return response.status_code == 200
+        response = await self._send("DELETE", url, headers=headers)
+        return response.status_code == 200
     
     async def get_listing(self, external_id: str) -> Optional[Dict[str, Any]]:
         """Get Amazon listing details"""
         await self._ensure_authenticated()
-        
+        return await self._read("get_listing", external_id, lambda: self._fetch_listing(external_id))
+    
+    async def _fetch_listing(self, external_id: str) -> Optional[Dict[str, Any]]:
         url = f"{self.BASE_URL}/listings/2021-08-01/items/{self.marketplace_id}/{external_id}"
         headers = await self._get_headers()
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=headers)
-            
-            if response.status_code == 404:
-                return None
-            
-            response.raise_for_status()
-            return response.json()
+        response = await self._send("GET", url, headers=headers)
+        
+        if response.status_code == 404:
+            return None
+        
+        response.raise_for_status()
+        return response.json()
     
     async def update_inventory(self, sku: str, quantity: int) -> bool:
         """Update Amazon inventory"""
@@ -163,21 +190,25 @@ class AmazonAdapter(MarketplaceAdapter):
     async def get_inventory(self, sku: str) -> Optional[Dict[str, Any]]:
         """Get Amazon inventory levels"""
         await self._ensure_authenticated()
-        
+        return await self._read("get_inventory", sku, lambda: self._fetch_inventory(sku))
+    
+    async def _fetch_inventory(self, sku: str) -> Optional[Dict[str, Any]]:
         url = f"{self.BASE_URL}/fba/inventory/v1/summaries"
         headers = await self._get_headers()
         params = {"sellerSkus": sku}
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=headers, params=params)
-            
-            if response.status_code != 200:
-                return None
-            
-            data = response.json()
-            inventories = data.get("payload", {}).get("inventorySummaries", [])
-            
-            return inventories[0] if inventories else None
+        response = await self._send("GET", url, headers=headers, params=params)
+        
+        if response.status_code == 429 or response.status_code >= 500:
+            # Throttled or failing: let _read fall back to the last known levels
+            response.raise_for_status()
+        if response.status_code != 200:
+            return None
+        
+        data = response.json()
+        inventories = data.get("payload", {}).get("inventorySummaries", [])
+        
+        return inventories[0] if inventories else None
     
     async def bulk_update_inventory(self, updates: List[InventoryUpdate]) -> Dict[str, Any]:
         """Bulk update Amazon inventory"""
@@ -200,6 +231,117 @@ class AmazonAdapter(MarketplaceAdapter):
         
         return results
     
+    async def bulk_update_prices(self, updates: List[PriceUpdate]) -> Dict[str, Any]:
+        """Submit price changes as one JSON_LISTINGS_FEED per 10k SKUs"""
+        await self._ensure_authenticated()
+        
+        results = {"success": [], "errors": [], "feeds": []}
+        headers = await self._get_headers()
+        batch_size = 10000
+        
+        async with httpx.AsyncClient() as client:
+            for i in range(0, len(updates), batch_size):
+                batch = updates[i:i + batch_size]
+                feed = {
+                    "header": {"sellerId": self.seller_id, "version": "2.0", "issueLocale": "de_DE"},
+                    "messages": [
+                        {
+                            "messageId": n + 1,
+                            "sku": update.sku,
+                            "operationType": "PATCH",
+                            "productType": "PRODUCT",
+                            "patches": [{
+                                "op": "replace",
+                                "path": "/attributes/purchasable_offer",
+                                "value": self._purchasable_offer(update.price, update.currency)
+                            }]
+                        }
+                        for n, update in enumerate(batch)
+                    ]
+                }
+                
+                try:
+                    # Feed document, upload, then the feed referencing it
+                    response = await self._send(
+                        "POST",
+                        f"{self.BASE_URL}/feeds/2021-06-30/documents",
+                        headers=headers,
+                        json={"contentType": "application/json; charset=UTF-8"}
+                    )
+                    response.raise_for_status()
+                    document = response.json()
+                    
+                    upload = await client.put(
+                        document["url"],
+                        content=json.dumps(feed),
+                        headers={"Content-Type": "application/json; charset=UTF-8"}
+                    )
+                    upload.raise_for_status()
+                    
+                    response = await self._send(
+                        "POST",
+                        f"{self.BASE_URL}/feeds/2021-06-30/feeds",
+                        headers=headers,
+                        json={
+                            "feedType": "JSON_LISTINGS_FEED",
+                            "marketplaceIds": [self.marketplace_id],
+                            "inputFeedDocumentId": document["feedDocumentId"]
+                        }
+                    )
+                    response.raise_for_status()
+                    
+                    # Submitted, not applied: the processing report comes later
+                    results["feeds"].append({
+                        "feed_id": response.json().get("feedId"),
+                        "skus": [update.sku for update in batch]
+                    })
+                    results["success"].extend(update.sku for update in batch)
+                except Exception as e:
+                    results["errors"].extend({"sku": update.sku, "error": str(e)} for update in batch)
+        
+        return results
+    
+    async def price_feed_result(self, feed_id: str) -> Optional[Dict[str, Any]]:
+        """Processing report of a price feed, None while Amazon is still processing it.
+        
+        Returns {"status": ..., "errors": {sku_position: message}}, positions
+        indexing the feed's skus list; errors is None when the whole feed
+        was rejected (CANCELLED, FATAL).
+        """
+        await self._ensure_authenticated()
+        
+        headers = await self._get_headers()
+        response = await self._send("GET", f"{self.BASE_URL}/feeds/2021-06-30/feeds/{feed_id}", headers=headers)
+        response.raise_for_status()
+        feed = response.json()
+        status = feed.get("processingStatus")
+        if status in ("IN_QUEUE", "IN_PROGRESS"):
+            return None
+        if status != "DONE" or not feed.get("resultFeedDocumentId"):
+            return {"status": status, "errors": None}
+        
+        response = await self._send(
+            "GET",
+            f"{self.BASE_URL}/feeds/2021-06-30/documents/{feed['resultFeedDocumentId']}",
+            headers=headers
+        )
+        response.raise_for_status()
+        document = response.json()
+        
+        async with httpx.AsyncClient() as client:
+            download = await client.get(document["url"])
+            download.raise_for_status()
+        content = download.content
+        if document.get("compressionAlgorithm") == "GZIP":
+            content = gzip.decompress(content)
+        
+        errors = {}
+        for issue in json.loads(content).get("issues", []):
+            if issue.get("severity") == "ERROR" and issue.get("messageId"):
+                # messageId n is the n-th SKU of the feed, see bulk_update_prices
+                errors.setdefault(issue["messageId"] - 1, issue.get("message", issue.get("code", "error")))
+        return {"status": status, "errors": errors}
+    
     async def fetch_orders(self, since: datetime) -> List[OrderData]:
         """Fetch Amazon orders"""
         await self._ensure_authenticated()
@@ -212,40 +354,42 @@ class AmazonAdapter(MarketplaceAdapter):
             "OrderStatuses": ["Pending", "Unshipped", "PartiallyShipped", "Shipped"]
         }
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=headers, params=params)
-            response.raise_for_status()
-            
-            data = response.json()
-            orders = data.get("payload", {}).get("Orders", [])
-            
-            # Convert to standardized format
-            order_data_list = []
-            for order in orders:
-                order_items = await self._get_order_items(order["AmazonOrderId"])
-                order_data = self._convert_amazon_order(order, order_items)
-                order_data_list.append(order_data)
-            
-            return order_data_list
+        response = await self._send("GET", url, headers=headers, params=params)
+        response.raise_for_status()
+        
+        data = response.json()
+        orders = data.get("payload", {}).get("Orders", [])
+        
+        # Convert to standardized format
+        order_data_list = []
+        for order in orders:
+            order_items = await self._get_order_items(order["AmazonOrderId"])
+            order_data = self._convert_amazon_order(order, order_items)
+            order_data_list.append(order_data)
+        
+        return order_data_list
     
     async def get_order(self, external_order_id: str) -> Optional[OrderData]:
         """Get specific Amazon order"""
         await self._ensure_authenticated()
-        
+        return await self._read(
+            "get_order", external_order_id, lambda: self._fetch_order(external_order_id), model=OrderData
+        )
+    
+    async def _fetch_order(self, external_order_id: str) -> Optional[OrderData]:
         url = f"{self.BASE_URL}/orders/v0/orders/{external_order_id}"
         headers = await self._get_headers()
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=headers)
-            
-            if response.status_code == 404:
-                return None
-            
-            response.raise_for_status()
-            order = response.json().get("payload")
-            
-            order_items = await self._get_order_items(external_order_id)
-            return self._convert_amazon_order(order, order_items)
+        response = await self._send("GET", url, headers=headers)
+        
+        if response.status_code == 404:
+            return None
+        
+        response.raise_for_status()
+        order = response.json().get("payload")
+        
+        order_items = await self._get_order_items(external_order_id)
+        return self._convert_amazon_order(order, order_items)
     
     async def update_order_status(self, external_order_id: str, status: str, tracking_number: Optional[str] = None) -> bool:
         """Update Amazon order status"""
@@ -289,6 +433,25 @@ class AmazonAdapter(MarketplaceAdapter):
             return await self.authenticate()
         return True
     
+    async def _send(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """One SP-API request through the marketplace circuit breaker.
+        
+        429 and 5xx responses are returned as before but count as failures;
+        while the circuit is open this raises CircuitOpenException at once.
+        """
+        self.breaker.allow()
+        try:
+            async with httpx.AsyncClient(timeout=settings.MARKETPLACE_REQUEST_TIMEOUT_SECONDS) as client:
+                response = await client.request(method, url, **kwargs)
+        except (asyncio.CancelledError, GeneratorExit):
+            self.breaker.cancel()
+            raise
+        except Exception as e:
+            self.breaker.record(not is_transient(e))
+            raise
+        self.breaker.record(response.status_code != 429 and response.status_code < 500)
+        return response
+    
     async def _get_headers(self) -> Dict[str, str]:
         """Get request headers with authentication"""
         return {
@@ -301,17 +464,28 @@ class AmazonAdapter(MarketplaceAdapter):
         """Convert standardized listing data to Amazon format"""
         return {
             "productType": "PRODUCT",  # This would be category-specific
-            "attributes": {
-                "item_name": [{"value": listing_data.title, "language_tag": "de_DE"}],
-                "description": [{"value": listing_data.description, "language_tag": "de_DE"}],
-                "bullet_point": [{"value": bp, "language_tag": "de_DE"} for bp in listing_data.bullet_points],
-                "main_image_url": listing_data.images[0] if listing_data.images else None,
-                "other_image_url": listing_data.images[1:] if len(listing_data.images) > 1 else [],
-                "generic_keyword": listing_data.keywords,
-                "list_price": [{"value": listing_data.price, "currency": listing_data.currency}]
-            }
+            "attributes": self._amazon_attributes(listing_data)
+        }
+    
+    def _amazon_attributes(self, listing_data: ListingData) -> Dict[str, Any]:
+        return {
+            "item_name": [{"value": listing_data.title, "language_tag": "de_DE"}],
+            "description": [{"value": listing_data.description, "language_tag": "de_DE"}],
+            "bullet_point": [{"value": bp, "language_tag": "de_DE"} for bp in listing_data.bullet_points],
+            "main_image_url": listing_data.images[0] if listing_data.images else None,
+            "other_image_url": listing_data.images[1:] if len(listing_data.images) > 1 else [],
+            "generic_keyword": listing_data.keywords,
+            "purchasable_offer": self._purchasable_offer(listing_data.price, listing_data.currency)
         }
     
+    def _purchasable_offer(self, price: float, currency: str) -> List[Dict[str, Any]]:
+        """Selling price attribute; the listing and price feed paths both set it"""
+        return [{
+            "marketplace_id": self.marketplace_id,
+            "currency": currency,
+            "our_price": [{"schedule": [{"value_with_tax": price}]}]
+        }]
+    
     def _convert_amazon_order(self, amazon_order: Dict[str, Any], order_items: List[Dict[str, Any]]) -> OrderData:
         """Convert Amazon order format to standardized format"""
         return OrderData(
@@ -331,12 +505,11 @@ class AmazonAdapter(MarketplaceAdapter):
         url = f"{self.BASE_URL}/orders/v0/orders/{order_id}/orderItems"
         headers = await self._get_headers()
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=headers)
-            response.raise_for_status()
-            
-            data = response.json()
-            return data.get("payload", {}).get("OrderItems", [])
+        response = await self._send("GET", url, headers=headers)
+        response.raise_for_status()
+        
+        data = response.json()
+        return data.get("payload", {}).get("OrderItems", [])
     
     async def _confirm_shipment(self, order_id: str, tracking_number: str) -> bool:
         """Confirm shipment for Amazon order"""
@@ -351,9 +524,8 @@ class AmazonAdapter(MarketplaceAdapter):
             }
         }
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, headers=headers, json=payload)
-            return response.status_code == 200
+        response = await self._send("POST", url, headers=headers, json=payload)
+        return response.status_code == 200
 
 
 # Register the adapter
@@ -1,11 +1,23 @@
 """Base marketplace adapter interface"""
 
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Callable, Awaitable, Type
 from datetime import datetime
 from pydantic import BaseModel
+import asyncio
+import hashlib
+import structlog
+
+import orjson
 
 from app.models.database import MarketplaceType, Listing, Order
+from app.core.config import settings
+from app.core.exceptions import CircuitOpenException
+from app.core.lazy import import_string
+from app.core.redis import get_redis
+from app.core.resilience import CircuitBreaker, circuit_breaker, hedged, is_transient
+
+logger = structlog.get_logger()
 
 
 class MarketplaceCredentials(BaseModel):
@@ -26,6 +38,13 @@ class ListingData(BaseModel):
     category: str
     attributes: Dict[str, Any]
     compliance_flags: List[str] = []
+    
+    def field_hashes(self) -> Dict[str, str]:
+        """Content hash per field; compared with Listing.synced_field_hashes to find what changed"""
+        return {
+            name: hashlib.md5(orjson.dumps(value, option=orjson.OPT_SORT_KEYS)).hexdigest()
+            for name, value in self.model_dump(mode="json").items()
+        }
 
 
 class InventoryUpdate(BaseModel):
@@ -35,6 +54,13 @@ class InventoryUpdate(BaseModel):
     location: Optional[str] = None
 
 
+class PriceUpdate(BaseModel):
+    """Price update data"""
+    sku: str
+    price: float
+    currency: str = "EUR"
+
+
 class OrderData(BaseModel):
     """Standardized order data"""
     external_order_id: str
@@ -77,6 +103,11 @@ class MarketplaceAdapter(ABC):
         self.marketplace = credentials.marketplace
         self._client = None
     
+    @property
+    def breaker(self) -> CircuitBreaker:
+        """Circuit breaker of this marketplace's API, shared by all adapter instances"""
+        return circuit_breaker(f"marketplace:{self.marketplace.value}")
+    
     @abstractmethod
     async def authenticate(self) -> bool:
         """Authenticate with the marketplace API"""
@@ -94,8 +125,18 @@ class MarketplaceAdapter(ABC):
         pass
     
     @abstractmethod
-    async def update_listing(self, external_id: str, listing_data: ListingData) -> Dict[str, Any]:
-        """Update an existing listing"""
+    async def update_listing(
+        self,
+        external_id: str,
+        listing_data: ListingData,
+        synced_hashes: Optional[Dict[str, str]] = None
+    ) -> Dict[str, Any]:
+        """Update an existing listing.
+        
+        synced_hashes are the field hashes of the last successful sync;
+        adapters that support partial updates send only the changed fields.
+        The result carries the new hashes under "field_hashes".
+        """
         pass
     
     @abstractmethod
@@ -168,6 +209,114 @@ class MarketplaceAdapter(ABC):
         """Get listing performance metrics"""
         pass
     
+    # Bulk operations
+    # Default implementations fan out to the single-item calls with bounded
+    # concurrency; adapters with a native feed/batch API should override them.
+    # Keys are caller-chosen references and are echoed back in the result.
+    bulk_concurrency: int = 8
+    
+    # Optional capabilities; callers check them before relying on the method.
+    # supports_price_feed: bulk_update_prices(List[PriceUpdate]) returning
+    # {"success": [sku, ...], "errors": [{"sku": ..., "error": ...}],
+    #  "feeds": [{"feed_id": ..., "skus": [sku, ...]}]} for submitted feeds,
+    # and price_feed_result(feed_id) with their processing outcome
+    supports_price_feed: bool = False
+    
+    async def bulk_publish_listings(self, listings: Dict[str, ListingData]) -> Dict[str, Any]:
+        """Publish several listings"""
+        return await self._bulk_call(self.publish_listing, {k: (v,) for k, v in listings.items()})
+    
+    async def bulk_update_listings(self, updates: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """Update several listings; values are {"external_id": ..., "listing_data": ..., "synced_hashes": ...}"""
+        return await self._bulk_call(
+            self.update_listing,
+            {k: (v["external_id"], v["listing_data"], v.get("synced_hashes")) for k, v in updates.items()}
+        )
+    
+    async def bulk_delete_listings(self, external_ids: Dict[str, str]) -> Dict[str, Any]:
+        """Delete several listings"""
+        return await self._bulk_call(self.delete_listing, {k: (v,) for k, v in external_ids.items()})
+    
+    async def bulk_get_listings(self, external_ids: Dict[str, str]) -> Dict[str, Any]:
+        """Fetch several listings"""
+        return await self._bulk_call(self.get_listing, {k: (v,) for k, v in external_ids.items()})
+    
+    async def _bulk_call(
+        self,
+        func: Callable[..., Awaitable[Any]],
+        calls: Dict[str, tuple]
+    ) -> Dict[str, Any]:
+        """Run func for every argument tuple, at most bulk_concurrency at a time"""
+        results = {"success": {}, "errors": {}}
+        semaphore = asyncio.Semaphore(self.bulk_concurrency)
+        
+        async def run(key: str, args: tuple):
+            async with semaphore:
+                try:
+                    results["success"][key] = await func(*args)
+                except Exception as e:
+                    results["errors"][key] = str(e)
+        
+        await asyncio.gather(*(run(key, args) for key, args in calls.items()))
+        return results
+    
+    # Resilient reads
+    # Idempotent reads (get_listing, get_order, get_inventory) go through
+    # _read: a second attempt is sent once the first outlives the
+    # operation's p95 latency, and the last good result is kept in Redis and
+    # served (marked with "_stale") while the marketplace's circuit is open
+    # or the call fails transiently.
+    async def _read(
+        self,
+        operation: str,
+        key: str,
+        fetch: Callable[[], Awaitable[Any]],
+        model: Optional[Type[BaseModel]] = None
+    ) -> Any:
+        """Hedged read with a stale fallback; model rebuilds pydantic results from the fallback"""
+        cache_key = f"marketplace_read:{self.marketplace.value}:{operation}:{key}"
+        try:
+            result = await hedged(f"{self.marketplace.value}:{operation}", fetch)
+        except Exception as e:
+            if not isinstance(e, CircuitOpenException) and not is_transient(e):
+                raise
+            stale = await self._stale_read(cache_key, model)
+            if stale is None:
+                raise
+            logger.warning(
+                "Serving stale marketplace read",
+                marketplace=self.marketplace.value,
+                operation=operation,
+                key=key,
+                error=str(e)
+            )
+            return stale
+        
+        if result is not None:
+            try:
+                value = result.model_dump(mode="json") if isinstance(result, BaseModel) else result
+                await get_redis().set(
+                    cache_key, orjson.dumps(value), ex=settings.MARKETPLACE_STALE_READ_TTL_SECONDS
+                )
+            except Exception as e:
+                logger.warning("Marketplace read not cached", operation=operation, error=str(e))
+        return result
+    
+    async def _stale_read(self, cache_key: str, model: Optional[Type[BaseModel]]) -> Any:
+        try:
+            raw = await get_redis().get(cache_key)
+        except Exception:
+            return None
+        if raw is None:
+            return None
+        value = orjson.loads(raw)
+        if model is not None:
+            # Pydantic results carry no marker; callers needing freshness check the breaker
+            return model.model_validate(value)
+        if isinstance(value, dict):
+            value["_stale"] = True
+        return value
+    
     # Utility methods
     def get_marketplace_specific_attributes(self, category: str) -> Dict[str, Any]:
         """Get marketplace-specific required attributes for a category"""
@@ -203,6 +352,12 @@ class MarketplaceAdapterFactory:
     
     _adapters = {}
     
+    # Adapter modules are imported on first use, so SDKs for marketplaces
+    # that are never called are never loaded
+    _adapter_modules = {
+        MarketplaceType.AMAZON: "app.adapters.amazon",
+    }
+    
     @classmethod
     def register_adapter(cls, marketplace: MarketplaceType, adapter_class):
         """Register an adapter for a marketplace"""
@@ -211,13 +366,42 @@ class MarketplaceAdapterFactory:
     @classmethod
     def create_adapter(cls, credentials: MarketplaceCredentials) -> MarketplaceAdapter:
         """Create an adapter instance for the specified marketplace"""
+        if credentials.marketplace not in cls._adapters and credentials.marketplace in cls._adapter_modules:
+            # Importing the module registers the adapter
+            import_string(cls._adapter_modules[credentials.marketplace])
+        
         adapter_class = cls._adapters.get(credentials.marketplace)
         if not adapter_class:
             raise ValueError(f"No adapter registered for marketplace: {credentials.marketplace}")
         
         return adapter_class(credentials)
     
+    @classmethod
+    def create_from_settings(cls, marketplace: MarketplaceType) -> MarketplaceAdapter:
+        """Create an adapter with the credentials configured in settings"""
+        configured = {
+            MarketplaceType.AMAZON: {
+                "client_id": settings.AMAZON_SP_API_CLIENT_ID,
+                "client_secret": settings.AMAZON_SP_API_CLIENT_SECRET,
+                "refresh_token": settings.AMAZON_SP_API_REFRESH_TOKEN,
+                "marketplace_id": settings.AMAZON_MARKETPLACE_ID,
+            },
+            MarketplaceType.EBAY: {
+                "app_id": settings.EBAY_APP_ID,
+                "dev_id": settings.EBAY_DEV_ID,
+                "cert_id": settings.EBAY_CERT_ID,
+                "user_token": settings.EBAY_USER_TOKEN,
+            },
+            MarketplaceType.OTTO: {"api_key": settings.OTTO_API_KEY},
+            MarketplaceType.KAUFLAND: {"api_key": settings.KAUFLAND_API_KEY},
+            MarketplaceType.CDISCOUNT: {"api_key": settings.CDISCOUNT_API_KEY},
+        }
+        return cls.create_adapter(MarketplaceCredentials(
+            marketplace=marketplace,
+            credentials=configured.get(marketplace, {})
+        ))
+    
     @classmethod
     def get_supported_marketplaces(cls) -> List[MarketplaceType]:
         """Get list of supported marketplaces"""
-        return list(cls._adapters.keys())
\ No newline at end of file
+        return list(set(cls._adapters) | set(cls._adapter_modules))
\ No newline at end of file
@@ -8,6 +8,11 @@ from enum import Enum
 import asyncio
 import structlog
 
+from app.agents.model_router import model_router
+from app.services.llm_limiter import llm_limiter, current_priority
+from app.core.lazy import import_string
+from app.core.resilience import resilience_stats
+
 logger = structlog.get_logger()
 
 
@@ -267,6 +272,9 @@ class BaseAIAgent(ABC):
             
             self.logger.info("Executing task", task_id=task.task_id, task_type=task.task_type)
             
+            # LLM calls made by this task queue at the task's priority
+            current_priority.set(task.priority.value)
+            
             # Execute with timeout
             try:
                 completed_task = await asyncio.wait_for(
@@ -340,6 +348,20 @@ class BaseAIAgent(ABC):
         self.current_tasks.pop(task_id, None)
 
 
+# Agent factories as "module:function" paths. Modules are imported only for
+# agents listed in settings.ENABLED_AGENTS, so the SDKs behind disabled
+# agents are never loaded.
+AGENT_FACTORIES = {
+    "listing_generator": "app.agents.listing_generator:create_listing_generator_agent",
+    "inventory_forecaster": "app.agents.inventory_forecaster:create_inventory_forecaster_agent",
+    "pricing_agent": "app.agents.pricing_agent:create_pricing_agent",
+    "review_miner": "app.agents.review_miner:create_review_miner_agent",
+    "translator": "app.agents.translator:create_translator_agent",
+    "image_optimizer": "app.agents.image_optimizer:create_image_optimizer_agent",
+    "sales_chat": "app.agents.sales_chat:create_sales_chat_agent",
+}
+
+
 class AgentManager:
     """Manager for all AI agents"""
     
@@ -385,6 +407,28 @@ class AgentManager:
             self.logger.error("Failed to unregister agent", agent_id=agent_id, error=str(e))
             return False
     
+    async def load_agents(self, agent_ids: List[str]) -> Dict[str, bool]:
+        """Import, create and start the given agents concurrently"""
+        
+        async def load(agent_id: str) -> bool:
+            factory_path = AGENT_FACTORIES.get(agent_id)
+            if not factory_path:
+                self.logger.warning("Unknown agent in configuration", agent_id=agent_id)
+                return False
+            
+            try:
+                factory = import_string(factory_path)
+                agent = factory(agent_id)
+            except Exception as e:
+                self.logger.error("Failed to load agent", agent_id=agent_id, error=str(e))
+                return False
+            
+            await self.register_agent(agent)
+            return agent.status != AgentStatus.ERROR
+        
+        results = await asyncio.gather(*(load(agent_id) for agent_id in agent_ids))
+        return dict(zip(agent_ids, results))
+    
     async def get_agent(self, agent_id: str) -> Optional[BaseAIAgent]:
         """Get an agent by ID"""
         return self.agents.get(agent_id)
@@ -427,7 +471,10 @@ class AgentManager:
                     "metrics": agent.metrics.dict()
                 }
                 for agent_id, agent in self.agents.items()
-            }
+            },
+            "model_routing": model_router.get_stats(),
+            "llm_limiter": llm_limiter.get_stats(),
+            "resilience": resilience_stats()
         }
 
 
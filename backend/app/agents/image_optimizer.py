@@ -0,0 +1,144 @@
+"""Image Optimization AI Agent"""
+
+from typing import Dict, List, Any
+from datetime import datetime
+import uuid
+
+import httpx
+
+from app.agents.base import BaseAIAgent, AgentTask, AgentConfig, TaskStatus
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.database import Product
+from app.services.image_index import image_index
+from app.services.image_pipeline import image_pipeline
+from app.services.storage import get_storage
+
+
+class ImageOptimizerAgent(BaseAIAgent):
+    """AI Agent that moves external product images through the image pipeline"""
+    
+    async def initialize(self) -> bool:
+        """Initialize the image optimizer agent"""
+        self.logger.info("Image optimizer agent initialized successfully")
+        return True
+    
+    async def execute_task(self, task: AgentTask) -> AgentTask:
+        """Download a product's external images, process them and replace the URLs.
+
+        With {"scan_duplicates": true} instead of a product_id, fingerprints
+        the catalog's images and reports near-duplicate groups.
+        """
+        try:
+            if task.input_data.get("scan_duplicates"):
+                task.progress_percentage = 10
+                task.progress_message = "Fingerprinting catalog images"
+                task.result = await image_index.scan_catalog(
+                    image_pipeline.fingerprint, task.input_data.get("limit")
+                )
+                task.status = TaskStatus.COMPLETED
+                task.completed_at = datetime.now()
+                task.progress_percentage = 100
+                task.progress_message = "Image duplicate scan completed"
+                return task
+            
+            product_id = uuid.UUID(str(task.input_data["product_id"]))
+            own_prefix = get_storage().url("images/")
+            
+            async with AsyncSessionLocal() as session:
+                product = await session.get(Product, product_id)
+                if not product:
+                    raise ValueError(f"Product not found: {product_id}")
+                
+                urls = list(product.images or [])
+                external = [url for url in urls if not url.startswith(own_prefix)]
+                
+                task.progress_percentage = 10
+                task.progress_message = f"Downloading {len(external)} images"
+                
+                replaced, failed = {}, {}
+                async with httpx.AsyncClient(timeout=30, follow_redirects=True) as client:
+                    for url in external:
+                        try:
+                            response = await client.get(url)
+                            response.raise_for_status()
+                            replaced[url] = (await image_pipeline.ingest(response.content, product_id))["url"]
+                        except Exception as e:
+                            failed[url] = str(e)
+                
+                # Replacing may collapse duplicates that suppliers sent under different URLs
+                product.images = list(dict.fromkeys(replaced.get(url, url) for url in urls))
+                await session.commit()
+            
+            task.result = {
+                "product_id": str(product_id),
+                "processed": len(replaced),
+                "failed": failed,
+                "images": product.images
+            }
+            task.status = TaskStatus.COMPLETED
+            task.completed_at = datetime.now()
+            task.progress_percentage = 100
+            task.progress_message = "Image optimization completed"
+            
+            self.logger.info(
+                "Images optimized",
+                task_id=task.task_id,
+                processed=len(replaced),
+                failed=len(failed)
+            )
+            
+            return task
+            
+        except Exception as e:
+            task.status = TaskStatus.FAILED
+            task.error_message = str(e)
+            task.completed_at = datetime.now()
+            
+            self.logger.error(
+                "Image optimization failed",
+                task_id=task.task_id,
+                error=str(e)
+            )
+            
+            return task
+    
+    async def validate_input(self, input_data: Dict[str, Any]) -> List[str]:
+        """Validate input data for image optimization"""
+        errors = []
+        
+        if input_data.get("scan_duplicates"):
+            return errors
+        
+        try:
+            uuid.UUID(str(input_data.get("product_id")))
+        except ValueError:
+            errors.append("A valid product_id is required")
+        
+        return errors
+
+
+# Factory function to create image optimizer agent
+def create_image_optimizer_agent(agent_id: str = "image_optimizer") -> ImageOptimizerAgent:
+    """Create an image optimizer agent with default configuration"""
+    
+    config = AgentConfig(
+        agent_id=agent_id,
+        agent_type="image_optimizer",
+        name="Image Optimization Agent",
+        description="Creates marketplace image variants, strips metadata and dedupes product images",
+        enabled=True,
+        automation_level=100,
+        confidence_threshold=0,
+        schedule_enabled=False,
+        max_concurrent_tasks=4,
+        task_timeout_seconds=600,
+        retry_attempts=2,
+        settings={
+            "max_image_bytes": settings.IMAGE_MAX_BYTES,
+            "phash_max_distance": settings.IMAGE_PHASH_MAX_DISTANCE,
+            "dhash_max_distance": settings.IMAGE_DHASH_MAX_DISTANCE
+        }
+    )
+    
+    return ImageOptimizerAgent(config)
@@ -0,0 +1,96 @@
+"""Inventory Forecasting AI Agent"""
+
+from typing import Dict, List, Any
+from datetime import datetime
+
+from app.agents.base import BaseAIAgent, AgentTask, AgentConfig, TaskStatus
+from app.core.config import settings
+from app.services.forecasting import DemandForecastService
+
+
+class InventoryForecasterAgent(BaseAIAgent):
+    """AI Agent that forecasts demand for every product and suggests reorders"""
+    
+    def __init__(self, config: AgentConfig):
+        super().__init__(config)
+        self.forecast_service = DemandForecastService()
+    
+    async def initialize(self) -> bool:
+        """Initialize the inventory forecaster agent"""
+        self.logger.info("Inventory forecaster agent initialized successfully")
+        return True
+    
+    async def execute_task(self, task: AgentTask) -> AgentTask:
+        """Execute a forecasting run over all products"""
+        try:
+            input_data = task.input_data
+            history_days = input_data.get("history_days", self.config.settings.get("history_days"))
+            write = input_data.get("write", True)
+            
+            task.progress_percentage = 10
+            task.progress_message = "Forecasting demand"
+            
+            summary = await self.forecast_service.run(history_days=history_days, write=write)
+            
+            task.result = {"summary": summary, "written": write}
+            task.status = TaskStatus.COMPLETED
+            task.completed_at = datetime.now()
+            task.progress_percentage = 100
+            task.progress_message = "Demand forecast completed"
+            
+            self.logger.info("Demand forecast completed", task_id=task.task_id, **summary)
+            
+            return task
+            
+        except Exception as e:
+            task.status = TaskStatus.FAILED
+            task.error_message = str(e)
+            task.completed_at = datetime.now()
+            
+            self.logger.error(
+                "Demand forecast failed",
+                task_id=task.task_id,
+                error=str(e)
+            )
+            
+            return task
+    
+    async def validate_input(self, input_data: Dict[str, Any]) -> List[str]:
+        """Validate input data for a forecasting run"""
+        errors = []
+        
+        history_days = input_data.get("history_days")
+        if history_days is not None and (not isinstance(history_days, int) or not 28 <= history_days <= 1095):
+            errors.append("history_days must be an integer between 28 and 1095")
+        
+        if not isinstance(input_data.get("write", True), bool):
+            errors.append("write must be a boolean")
+        
+        return errors
+
+
+# Factory function to create inventory forecaster agent
+def create_inventory_forecaster_agent(agent_id: str = "inventory_forecaster") -> InventoryForecasterAgent:
+    """Create an inventory forecaster agent with default configuration"""
+    
+    config = AgentConfig(
+        agent_id=agent_id,
+        agent_type="inventory_forecaster",
+        name="Inventory Forecasting Agent",
+        description="Forecasts daily demand per product and suggests reorder points and quantities",
+        enabled=True,
+        automation_level=90,
+        confidence_threshold=70,
+        schedule_enabled=True,
+        cron_expression="0 3 * * *",
+        max_concurrent_tasks=1,
+        task_timeout_seconds=900,
+        retry_attempts=1,
+        settings={
+            "history_days": settings.FORECAST_HISTORY_DAYS,
+            "service_level": settings.FORECAST_SERVICE_LEVEL,
+            "review_days": settings.FORECAST_REVIEW_DAYS
+        }
+    )
+    
+    return InventoryForecasterAgent(config)
@@ -1,15 +1,20 @@
 """Listing Generation AI Agent"""
 
-import openai
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 import json
 import asyncio
 from datetime import datetime
 
 from app.agents.base import BaseAIAgent, AgentTask, AgentConfig, TaskStatus
 from app.core.config import settings
+from app.core.lazy import lazy_import
 from app.core.exceptions import AIAgentException, ContentGenerationException
 from app.models.database import MarketplaceType
+from app.agents.model_router import model_router
+from app.services import llm
+from app.services.semantic_cache import content_cache
+
+openai = lazy_import("openai")
 
 
 class ListingGeneratorAgent(BaseAIAgent):
@@ -84,27 +89,20 @@ class ListingGeneratorAgent(BaseAIAgent):
             task.progress_percentage = 10
             task.progress_message = "Analyzing product data"
             
-            # Generate listing content
-            listing_content = await self._generate_listing_content(
-                product_data, marketplace, language, target_audience
-            )
-            
-            task.progress_percentage = 70
-            task.progress_message = "Validating generated content"
-            
-            # Validate against marketplace guidelines
-            validation_results = await self._validate_listing_content(
-                listing_content, marketplace
+            # Generate, validate and score; small-tier results below the
+            # confidence threshold are regenerated on the large tier
+            listing_content, validation_results, confidence_score, routing = await self._generate_listing_content(
+                product_data,
+                marketplace,
+                language,
+                target_audience,
+                task_type=task.task_type,
+                quality=input_data.get("quality", "standard")
             )
             
             task.progress_percentage = 90
             task.progress_message = "Finalizing listing"
             
-            # Calculate confidence score
-            confidence_score = self._calculate_confidence_score(
-                listing_content, validation_results
-            )
-            
             # Prepare result
             result = {
                 "listing_content": listing_content,
@@ -112,7 +110,8 @@ class ListingGeneratorAgent(BaseAIAgent):
                 "marketplace": marketplace.value,
                 "language": language,
                 "confidence_score": confidence_score,
-                "auto_execute": self.should_auto_execute(confidence_score)
+                "auto_execute": self.should_auto_execute(confidence_score),
+                "model": routing
             }
             
             task.result = result
@@ -126,7 +125,9 @@ class ListingGeneratorAgent(BaseAIAgent):
                 "Listing generated successfully",
                 task_id=task.task_id,
                 marketplace=marketplace.value,
-                confidence=confidence_score
+                confidence=confidence_score,
+                tier=routing.get("tier"),
+                escalated=routing.get("escalated", False)
             )
             
             return task
@@ -171,6 +172,9 @@ class ListingGeneratorAgent(BaseAIAgent):
         if language not in settings.SUPPORTED_LANGUAGES:
             errors.append(f"Unsupported language: {language}")
         
+        if input_data.get("quality", "standard") not in ("standard", "high"):
+            errors.append("quality must be standard or high")
+        
         return errors
     
     async def _generate_listing_content(
@@ -178,9 +182,11 @@ class ListingGeneratorAgent(BaseAIAgent):
         product_data: Dict[str, Any], 
         marketplace: MarketplaceType,
         language: str,
-        target_audience: str
-    ) -> Dict[str, Any]:
-        """Generate listing content using OpenAI"""
+        target_audience: str,
+        task_type: str = "generate_listing",
+        quality: str = "standard"
+    ) -> Tuple[Dict[str, Any], Dict[str, Any], float, Dict[str, Any]]:
+        """Generate listing content; returns content, validation, confidence and model routing"""
         
         guidelines = self.marketplace_guidelines.get(marketplace, {})
         
@@ -189,10 +195,34 @@ class ListingGeneratorAgent(BaseAIAgent):
             product_data, marketplace, language, target_audience, guidelines
         )
         
+        # Regenerations for an unchanged product are served from the semantic cache;
+        # only products with an id can be invalidated when they change
+        product_id = product_data.get("id")
+        scope = f"{marketplace.value}:{language}:{target_audience}:{task_type}"
+        embedding = None
+        if product_id:
+            try:
+                embedding = (await llm.embed([prompt]))[0]
+                cached = await content_cache.lookup(embedding, scope, [product_id])
+                if cached is not None:
+                    validation_results = await self._validate_listing_content(cached, marketplace)
+                    confidence_score = self._calculate_confidence_score(cached, validation_results)
+                    return cached, validation_results, confidence_score, {"cached": True}
+            except Exception as e:
+                self.logger.warning("Content cache unavailable", error=str(e))
+        
+        evaluated = {}
+        
+        async def score(content: str) -> float:
+            listing_content = self._parse_generated_content(content, guidelines)
+            validation_results = await self._validate_listing_content(listing_content, marketplace)
+            confidence_score = self._calculate_confidence_score(listing_content, validation_results)
+            evaluated[content] = (listing_content, validation_results, confidence_score)
+            return confidence_score
+        
         try:
-            response = await self.openai_client.chat.completions.create(
-                model=settings.OPENAI_MODEL,
-                messages=[
+            result = await model_router.generate(
+                [
                     {
                         "role": "system",
                         "content": "You are an expert e-commerce copywriter specializing in marketplace listings. Generate compelling, compliant, and SEO-optimized product listings."
@@ -202,18 +232,25 @@ class ListingGeneratorAgent(BaseAIAgent):
                         "content": prompt
                     }
                 ],
-                temperature=0.7,
-                max_tokens=2000
+                agent=self.config.agent_id,
+                task_type=task_type,
+                score=score,
+                threshold=self.config.confidence_threshold,
+                quality=quality,
+                temperature=self.config.settings.get("temperature", 0.7)
             )
-            
-            # Parse the response
-            content = response.choices[0].message.content
-            listing_content = self._parse_generated_content(content, guidelines)
-            
-            return listing_content
-            
         except Exception as e:
             raise ContentGenerationException(f"Failed to generate listing content: {str(e)}")
+        
+        listing_content, validation_results, confidence_score = evaluated[result["content"]]
+        if embedding is not None and confidence_score >= self.config.confidence_threshold:
+            await content_cache.store(embedding, listing_content, scope, [product_id])
+        
+        routing = {
+            key: result[key]
+            for key in ("tier", "model", "escalated", "degraded", "latency_seconds", "cost_usd", "prompt_tokens", "completion_tokens")
+        }
+        return listing_content, validation_results, confidence_score, routing
     
     def _create_generation_prompt(
         self,
@@ -472,9 +509,9 @@ def create_listing_generator_agent(agent_id: str = "listing_generator") -> Listi
         task_timeout_seconds=300,
         retry_attempts=2,
         settings={
-            "model": settings.OPENAI_MODEL,
+            "model": settings.MODEL_LARGE or settings.OPENAI_MODEL,
+            "small_model": settings.MODEL_SMALL,
             "temperature": 0.7,
-            "max_tokens": 2000,
             "supported_marketplaces": ["amazon", "ebay", "otto", "kaufland"],
             "supported_languages": ["en", "de", "zh"]
         }
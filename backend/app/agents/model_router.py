@@ -0,0 +1,197 @@
+"""Tiered model routing for agent LLM calls"""
+
+from typing import Dict, List, Optional, Any, Callable, Awaitable
+from collections import deque
+import time
+import structlog
+
+from prometheus_client import Counter, Histogram
+
+from app.core.config import settings
+from app.core.exceptions import CircuitOpenException
+from app.services import llm
+
+logger = structlog.get_logger()
+
+SMALL = "small"
+LARGE = "large"
+
+# Task types the small tier is tried on first, with their output budget.
+# Unknown task types have no quality check to escalate on and go to the
+# large tier.
+TASK_PROFILES: Dict[str, Dict[str, Any]] = {
+    "generate_listing": {"tier": SMALL, "max_tokens": 2000},
+    "compliance_review": {"tier": LARGE, "max_tokens": 2000},
+}
+DEFAULT_PROFILE = {"tier": LARGE, "max_tokens": 2000}
+
+REQUEST_SECONDS = Histogram(
+    "llm_request_seconds",
+    "LLM completion latency by model tier",
+    ["tier"],
+    buckets=(0.5, 1, 2, 4, 8, 15, 30, 60, 120)
+)
+TOKENS = Counter("llm_tokens_total", "LLM tokens by model tier", ["tier", "kind"])  # prompt, completion
+COST = Counter("llm_cost_usd_total", "Estimated LLM spend by model tier", ["tier"])
+ESCALATIONS = Counter("llm_escalations_total", "Small-tier results redone on the large tier", ["agent"])
+
+
+class ModelRouter:
+    """Chooses the model tier for each agent LLM call.
+
+    The tier follows the task type (TASK_PROFILES), the prompt size
+    (prompts over MODEL_SMALL_MAX_INPUT_CHARS go to the large tier) and
+    the required quality ("high" always gets the large tier). A
+    small-tier result scoring below the agent's confidence threshold is
+    regenerated on the large tier. When a tier's circuit breaker is open
+    the other tier answers instead and the result is marked degraded.
+    Latency, tokens and estimated cost are recorded per tier, both as
+    Prometheus metrics and in get_stats().
+    """
+
+    def __init__(self):
+        self._latencies: Dict[str, deque] = {SMALL: deque(maxlen=1000), LARGE: deque(maxlen=1000)}
+        self._totals: Dict[str, Dict[str, float]] = {
+            tier: {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0}
+            for tier in (SMALL, LARGE)
+        }
+        self._routed = {"calls": 0, "escalations": 0}
+        self.logger = logger.bind(component="model_router")
+
+    @staticmethod
+    def model_for(tier: str) -> str:
+        if tier == SMALL:
+            return settings.MODEL_SMALL
+        return settings.MODEL_LARGE or settings.OPENAI_MODEL
+
+    @staticmethod
+    def _cost(tier: str, prompt_tokens: int, completion_tokens: int) -> float:
+        if tier == SMALL:
+            rates = settings.MODEL_SMALL_COST_PER_1K_INPUT, settings.MODEL_SMALL_COST_PER_1K_OUTPUT
+        else:
+            rates = settings.MODEL_LARGE_COST_PER_1K_INPUT, settings.MODEL_LARGE_COST_PER_1K_OUTPUT
+        return (prompt_tokens * rates[0] + completion_tokens * rates[1]) / 1000
+
+    def profile(self, task_type: str) -> Dict[str, Any]:
+        return TASK_PROFILES.get(task_type, DEFAULT_PROFILE)
+
+    def route(self, task_type: str, input_chars: int, quality: str = "standard") -> str:
+        if not settings.MODEL_ROUTING_ENABLED or quality == "high":
+            return LARGE
+        if input_chars > settings.MODEL_SMALL_MAX_INPUT_CHARS:
+            # Long inputs are where small models lose facts
+            return LARGE
+        return self.profile(task_type)["tier"]
+
+    async def complete(
+        self,
+        messages: List[Dict[str, str]],
+        tier: str,
+        max_tokens: int,
+        temperature: float = 0.7
+    ) -> Dict[str, Any]:
+        """One completion on a tier, with its latency and cost recorded"""
+        start = time.perf_counter()
+        result = await llm.chat_completion(messages, self.model_for(tier), max_tokens, temperature)
+        latency = time.perf_counter() - start
+        cost = self._cost(tier, result["prompt_tokens"], result["completion_tokens"])
+
+        REQUEST_SECONDS.labels(tier).observe(latency)
+        TOKENS.labels(tier, "prompt").inc(result["prompt_tokens"])
+        TOKENS.labels(tier, "completion").inc(result["completion_tokens"])
+        COST.labels(tier).inc(cost)
+        self._latencies[tier].append(latency)
+        totals = self._totals[tier]
+        totals["calls"] += 1
+        totals["prompt_tokens"] += result["prompt_tokens"]
+        totals["completion_tokens"] += result["completion_tokens"]
+        totals["cost_usd"] += cost
+
+        return {**result, "tier": tier, "latency_seconds": round(latency, 3), "cost_usd": round(cost, 6)}
+
+    async def generate(
+        self,
+        messages: List[Dict[str, str]],
+        *,
+        agent: str,
+        task_type: str,
+        score: Callable[[str], Awaitable[float]],
+        threshold: float,
+        quality: str = "standard",
+        max_tokens: Optional[int] = None,
+        temperature: float = 0.7
+    ) -> Dict[str, Any]:
+        """Complete on the routed tier, escalating once if the result scores below threshold"""
+        tier = self.route(task_type, sum(len(m["content"]) for m in messages), quality)
+        max_tokens = max_tokens or self.profile(task_type)["max_tokens"]
+        self._routed["calls"] += 1
+
+        try:
+            result = await self.complete(messages, tier, max_tokens, temperature)
+            result["degraded"] = False
+        except CircuitOpenException as e:
+            # The tier's endpoint is failing fast: the other tier is better than no result
+            other = LARGE if tier == SMALL else SMALL
+            if self.model_for(other) == self.model_for(tier):
+                raise
+            self.logger.warning(
+                "Model tier unavailable, using fallback",
+                task_type=task_type,
+                tier=tier,
+                fallback=other,
+                error=str(e)
+            )
+            tier = other
+            result = await self.complete(messages, tier, max_tokens, temperature)
+            result["degraded"] = True
+        result["score"] = await score(result["content"])
+        result["escalated"] = False
+
+        if tier == SMALL and result["score"] < threshold and not result["degraded"]:
+            self._routed["escalations"] += 1
+            ESCALATIONS.labels(agent).inc()
+            self.logger.info(
+                "Escalating to large model",
+                agent=agent,
+                task_type=task_type,
+                score=result["score"],
+                threshold=threshold
+            )
+            small = result
+            try:
+                # A low score may come from a truncated answer: retry with the large budget
+                large_tokens = max(max_tokens, DEFAULT_PROFILE["max_tokens"])
+                result = await self.complete(messages, LARGE, large_tokens, temperature)
+            except CircuitOpenException:
+                # Keep the below-threshold small-tier result; the caller sees its score
+                small["degraded"] = True
+                return small
+            result["score"] = await score(result["content"])
+            result["escalated"] = True
+            result["degraded"] = False
+            result["cost_usd"] = round(result["cost_usd"] + small["cost_usd"], 6)
+
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        tiers = {}
+        for tier, totals in self._totals.items():
+            latencies = sorted(self._latencies[tier])
+            tiers[tier] = {
+                "model": self.model_for(tier),
+                **totals,
+                "cost_usd": round(totals["cost_usd"], 4),
+                "latency_p50_seconds": round(latencies[len(latencies) // 2], 3) if latencies else None,
+                "latency_p95_seconds": round(latencies[int(len(latencies) * 0.95)], 3) if latencies else None,
+            }
+        calls = self._routed["calls"]
+        return {
+            "enabled": settings.MODEL_ROUTING_ENABLED,
+            "routed_calls": calls,
+            "escalations": self._routed["escalations"],
+            "escalation_rate": round(self._routed["escalations"] / calls, 4) if calls else 0.0,
+            "tiers": tiers,
+        }
+
+
+model_router = ModelRouter()
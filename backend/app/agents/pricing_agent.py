@@ -0,0 +1,110 @@
+"""Pricing AI Agent"""
+
+from typing import Dict, List, Any
+from datetime import datetime
+
+from app.agents.base import BaseAIAgent, AgentTask, AgentConfig, TaskStatus
+from app.core.config import settings
+from app.core.exceptions import ValidationException
+from app.models.database import MarketplaceType
+from app.services.repricing import RepricingService, STRATEGIES
+
+
+class PricingAgent(BaseAIAgent):
+    """AI Agent that reprices marketplace listings in bulk"""
+    
+    def __init__(self, config: AgentConfig):
+        super().__init__(config)
+        self.repricing_service = RepricingService()
+    
+    async def initialize(self) -> bool:
+        """Initialize the pricing agent"""
+        self.logger.info("Pricing agent initialized successfully")
+        return True
+    
+    async def execute_task(self, task: AgentTask) -> AgentTask:
+        """Reprice one marketplace, or every supported one"""
+        try:
+            input_data = task.input_data
+            marketplaces = (
+                [MarketplaceType(input_data["marketplace"])] if input_data.get("marketplace")
+                else [MarketplaceType(m) for m in self.config.settings["marketplaces"]]
+            )
+            strategy = input_data.get("strategy", self.config.settings.get("strategy"))
+            dry_run = input_data.get("dry_run", False)
+            
+            results = []
+            for n, marketplace in enumerate(marketplaces):
+                task.progress_percentage = int(100 * n / len(marketplaces))
+                task.progress_message = f"Repricing {marketplace.value}"
+                try:
+                    results.append(await self.repricing_service.reprice(marketplace, strategy, dry_run))
+                except ValidationException as e:
+                    results.append({"marketplace": marketplace.value, "error": str(e)})
+            
+            task.result = {"runs": results, "dry_run": dry_run}
+            task.status = TaskStatus.COMPLETED
+            task.completed_at = datetime.now()
+            task.progress_percentage = 100
+            task.progress_message = "Repricing completed"
+            
+            self.logger.info(
+                "Repricing completed",
+                task_id=task.task_id,
+                changed=sum(r.get("changed", 0) for r in results)
+            )
+            
+            return task
+            
+        except Exception as e:
+            task.status = TaskStatus.FAILED
+            task.error_message = str(e)
+            task.completed_at = datetime.now()
+            
+            self.logger.error(
+                "Repricing failed",
+                task_id=task.task_id,
+                error=str(e)
+            )
+            
+            return task
+    
+    async def validate_input(self, input_data: Dict[str, Any]) -> List[str]:
+        """Validate input data for a repricing run"""
+        errors = []
+        
+        marketplace = input_data.get("marketplace")
+        if marketplace and marketplace not in [m.value for m in MarketplaceType]:
+            errors.append(f"Unsupported marketplace: {marketplace}")
+        
+        strategy = input_data.get("strategy")
+        if strategy and strategy not in STRATEGIES:
+            errors.append(f"Unknown repricing strategy: {strategy}")
+        
+        return errors
+
+
+# Factory function to create pricing agent
+def create_pricing_agent(agent_id: str = "pricing_agent") -> PricingAgent:
+    """Create a pricing agent with default configuration"""
+    
+    config = AgentConfig(
+        agent_id=agent_id,
+        agent_type="pricing_agent",
+        name="Pricing Agent",
+        description="Reprices marketplace listings in bulk by strategy and pricing rules",
+        enabled=True,
+        automation_level=60,
+        confidence_threshold=85,
+        schedule_enabled=True,
+        cron_expression="*/30 * * * *",
+        max_concurrent_tasks=1,
+        task_timeout_seconds=600,
+        retry_attempts=1,
+        settings={
+            "strategy": settings.REPRICING_STRATEGY,
+            "marketplaces": ["amazon", "ebay", "otto", "kaufland"]
+        }
+    )
+    
+    return PricingAgent(config)
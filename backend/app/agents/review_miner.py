@@ -0,0 +1,89 @@
+"""Review Mining AI Agent"""
+
+from typing import Dict, List, Any
+from datetime import datetime
+
+from app.agents.base import BaseAIAgent, AgentTask, AgentConfig, TaskStatus
+from app.core.config import settings
+from app.services.review_mining import review_miner
+
+
+class ReviewMinerAgent(BaseAIAgent):
+    """AI Agent that scores review sentiment and extracts product aspects"""
+    
+    async def initialize(self) -> bool:
+        """Initialize the review miner agent"""
+        self.logger.info("Review miner agent initialized successfully")
+        return True
+    
+    async def stop(self) -> bool:
+        """Stop the agent and its inference workers"""
+        review_miner.close()
+        return await super().stop()
+    
+    async def execute_task(self, task: AgentTask) -> AgentTask:
+        """Analyse new and edited reviews"""
+        try:
+            task.progress_percentage = 10
+            task.progress_message = "Analysing pending reviews"
+            
+            summary = await review_miner.run(limit=task.input_data.get("limit"))
+            
+            task.result = summary
+            task.status = TaskStatus.COMPLETED
+            task.completed_at = datetime.now()
+            task.progress_percentage = 100
+            task.progress_message = "Review mining completed"
+            
+            self.logger.info("Review mining completed", task_id=task.task_id, **summary)
+            
+            return task
+            
+        except Exception as e:
+            task.status = TaskStatus.FAILED
+            task.error_message = str(e)
+            task.completed_at = datetime.now()
+            
+            self.logger.error(
+                "Review mining failed",
+                task_id=task.task_id,
+                error=str(e)
+            )
+            
+            return task
+    
+    async def validate_input(self, input_data: Dict[str, Any]) -> List[str]:
+        """Validate input data for a review mining run"""
+        errors = []
+        
+        limit = input_data.get("limit")
+        if limit is not None and (not isinstance(limit, int) or limit <= 0):
+            errors.append("limit must be a positive integer")
+        
+        return errors
+
+
+# Factory function to create review miner agent
+def create_review_miner_agent(agent_id: str = "review_miner") -> ReviewMinerAgent:
+    """Create a review miner agent with default configuration"""
+    
+    config = AgentConfig(
+        agent_id=agent_id,
+        agent_type="review_miner",
+        name="Review Mining Agent",
+        description="Scores review sentiment and extracts aspects with a quantized local model",
+        enabled=True,
+        automation_level=100,
+        confidence_threshold=0,
+        schedule_enabled=True,
+        cron_expression="*/15 * * * *",
+        max_concurrent_tasks=1,
+        task_timeout_seconds=3600,
+        retry_attempts=1,
+        settings={
+            "model": settings.REVIEW_MINING_MODEL,
+            "workers": settings.REVIEW_MINING_WORKERS
+        }
+    )
+    
+    return ReviewMinerAgent(config)
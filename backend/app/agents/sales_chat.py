@@ -0,0 +1,97 @@
+"""Sales Chat AI Agent"""
+
+from typing import Dict, List, Any
+from datetime import datetime
+
+from app.agents.base import BaseAIAgent, AgentTask, AgentConfig, TaskStatus
+from app.core.config import settings
+from app.core.exceptions import AIAgentException
+from app.services.sales_chat import sales_chat, LANGUAGE_NAMES
+
+
+class SalesChatAgent(BaseAIAgent):
+    """AI Agent that answers customer messages from non-streaming channels (WhatsApp, email)"""
+    
+    async def initialize(self) -> bool:
+        """Initialize the sales chat agent"""
+        try:
+            if not settings.OPENAI_API_KEY:
+                raise AIAgentException("sales_chat", "OpenAI API key not configured")
+            
+            self.logger.info("Sales chat agent initialized successfully")
+            return True
+            
+        except Exception as e:
+            self.logger.error("Failed to initialize sales chat", error=str(e))
+            return False
+    
+    async def execute_task(self, task: AgentTask) -> AgentTask:
+        """Answer one message; the channel's sender id is the conversation id"""
+        try:
+            input_data = task.input_data
+            task.progress_message = "Generating reply"
+            
+            task.result = await sales_chat.reply(
+                input_data["message"],
+                conversation_id=input_data.get("conversation_id"),
+                language=input_data.get("language")
+            )
+            task.status = TaskStatus.COMPLETED
+            task.completed_at = datetime.now()
+            task.progress_percentage = 100
+            task.progress_message = "Reply generated"
+            
+            return task
+            
+        except Exception as e:
+            task.status = TaskStatus.FAILED
+            task.error_message = str(e)
+            task.completed_at = datetime.now()
+            
+            self.logger.error(
+                "Sales chat reply failed",
+                task_id=task.task_id,
+                error=str(e)
+            )
+            
+            return task
+    
+    async def validate_input(self, input_data: Dict[str, Any]) -> List[str]:
+        """Validate input data for a chat reply"""
+        errors = []
+        
+        message = input_data.get("message")
+        if not isinstance(message, str) or not message.strip():
+            errors.append("message is required")
+        
+        language = input_data.get("language")
+        if language is not None and language not in LANGUAGE_NAMES:
+            errors.append(f"Unsupported language: {language}")
+        
+        return errors
+
+
+# Factory function to create sales chat agent
+def create_sales_chat_agent(agent_id: str = "sales_chat") -> SalesChatAgent:
+    """Create a sales chat agent with default configuration"""
+    
+    config = AgentConfig(
+        agent_id=agent_id,
+        agent_type="sales_chat",
+        name="Sales Chat Agent",
+        description="Answers customer questions with products retrieved from the catalog embeddings",
+        enabled=True,
+        automation_level=90,
+        confidence_threshold=70,
+        schedule_enabled=False,
+        max_concurrent_tasks=20,
+        task_timeout_seconds=settings.CHAT_TURN_TIMEOUT_SECONDS,
+        retry_attempts=1,
+        settings={
+            "model": settings.CHAT_MODEL or settings.OPENAI_MODEL,
+            "window_messages": settings.CHAT_WINDOW_MESSAGES,
+            "retrieval_top_k": settings.CHAT_RETRIEVAL_TOP_K
+        }
+    )
+    
+    return SalesChatAgent(config)
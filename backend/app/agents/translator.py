@@ -0,0 +1,112 @@
+"""Translation AI Agent"""
+
+from typing import Dict, List, Any
+from datetime import datetime
+
+from app.agents.base import BaseAIAgent, AgentTask, AgentConfig, TaskStatus
+from app.core.config import settings
+from app.core.exceptions import AIAgentException
+from app.services.translation_memory import translation_memory, DEEPL_TARGETS
+
+
+class TranslatorAgent(BaseAIAgent):
+    """AI Agent that translates listing and blog content through the translation memory"""
+    
+    async def initialize(self) -> bool:
+        """Initialize the translator agent"""
+        try:
+            if not settings.DEEPL_API_KEY:
+                raise AIAgentException("translator", "DeepL API key not configured")
+            
+            self.logger.info("Translator agent initialized successfully")
+            return True
+            
+        except Exception as e:
+            self.logger.error("Failed to initialize translator", error=str(e))
+            return False
+    
+    async def execute_task(self, task: AgentTask) -> AgentTask:
+        """Translate texts into each target language"""
+        try:
+            input_data = task.input_data
+            texts = input_data["texts"]
+            source_lang = input_data.get("source_lang", "en")
+            target_langs = [
+                lang for lang in input_data.get("target_languages", settings.SUPPORTED_LANGUAGES)
+                if lang != source_lang
+            ]
+            
+            translations, stats = {}, {}
+            for n, lang in enumerate(target_langs):
+                task.progress_percentage = int(100 * n / max(len(target_langs), 1))
+                task.progress_message = f"Translating into {lang}"
+                translations[lang], stats[lang] = await translation_memory.translate_many(
+                    texts, lang, source_lang
+                )
+            
+            task.result = {"translations": translations, "stats": stats}
+            task.status = TaskStatus.COMPLETED
+            task.completed_at = datetime.now()
+            task.progress_percentage = 100
+            task.progress_message = "Translation completed"
+            
+            self.logger.info(
+                "Translation completed",
+                task_id=task.task_id,
+                languages=target_langs,
+                characters_saved=sum(s.get("characters_saved", 0) for s in stats.values())
+            )
+            
+            return task
+            
+        except Exception as e:
+            task.status = TaskStatus.FAILED
+            task.error_message = str(e)
+            task.completed_at = datetime.now()
+            
+            self.logger.error(
+                "Translation failed",
+                task_id=task.task_id,
+                error=str(e)
+            )
+            
+            return task
+    
+    async def validate_input(self, input_data: Dict[str, Any]) -> List[str]:
+        """Validate input data for translation"""
+        errors = []
+        
+        texts = input_data.get("texts")
+        if not isinstance(texts, list) or not all(isinstance(t, str) for t in texts):
+            errors.append("texts must be a list of strings")
+        
+        for lang in [input_data.get("source_lang", "en"), *input_data.get("target_languages", [])]:
+            if lang not in DEEPL_TARGETS:
+                errors.append(f"Unsupported language: {lang}")
+        
+        return errors
+
+
+# Factory function to create translator agent
+def create_translator_agent(agent_id: str = "translator") -> TranslatorAgent:
+    """Create a translator agent with default configuration"""
+    
+    config = AgentConfig(
+        agent_id=agent_id,
+        agent_type="translator",
+        name="Translation Agent",
+        description="Translates listings and blog posts with a segment-level translation memory over DeepL",
+        enabled=True,
+        automation_level=80,
+        confidence_threshold=75,
+        schedule_enabled=False,
+        max_concurrent_tasks=5,
+        task_timeout_seconds=300,
+        retry_attempts=2,
+        settings={
+            "provider": "deepl",
+            "supported_languages": settings.SUPPORTED_LANGUAGES
+        }
+    )
+    
+    return TranslatorAgent(config)
@@ -2,8 +2,23 @@
 
 from fastapi import APIRouter
 
+from app.agents.model_router import model_router
+from app.services.llm_limiter import llm_limiter
+
 router = APIRouter()
 
 @router.get("/")
 async def list_agents():
-    return {"message": "AI Agents list endpoint"}
\ No newline at end of file
+    return {"message": "AI Agents list endpoint"}
+
+
+@router.get("/model-routing")
+async def get_model_routing_stats():
+    """Calls, escalations, latency and estimated spend per model tier"""
+    return model_router.get_stats()
+
+
+@router.get("/llm-limiter")
+async def get_llm_limiter_stats():
+    """Adaptive concurrency limit, in-flight and waiting calls, and token budget"""
+    return llm_limiter.get_stats()
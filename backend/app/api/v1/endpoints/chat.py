@@ -1,10 +1,103 @@
 """Chat/WebSocket API endpoints"""
 
-from fastapi import APIRouter, WebSocket
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+import orjson
+
+from app.schemas.chat import ChatRequest, ChatResponse
+from app.services.sales_chat import sales_chat
+from app.services.semantic_cache import cache_stats
+from app.core.exceptions import ValidationException
 
 router = APIRouter()
 
+
+@router.post("/", response_model=ChatResponse)
+async def chat(request: ChatRequest):
+    """Answer a customer message in one response"""
+    try:
+        return await sales_chat.reply(request.message, request.conversation_id, request.language)
+    except ValidationException as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/stream")
+async def chat_stream(request: ChatRequest):
+    """Answer a customer message as server-sent events.
+
+    Events are JSON objects: one "context" (conversation id and the
+    products the answer draws on), "token" events as the answer is
+    generated, then "done" - or "error" if generation fails midway.
+    """
+    events = sales_chat.stream_reply(request.message, request.conversation_id, request.language)
+    try:
+        # Validation errors surface on the first event, while a status code can still be sent
+        first = await events.__anext__()
+    except ValidationException as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    async def sse():
+        yield b"data: " + orjson.dumps(first) + b"\n\n"
+        try:
+            async for event in events:
+                yield b"data: " + orjson.dumps(event) + b"\n\n"
+        except Exception as e:
+            yield b"data: " + orjson.dumps({"type": "error", "message": str(e)}) + b"\n\n"
+        finally:
+            # Releases the conversation lock if the client went away mid-answer
+            await events.aclose()
+
+    return StreamingResponse(
+        sse(),
+        media_type="text/event-stream",
+        # Proxies (nginx) must not buffer the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """Hit rates of the semantic answer caches in this process"""
+    return {"caches": cache_stats()}
+
+
+@router.get("/{conversation_id}")
+async def get_conversation(conversation_id: str):
+    """Get a conversation's summary, recent messages and cached products"""
+    conversation = await sales_chat.get_conversation(conversation_id)
+    if not conversation:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    return conversation
+
+
+@router.delete("/{conversation_id}")
+async def delete_conversation(conversation_id: str):
+    """Forget a conversation"""
+    if not await sales_chat.delete_conversation(conversation_id):
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    return {"message": "Conversation deleted"}
+
+
 @router.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
+    """Chat over a WebSocket: send {"message", "conversation_id"?, "language"?}, receive the same events as /stream"""
     await websocket.accept()
-    await websocket.send_text("Chat WebSocket connected")
\ No newline at end of file
+    conversation_id = None
+    try:
+        while True:
+            data = await websocket.receive_json()
+            try:
+                request = ChatRequest(**{"conversation_id": conversation_id, **data})
+                async for event in sales_chat.stream_reply(request.message, request.conversation_id, request.language):
+                    conversation_id = event.get("conversation_id", conversation_id)
+                    await websocket.send_json(event)
+            except WebSocketDisconnect:
+                raise
+            except Exception as e:
+                await websocket.send_json({"type": "error", "message": str(e)})
+    except WebSocketDisconnect:
+        pass
@@ -1,9 +1,82 @@
 """Inventory management API endpoints"""
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+import uuid
+
+from app.core.database import get_db
+from app.schemas.inventory import (
+    ReservationRequest,
+    ReservationResult,
+    StockAdjustment,
+    ProductAvailability
+)
+from app.services.inventory import InventoryService
+from app.core.exceptions import ValidationException
 
 router = APIRouter()
 
-@router.get("/")
-async def list_inventory():
-    return {"message": "Inventory endpoint"}
\ No newline at end of file
+
+@router.get("/{product_id}", response_model=ProductAvailability)
+async def get_availability(
+    product_id: uuid.UUID,
+    db: AsyncSession = Depends(get_db)
+):
+    """Get per-warehouse stock for a product"""
+    inventory_service = InventoryService()
+    return await inventory_service.get_availability(db, product_id)
+
+
+@router.post("/{product_id}/adjust")
+async def adjust_stock(product_id: uuid.UUID, adjustment: StockAdjustment):
+    """Receive or correct on-hand stock in a warehouse"""
+    inventory_service = InventoryService()
+    quantity = await inventory_service.adjust_stock(
+        product_id, adjustment.warehouse, adjustment.delta
+    )
+    
+    if quantity is None:
+        raise HTTPException(
+            status_code=409,
+            detail="No such warehouse stock, or the change would drop below reserved stock"
+        )
+    
+    return {"product_id": product_id, "warehouse": adjustment.warehouse, "quantity": quantity}
+
+
+@router.post("/reservations", response_model=ReservationResult)
+async def reserve_stock(request: ReservationRequest):
+    """Reserve stock for every line of an order, or for none"""
+    try:
+        inventory_service = InventoryService()
+        result = await inventory_service.reserve(
+            request.order_ref,
+            [line.dict() for line in request.lines],
+            request.ttl_seconds
+        )
+    except ValidationException as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if not result["reserved"]:
+        raise HTTPException(status_code=409, detail={
+            "message": "Insufficient stock",
+            "shortages": [str(product_id) for product_id in result["shortages"]]
+        })
+    
+    return result
+
+
+@router.post("/reservations/{order_ref}/commit")
+async def commit_reservation(order_ref: str):
+    """Consume the stock held for an order (shipment)"""
+    inventory_service = InventoryService()
+    committed = await inventory_service.commit(order_ref)
+    return {"order_ref": order_ref, "committed": committed}
+
+
+@router.post("/reservations/{order_ref}/release")
+async def release_reservation(order_ref: str):
+    """Give back the stock held for an order (cancellation)"""
+    inventory_service = InventoryService()
+    released = await inventory_service.release(order_ref)
+    return {"order_ref": order_ref, "released": released}
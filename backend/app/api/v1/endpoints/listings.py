@@ -3,18 +3,21 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional, Dict, Any
+from datetime import datetime
 import uuid
 
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db, get_reporting_db
 from app.schemas.listings import (
     ListingCreate,
     ListingUpdate,
     ListingResponse,
     ListingList,
     BulkListingOperation,
-    ListingGenerationRequest
+    ListingGenerationRequest,
+    ListingPerformance
 )
 from app.services.listings import ListingService
+from app.services.attribute_filters import parse_attribute_filters
 from app.agents.base import agent_manager, AgentTask
 from app.core.exceptions import ValidationException, AIAgentException
 
@@ -107,32 +110,38 @@ async def list_listings(
     marketplace: Optional[str] = Query(None),
     product_id: Optional[uuid.UUID] = Query(None),
     status: Optional[str] = Query(None),
-    db: AsyncSession = Depends(get_db)
+    attr: Optional[List[str]] = Query(None, description="Marketplace data filter key:value, repeatable (e.g. fulfillment.fba:true)"),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """List listings with filtering and pagination"""
-    listing_service = ListingService(db)
-    
-    filters = {}
-    if marketplace:
-        filters["marketplace"] = marketplace
-    if product_id:
-        filters["product_id"] = product_id
-    if status:
-        filters["status"] = status
-    
-    listings = await listing_service.list_listings(
-        skip=skip,
-        limit=limit,
-        filters=filters
-    )
-    
-    return listings
+    try:
+        listing_service = ListingService(db)
+        
+        filters = {}
+        if marketplace:
+            filters["marketplace"] = marketplace
+        if product_id:
+            filters["product_id"] = product_id
+        if status:
+            filters["status"] = status
+        if attr:
+            filters["marketplace_data"] = parse_attribute_filters(attr)
+        
+        listings = await listing_service.list_listings(
+            skip=skip,
+            limit=limit,
+            filters=filters
+        )
+        
+        return listings
+    except ValidationException as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.get("/{listing_id}", response_model=ListingResponse)
 async def get_listing(
     listing_id: uuid.UUID,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get a specific listing by ID"""
     listing_service = ListingService(db)
@@ -237,29 +246,67 @@ async def bulk_listing_operations(
     """Perform bulk operations on listings"""
     try:
         listing_service = ListingService(db)
+        job = listing_service.create_bulk_job(operation)
         
         # Add background task for bulk operations
         background_tasks.add_task(
             listing_service.bulk_operations, 
-            operation
+            operation,
+            job
         )
         
         return {
             "message": "Bulk operation started",
+            "job_id": job.job_id,
             "operation_type": operation.operation_type,
-            "listing_count": len(operation.listing_ids)
+            "listing_count": job.total
         }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/{listing_id}/performance")
+@router.get("/bulk/{job_id}")
+async def get_bulk_operation_status(
+    job_id: str,
+    include_results: bool = Query(True),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get progress and per-listing results of a bulk operation"""
+    listing_service = ListingService(db)
+    job = listing_service.get_bulk_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Bulk job not found")
+    
+    exclude = None if include_results else {"results"}
+    return {
+        **job.dict(exclude=exclude),
+        "progress": job.progress_percentage
+    }
+
+
+@router.post("/{listing_id}/events", status_code=202)
+async def record_listing_event(
+    listing_id: uuid.UUID,
+    counter: str = Query(..., regex="^(views|clicks|conversions)$"),
+    count: int = Query(1, ge=1, le=1000),
+    db: AsyncSession = Depends(get_db)
+):
+    """Count listing views, clicks or conversions (buffered, flushed in batches)"""
+    try:
+        listing_service = ListingService(db)
+        listing_service.record_event(listing_id, counter, count)
+        return {"status": "accepted"}
+    except ValidationException as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/{listing_id}/performance", response_model=ListingPerformance)
 async def get_listing_performance(
     listing_id: uuid.UUID,
     start_date: Optional[str] = Query(None),
     end_date: Optional[str] = Query(None),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_reporting_db)
 ):
     """Get performance metrics for a listing"""
     try:
@@ -267,9 +314,15 @@ async def get_listing_performance(
         performance = await listing_service.get_listing_performance(
             listing_id, start_date, end_date
         )
-        return performance
+    except ValidationException as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    
+    if not performance:
+        raise HTTPException(status_code=404, detail="Listing not found")
+    
+    return performance
 
 
 @router.post("/{listing_id}/optimize")
@@ -319,13 +372,14 @@ async def get_listing_reviews(
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=200),
     rating_filter: Optional[int] = Query(None, ge=1, le=5),
-    db: AsyncSession = Depends(get_db)
+    since: Optional[datetime] = Query(None, description="Only reviews on or after this date"),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get reviews for a listing"""
     try:
         listing_service = ListingService(db)
         reviews = await listing_service.get_listing_reviews(
-            listing_id, skip, limit, rating_filter
+            listing_id, skip, limit, rating_filter, since
         )
         return reviews
     except Exception as e:
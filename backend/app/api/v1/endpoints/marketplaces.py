@@ -2,9 +2,17 @@
 
 from fastapi import APIRouter
 
+from app.core.resilience import resilience_stats
+
 router = APIRouter()
 
 # Placeholder - marketplace endpoints would be implemented here
 @router.get("/")
 async def list_marketplaces():
-    return {"message": "Marketplace list endpoint"}
\ No newline at end of file
+    return {"message": "Marketplace list endpoint"}
+
+
+@router.get("/circuits")
+async def get_circuits():
+    """Circuit breaker state per marketplace and LLM endpoint, and hedged-read statistics"""
+    return resilience_stats()
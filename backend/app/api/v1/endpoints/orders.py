@@ -1,10 +1,61 @@
 """Order management API endpoints"""
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from datetime import datetime
+import uuid
+
+from app.core.database import get_read_db
+from app.schemas.orders import OrderList, OrderDetailResponse
+from app.services.orders import OrderService
+from app.core.exceptions import ValidationException
 
 router = APIRouter()
 
-# Placeholder
-@router.get("/")
-async def list_orders():
-    return {"message": "Orders endpoint"}
\ No newline at end of file
+
+@router.get("/", response_model=OrderList)
+async def list_orders(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    since: Optional[datetime] = Query(None, description="Placed at or after (default: 30 days before 'until')"),
+    until: Optional[datetime] = Query(None, description="Placed before (default: now)"),
+    marketplace: Optional[str] = Query(None),
+    status: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """List orders in a time window with filtering and pagination"""
+    try:
+        order_service = OrderService(db)
+        
+        filters = {}
+        if marketplace:
+            filters["marketplace"] = marketplace
+        if status:
+            filters["status"] = status
+        
+        return await order_service.list_orders(
+            skip=skip,
+            limit=limit,
+            since=since,
+            until=until,
+            filters=filters
+        )
+    except ValidationException as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/{order_id}", response_model=OrderDetailResponse)
+async def get_order(
+    order_id: uuid.UUID,
+    placed_at: Optional[datetime] = Query(None, description="Order timestamp; limits the lookup to one partition"),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Get a specific order with its lines"""
+    order_service = OrderService(db)
+    order = await order_service.get_order(order_id, placed_at)
+    
+    if not order:
+        raise HTTPException(status_code=404, detail="Order not found")
+    
+    return order
@@ -1,9 +1,31 @@
 """Pricing API endpoints"""
 
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
+
+from app.schemas.pricing import RepriceRequest, RepriceResult
+from app.services.repricing import RepricingService
+from app.core.exceptions import ValidationException
 
 router = APIRouter()
 
 @router.post("/suggest")
 async def suggest_pricing():
-    return {"message": "Pricing suggestion endpoint"}
\ No newline at end of file
+    return {"message": "Pricing suggestion endpoint"}
+
+
+@router.post("/reprice", response_model=RepriceResult)
+async def reprice(request: RepriceRequest):
+    """Reprice all active listings of a marketplace; dry runs only report"""
+    try:
+        repricing_service = RepricingService()
+        return await repricing_service.reprice(
+            request.marketplace,
+            strategy=request.strategy,
+            dry_run=request.dry_run,
+            target_margin=request.target_margin,
+            min_margin=request.min_margin,
+            undercut=request.undercut,
+            max_change=request.max_change
+        )
+    except ValidationException as e:
+        raise HTTPException(status_code=400, detail=str(e))
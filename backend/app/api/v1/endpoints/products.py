@@ -1,20 +1,29 @@
 """Product management API endpoints"""
 
-from fastapi import APIRouter, Depends, HTTPException, Query, File, UploadFile
+from fastapi import APIRouter, Depends, HTTPException, Query, File, UploadFile, BackgroundTasks, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional, Dict, Any
 import uuid
 
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db, get_reporting_db
 from app.schemas.products import (
     ProductCreate,
     ProductUpdate,
     ProductResponse,
     ProductList,
+    ProductAnalytics,
+    ProductAssetResponse,
     BulkProductOperation
 )
-from app.services.products import ProductService
+from app.services.products import ProductService, asset_filename
 from app.services.ai_content import AIContentService
+from app.services.vector_index import VectorIndexManager
+from app.services.attribute_filters import parse_attribute_filters
+from app.services.product_neighbors import neighbor_refresher
+from app.services.sales_rollup import sales_rollup, parse_period
+from app.services.image_index import image_index
+from app.services.image_pipeline import image_pipeline
+from app.services.semantic_cache import invalidate_products
 from app.core.exceptions import ValidationException
 
 router = APIRouter()
@@ -42,33 +51,116 @@ async def list_products(
     category: Optional[str] = Query(None),
     brand: Optional[str] = Query(None),
     status: Optional[str] = Query(None),
-    db: AsyncSession = Depends(get_db)
+    attr: Optional[List[str]] = Query(None, description="Attribute filter key:value, repeatable (e.g. color:red, fba:true)"),
+    spec: Optional[List[str]] = Query(None, description="Specification filter key:value, repeatable (e.g. voltage:12)"),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """List products with filtering and pagination"""
-    product_service = ProductService(db)
-    
-    filters = {}
-    if category:
-        filters["category"] = category
-    if brand:
-        filters["brand"] = brand
-    if status:
-        filters["status"] = status
+    try:
+        product_service = ProductService(db)
+        
+        filters = {}
+        if category:
+            filters["category"] = category
+        if brand:
+            filters["brand"] = brand
+        if status:
+            filters["status"] = status
+        if attr:
+            filters["attributes"] = parse_attribute_filters(attr)
+        if spec:
+            filters["specifications"] = parse_attribute_filters(spec)
+        
+        products = await product_service.list_products(
+            skip=skip,
+            limit=limit,
+            search=search,
+            filters=filters
+        )
+        
+        return products
+    except ValidationException as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/index/embedding")
+async def get_embedding_index_status():
+    """Get the state of the similarity-search index"""
+    try:
+        return await VectorIndexManager().get_status()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/index/embedding/rebuild")
+async def rebuild_embedding_index(
+    background_tasks: BackgroundTasks,
+    force: bool = Query(False)
+):
+    """Re-cluster the similarity-search index if the catalog has outgrown it"""
+    background_tasks.add_task(VectorIndexManager().rebuild, force)
+    return {"message": "Embedding index rebuild started", "force": force}
+
+
+@router.post("/index/neighbors/refresh")
+async def refresh_product_neighbors(background_tasks: BackgroundTasks):
+    """Recompute precomputed similar products for changed embeddings"""
+    background_tasks.add_task(neighbor_refresher.refresh)
+    return {"message": "Similar-product refresh started"}
+
+
+async def _scan_product_images(limit: Optional[int]):
+    await image_index.scan_catalog(image_pipeline.fingerprint, limit)
+
+
+@router.post("/index/images/scan")
+async def scan_product_images(
+    background_tasks: BackgroundTasks,
+    limit: Optional[int] = Query(None, ge=1, description="Maximum images to fingerprint (default: all)")
+):
+    """Fingerprint catalog images that are not indexed yet"""
+    background_tasks.add_task(_scan_product_images, limit)
+    return {"message": "Image fingerprint scan started", "limit": limit}
+
+
+@router.get("/index/images/duplicates")
+async def get_duplicate_product_images(
+    min_size: int = Query(2, ge=2),
+    limit: int = Query(100, ge=1, le=1000)
+):
+    """Groups of duplicate and near-duplicate images across the catalog, largest first"""
+    try:
+        clusters = await image_index.find_clusters(min_size)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
     
-    products = await product_service.list_products(
-        skip=skip,
-        limit=limit,
-        search=search,
-        filters=filters
-    )
+    return {
+        "clusters": len(clusters),
+        "duplicate_images": sum(c["size"] - 1 for c in clusters),
+        "top_clusters": clusters[:limit]
+    }
+
+
+@router.post("/analytics/rollup/backfill")
+async def backfill_sales_rollup(
+    background_tasks: BackgroundTasks,
+    start_date: str = Query(..., description="First day to rebuild (YYYY-MM-DD)"),
+    end_date: Optional[str] = Query(None, description="Last day to rebuild (default: today)")
+):
+    """Rebuild the daily sales rollup from orders and reviews for a date range"""
+    try:
+        start, end = parse_period(start_date, end_date)
+    except ValidationException as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    return products
+    background_tasks.add_task(sales_rollup.backfill, start, end)
+    return {"message": "Sales rollup backfill started", "start_date": start, "end_date": end}
 
 
 @router.get("/{product_id}", response_model=ProductResponse)
 async def get_product(
     product_id: uuid.UUID,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get a specific product by ID"""
     product_service = ProductService(db)
@@ -94,6 +186,7 @@ async def update_product(
         if not updated_product:
             raise HTTPException(status_code=404, detail="Product not found")
         
+        await invalidate_products([product_id])
         return updated_product
     except ValidationException as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -111,6 +204,7 @@ async def delete_product(
     if not success:
         raise HTTPException(status_code=404, detail="Product not found")
     
+    await invalidate_products([product_id])
     return {"message": "Product deleted successfully"}
 
 
@@ -133,10 +227,49 @@ async def upload_product_images(
             )
     
     try:
-        image_urls = await product_service.upload_images(product_id, files)
-        return {"image_urls": image_urls}
+        images = await product_service.upload_images(product_id, files)
+    except ValidationException as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    
+    if images is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+    
+    return {"image_urls": [image["url"] for image in images], "images": images}
+
+
+@router.put("/{product_id}/assets/{filename}", response_model=ProductAssetResponse)
+async def upload_product_asset(
+    product_id: uuid.UUID,
+    filename: str,
+    request: Request,
+    db: AsyncSession = Depends(get_db)
+):
+    """Upload a large asset (image, video, PDF) as the raw request body.
+
+    The body is streamed to storage in parts as it arrives and is never
+    held in memory as a whole.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    allowed_prefixes = ("image/", "video/", "application/pdf")
+    if not content_type.startswith(allowed_prefixes):
+        raise HTTPException(status_code=400, detail=f"Invalid file type: {content_type or 'missing'}")
+    try:
+        filename = asset_filename(filename)
+    except ValidationException as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        product_service = ProductService(db)
+        asset = await product_service.upload_asset(product_id, filename, content_type, request.stream())
+    except ValidationException as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    
+    if not asset:
+        raise HTTPException(status_code=404, detail="Product not found")
+    
+    return asset
 
 
 @router.post("/{product_id}/ai-enhance")
@@ -178,6 +311,7 @@ async def bulk_product_operations(
     try:
         product_service = ProductService(db)
         result = await product_service.bulk_operations(operation)
+        await invalidate_products(operation.product_ids)
         return result
     except ValidationException as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -187,13 +321,14 @@ async def bulk_product_operations(
 async def find_similar_products(
     product_id: uuid.UUID,
     limit: int = Query(10, ge=1, le=50),
-    db: AsyncSession = Depends(get_db)
+    recall_target: Optional[float] = Query(None, ge=0.5, le=1.0),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Find similar products using AI embeddings"""
     try:
         product_service = ProductService(db)
         similar_products = await product_service.find_similar_products(
-            product_id, limit
+            product_id, limit, recall_target
         )
         return {"similar_products": similar_products}
     except Exception as e:
@@ -221,7 +356,7 @@ async def import_products_csv(
 async def export_products_csv(
     category: Optional[str] = Query(None),
     brand: Optional[str] = Query(None),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_reporting_db)
 ):
     """Export products to CSV file"""
     try:
@@ -248,12 +383,12 @@ async def export_products_csv(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/{product_id}/analytics")
+@router.get("/{product_id}/analytics", response_model=ProductAnalytics)
 async def get_product_analytics(
     product_id: uuid.UUID,
     start_date: Optional[str] = Query(None),
     end_date: Optional[str] = Query(None),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_reporting_db)
 ):
     """Get analytics data for a product"""
     try:
@@ -261,6 +396,12 @@ async def get_product_analytics(
         analytics = await product_service.get_product_analytics(
             product_id, start_date, end_date
         )
-        return analytics
+    except ValidationException as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    if not analytics:
+        raise HTTPException(status_code=404, detail="Product not found")
+    
+    return analytics
\ No newline at end of file
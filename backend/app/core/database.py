@@ -1,20 +1,198 @@
 """Database configuration and session management"""
 
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from typing import List, Optional, Dict
+import asyncio
+import itertools
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
-from sqlalchemy import MetaData
+from sqlalchemy import MetaData, event, text
+import numpy as np
+import orjson
+import structlog
 from app.core.config import settings
 
+logger = structlog.get_logger()
 
-# SQLAlchemy engine
-engine = create_async_engine(
+
+def _json_dumps(value) -> str:
+    return orjson.dumps(value).decode()
+
+
+def _vector_to_text(value) -> str:
+    # pgvector's bind processor usually hands us the text form already
+    if isinstance(value, str):
+        return value
+    return "[" + ",".join(str(float(v)) for v in value) + "]"
+
+
+def _vector_from_text(value: str) -> np.ndarray:
+    return np.fromstring(value[1:-1], sep=",", dtype=np.float32)
+
+
+async def _register_vector_codec(connection):
+    try:
+        await connection.set_type_codec(
+            "vector",
+            encoder=_vector_to_text,
+            decoder=_vector_from_text,
+            schema="public",
+            format="text"
+        )
+    except ValueError:
+        # pgvector extension not installed in this database
+        pass
+
+
+def register_codecs(dbapi_connection, connection_record):
+    """Register the pgvector codec when a pooled connection is opened.
+
+    Doing this at connect time means embeddings decode straight into NumPy
+    arrays and asyncpg does not introspect the vector type on first use.
+    """
+    dbapi_connection.run_async(_register_vector_codec)
+
+
+def create_engine(
+    url: str,
+    pool_size: int,
+    max_overflow: int,
+    statement_timeout_ms: int,
+    application_name: str,
+    read_only: bool = False
+) -> AsyncEngine:
+    """Create an engine with its own pool and server-side statement timeout"""
+    server_settings = {
+        "application_name": application_name,
+        "statement_timeout": str(statement_timeout_ms),
+    }
+    if read_only:
+        server_settings["default_transaction_read_only"] = "on"
+
+    new_engine = create_async_engine(
+        url,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_pre_ping=read_only,
+        echo=settings.DEBUG,
+        future=True,
+        connect_args={"server_settings": server_settings},
+        # The asyncpg dialect registers json/jsonb codecs on every new
+        # connection with these functions
+        json_serializer=_json_dumps,
+        json_deserializer=orjson.loads
+    )
+    event.listen(new_engine.sync_engine, "connect", register_codecs)
+    return new_engine
+
+
+# Primary engine: writes and latency-sensitive reads (checkout, orders)
+engine = create_engine(
     settings.DATABASE_URL,
     pool_size=settings.DATABASE_POOL_SIZE,
     max_overflow=settings.DATABASE_MAX_OVERFLOW,
-    echo=settings.DEBUG,
-    future=True
+    statement_timeout_ms=settings.DATABASE_STATEMENT_TIMEOUT_MS,
+    application_name="goodlink-api"
+)
+
+# Read replicas
+replica_engines: List[AsyncEngine] = [
+    create_engine(
+        url,
+        pool_size=settings.DATABASE_REPLICA_POOL_SIZE,
+        max_overflow=settings.DATABASE_REPLICA_MAX_OVERFLOW,
+        statement_timeout_ms=settings.DATABASE_STATEMENT_TIMEOUT_MS,
+        application_name=f"goodlink-api-replica-{i}",
+        read_only=True
+    )
+    for i, url in enumerate(settings.DATABASE_REPLICA_URLS)
+]
+
+# Reporting/export engine: a small isolated pool, so long-running analytics
+# can queue among themselves but never take connections from checkout
+reporting_engine = create_engine(
+    settings.DATABASE_REPORTING_URL
+    or (settings.DATABASE_REPLICA_URLS[0] if settings.DATABASE_REPLICA_URLS else settings.DATABASE_URL),
+    pool_size=settings.DATABASE_REPORTING_POOL_SIZE,
+    max_overflow=settings.DATABASE_REPORTING_MAX_OVERFLOW,
+    statement_timeout_ms=settings.DATABASE_REPORTING_STATEMENT_TIMEOUT_MS,
+    application_name="goodlink-reporting",
+    read_only=bool(settings.DATABASE_REPORTING_URL or settings.DATABASE_REPLICA_URLS)
+)
+
+REPLICA_LAG_SQL = text(
+    "SELECT CASE "
+    "WHEN NOT pg_is_in_recovery() THEN 0 "
+    "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
 )
 
+
+class ReplicaRouter:
+    """Routes read-only sessions to replicas that are within the lag budget.
+
+    A background task polls each replica's replay lag. Reads round-robin
+    over replicas at or under DATABASE_REPLICA_MAX_LAG_SECONDS and fall
+    back to the primary when none qualify (or none are configured).
+    """
+
+    def __init__(self, replicas: List[AsyncEngine], primary: AsyncEngine):
+        self.replicas = replicas
+        self.primary = primary
+        self.lag: Dict[int, Optional[float]] = {i: None for i in range(len(replicas))}
+        self._counter = itertools.count()
+        self._monitor: Optional[asyncio.Task] = None
+        self.logger = logger.bind(component="replica_router")
+
+    def pick(self) -> AsyncEngine:
+        """Engine for the next read-only session"""
+        healthy = [
+            self.replicas[i] for i, lag in self.lag.items()
+            if lag is not None and lag <= settings.DATABASE_REPLICA_MAX_LAG_SECONDS
+        ]
+        if not healthy:
+            return self.primary
+        return healthy[next(self._counter) % len(healthy)]
+
+    async def check_lag(self):
+        """Measure replay lag on every replica; unreachable replicas are excluded"""
+        async def measure(i: int, replica: AsyncEngine):
+            try:
+                async with replica.connect() as conn:
+                    self.lag[i] = float(await conn.scalar(REPLICA_LAG_SQL))
+            except Exception as e:
+                if self.lag[i] is not None:
+                    self.logger.warning("Replica unavailable", replica=i, error=str(e))
+                self.lag[i] = None
+
+        await asyncio.gather(*(measure(i, r) for i, r in enumerate(self.replicas)))
+
+    async def start(self):
+        """Take an initial measurement and start polling"""
+        if not self.replicas:
+            return
+        await self.check_lag()
+        self._monitor = asyncio.create_task(self._poll())
+
+    async def stop(self):
+        if self._monitor:
+            self._monitor.cancel()
+
+    async def _poll(self):
+        while True:
+            await asyncio.sleep(settings.DATABASE_REPLICA_LAG_CHECK_SECONDS)
+            await self.check_lag()
+
+
+replica_router = ReplicaRouter(replica_engines, engine)
+
+
+async def dispose_engines():
+    """Close every pool (shutdown)"""
+    await replica_router.stop()
+    for pooled_engine in [engine, reporting_engine, *replica_engines]:
+        await pooled_engine.dispose()
+
+
 # Session factory
 AsyncSessionLocal = async_sessionmaker(
     engine,
@@ -42,4 +220,22 @@ async def get_db() -> AsyncSession:
         try:
             yield session
         finally:
-            await session.close()
\ No newline at end of file
+            await session.close()
+
+
+# Dependency for read-only endpoints: a lag-checked replica or the primary
+async def get_read_db() -> AsyncSession:
+    async with AsyncSessionLocal(bind=replica_router.pick()) as session:
+        try:
+            yield session
+        finally:
+            await session.close()
+
+
+# Dependency for analytics and exports: the isolated reporting pool
+async def get_reporting_db() -> AsyncSession:
+    async with AsyncSessionLocal(bind=reporting_engine) as session:
+        try:
+            yield session
+        finally:
+            await session.close()
@@ -67,4 +67,12 @@ class ContentGenerationException(GoodlinkException):
 
 class TranslationException(GoodlinkException):
     """Raised when translation services fail"""
-    pass
\ No newline at end of file
+    pass
+
+
+class CircuitOpenException(ExternalServiceException):
+    """Raised instead of calling a service whose circuit breaker is open"""
+    
+    def __init__(self, service: str, retry_after: float):
+        self.retry_after = retry_after
+        super().__init__(service, f"temporarily unavailable, retry in {retry_after:.0f}s")
@@ -0,0 +1,41 @@
+"""Deferred imports for heavy optional dependencies"""
+
+import importlib
+import types
+from typing import Optional
+
+
+class LazyModule(types.ModuleType):
+    """Module proxy that imports the real module on first attribute access.
+
+    Used for ML and cloud SDKs (openai, torch, transformers, boto3, cv2, ...)
+    so that importing the app does not pay for libraries the enabled agents
+    and adapters never touch.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self._module: Optional[types.ModuleType] = None
+
+    def _load(self) -> types.ModuleType:
+        if self._module is None:
+            self._module = importlib.import_module(self.__name__)
+        return self._module
+
+    def __getattr__(self, item: str):
+        return getattr(self._load(), item)
+
+    def __dir__(self):
+        return dir(self._load())
+
+
+def lazy_import(name: str) -> LazyModule:
+    """Return a proxy for module `name` that is imported when first used"""
+    return LazyModule(name)
+
+
+def import_string(path: str):
+    """Import an object from a "package.module:attribute" path"""
+    module_name, _, attribute = path.partition(":")
+    module = importlib.import_module(module_name)
+    return getattr(module, attribute) if attribute else module
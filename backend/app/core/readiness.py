@@ -0,0 +1,38 @@
+"""Readiness tracking for startup warm-up"""
+
+from typing import Dict, Any, Optional
+
+
+class ReadinessState:
+    """Tracks which startup components have finished warming up.
+
+    The /ready probe reports ready only once every registered component
+    has been marked ready; /health stays a plain liveness check.
+    """
+
+    def __init__(self):
+        self.components: Dict[str, Dict[str, Any]] = {}
+
+    def register(self, *names: str):
+        """Register components that must warm up before the app is ready"""
+        for name in names:
+            self.components[name] = {"ready": False, "detail": None}
+
+    def mark_ready(self, name: str, detail: Optional[Any] = None):
+        self.components[name] = {"ready": True, "detail": detail}
+
+    def mark_failed(self, name: str, error: str):
+        self.components[name] = {"ready": False, "detail": error}
+
+    @property
+    def is_ready(self) -> bool:
+        return bool(self.components) and all(c["ready"] for c in self.components.values())
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "ready": self.is_ready,
+            "components": self.components
+        }
+
+
+readiness = ReadinessState()
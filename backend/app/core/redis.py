@@ -0,0 +1,14 @@
+"""Redis connection management"""
+
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+
+
+# Shared client; the underlying connection pool connects lazily
+redis_client = aioredis.from_url(settings.REDIS_URL, decode_responses=True)
+
+
+def get_redis() -> aioredis.Redis:
+    """Get the shared Redis client"""
+    return redis_client
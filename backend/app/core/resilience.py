@@ -0,0 +1,245 @@
+"""Circuit breakers and hedged requests for external services"""
+
+from typing import Dict, List, Optional, Any, Callable, Awaitable, TypeVar
+from collections import deque
+from contextlib import asynccontextmanager
+import asyncio
+import time
+import structlog
+
+from prometheus_client import Counter, Gauge
+
+from app.core.config import settings
+from app.core.exceptions import CircuitOpenException
+
+logger = structlog.get_logger()
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+STATE = Gauge("circuit_state", "Circuit breaker state (0 closed, 1 half-open, 2 open)", ["circuit"])
+REJECTED = Counter("circuit_rejected_total", "Calls failed fast by an open circuit", ["circuit"])
+HEDGES = Counter("hedged_requests_total", "Second attempts sent for slow idempotent reads", ["operation", "result"])  # won, lost
+
+# Transport failures of httpx (TransportError) and openai (APIConnectionError, APITimeoutError)
+_TRANSIENT_TYPES = {"TimeoutError", "TransportError", "APIConnectionError", "APITimeoutError"}
+
+
+def is_transient(error: BaseException) -> bool:
+    """429, 5xx, timeouts and connection errors: the service is struggling, the request may be fine"""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    if status is not None:
+        return status == 429 or status >= 500
+    return any(cls.__name__ in _TRANSIENT_TYPES for cls in type(error).__mro__)
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker for one external endpoint.
+
+    Closed: calls pass and their outcomes fill a window of the last
+    CIRCUIT_WINDOW calls; once it holds CIRCUIT_MIN_CALLS outcomes and
+    at least CIRCUIT_FAILURE_RATE of them are transient failures, the
+    circuit opens. Open: calls fail at once with CircuitOpenException for
+    CIRCUIT_OPEN_SECONDS. Half-open: up to CIRCUIT_HALF_OPEN_PROBES calls
+    are let through; a success closes the circuit, a failure opens it
+    again. Client errors (4xx other than 429) count as successes, since
+    the service answered.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.state = CLOSED
+        self._outcomes: deque = deque(maxlen=settings.CIRCUIT_WINDOW)
+        self._opened_at = 0.0
+        self._probes = 0
+        self.stats = {"calls": 0, "failures": 0, "rejected": 0, "opened": 0}
+        self.logger = logger.bind(component="circuit_breaker", circuit=name)
+        STATE.labels(name).set(0)
+
+    def _set_state(self, state: str):
+        self.state = state
+        STATE.labels(self.name).set({CLOSED: 0, HALF_OPEN: 1, OPEN: 2}[state])
+
+    @property
+    def retry_after(self) -> float:
+        return max(0.0, self._opened_at + settings.CIRCUIT_OPEN_SECONDS - time.monotonic())
+
+    def allow(self):
+        """Admit one call or raise CircuitOpenException; pair with record() or cancel()"""
+        if self.state == OPEN:
+            if self.retry_after > 0:
+                self.stats["rejected"] += 1
+                REJECTED.labels(self.name).inc()
+                raise CircuitOpenException(self.name, self.retry_after)
+            self._set_state(HALF_OPEN)
+            self._probes = 0
+        if self.state == HALF_OPEN:
+            if self._probes >= settings.CIRCUIT_HALF_OPEN_PROBES:
+                self.stats["rejected"] += 1
+                REJECTED.labels(self.name).inc()
+                raise CircuitOpenException(self.name, settings.CIRCUIT_OPEN_SECONDS)
+            self._probes += 1
+        self.stats["calls"] += 1
+
+    def record(self, success: bool):
+        if not success:
+            self.stats["failures"] += 1
+        if self.state == HALF_OPEN:
+            self._probes = max(0, self._probes - 1)
+            if success:
+                self._outcomes.clear()
+                self._set_state(CLOSED)
+                self.logger.info("Circuit closed")
+            else:
+                self._open()
+            return
+        if self.state == OPEN:
+            # Outcome of a call admitted before the circuit opened
+            return
+
+        self._outcomes.append(success)
+        failures = self._outcomes.count(False)
+        if (
+            len(self._outcomes) >= settings.CIRCUIT_MIN_CALLS
+            and failures >= settings.CIRCUIT_FAILURE_RATE * len(self._outcomes)
+        ):
+            self._open()
+
+    def cancel(self):
+        """The admitted call was abandoned (e.g. a lost hedge) without an outcome"""
+        if self.state == HALF_OPEN:
+            self._probes = max(0, self._probes - 1)
+
+    def _open(self):
+        self._set_state(OPEN)
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        self.stats["opened"] += 1
+        self.logger.warning("Circuit opened", open_seconds=settings.CIRCUIT_OPEN_SECONDS)
+
+    @asynccontextmanager
+    async def guard(self):
+        """async with breaker.guard(): call the service (exceptions are classified by is_transient)"""
+        self.allow()
+        try:
+            yield
+        except (asyncio.CancelledError, GeneratorExit):
+            self.cancel()
+            raise
+        except Exception as e:
+            self.record(not is_transient(e))
+            raise
+        else:
+            self.record(True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "circuit": self.name,
+            "state": self.state,
+            "retry_after_seconds": round(self.retry_after, 1) if self.state == OPEN else 0.0,
+            "window_failures": self._outcomes.count(False),
+            "window_calls": len(self._outcomes),
+            **self.stats,
+        }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def circuit_breaker(name: str) -> CircuitBreaker:
+    """The process-wide breaker for an endpoint, shared by every client instance"""
+    breaker = _breakers.get(name)
+    if breaker is None:
+        breaker = _breakers[name] = CircuitBreaker(name)
+    return breaker
+
+
+class _Hedging:
+    """Latency history and hedge budget of one operation"""
+
+    def __init__(self, operation: str):
+        self.operation = operation
+        self.latencies: deque = deque(maxlen=settings.HEDGE_LATENCY_SAMPLES)
+        self.stats = {"calls": 0, "hedged": 0, "hedge_won": 0}
+
+    def delay(self) -> float:
+        """p95 of recent attempt latencies; the fixed default until enough samples exist"""
+        if len(self.latencies) < settings.HEDGE_MIN_SAMPLES:
+            return settings.HEDGE_DEFAULT_DELAY_SECONDS
+        ordered = sorted(self.latencies)
+        return max(settings.HEDGE_MIN_DELAY_SECONDS, ordered[int(len(ordered) * 0.95)])
+
+    def may_hedge(self) -> bool:
+        # Under a general slowdown every call passes p95; the budget keeps hedges from doubling load
+        return self.stats["hedged"] < settings.HEDGE_MAX_RATIO * self.stats["calls"] + 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        latencies = sorted(self.latencies)
+        return {
+            "operation": self.operation,
+            **self.stats,
+            "delay_seconds": round(self.delay(), 3),
+            "latency_p50_seconds": round(latencies[len(latencies) // 2], 3) if latencies else None,
+        }
+
+
+_hedging: Dict[str, _Hedging] = {}
+
+
+async def hedged(operation: str, attempt: Callable[[], Awaitable[T]]) -> T:
+    """Run an idempotent read, sending a second attempt if the first outlives the p95 delay.
+
+    The first attempt to succeed wins and the other is cancelled. Only for
+    calls that are safe to repeat: reads, never writes.
+    """
+    hedging = _hedging.get(operation)
+    if hedging is None:
+        hedging = _hedging[operation] = _Hedging(operation)
+    hedging.stats["calls"] += 1
+
+    async def timed() -> T:
+        started = time.monotonic()
+        try:
+            return await attempt()
+        except asyncio.CancelledError:
+            # A cancelled attempt ran at least this long: keep the tail visible
+            hedging.latencies.append(time.monotonic() - started)
+            raise
+        else:
+            hedging.latencies.append(time.monotonic() - started)
+
+    pending = {asyncio.ensure_future(timed())}
+    hedge: Optional[asyncio.Future] = None
+    try:
+        done, _ = await asyncio.wait(pending, timeout=hedging.delay())
+        if not done and settings.HEDGE_ENABLED and hedging.may_hedge():
+            hedging.stats["hedged"] += 1
+            hedge = asyncio.ensure_future(timed())
+            pending.add(hedge)
+
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if hedge is not None:
+                        hedging.stats["hedge_won"] += task is hedge
+                        HEDGES.labels(operation, "won" if task is hedge else "lost").inc()
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def resilience_stats() -> Dict[str, List[Dict[str, Any]]]:
+    return {
+        "circuits": [breaker.get_stats() for breaker in _breakers.values()],
+        "hedging": [hedging.get_stats() for hedging in _hedging.values()],
+    }
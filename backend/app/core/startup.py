@@ -0,0 +1,94 @@
+"""Startup warm-up of connection pools and agents"""
+
+import asyncio
+import time
+import uuid
+import structlog
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import engine
+from app.core.readiness import readiness
+from app.core.redis import get_redis
+from app.agents.base import agent_manager
+from app.models.database import Listing
+from app.services.products import ProductService
+from app.services.product_neighbors import ProductNeighborService
+
+logger = structlog.get_logger()
+
+# Placeholder key used to run the hot queries once per connection; it
+# matches no row, the point is to get the statements prepared
+_WARM_UP_ID = uuid.UUID(int=0)
+
+
+async def _prepare_hot_statements(session: AsyncSession):
+    """Run the latency-sensitive queries so asyncpg caches their prepared statements.
+
+    The statements are issued through the same service code as the
+    endpoints, so the SQL text (the prepared-statement cache key) matches.
+    """
+    await ProductService(session).get_product(_WARM_UP_ID)
+    await ProductNeighborService(session).get_neighbors(_WARM_UP_ID, 10)
+    await session.get(Listing, _WARM_UP_ID)
+
+
+async def _warm_connection():
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+        async with AsyncSession(bind=conn) as session:
+            await _prepare_hot_statements(session)
+            await session.rollback()
+
+
+async def warm_up_postgres():
+    """Open DATABASE_POOL_SIZE connections in parallel and prepare hot statements.
+
+    All connections are held open at the same time so each one is a
+    distinct pool slot; they return to the pool when the tasks finish.
+    """
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(_warm_connection() for _ in range(settings.DATABASE_POOL_SIZE)))
+    except Exception as e:
+        readiness.mark_failed("postgres", str(e))
+        raise
+
+    elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+    readiness.mark_ready("postgres", detail={
+        "connections": settings.DATABASE_POOL_SIZE,
+        "warm_up_ms": elapsed_ms
+    })
+    logger.info(
+        "Database pool warmed",
+        connections=settings.DATABASE_POOL_SIZE,
+        warm_up_ms=elapsed_ms
+    )
+
+
+async def warm_up_redis():
+    """Connect to Redis and mark it ready"""
+    start = time.perf_counter()
+    try:
+        await get_redis().ping()
+        readiness.mark_ready("redis", detail={
+            "ping_ms": round((time.perf_counter() - start) * 1000, 1)
+        })
+    except Exception as e:
+        logger.error("Redis connection failed", error=str(e))
+        readiness.mark_failed("redis", str(e))
+
+
+async def warm_up_agents():
+    """Import and start the enabled agents, then mark them ready"""
+    try:
+        results = await agent_manager.load_agents(settings.ENABLED_AGENTS)
+        failed = [agent_id for agent_id, ok in results.items() if not ok]
+        if failed:
+            logger.warning("Some agents failed to start", agents=failed)
+        readiness.mark_ready("agents", detail=results)
+    except Exception as e:
+        logger.error("Agent warm-up failed", error=str(e))
+        readiness.mark_failed("agents", str(e))
@@ -6,19 +6,32 @@ Multi-marketplace AI-powered e-commerce platform
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from contextlib import asynccontextmanager
+import asyncio
 import structlog
 import time
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
 from app.core.config import settings
-from app.core.database import engine
+from app.core.database import replica_router, dispose_engines
+from app.core.readiness import readiness
+from app.core.startup import warm_up_postgres, warm_up_redis, warm_up_agents
+from app.agents.base import agent_manager
+from app.services.listing_counters import listing_counters
+from app.services.sales_rollup import sales_rollup
+from app.services.inventory import stock_reconciler
+from app.services.stock_propagation import stock_propagator
+from app.services.partitions import partition_manager
+from app.services.product_neighbors import neighbor_refresher
+from app.services.image_pipeline import image_pipeline
 from app.api.v1.router import api_router
 from app.core.exceptions import (
     ValidationException,
     AuthenticationException,
     MarketplaceException,
-    AIAgentException
+    AIAgentException,
+    CircuitOpenException
 )
 
 # Configure structured logging
@@ -45,25 +58,41 @@ async def lifespan(app: FastAPI):
     """Application lifespan events"""
     # Startup
     logger.info("Starting Goodlink Germany API", version=settings.VERSION)
+    readiness.register("postgres", "redis", "agents")
     
-    # Initialize database connections
+    # Fill the database pool before serving; fail fast if Postgres is down
     try:
-        # Test database connection
-        async with engine.begin() as conn:
-            await conn.execute("SELECT 1")
-        logger.info("Database connection established")
+        await warm_up_postgres()
     except Exception as e:
         logger.error("Database connection failed", error=str(e))
         raise
+    await replica_router.start()
+    await listing_counters.start()
+    await sales_rollup.start()
+    await stock_reconciler.start()
+    await stock_propagator.start()
+    await partition_manager.start()
+    await neighbor_refresher.start()
     
-    # Initialize Redis connection
-    # Initialize AI services
-    # Start background tasks
+    # Redis and agents warm up in the background; /ready reports 503 until
+    # every dependency is ready
+    warm_up = asyncio.gather(warm_up_redis(), warm_up_agents())
     
     yield
     
     # Shutdown
     logger.info("Shutting down Goodlink Germany API")
+    warm_up.cancel()
+    await listing_counters.stop()
+    await sales_rollup.stop()
+    await stock_reconciler.stop()
+    await stock_propagator.stop()
+    await partition_manager.stop()
+    await neighbor_refresher.stop()
+    image_pipeline.close()
+    for agent_id in list(agent_manager.agents):
+        await agent_manager.unregister_agent(agent_id)
+    await dispose_engines()
 
 
 def create_application() -> FastAPI:
@@ -151,6 +180,15 @@ def create_application() -> FastAPI:
             content={"error": "AI Agent Error", "detail": str(exc)}
         )
     
+    @app.exception_handler(CircuitOpenException)
+    async def circuit_open_exception_handler(request: Request, exc: CircuitOpenException):
+        logger.warning("Circuit open", error=str(exc), path=request.url.path)
+        return JSONResponse(
+            status_code=503,
+            content={"error": "Service Unavailable", "detail": str(exc)},
+            headers={"Retry-After": str(max(1, round(exc.retry_after)))}
+        )
+    
     # Health check endpoint
     @app.get("/health")
     async def health_check():
@@ -160,6 +198,20 @@ def create_application() -> FastAPI:
             "timestamp": time.time()
         }
     
+    # Readiness probe: ready only after pools and agents are warm
+    @app.get("/ready")
+    async def readiness_check():
+        report = readiness.report()
+        return JSONResponse(
+            status_code=200 if report["ready"] else 503,
+            content=report
+        )
+    
+    # Prometheus metrics (translation memory hit rates, ...)
+    @app.get("/metrics")
+    async def metrics():
+        return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+    
     # Include API router
     app.include_router(api_router, prefix="/api/v1")
     
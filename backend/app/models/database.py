@@ -1,12 +1,12 @@
 """Database models for Goodlink Germany"""
 
 from sqlalchemy import (
-    Column, Integer, String, Text, JSON, DateTime, Boolean, 
-    Float, ForeignKey, Index, Enum as SQLEnum
+    Column, Integer, String, Text, JSON, DateTime, Date, Boolean, 
+    BigInteger, Float, ForeignKey, ForeignKeyConstraint, Index, Computed, Enum as SQLEnum
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from sqlalchemy.dialects.postgresql import UUID, ARRAY
+from sqlalchemy.dialects.postgresql import UUID, ARRAY, JSONB
 from pgvector.sqlalchemy import Vector
 import uuid
 import enum
@@ -45,6 +45,12 @@ class ListingStatus(enum.Enum):
     SUSPENDED = "suspended"
 
 
+class ReservationStatus(enum.Enum):
+    HELD = "held"
+    COMMITTED = "committed"
+    RELEASED = "released"
+
+
 class OrderStatus(enum.Enum):
     PENDING = "pending"
     CONFIRMED = "confirmed"
@@ -63,8 +69,8 @@ class Product(Base):
     category = Column(String(100), nullable=False)
     title = Column(String(500), nullable=False)
     description = Column(Text)
-    specifications = Column(JSON)  # Technical specs, dimensions, etc.
-    attributes = Column(JSON)  # Flexible product attributes
+    specifications = Column(JSONB)  # Technical specs, dimensions, etc.
+    attributes = Column(JSONB)  # Flexible product attributes
     images = Column(ARRAY(String))  # Image URLs
     weight = Column(Float)  # kg
     dimensions = Column(JSON)  # length, width, height in cm
@@ -91,6 +97,8 @@ class Product(Base):
     
     # Vector embedding for AI similarity search
     embedding = Column(Vector(1536))  # OpenAI ada-002 embedding size
+    embedding_updated_at = Column(DateTime(timezone=True))
+    neighbors_updated_at = Column(DateTime(timezone=True))  # Last top-K neighbor recompute
     
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -104,10 +112,93 @@ class Product(Base):
     __table_args__ = (
         Index("ix_products_brand_category", "brand", "category"),
         Index("ix_products_status_updated", "status", "updated_at"),
-        Index("ix_products_embedding", "embedding", postgresql_using="ivfflat"),
+        # Containment (@>) filters on attributes; see app.services.attribute_filters
+        Index(
+            "ix_products_attributes",
+            "attributes",
+            postgresql_using="gin",
+            postgresql_ops={"attributes": "jsonb_path_ops"}
+        ),
+        Index(
+            "ix_products_specifications",
+            "specifications",
+            postgresql_using="gin",
+            postgresql_ops={"specifications": "jsonb_path_ops"}
+        ),
+        # Rebuilt and re-clustered by app.services.vector_index.VectorIndexManager
+        Index(
+            "ix_products_embedding",
+            "embedding",
+            postgresql_using="ivfflat",
+            postgresql_with={"lists": 100},
+            postgresql_ops={"embedding": "vector_cosine_ops"}
+        ),
+    )
+
+
+class ProductNeighbor(Base):
+    """Precomputed top-K similar products, maintained by ProductNeighborService"""
+    __tablename__ = "product_neighbors"
+    
+    product_id = Column(UUID(as_uuid=True), ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    rank = Column(Integer, primary_key=True)  # 1 = most similar
+    neighbor_id = Column(UUID(as_uuid=True), ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    similarity = Column(Float, nullable=False)  # Cosine similarity
+    computed_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        Index("ix_product_neighbors_neighbor", "neighbor_id"),
     )
 
 
+class ProductAsset(Base):
+    """Streamed product asset (lifestyle image, video, manual), stored via app.services.storage"""
+    __tablename__ = "product_assets"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    product_id = Column(UUID(as_uuid=True), ForeignKey("products.id", ondelete="CASCADE"), nullable=False, index=True)
+    filename = Column(String(255), nullable=False)
+    storage_key = Column(String(500), nullable=False, unique=True)
+    url = Column(String(1000), nullable=False)
+    content_type = Column(String(100), nullable=False)
+    size = Column(BigInteger, nullable=False)
+    sha256 = Column(String(64), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class ImageFingerprint(Base):
+    """Perceptual hashes of a product image, for near-duplicate lookups (app.services.image_index)"""
+    __tablename__ = "image_fingerprints"
+    
+    content_hash = Column(String(64), primary_key=True)  # SHA-256 of the image bytes
+    phash = Column(BigInteger, nullable=False)  # 64-bit hashes stored as signed bigint
+    dhash = Column(BigInteger, nullable=False)
+    
+    # pHash split into 16-bit chunks; each is indexed for multi-index hashing
+    phash_0 = Column(Integer, nullable=False, index=True)
+    phash_1 = Column(Integer, nullable=False, index=True)
+    phash_2 = Column(Integer, nullable=False, index=True)
+    phash_3 = Column(Integer, nullable=False, index=True)
+    
+    width = Column(Integer, nullable=False)
+    height = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class ImageFingerprintUrl(Base):
+    """Where an image was seen; several URLs can share one fingerprint (app.services.image_index)"""
+    __tablename__ = "image_fingerprint_urls"
+    
+    url = Column(String(1000), primary_key=True)
+    # NULL when the last fetch failed; error says why
+    content_hash = Column(
+        String(64), ForeignKey("image_fingerprints.content_hash", ondelete="CASCADE"), index=True
+    )
+    product_id = Column(UUID(as_uuid=True), ForeignKey("products.id", ondelete="SET NULL"), index=True)
+    error = Column(String(500))
+    checked_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
 class Listing(Base):
     __tablename__ = "listings"
     
@@ -132,7 +223,7 @@ class Listing(Base):
     currency = Column(String(3), default="EUR")
     
     # Marketplace-specific attributes
-    marketplace_data = Column(JSON)  # Category-specific attributes
+    marketplace_data = Column(JSONB)  # Category-specific attributes
     compliance_flags = Column(ARRAY(String))
     
     # Status & Performance
@@ -147,6 +238,7 @@ class Listing(Base):
     errors = Column(ARRAY(String))
     last_sync_at = Column(DateTime(timezone=True))
     sync_status = Column(String(50))
+    synced_field_hashes = Column(JSONB)  # ListingData field hashes last sent to the marketplace (delta updates)
     
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -161,9 +253,24 @@ class Listing(Base):
         Index("ix_listings_marketplace_external", "marketplace", "external_id"),
         Index("ix_listings_status_marketplace", "status", "marketplace"),
         Index("ix_listings_product_marketplace", "product_id", "marketplace"),
+        Index(
+            "ix_listings_marketplace_data",
+            "marketplace_data",
+            postgresql_using="gin",
+            postgresql_ops={"marketplace_data": "jsonb_path_ops"}
+        ),
     )
 
 
+class ListingCounterFlush(Base):
+    """Applied counter flushes; makes replayed flushes a no-op (app.services.listing_counters)"""
+    __tablename__ = "listing_counter_flushes"
+    
+    flush_id = Column(String(36), primary_key=True)
+    listings = Column(Integer, nullable=False)
+    applied_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+
 class Inventory(Base):
     __tablename__ = "inventory"
     
@@ -197,7 +304,40 @@ class Inventory(Base):
     )
 
 
+class InventoryReservation(Base):
+    """Stock held for an order line in one warehouse (app.services.inventory)"""
+    __tablename__ = "inventory_reservations"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    order_ref = Column(String(100), nullable=False)  # Order or checkout the stock is held for
+    inventory_id = Column(UUID(as_uuid=True), ForeignKey("inventory.id"), nullable=False)
+    product_id = Column(UUID(as_uuid=True), ForeignKey("products.id"), nullable=False)
+    warehouse = Column(String(100), nullable=False)
+    quantity = Column(Integer, nullable=False)
+    status = Column(SQLEnum(ReservationStatus), nullable=False, default=ReservationStatus.HELD)
+    
+    # Timestamps
+    expires_at = Column(DateTime(timezone=True))  # Held reservations are released after this
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    
+    __table_args__ = (
+        Index("ix_inventory_reservations_order_ref", "order_ref"),
+        Index(
+            "ix_inventory_reservations_held_expiry",
+            "expires_at",
+            postgresql_where=(status == ReservationStatus.HELD)
+        ),
+    )
+
+
 class Order(Base):
+    """Orders, range-partitioned by month on placed_at (app.services.partitions).
+
+    placed_at is part of the primary key because PostgreSQL requires the
+    partition key in every unique constraint; filter on it so queries only
+    touch the partitions they need.
+    """
     __tablename__ = "orders"
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -224,14 +364,14 @@ class Order(Base):
     carrier = Column(String(100))
     
     # Timestamps
-    placed_at = Column(DateTime(timezone=True), nullable=False)
+    placed_at = Column(DateTime(timezone=True), primary_key=True)
     shipped_at = Column(DateTime(timezone=True))
     delivered_at = Column(DateTime(timezone=True))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Marketplace-specific data
-    marketplace_data = Column(JSON)
+    marketplace_data = Column(JSONB)
     
     # Relationships
     items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan")
@@ -239,14 +379,24 @@ class Order(Base):
     __table_args__ = (
         Index("ix_orders_marketplace_external", "marketplace", "external_order_id"),
         Index("ix_orders_status_placed", "status", "placed_at"),
+        Index("ix_orders_changed_at", func.coalesce(updated_at, created_at)),
+        Index(
+            "ix_orders_marketplace_data",
+            "marketplace_data",
+            postgresql_using="gin",
+            postgresql_ops={"marketplace_data": "jsonb_path_ops"}
+        ),
+        {"postgresql_partition_by": "RANGE (placed_at)"},
     )
 
 
 class OrderItem(Base):
+    """Order lines, partitioned like orders on the parent's placed_at"""
     __tablename__ = "order_items"
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    order_id = Column(UUID(as_uuid=True), ForeignKey("orders.id"), nullable=False)
+    order_id = Column(UUID(as_uuid=True), nullable=False)
+    placed_at = Column(DateTime(timezone=True), primary_key=True)  # Copied from the order
     product_id = Column(UUID(as_uuid=True), ForeignKey("products.id"), nullable=False)
     
     # Item details
@@ -264,9 +414,17 @@ class OrderItem(Base):
     # Relationships
     order = relationship("Order", back_populates="items")
     product = relationship("Product", back_populates="order_items")
+    
+    __table_args__ = (
+        ForeignKeyConstraint(["order_id", "placed_at"], ["orders.id", "orders.placed_at"]),
+        Index("ix_order_items_order", "order_id"),
+        Index("ix_order_items_product_placed", "product_id", "placed_at"),
+        {"postgresql_partition_by": "RANGE (placed_at)"},
+    )
 
 
 class Review(Base):
+    """Reviews, range-partitioned by month on review_date"""
     __tablename__ = "reviews"
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -282,13 +440,15 @@ class Review(Base):
     sentiment = Column(Float)  # -1 to 1
     aspects = Column(JSON)  # Extracted aspects and sentiments
     language = Column(String(5))
+    content_hash = Column(String(32), Computed("md5(coalesce(title, '') || E'\\n' || coalesce(body, ''))", persisted=True))
+    analyzed_hash = Column(String(32))  # content_hash at the last analysis, see app.services.review_mining
     
     # Metadata
     verified_purchase = Column(Boolean, default=False)
     helpful_votes = Column(Integer, default=0)
     
     # Timestamps
-    review_date = Column(DateTime(timezone=True), nullable=False)
+    review_date = Column(DateTime(timezone=True), primary_key=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Marketplace data
@@ -301,9 +461,78 @@ class Review(Base):
     __table_args__ = (
         Index("ix_reviews_listing_rating", "listing_id", "rating"),
         Index("ix_reviews_sentiment", "sentiment"),
+        Index("ix_reviews_created_at", "created_at"),
+        Index(
+            "ix_reviews_pending_analysis",
+            "review_date",
+            postgresql_where=(sentiment.is_(None) | analyzed_hash.is_distinct_from(content_hash))
+        ),
+        {"postgresql_partition_by": "RANGE (review_date)"},
     )
 
 
+class SalesDaily(Base):
+    """Daily rollup per product and marketplace, maintained by app.services.sales_rollup"""
+    __tablename__ = "sales_daily"
+    
+    product_id = Column(UUID(as_uuid=True), ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    marketplace = Column(SQLEnum(MarketplaceType), primary_key=True)
+    day = Column(Date, primary_key=True)  # Local day in ANALYTICS_TIMEZONE
+    
+    # From orders and order_items (cancelled and refunded orders excluded)
+    units = Column(Integer, nullable=False, server_default="0")
+    revenue = Column(Float, nullable=False, server_default="0")
+    orders = Column(Integer, nullable=False, server_default="0")
+    
+    # From listing counters
+    views = Column(Integer, nullable=False, server_default="0")
+    clicks = Column(Integer, nullable=False, server_default="0")
+    
+    # From reviews
+    review_count = Column(Integer, nullable=False, server_default="0")
+    rating_sum = Column(Integer, nullable=False, server_default="0")
+    
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class RollupWatermark(Base):
+    """Change-scan position for incremental rollups"""
+    __tablename__ = "rollup_watermarks"
+    
+    name = Column(String(50), primary_key=True)
+    value = Column(DateTime(timezone=True), nullable=False)
+
+
+class DemandForecast(Base):
+    """Latest demand forecast and reorder suggestion per product, written by app.services.forecasting"""
+    __tablename__ = "demand_forecasts"
+    
+    product_id = Column(UUID(as_uuid=True), ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    model = Column(String(20), nullable=False)  # ses, sba
+    daily_demand = Column(Float, nullable=False)
+    demand_std = Column(Float, nullable=False)  # Of the one-step-ahead error
+    reorder_point = Column(Integer, nullable=False)
+    order_quantity = Column(Integer, nullable=False)  # Suggested, 0 when above the reorder point
+    history_days = Column(Integer, nullable=False)
+    computed_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        Index("ix_demand_forecasts_reorder", "order_quantity", postgresql_where=(order_quantity > 0)),
+    )
+
+
+class TranslationMemoryEntry(Base):
+    """Translated segment, keyed by the hash of its normalized source; see app.services.translation_memory"""
+    __tablename__ = "translation_memory"
+    
+    source_lang = Column(String(5), primary_key=True)
+    target_lang = Column(String(5), primary_key=True)
+    source_hash = Column(String(32), primary_key=True)
+    source_text = Column(Text, nullable=False)
+    target_text = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
 class BlogPost(Base):
     __tablename__ = "blog_posts"
     
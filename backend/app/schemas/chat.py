@@ -0,0 +1,25 @@
+"""Pydantic schemas for the sales chat"""
+
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+
+class ChatRequest(BaseModel):
+    """Schema for a customer message; a new conversation starts without conversation_id"""
+    message: str = Field(..., min_length=1)
+    conversation_id: Optional[str] = Field(None, max_length=100)
+    language: Optional[str] = Field(None, pattern="^(en|de|zh)$")
+
+
+class ChatProduct(BaseModel):
+    id: str
+    sku: str
+    title: str
+    price: Optional[float] = None
+    similarity: float
+
+
+class ChatResponse(BaseModel):
+    conversation_id: str
+    reply: str
+    products: List[ChatProduct]
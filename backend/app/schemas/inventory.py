@@ -0,0 +1,54 @@
+"""Pydantic schemas for inventory and reservations"""
+
+from pydantic import BaseModel, Field
+from typing import List, Optional
+import uuid
+
+
+class ReservationLine(BaseModel):
+    """One order line to reserve"""
+    product_id: uuid.UUID
+    quantity: int = Field(..., gt=0)
+
+
+class ReservationRequest(BaseModel):
+    """Schema for reserving stock for an order"""
+    order_ref: str = Field(..., min_length=1, max_length=100)
+    lines: List[ReservationLine] = Field(..., min_length=1, max_length=500)
+    ttl_seconds: Optional[int] = Field(None, gt=0, le=86400)
+
+
+class ReservationResponse(BaseModel):
+    """One reserved line"""
+    id: uuid.UUID
+    product_id: uuid.UUID
+    warehouse: str
+    quantity: int
+
+
+class ReservationResult(BaseModel):
+    """Schema for reservation results; nothing is held unless reserved is true"""
+    order_ref: str
+    reserved: bool
+    reservations: List[ReservationResponse]
+    shortages: List[uuid.UUID]
+
+
+class StockAdjustment(BaseModel):
+    """Schema for receiving or correcting on-hand stock"""
+    warehouse: str = "main"
+    delta: int
+
+
+class WarehouseStock(BaseModel):
+    warehouse: str
+    quantity: int
+    reserved: int
+    available: int
+
+
+class ProductAvailability(BaseModel):
+    """Schema for per-warehouse availability"""
+    product_id: uuid.UUID
+    available: int
+    warehouses: List[WarehouseStock]
@@ -7,6 +7,7 @@ import uuid
 from enum import Enum
 
 from app.models.database import MarketplaceType, ListingStatus
+from app.core.config import settings
 
 
 class ListingBase(BaseModel):
@@ -148,11 +149,41 @@ class BulkListingOperation(BaseModel):
     def validate_listing_ids(cls, v):
         if len(v) == 0:
             raise ValueError('At least one listing ID is required')
-        if len(v) > 500:
-            raise ValueError('Maximum 500 listings per bulk operation')
+        if len(v) > settings.BULK_LISTING_MAX_IDS:
+            raise ValueError(
+                f'Maximum {settings.BULK_LISTING_MAX_IDS} listings per bulk operation'
+            )
         return v
 
 
+class BulkListingResult(BaseModel):
+    """Outcome of a bulk operation for a single listing"""
+    listing_id: uuid.UUID
+    success: bool
+    error: Optional[str] = None
+    data: Optional[Dict[str, Any]] = None
+
+
+class BulkListingJob(BaseModel):
+    """Progress and per-listing results of a bulk listing operation"""
+    job_id: str
+    operation_type: BulkListingOperationType
+    status: str = "pending"  # pending, running, completed, failed
+    total: int
+    processed: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    results: Dict[str, BulkListingResult] = Field(default_factory=dict)
+    error_message: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.now)
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+
+    @property
+    def progress_percentage(self) -> int:
+        return int(self.processed / self.total * 100) if self.total else 100
+
+
 class ListingPerformance(BaseModel):
     """Schema for listing performance metrics"""
     listing_id: uuid.UUID
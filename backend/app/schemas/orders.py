@@ -0,0 +1,58 @@
+"""Pydantic schemas for order management"""
+
+from pydantic import BaseModel
+from typing import List, Optional, Dict, Any
+from datetime import datetime
+import uuid
+
+from app.models.database import MarketplaceType, OrderStatus
+
+
+class OrderItemResponse(BaseModel):
+    """Schema for order line responses"""
+    id: uuid.UUID
+    product_id: uuid.UUID
+    quantity: int
+    unit_price: float
+    total_price: float
+    external_item_id: Optional[str] = None
+    
+    class Config:
+        from_attributes = True
+
+
+class OrderResponse(BaseModel):
+    """Schema for order responses"""
+    id: uuid.UUID
+    marketplace: MarketplaceType
+    external_order_id: str
+    customer_name: Optional[str] = None
+    total: float
+    tax: Optional[float] = None
+    shipping_cost: Optional[float] = None
+    currency: Optional[str] = None
+    status: Optional[OrderStatus] = None
+    tracking_number: Optional[str] = None
+    carrier: Optional[str] = None
+    placed_at: datetime
+    shipped_at: Optional[datetime] = None
+    delivered_at: Optional[datetime] = None
+    marketplace_data: Optional[Dict[str, Any]] = None
+    
+    class Config:
+        from_attributes = True
+
+
+class OrderDetailResponse(OrderResponse):
+    """Schema for a single order with its lines"""
+    items: List[OrderItemResponse] = []
+
+
+class OrderList(BaseModel):
+    """Schema for order list responses"""
+    items: List[OrderResponse]
+    total: int
+    skip: int
+    limit: int
+    since: datetime
+    until: datetime
@@ -0,0 +1,43 @@
+"""Pydantic schemas for repricing"""
+
+from pydantic import BaseModel, Field
+from typing import List, Optional
+import uuid
+
+from app.models.database import MarketplaceType
+
+
+class RepriceRequest(BaseModel):
+    """Schema for a repricing run; unset parameters come from settings"""
+    marketplace: MarketplaceType
+    strategy: Optional[str] = None
+    dry_run: bool = False
+    target_margin: Optional[float] = Field(None, ge=0, le=5)
+    min_margin: Optional[float] = Field(None, ge=0, le=5)
+    undercut: Optional[float] = Field(None, ge=0)
+    max_change: Optional[float] = Field(None, ge=0, le=1)
+
+
+class PriceChange(BaseModel):
+    listing_id: uuid.UUID
+    sku: str
+    old_price: float
+    new_price: float
+
+
+class RepriceResult(BaseModel):
+    """Schema for repricing results; changes holds a sample on dry runs"""
+    marketplace: str
+    strategy: str
+    listings: int
+    changed: int
+    increased: int = 0
+    decreased: int = 0
+    written: Optional[int] = None
+    sent: Optional[int] = None
+    failed: Optional[int] = None
+    changes: Optional[List[PriceChange]] = None
+    load_s: float
+    compute_s: Optional[float] = None
+    write_s: Optional[float] = None
+    feed_s: Optional[float] = None
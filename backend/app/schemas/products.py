@@ -86,6 +86,21 @@ class ProductResponse(ProductBase):
         from_attributes = True
 
 
+class ProductAssetResponse(BaseModel):
+    """Schema for streamed product assets"""
+    id: uuid.UUID
+    product_id: uuid.UUID
+    filename: str
+    url: str
+    content_type: str
+    size: int
+    sha256: str
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+
 class ProductList(BaseModel):
     """Schema for product list responses"""
     items: List[ProductResponse]
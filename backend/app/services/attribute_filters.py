@@ -0,0 +1,52 @@
+"""Attribute filters compiled to indexed JSONB containment queries"""
+
+from typing import Dict, List, Optional, Any
+import json
+
+from app.core.exceptions import ValidationException
+
+
+def parse_attribute_filters(values: Optional[List[str]]) -> Dict[str, Any]:
+    """Parse repeated "key:value" query parameters into a containment document.
+
+    Dotted keys address nested objects ("dimensions.unit:cm"). Values are
+    read as JSON when possible, so "fba:true" and "voltage:12" match
+    booleans and numbers; anything else matches as a string. Repeating a
+    key collects the values into a list, which matches documents whose
+    array contains all of them.
+
+        ["color:red", "fba:true", "dimensions.unit:cm"]
+        -> {"color": "red", "fba": True, "dimensions": {"unit": "cm"}}
+    """
+    document: Dict[str, Any] = {}
+
+    for raw in values or []:
+        key, sep, value = raw.partition(":")
+        key = key.strip()
+        if not sep or not key:
+            raise ValidationException(f"Invalid attribute filter '{raw}', expected key:value")
+
+        try:
+            parsed = json.loads(value)
+        except ValueError:
+            parsed = value
+
+        *parents, leaf = key.split(".")
+        target = document
+        for part in parents:
+            target = target.setdefault(part, {})
+            if not isinstance(target, dict):
+                raise ValidationException(f"Conflicting attribute filter '{raw}'")
+
+        if leaf in target:
+            existing = target[leaf]
+            target[leaf] = (existing if isinstance(existing, list) else [existing]) + [parsed]
+        else:
+            target[leaf] = parsed
+
+    return document
+
+
+def containment_clause(column, document: Dict[str, Any]):
+    """`column @> document`, served by the column's jsonb_path_ops GIN index"""
+    return column.contains(document)
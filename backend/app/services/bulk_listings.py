@@ -0,0 +1,438 @@
+"""Bulk listing execution engine"""
+
+from typing import Dict, List, Optional, Any, Callable, Awaitable
+from datetime import datetime, timezone
+import asyncio
+import uuid
+import structlog
+
+from sqlalchemy import select, update, delete, values, column, func, cast, Numeric
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.exceptions import ValidationException
+from app.models.database import Listing, ListingStatus, MarketplaceType, Product
+from app.adapters.base import ListingData, InventoryUpdate, MarketplaceAdapterFactory
+from app.schemas.listings import (
+    BulkListingOperation,
+    BulkListingOperationType,
+    BulkListingJob,
+    BulkListingResult
+)
+
+logger = structlog.get_logger()
+
+# Jobs are kept in-process for an hour after completion, like agent tasks
+bulk_jobs: Dict[str, BulkListingJob] = {}
+
+
+def _chunks(items: List[Any], size: int):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _values_update(rows: List[Dict[str, Any]], columns: List[str]):
+    """UPDATE listings ... FROM (VALUES ...) for per-row values.
+
+    Column types are taken from the listings table so the asyncpg dialect
+    renders typed bind casts for the VALUES list.
+    """
+    table = Listing.__table__
+    source = values(
+        column("id", table.c.id.type),
+        *[column(name, table.c[name].type) for name in columns],
+        name="v"
+    ).data([tuple(row[name] for name in ["id", *columns]) for row in rows])
+
+    return (
+        update(Listing)
+        .where(Listing.id == source.c.id)
+        .values({name: source.c[name] for name in columns})
+        .execution_options(synchronize_session=False)
+    )
+
+
+class BulkListingEngine:
+    """Executes BulkListingOperation requests.
+
+    Database-side changes go out as set-based statements (one UPDATE per
+    chunk of BULK_DB_CHUNK_SIZE rows, which keeps the bind parameter count
+    under the PostgreSQL limit). Marketplace-side changes are grouped per
+    marketplace, run in parallel across marketplaces and sent through each
+    adapter's bulk methods with bounded concurrency.
+    """
+
+    def __init__(self, session_factory=AsyncSessionLocal):
+        self.session_factory = session_factory
+        self.chunk_size = settings.BULK_DB_CHUNK_SIZE
+        self.logger = logger.bind(component="bulk_listings")
+
+    def create_job(self, operation: BulkListingOperation) -> BulkListingJob:
+        """Register a job for the operation"""
+        job = BulkListingJob(
+            job_id=str(uuid.uuid4()),
+            operation_type=operation.operation_type,
+            total=len(set(operation.listing_ids))
+        )
+        bulk_jobs[job.job_id] = job
+        return job
+
+    def get_job(self, job_id: str) -> Optional[BulkListingJob]:
+        """Get a job by ID"""
+        return bulk_jobs.get(job_id)
+
+    async def run(self, job: BulkListingJob, operation: BulkListingOperation) -> BulkListingJob:
+        """Execute the operation, recording progress on the job"""
+        handlers = {
+            BulkListingOperationType.PUBLISH: self._publish,
+            BulkListingOperationType.UNPUBLISH: self._unpublish,
+            BulkListingOperationType.UPDATE_PRICES: self._update_prices,
+            BulkListingOperationType.SYNC: self._sync,
+            BulkListingOperationType.DELETE: self._delete,
+            BulkListingOperationType.UPDATE_STATUS: self._update_status,
+        }
+
+        job.status = "running"
+        job.started_at = datetime.now()
+        listing_ids = list(dict.fromkeys(operation.listing_ids))
+
+        try:
+            async with self.session_factory() as db:
+                await handlers[operation.operation_type](db, job, listing_ids, operation.parameters or {})
+            job.status = "completed"
+        except Exception as e:
+            job.status = "failed"
+            job.error_message = str(e)
+            self.logger.error("Bulk listing job failed", job_id=job.job_id, error=str(e))
+        finally:
+            job.completed_at = datetime.now()
+            asyncio.create_task(self._cleanup_job(job.job_id, delay=3600))
+
+        self.logger.info(
+            "Bulk listing job finished",
+            job_id=job.job_id,
+            operation=operation.operation_type,
+            succeeded=job.succeeded,
+            failed=job.failed
+        )
+        return job
+
+    # Operations
+    async def _update_status(self, db: AsyncSession, job: BulkListingJob,
+                             listing_ids: List[uuid.UUID], params: Dict[str, Any]):
+        try:
+            status = ListingStatus(params.get("status"))
+        except ValueError:
+            raise ValidationException(f"Invalid listing status: {params.get('status')}")
+
+        for chunk in _chunks(listing_ids, self.chunk_size):
+            result = await db.execute(
+                update(Listing)
+                .where(Listing.id.in_(chunk))
+                .values(status=status)
+                .returning(Listing.id)
+            )
+            updated = {row.id for row in result}
+            await db.commit()
+            for listing_id in chunk:
+                self._record(job, listing_id, listing_id in updated,
+                             None if listing_id in updated else "Listing not found")
+
+    async def _update_prices(self, db: AsyncSession, job: BulkListingJob,
+                             listing_ids: List[uuid.UUID], params: Dict[str, Any]):
+        prices = {uuid.UUID(str(k)): float(v) for k, v in (params.get("prices") or {}).items()}
+        adjustment = params.get("adjustment_percent")
+        if not prices and adjustment is None:
+            raise ValidationException("update_prices requires 'prices' or 'adjustment_percent'")
+
+        updated = set()
+        for chunk in _chunks(listing_ids, self.chunk_size):
+            if prices:
+                rows = [{"id": i, "price": prices[i]} for i in chunk if i in prices]
+                if not rows:
+                    continue
+                statement = _values_update(rows, ["price"])
+            else:
+                factor = 1 + float(adjustment) / 100
+                statement = (
+                    update(Listing)
+                    .where(Listing.id.in_(chunk))
+                    .values(price=func.round(cast(Listing.price * factor, Numeric), 2))
+                )
+            result = await db.execute(statement.returning(Listing.id))
+            updated.update(row.id for row in result)
+            await db.commit()
+
+        for listing_id in listing_ids:
+            if listing_id not in updated:
+                self._record(job, listing_id, False, "Listing not found or no price given")
+
+        # Push new prices for listings that are live on a marketplace
+        listings = [
+            row for row in await self._load_listings(db, list(updated))
+            if row.Listing.external_id and row.Listing.status == ListingStatus.ACTIVE
+        ]
+        pushed = {row.Listing.id for row in listings}
+        for listing_id in updated - pushed:
+            self._record(job, listing_id, True)
+
+        results = await self._run_per_marketplace(
+            listings,
+            lambda adapter, rows: adapter.bulk_update_listings({
+                str(row.Listing.id): {
+                    "external_id": row.Listing.external_id,
+                    "listing_data": self._to_listing_data(row),
+                    "synced_hashes": row.Listing.synced_field_hashes
+                }
+                for row in rows
+            })
+        )
+        await self._write_sync_results(db, job, results)
+
+    async def _publish(self, db: AsyncSession, job: BulkListingJob,
+                       listing_ids: List[uuid.UUID], params: Dict[str, Any]):
+        listings = await self._load_listings(db, listing_ids)
+        self._record_missing(job, listing_ids, listings)
+
+        results = await self._run_per_marketplace(
+            listings,
+            lambda adapter, rows: adapter.bulk_publish_listings({
+                str(row.Listing.id): self._to_listing_data(row) for row in rows
+            })
+        )
+
+        now = datetime.now(timezone.utc)
+        existing = {row.Listing.id: row.Listing for row in listings}
+        # A publish sends every field, so later updates are deltas against it
+        published_hashes = {row.Listing.id: self._to_listing_data(row).field_hashes() for row in listings}
+        rows = []
+        for listing_id, (ok, error, response) in results.items():
+            response = response if isinstance(response, dict) else {}
+            rows.append({
+                "id": listing_id,
+                "status": ListingStatus.ACTIVE if ok else ListingStatus.ERROR,
+                "external_id": (
+                    response.get("external_id") or response.get("sku")
+                    or existing[listing_id].external_id
+                ),
+                "published_at": now if ok else existing[listing_id].published_at,
+                "sync_status": "synced" if ok else "error",
+                "errors": None if ok else [error],
+                "last_sync_at": now,
+                "synced_field_hashes": (
+                    published_hashes[listing_id] if ok else existing[listing_id].synced_field_hashes
+                ),
+            })
+            self._record(job, listing_id, ok, error)
+
+        for chunk in _chunks(rows, self.chunk_size):
+            await db.execute(_values_update(
+                chunk,
+                ["status", "external_id", "published_at", "sync_status", "errors", "last_sync_at",
+                 "synced_field_hashes"]
+            ))
+        await db.commit()
+
+    async def _unpublish(self, db: AsyncSession, job: BulkListingJob,
+                         listing_ids: List[uuid.UUID], params: Dict[str, Any]):
+        listings = await self._load_listings(db, listing_ids)
+        self._record_missing(job, listing_ids, listings)
+
+        # Marketplaces take an offer offline when its quantity drops to zero
+        live = [row for row in listings if row.Listing.external_id]
+
+        async def zero_stock(adapter, rows):
+            by_sku = {row.sku: str(row.Listing.id) for row in rows}
+            response = await adapter.bulk_update_inventory(
+                [InventoryUpdate(sku=sku, quantity=0) for sku in by_sku]
+            )
+            return {
+                "success": {by_sku[sku]: True for sku in response.get("success", [])},
+                "errors": {by_sku[e["sku"]]: e["error"] for e in response.get("errors", [])}
+            }
+
+        results = await self._run_per_marketplace(live, zero_stock)
+        offline = [row.Listing.id for row in listings if not row.Listing.external_id]
+        offline += [listing_id for listing_id, (ok, _, _) in results.items() if ok]
+
+        for chunk in _chunks(offline, self.chunk_size):
+            await db.execute(
+                update(Listing)
+                .where(Listing.id.in_(chunk))
+                .values(status=ListingStatus.INACTIVE)
+            )
+        await db.commit()
+
+        for listing_id in offline:
+            self._record(job, listing_id, True)
+        for listing_id, (ok, error, _) in results.items():
+            if not ok:
+                self._record(job, listing_id, False, error)
+
+    async def _sync(self, db: AsyncSession, job: BulkListingJob,
+                    listing_ids: List[uuid.UUID], params: Dict[str, Any]):
+        listings = await self._load_listings(db, listing_ids)
+        self._record_missing(job, listing_ids, listings)
+
+        for row in listings:
+            if not row.Listing.external_id:
+                self._record(job, row.Listing.id, False, "Listing is not published")
+
+        results = await self._run_per_marketplace(
+            [row for row in listings if row.Listing.external_id],
+            lambda adapter, rows: adapter.bulk_get_listings({
+                str(row.Listing.id): row.Listing.external_id for row in rows
+            })
+        )
+        for listing_id, (ok, error, response) in list(results.items()):
+            if ok and response is None:
+                results[listing_id] = (False, "Listing not found on marketplace", None)
+        await self._write_sync_results(db, job, results)
+
+    async def _delete(self, db: AsyncSession, job: BulkListingJob,
+                      listing_ids: List[uuid.UUID], params: Dict[str, Any]):
+        listings = await self._load_listings(db, listing_ids)
+        self._record_missing(job, listing_ids, listings)
+
+        results = await self._run_per_marketplace(
+            [row for row in listings if row.Listing.external_id],
+            lambda adapter, rows: adapter.bulk_delete_listings({
+                str(row.Listing.id): row.Listing.external_id for row in rows
+            })
+        )
+        removable = [row.Listing.id for row in listings if not row.Listing.external_id]
+        for listing_id, (ok, error, response) in results.items():
+            if ok and response is not False:
+                removable.append(listing_id)
+            else:
+                self._record(job, listing_id, False, error or "Marketplace delete failed")
+
+        for chunk in _chunks(removable, self.chunk_size):
+            await db.execute(delete(Listing).where(Listing.id.in_(chunk)))
+        await db.commit()
+
+        for listing_id in removable:
+            self._record(job, listing_id, True)
+
+    # Helpers
+    async def _load_listings(self, db: AsyncSession, listing_ids: List[uuid.UUID]) -> List[Any]:
+        """Load listings with the product fields marketplaces need"""
+        rows = []
+        for chunk in _chunks(listing_ids, self.chunk_size):
+            result = await db.execute(
+                select(Listing, Product.sku, Product.category)
+                .join(Product, Product.id == Listing.product_id)
+                .where(Listing.id.in_(chunk))
+            )
+            rows.extend(result.all())
+        return rows
+
+    def _to_listing_data(self, row) -> ListingData:
+        listing = row.Listing
+        return ListingData(
+            title=listing.title,
+            description=listing.description or "",
+            bullet_points=listing.bullet_points or [],
+            keywords=listing.keywords or [],
+            images=listing.images or [],
+            price=listing.sale_price or listing.price,
+            currency=listing.currency or "EUR",
+            category=row.category,
+            attributes=listing.marketplace_data or {},
+            compliance_flags=listing.compliance_flags or []
+        )
+
+    async def _run_per_marketplace(
+        self,
+        rows: List[Any],
+        call: Callable[[Any, List[Any]], Awaitable[Dict[str, Any]]]
+    ) -> Dict[uuid.UUID, tuple]:
+        """Run a bulk adapter call per marketplace, in parallel.
+
+        Returns {listing_id: (ok, error, response)}.
+        """
+        groups: Dict[MarketplaceType, List[Any]] = {}
+        for row in rows:
+            groups.setdefault(row.Listing.marketplace, []).append(row)
+
+        async def run(marketplace: MarketplaceType, group: List[Any]):
+            try:
+                adapter = MarketplaceAdapterFactory.create_from_settings(marketplace)
+                adapter.bulk_concurrency = settings.BULK_ADAPTER_CONCURRENCY
+                response = await call(adapter, group)
+            except Exception as e:
+                return {row.Listing.id: (False, str(e), None) for row in group}
+
+            outcome = {}
+            for key, value in response.get("success", {}).items():
+                outcome[uuid.UUID(key)] = (True, None, value)
+            for key, error in response.get("errors", {}).items():
+                outcome[uuid.UUID(key)] = (False, error, None)
+            return outcome
+
+        results: Dict[uuid.UUID, tuple] = {}
+        for outcome in await asyncio.gather(*(run(m, g) for m, g in groups.items())):
+            results.update(outcome)
+        return results
+
+    async def _write_sync_results(self, db: AsyncSession, job: BulkListingJob,
+                                  results: Dict[uuid.UUID, tuple]):
+        """Store per-listing marketplace outcomes in one VALUES update per chunk.
+
+        Field hashes returned by update_listing become the listing's
+        synced_field_hashes, the baseline of its next delta update.
+        """
+        now = datetime.now(timezone.utc)
+        rows, hashed = [], []
+        for listing_id, (ok, error, response) in results.items():
+            rows.append({
+                "id": listing_id,
+                "sync_status": "synced" if ok else "error",
+                "errors": None if ok else [error],
+                "last_sync_at": now,
+            })
+            if isinstance(response, dict) and "field_hashes" in response:
+                response = dict(response)
+                hashed.append({"id": listing_id, "synced_field_hashes": response.pop("field_hashes")})
+            self._record(job, listing_id, ok, error, response if isinstance(response, dict) else None)
+
+        for chunk in _chunks(rows, self.chunk_size):
+            await db.execute(_values_update(chunk, ["sync_status", "errors", "last_sync_at"]))
+        for chunk in _chunks(hashed, self.chunk_size):
+            await db.execute(_values_update(chunk, ["synced_field_hashes"]))
+        await db.commit()
+
+    def _record_missing(self, job: BulkListingJob, listing_ids: List[uuid.UUID], rows: List[Any]):
+        found = {row.Listing.id for row in rows}
+        for listing_id in listing_ids:
+            if listing_id not in found:
+                self._record(job, listing_id, False, "Listing not found")
+
+    def _record(self, job: BulkListingJob, listing_id: uuid.UUID, success: bool,
+                error: Optional[str] = None, data: Optional[Dict[str, Any]] = None):
+        """Record a listing's outcome and advance job progress"""
+        key = str(listing_id)
+        previous = job.results.get(key)
+        if previous is None:
+            job.processed += 1
+        elif previous.success:
+            job.succeeded -= 1
+        else:
+            job.failed -= 1
+
+        job.results[key] = BulkListingResult(
+            listing_id=listing_id, success=success, error=error, data=data
+        )
+        if success:
+            job.succeeded += 1
+        else:
+            job.failed += 1
+
+    async def _cleanup_job(self, job_id: str, delay: int = 3600):
+        """Forget a finished job after delay"""
+        await asyncio.sleep(delay)
+        bulk_jobs.pop(job_id, None)
+
+
+bulk_listing_engine = BulkListingEngine()
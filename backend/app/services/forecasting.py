@@ -0,0 +1,308 @@
+"""Vectorized demand forecasting and reorder point suggestions"""
+
+from typing import Dict, List, Optional, Any
+from datetime import date, datetime, timedelta, timezone
+from statistics import NormalDist
+import asyncio
+import time
+import uuid
+import structlog
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+
+logger = structlog.get_logger()
+
+# Syntetos-Boylan cut-off: average inter-demand interval above which a
+# series is treated as intermittent and forecast with SBA instead of SES
+ADI_INTERMITTENT = 1.32
+
+MODEL_SES = 0
+MODEL_SBA = 1
+MODEL_NAMES = {MODEL_SES: "ses", MODEL_SBA: "sba"}
+
+# Daily demand of every forecastable product in one round trip. Products
+# are numbered in SQL so the demand comes back as three integer arrays
+# (product index, day offset, units) that asyncpg decodes in bulk.
+_DEMAND = text("""
+WITH p AS (
+    SELECT p.id, p.lead_time_days,
+           (row_number() OVER (ORDER BY p.id) - 1)::int AS idx
+    FROM products p
+    WHERE p.status IN ('ACTIVE', 'DRAFT')
+      AND EXISTS (SELECT 1 FROM inventory i WHERE i.product_id = p.id)
+),
+d AS (
+    SELECT p.idx,
+           ((o.placed_at AT TIME ZONE :tz)::date - CAST(:start AS date))::int AS day,
+           sum(i.quantity)::int AS units
+    FROM orders o
+    JOIN order_items i ON i.order_id = o.id AND i.placed_at = o.placed_at
+    JOIN p ON p.id = i.product_id
+    WHERE o.placed_at >= :start_ts AND o.placed_at < :end_ts
+      AND o.status::text NOT IN ('CANCELLED', 'REFUNDED')
+    GROUP BY 1, 2
+)
+SELECT
+    (SELECT array_agg(id ORDER BY idx) FROM p) AS product_ids,
+    (SELECT array_agg(coalesce(lead_time_days, :default_lead_time) ORDER BY idx) FROM p) AS lead_times,
+    (SELECT array_agg(idx) FROM d) AS demand_idx,
+    (SELECT array_agg(day) FROM d) AS demand_day,
+    (SELECT array_agg(units) FROM d) AS demand_units
+""")
+
+_WRITE_FORECASTS = text("""
+INSERT INTO demand_forecasts
+    (product_id, model, daily_demand, demand_std, reorder_point, order_quantity, history_days, computed_at)
+SELECT f.product_id, f.model, f.daily_demand, f.demand_std, f.reorder_point, f.order_quantity, :history_days, now()
+FROM unnest(
+    CAST(:product_ids AS uuid[]), CAST(:models AS text[]), CAST(:daily_demand AS float8[]),
+    CAST(:demand_std AS float8[]), CAST(:reorder_points AS int[]), CAST(:order_quantities AS int[])
+) AS f(product_id, model, daily_demand, demand_std, reorder_point, order_quantity)
+ON CONFLICT (product_id) DO UPDATE SET
+    model = excluded.model,
+    daily_demand = excluded.daily_demand,
+    demand_std = excluded.demand_std,
+    reorder_point = excluded.reorder_point,
+    order_quantity = excluded.order_quantity,
+    history_days = excluded.history_days,
+    computed_at = excluded.computed_at
+""")
+
+_WRITE_PRODUCT_REORDER_POINTS = text("""
+UPDATE products p
+SET reorder_point = f.reorder_point
+FROM unnest(CAST(:product_ids AS uuid[]), CAST(:reorder_points AS int[])) AS f(product_id, reorder_point)
+WHERE p.id = f.product_id AND p.reorder_point IS DISTINCT FROM f.reorder_point
+""")
+
+# Split the product reorder point over its warehouses by on-hand share
+# (evenly when the product is out of stock everywhere)
+_WRITE_INVENTORY_REORDER_POINTS = text("""
+UPDATE inventory i
+SET reorder_point = ceil(f.reorder_point * coalesce(i.quantity::float8 / nullif(t.total, 0), 1.0 / t.n))::int
+FROM unnest(CAST(:product_ids AS uuid[]), CAST(:reorder_points AS int[])) AS f(product_id, reorder_point)
+JOIN (
+    SELECT product_id, sum(quantity) AS total, count(*) AS n
+    FROM inventory
+    WHERE product_id = ANY(CAST(:product_ids AS uuid[]))
+    GROUP BY product_id
+) t ON t.product_id = f.product_id
+WHERE i.product_id = f.product_id
+""")
+
+_STOCK_POSITION = text("""
+SELECT product_id,
+       sum(quantity - coalesce(reserved, 0) + coalesce(incoming, 0))::int AS position
+FROM inventory
+WHERE product_id = ANY(CAST(:product_ids AS uuid[]))
+GROUP BY product_id
+""")
+
+
+def forecast_demand(
+    demand: np.ndarray,
+    alpha: float = 0.1,
+    error_alpha: float = 0.1
+) -> Dict[str, np.ndarray]:
+    """Fit SES and Croston/SBA to every row of a (products x days) matrix at once.
+
+    The time dimension is a Python loop; every step is a vector operation
+    over all products, so cost grows with days, not with products.
+    Returns the chosen model per product, the per-day demand forecast and
+    the standard deviation of its one-step-ahead errors.
+    """
+    demand = np.asarray(demand, dtype=np.float64)
+    n_products, n_days = demand.shape
+    positive = demand > 0
+
+    # Classification: average inter-demand interval per product
+    occurrences = positive.sum(axis=1)
+    adi = np.where(occurrences > 0, n_days / np.maximum(occurrences, 1), np.inf)
+    intermittent = adi > ADI_INTERMITTENT
+
+    # Initial states
+    nonzero_mean = np.where(
+        occurrences > 0, demand.sum(axis=1) / np.maximum(occurrences, 1), 0.0
+    )
+    level = demand[:, :min(7, n_days)].mean(axis=1)  # SES level
+    size = nonzero_mean.copy()  # Croston demand size
+    interval = np.where(np.isfinite(adi), adi, n_days).astype(np.float64)  # Croston interval
+    since_last = np.ones(n_products)
+    sq_error = np.zeros(n_products)
+    sba_factor = 1 - alpha / 2
+
+    for t in range(n_days):
+        y = demand[:, t]
+        hit = positive[:, t]
+
+        # One-step-ahead error of whichever model the product uses
+        forecast = np.where(intermittent, sba_factor * size / interval, level)
+        sq_error += error_alpha * ((y - forecast) ** 2 - sq_error)
+
+        # SES
+        level += alpha * (y - level)
+
+        # Croston/SBA: update size and interval only in periods with demand
+        size = np.where(hit, size + alpha * (y - size), size)
+        interval = np.where(hit, interval + alpha * (since_last - interval), interval)
+        since_last = np.where(hit, 1.0, since_last + 1.0)
+
+    daily_demand = np.where(intermittent, sba_factor * size / interval, level)
+    daily_demand[occurrences == 0] = 0.0
+
+    return {
+        "model": np.where(intermittent, MODEL_SBA, MODEL_SES),
+        "daily_demand": daily_demand,
+        "demand_std": np.sqrt(sq_error),
+    }
+
+
+def reorder_policy(
+    daily_demand: np.ndarray,
+    demand_std: np.ndarray,
+    lead_time_days: np.ndarray,
+    stock_position: np.ndarray,
+    service_level: float,
+    review_days: int
+) -> Dict[str, np.ndarray]:
+    """Reorder point and order quantity per product (order-up-to policy).
+
+    reorder point = demand over the lead time + z * std * sqrt(lead time);
+    order quantity = what brings the stock position up to the reorder
+    point plus one review period of demand.
+    """
+    z = NormalDist().inv_cdf(service_level)
+    lead_time = np.maximum(lead_time_days, 1).astype(np.float64)
+
+    reorder_point = np.ceil(daily_demand * lead_time + z * demand_std * np.sqrt(lead_time))
+    order_up_to = reorder_point + np.ceil(daily_demand * review_days)
+    order_quantity = np.where(stock_position <= reorder_point, order_up_to - stock_position, 0)
+
+    return {
+        "reorder_point": reorder_point.astype(np.int64),
+        "order_quantity": np.maximum(order_quantity, 0).astype(np.int64),
+    }
+
+
+class DemandForecastService:
+    """Loads demand history, forecasts every product and writes the results back.
+
+    Results go to demand_forecasts (model, daily demand and error, reorder
+    point, suggested order quantity); the reorder point is also written to
+    Product.reorder_point and split over the product's warehouses in
+    Inventory.reorder_point.
+    """
+
+    def __init__(self, session_factory=AsyncSessionLocal):
+        self.session_factory = session_factory
+        self.logger = logger.bind(component="demand_forecast")
+
+    async def run(
+        self,
+        history_days: Optional[int] = None,
+        write: bool = True
+    ) -> Dict[str, Any]:
+        history_days = history_days or settings.FORECAST_HISTORY_DAYS
+        timings = {}
+
+        start = time.perf_counter()
+        async with self.session_factory() as session:
+            product_ids, lead_times, matrix = await self._load(session, history_days)
+        timings["load_s"] = round(time.perf_counter() - start, 2)
+
+        if not product_ids:
+            return {"products": 0, **timings}
+
+        start = time.perf_counter()
+        # NumPy releases the GIL for the array work; keep the event loop free
+        fitted = await asyncio.to_thread(
+            forecast_demand, matrix, settings.FORECAST_ALPHA, settings.FORECAST_ALPHA
+        )
+        timings["fit_s"] = round(time.perf_counter() - start, 2)
+
+        if write:
+            start = time.perf_counter()
+            async with self.session_factory() as session:
+                async with session.begin():
+                    position = await self._stock_position(session, product_ids)
+                    policy = reorder_policy(
+                        fitted["daily_demand"],
+                        fitted["demand_std"],
+                        lead_times,
+                        position,
+                        settings.FORECAST_SERVICE_LEVEL,
+                        settings.FORECAST_REVIEW_DAYS
+                    )
+                    await self._write(session, product_ids, fitted, policy, history_days)
+            timings["write_s"] = round(time.perf_counter() - start, 2)
+
+        summary = {
+            "products": len(product_ids),
+            "intermittent": int((fitted["model"] == MODEL_SBA).sum()),
+            **timings
+        }
+        self.logger.info("Demand forecast completed", **summary)
+        return summary
+
+    async def _load(self, session: AsyncSession, history_days: int):
+        """Demand matrix (products x days), product IDs and lead times"""
+        tz = settings.ANALYTICS_TIMEZONE
+        end = datetime.now(timezone.utc).date()
+        start = end - timedelta(days=history_days)
+
+        row = (await session.execute(_DEMAND, {
+            "tz": tz,
+            "start": start,
+            # Placed-at bounds so only the partitions in the window are read
+            "start_ts": datetime.combine(start, datetime.min.time(), tzinfo=timezone.utc) - timedelta(days=1),
+            "end_ts": datetime.combine(end, datetime.min.time(), tzinfo=timezone.utc) + timedelta(days=1),
+            "default_lead_time": settings.FORECAST_DEFAULT_LEAD_TIME_DAYS,
+        })).one()
+
+        product_ids = list(row.product_ids or [])
+        lead_times = np.asarray(row.lead_times or [], dtype=np.int64)
+        matrix = np.zeros((len(product_ids), history_days), dtype=np.float32)
+
+        if row.demand_idx:
+            idx = np.asarray(row.demand_idx, dtype=np.int64)
+            day = np.asarray(row.demand_day, dtype=np.int64)
+            units = np.asarray(row.demand_units, dtype=np.float32)
+            # Days at the window edges (timezone shift) are dropped
+            inside = (day >= 0) & (day < history_days)
+            matrix[idx[inside], day[inside]] = units[inside]
+
+        return product_ids, lead_times, matrix
+
+    async def _stock_position(self, session: AsyncSession, product_ids: List[uuid.UUID]) -> np.ndarray:
+        result = await session.execute(_STOCK_POSITION, {"product_ids": product_ids})
+        positions = {row.product_id: row.position for row in result}
+        return np.asarray([positions.get(pid, 0) for pid in product_ids], dtype=np.float64)
+
+    async def _write(self, session: AsyncSession, product_ids, fitted, policy, history_days: int):
+        chunk = settings.FORECAST_WRITE_CHUNK_SIZE
+        models = [MODEL_NAMES[m] for m in fitted["model"].tolist()]
+        daily_demand = np.round(fitted["daily_demand"], 4).tolist()
+        demand_std = np.round(fitted["demand_std"], 4).tolist()
+        reorder_points = policy["reorder_point"].tolist()
+        order_quantities = policy["order_quantity"].tolist()
+
+        for i in range(0, len(product_ids), chunk):
+            window = slice(i, i + chunk)
+            ids = product_ids[window]
+            await session.execute(_WRITE_FORECASTS, {
+                "product_ids": ids,
+                "models": models[window],
+                "daily_demand": daily_demand[window],
+                "demand_std": demand_std[window],
+                "reorder_points": reorder_points[window],
+                "order_quantities": order_quantities[window],
+                "history_days": history_days,
+            })
+            params = {"product_ids": ids, "reorder_points": reorder_points[window]}
+            await session.execute(_WRITE_PRODUCT_REORDER_POINTS, params)
+            await session.execute(_WRITE_INVENTORY_REORDER_POINTS, params)
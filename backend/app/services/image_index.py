@@ -0,0 +1,404 @@
+"""Perceptual-hash index for duplicate and near-duplicate product images"""
+
+from typing import Dict, List, Optional, Any, Callable, Awaitable, Iterable, Tuple
+from itertools import combinations
+import asyncio
+import hashlib
+import io
+import uuid
+import structlog
+
+import httpx
+import numpy as np
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+
+logger = structlog.get_logger()
+
+CHUNKS = 4  # 64-bit pHash split into four 16-bit chunks for multi-index hashing
+CHUNK_BITS = 64 // CHUNKS
+
+_DCT_SIZE = 32
+
+
+def _dct_matrix(n: int) -> np.ndarray:
+    """Orthonormal DCT-II basis, so a 2-D DCT is two matrix products"""
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    basis = np.cos(np.pi * (2 * i + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+    basis[0] /= np.sqrt(2.0)
+    return basis
+
+
+_DCT = _dct_matrix(_DCT_SIZE)
+
+
+def _bits_to_int(bits: np.ndarray) -> int:
+    value = 0
+    for bit in bits.ravel().tolist():
+        value = (value << 1) | int(bit)
+    return value
+
+
+def phash(gray: np.ndarray) -> int:
+    """64-bit DCT hash of a 32x32 grayscale image"""
+    coefficients = _DCT @ gray.astype(np.float64) @ _DCT.T
+    low = coefficients[:8, :8].ravel()
+    # DC term excluded from the median; it only carries overall brightness
+    return _bits_to_int(low > np.median(low[1:]))
+
+
+def dhash(gray: np.ndarray) -> int:
+    """64-bit gradient hash of a 9x8 (width x height) grayscale image"""
+    return _bits_to_int(gray[:, 1:] > gray[:, :-1])
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def to_signed(value: int) -> int:
+    """Unsigned 64-bit hash as a Postgres bigint"""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def to_unsigned(value: int) -> int:
+    return value + (1 << 64) if value < 0 else value
+
+
+def hash_chunks(value: int) -> List[int]:
+    return [(value >> (CHUNK_BITS * (CHUNKS - 1 - n))) & ((1 << CHUNK_BITS) - 1) for n in range(CHUNKS)]
+
+
+def chunk_neighbours(chunk: int, radius: int) -> List[int]:
+    """Every chunk value within `radius` bits of chunk"""
+    values = [chunk]
+    for r in range(1, radius + 1):
+        for bits in combinations(range(CHUNK_BITS), r):
+            flipped = chunk
+            for bit in bits:
+                flipped ^= 1 << bit
+            values.append(flipped)
+    return values
+
+
+def fingerprint_image(data: bytes) -> Dict[str, int]:
+    """pHash, dHash and size of an encoded image; runs in a worker process.
+
+    JPEGs are decoded at reduced scale (draft mode), which is all the
+    hashes need.
+    """
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as source:
+        width, height = source.size
+        # draft() only works before the pixels are loaded, so orientation
+        # is applied to the small grayscale image afterwards
+        orientation = source.getexif().get(0x0112, 1)
+        source.draft("L", (_DCT_SIZE * 4, _DCT_SIZE * 4))
+        gray = source.convert("L")
+
+    method = {
+        2: Image.Transpose.FLIP_LEFT_RIGHT,
+        3: Image.Transpose.ROTATE_180,
+        4: Image.Transpose.FLIP_TOP_BOTTOM,
+        5: Image.Transpose.TRANSPOSE,
+        6: Image.Transpose.ROTATE_270,
+        7: Image.Transpose.TRANSVERSE,
+        8: Image.Transpose.ROTATE_90,
+    }.get(orientation)
+    if method is not None:
+        gray = gray.transpose(method)
+    if orientation in (5, 6, 7, 8):
+        width, height = height, width
+
+    resample = Image.Resampling.LANCZOS
+    return {
+        "phash": phash(np.asarray(gray.resize((_DCT_SIZE, _DCT_SIZE), resample))),
+        "dhash": dhash(np.asarray(gray.resize((9, 8), resample), dtype=np.int16)),
+        "width": width,
+        "height": height,
+        "content_hash": hashlib.sha256(data).hexdigest(),
+    }
+
+
+class MultiIndex:
+    """In-memory multi-index hashing over 64-bit hashes.
+
+    Every hash is filed under each of its CHUNKS chunks. By the pigeonhole
+    principle, a hash within distance d of the query matches it to within
+    d // CHUNKS bits in at least one chunk, so a search looks up only the
+    neighbouring values of each chunk and verifies those candidates. The
+    same scheme backs the indexed chunk columns of image_fingerprints.
+    """
+
+    def __init__(self):
+        self.values: List[int] = []
+        self.items: List[Any] = []
+        self.tables: List[Dict[int, List[int]]] = [{} for _ in range(CHUNKS)]
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def add(self, value: int, item: Any):
+        position = len(self.values)
+        self.values.append(value)
+        self.items.append(item)
+        for table, chunk in zip(self.tables, hash_chunks(value)):
+            table.setdefault(chunk, []).append(position)
+
+    def search(self, value: int, radius: int) -> List[Tuple[int, Any]]:
+        """(distance, item) for every item within radius of value"""
+        candidates = set()
+        for table, chunk in zip(self.tables, hash_chunks(value)):
+            for neighbour in chunk_neighbours(chunk, radius // CHUNKS):
+                candidates.update(table.get(neighbour, ()))
+
+        found = []
+        for position in candidates:
+            distance = hamming(value, self.values[position])
+            if distance <= radius:
+                found.append((distance, self.items[position]))
+        return found
+
+
+# Candidates share at least one 16-bit chunk within radius; the pigeonhole
+# principle makes this exact for distances up to CHUNKS * (radius + 1) - 1
+_CANDIDATES = text("""
+SELECT f.content_hash, u.url, u.product_id, f.phash, f.dhash, f.width, f.height
+FROM image_fingerprints f
+JOIN image_fingerprint_urls u ON u.content_hash = f.content_hash
+WHERE f.phash_0 = ANY(CAST(:c0 AS int[])) OR f.phash_1 = ANY(CAST(:c1 AS int[]))
+   OR f.phash_2 = ANY(CAST(:c2 AS int[])) OR f.phash_3 = ANY(CAST(:c3 AS int[]))
+""")
+
+# Identical bytes under several URLs share one fingerprint row
+_INSERT = text("""
+INSERT INTO image_fingerprints
+    (content_hash, phash, dhash, phash_0, phash_1, phash_2, phash_3, width, height)
+VALUES
+    (:content_hash, :phash, :dhash, :phash_0, :phash_1, :phash_2, :phash_3, :width, :height)
+ON CONFLICT (content_hash) DO NOTHING
+""")
+
+_INSERT_URL = text("""
+INSERT INTO image_fingerprint_urls (url, content_hash, product_id, error, checked_at)
+VALUES (:url, :content_hash, :product_id, :error, now())
+ON CONFLICT (url) DO UPDATE SET
+    content_hash = EXCLUDED.content_hash,
+    product_id = COALESCE(EXCLUDED.product_id, image_fingerprint_urls.product_id),
+    error = EXCLUDED.error,
+    checked_at = EXCLUDED.checked_at
+""")
+
+# Failed URLs are retried only after IMAGE_SCAN_RETRY_FAILED_HOURS, so a
+# scan always moves past them
+_UNINDEXED = text("""
+SELECT DISTINCT ON (u.url) p.id AS product_id, u.url
+FROM products p
+CROSS JOIN LATERAL unnest(p.images) AS u(url)
+WHERE NOT EXISTS (
+    SELECT 1 FROM image_fingerprint_urls i
+    WHERE i.url = u.url
+      AND (i.content_hash IS NOT NULL OR i.checked_at > now() - make_interval(hours => :retry_hours))
+)
+LIMIT :limit
+""")
+
+_ALL = text("""
+SELECT u.content_hash, u.url, u.product_id, f.phash, f.dhash
+FROM image_fingerprint_urls u
+JOIN image_fingerprints f ON f.content_hash = u.content_hash
+""")
+
+
+class ImageIndex:
+    """Near-duplicate lookups over image_fingerprints.
+
+    Point queries (the upload path) use multi-index hashing in Postgres:
+    each pHash is also stored as four indexed 16-bit chunks, candidates
+    are fetched by chunk and verified by full pHash and dHash distance.
+    Fingerprints are keyed by content hash and image_fingerprint_urls
+    maps every URL to one (or records why it could not be fetched), so
+    the same bytes under another name are an exact duplicate. The catalog
+    scan builds the same index in memory over every URL and groups
+    near-duplicates.
+    """
+
+    def __init__(self, session_factory=AsyncSessionLocal):
+        self.session_factory = session_factory
+        self.logger = logger.bind(component="image_index")
+
+    def _matches(self, fingerprint: Dict[str, int], phash_value: int, dhash_value: int) -> Optional[int]:
+        distance = hamming(fingerprint["phash"], phash_value)
+        if distance <= settings.IMAGE_PHASH_MAX_DISTANCE and \
+                hamming(fingerprint["dhash"], dhash_value) <= settings.IMAGE_DHASH_MAX_DISTANCE:
+            return distance
+        return None
+
+    async def find_near_duplicates(self, fingerprint: Dict[str, int]) -> List[Dict[str, Any]]:
+        """Indexed images within the configured distances, closest first"""
+        radius = settings.IMAGE_PHASH_MAX_DISTANCE // CHUNKS
+        chunks = hash_chunks(fingerprint["phash"])
+        params = {f"c{n}": chunk_neighbours(chunk, radius) for n, chunk in enumerate(chunks)}
+
+        async with self.session_factory() as session:
+            rows = (await session.execute(_CANDIDATES, params)).all()
+
+        matches = []
+        for row in rows:
+            distance = self._matches(fingerprint, to_unsigned(row.phash), to_unsigned(row.dhash))
+            if distance is not None:
+                matches.append({
+                    "content_hash": row.content_hash,
+                    "url": row.url,
+                    "product_id": row.product_id,
+                    "width": row.width,
+                    "height": row.height,
+                    "distance": distance,
+                })
+        return sorted(matches, key=lambda m: m["distance"])
+
+    async def add(self, fingerprint: Dict[str, int], url: str, product_id: Optional[uuid.UUID] = None):
+        await self.add_many([(fingerprint, url, product_id)])
+
+    async def add_many(self, entries: Iterable[Tuple[Dict[str, int], str, Optional[uuid.UUID]]]):
+        entries = list(entries)
+        params = [
+            {
+                "content_hash": fingerprint["content_hash"],
+                "phash": to_signed(fingerprint["phash"]),
+                "dhash": to_signed(fingerprint["dhash"]),
+                **{f"phash_{n}": chunk for n, chunk in enumerate(hash_chunks(fingerprint["phash"]))},
+                "width": fingerprint["width"],
+                "height": fingerprint["height"],
+            }
+            for fingerprint, url, product_id in entries
+        ]
+        if not params:
+            return
+        urls = [
+            {"url": url, "content_hash": fingerprint["content_hash"], "product_id": product_id, "error": None}
+            for fingerprint, url, product_id in entries
+        ]
+        async with self.session_factory() as session:
+            async with session.begin():
+                await session.execute(_INSERT, params)
+                await session.execute(_INSERT_URL, urls)
+
+    async def add_failures(self, failures: Iterable[Tuple[str, Optional[uuid.UUID], str]]):
+        """Record URLs that could not be fetched or decoded, so scans skip them for a while"""
+        params = [
+            {"url": url, "content_hash": None, "product_id": product_id, "error": error[:500]}
+            for url, product_id, error in failures
+        ]
+        if not params:
+            return
+        async with self.session_factory() as session:
+            async with session.begin():
+                await session.execute(_INSERT_URL, params)
+
+    async def index_catalog(
+        self,
+        fingerprint: Callable[[bytes], Awaitable[Dict[str, int]]],
+        limit: Optional[int] = None
+    ) -> Dict[str, int]:
+        """Fingerprint Product.images URLs that are not indexed yet"""
+        indexed, failed = 0, 0
+        semaphore = asyncio.Semaphore(settings.IMAGE_SCAN_CONCURRENCY)
+
+        async with httpx.AsyncClient(timeout=30, follow_redirects=True) as client:
+            async def fetch(product_id: uuid.UUID, url: str):
+                async with semaphore:
+                    response = await client.get(url)
+                    response.raise_for_status()
+                    return await fingerprint(response.content), url, product_id
+
+            while limit is None or indexed + failed < limit:
+                batch = settings.IMAGE_SCAN_BATCH_SIZE
+                if limit is not None:
+                    batch = min(batch, limit - indexed - failed)
+                async with self.session_factory() as session:
+                    rows = (await session.execute(
+                        _UNINDEXED, {"limit": batch, "retry_hours": settings.IMAGE_SCAN_RETRY_FAILED_HOURS}
+                    )).all()
+                if not rows:
+                    break
+
+                results = await asyncio.gather(
+                    *(fetch(row.product_id, row.url) for row in rows), return_exceptions=True
+                )
+                entries = [r for r in results if not isinstance(r, BaseException)]
+                failures = [
+                    (row.url, row.product_id, str(r) or type(r).__name__)
+                    for row, r in zip(rows, results) if isinstance(r, BaseException)
+                ]
+                # Every selected URL is recorded either way, so the next batch moves on
+                await self.add_many(entries)
+                await self.add_failures(failures)
+                indexed += len(entries)
+                failed += len(failures)
+
+        return {"indexed": indexed, "failed": failed}
+
+    async def find_clusters(self, min_size: int = 2) -> List[Dict[str, Any]]:
+        """Groups of near-duplicate images across the whole catalog"""
+        async with self.session_factory() as session:
+            rows = (await session.execute(_ALL)).all()
+        return await asyncio.to_thread(self._cluster, rows, min_size)
+
+    def _cluster(self, rows, min_size: int) -> List[Dict[str, Any]]:
+        index = MultiIndex()
+        for n, row in enumerate(rows):
+            index.add(to_unsigned(row.phash), n)
+
+        parent = list(range(len(rows)))
+
+        def find(n: int) -> int:
+            while parent[n] != n:
+                parent[n] = parent[parent[n]]
+                n = parent[n]
+            return n
+
+        for n, row in enumerate(rows):
+            dhash_value = to_unsigned(row.dhash)
+            for _, other in index.search(to_unsigned(row.phash), settings.IMAGE_PHASH_MAX_DISTANCE):
+                if other > n and hamming(dhash_value, to_unsigned(rows[other].dhash)) <= settings.IMAGE_DHASH_MAX_DISTANCE:
+                    parent[find(other)] = find(n)
+
+        groups: Dict[int, List[int]] = {}
+        for n in range(len(rows)):
+            groups.setdefault(find(n), []).append(n)
+
+        clusters = [
+            {
+                "size": len(members),
+                "images": [
+                    {"content_hash": rows[m].content_hash, "url": rows[m].url, "product_id": rows[m].product_id}
+                    for m in members
+                ],
+            }
+            for members in groups.values() if len(members) >= min_size
+        ]
+        return sorted(clusters, key=lambda c: c["size"], reverse=True)
+
+    async def scan_catalog(
+        self,
+        fingerprint: Callable[[bytes], Awaitable[Dict[str, int]]],
+        limit: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Index missing catalog images, then report near-duplicate clusters"""
+        indexing = await self.index_catalog(fingerprint, limit)
+        clusters = await self.find_clusters()
+        summary = {
+            **indexing,
+            "clusters": len(clusters),
+            "duplicate_images": sum(c["size"] - 1 for c in clusters),
+        }
+        self.logger.info("Image catalog scan completed", **summary)
+        return {**summary, "top_clusters": clusters[:100]}
+
+
+image_index = ImageIndex()
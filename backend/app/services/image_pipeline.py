@@ -0,0 +1,285 @@
+"""Product image processing: marketplace variants in a process pool"""
+
+from typing import Dict, List, Optional, Any
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
+import hashlib
+import io
+import multiprocessing
+import os
+import uuid
+import structlog
+
+from app.core.config import settings
+from app.core.exceptions import ValidationException
+from app.services.image_index import image_index, fingerprint_image
+from app.services.storage import get_storage
+
+logger = structlog.get_logger()
+
+WHITE = (255, 255, 255)
+
+# Variants derived from each upload. "main" follows Amazon's main image
+# rules (pure white background, 1000px+ on the longest side for zoom);
+# the others are resized in a cascade from the previous, larger one.
+VARIANTS: Dict[str, Dict[str, Any]] = {
+    "main": {"max_side": 2000, "format": "JPEG", "ext": "jpg", "content_type": "image/jpeg"},
+    "large": {"max_side": 1600, "format": "WEBP", "ext": "webp", "content_type": "image/webp"},
+    "large_avif": {"max_side": 1600, "format": "AVIF", "ext": "avif", "content_type": "image/avif"},
+    "medium": {"max_side": 800, "format": "WEBP", "ext": "webp", "content_type": "image/webp"},
+    "thumbnail": {"max_side": 300, "format": "WEBP", "ext": "webp", "content_type": "image/webp"},
+}
+SAVE_OPTIONS = {
+    "JPEG": {"quality": 88, "optimize": True, "progressive": True},
+    "WEBP": {"quality": 80, "method": 4},
+    "AVIF": {"quality": 60, "speed": 6},
+}
+ZOOM_MIN_SIDE = 1000
+INPUT_FORMATS = {"JPEG", "PNG", "WEBP"}
+
+
+def _fit(image, max_side: int):
+    """Downscale so the longest side is at most max_side (never upscale)"""
+    from PIL import Image
+
+    scale = max_side / max(image.size)
+    if scale >= 1:
+        return image
+    size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+    # reducing_gap lets Pillow shrink by integer factors first, then resample
+    return image.resize(size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+
+
+def _encode(image, fmt: str, icc_profile: Optional[bytes]) -> bytes:
+    buffer = io.BytesIO()
+    # Nothing from the original's metadata is passed on except the colour profile
+    options = dict(SAVE_OPTIONS[fmt])
+    if icc_profile:
+        options["icc_profile"] = icc_profile
+    image.save(buffer, fmt, **options)
+    return buffer.getvalue()
+
+
+def process_image(data: bytes) -> Dict[str, Any]:
+    """Decode once and encode every variant; runs in a worker process.
+
+    EXIF orientation is applied to the pixels and all EXIF/XMP metadata
+    is dropped from the outputs.
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(data)) as source:
+        if source.format not in INPUT_FORMATS:
+            raise ValueError(f"Unsupported image format: {source.format}")
+        icc_profile = source.info.get("icc_profile")
+        image = ImageOps.exif_transpose(source)
+        image.load()
+
+    has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+    image = image.convert("RGBA" if has_alpha else "RGB")
+    width, height = image.size
+
+    # Main: flattened onto white and padded to a white square
+    main = _fit(image, VARIANTS["main"]["max_side"])
+    if has_alpha:
+        flat = Image.new("RGB", main.size, WHITE)
+        flat.paste(main, mask=main.getchannel("A"))
+        main = flat
+    side = max(main.size)
+    if main.width != main.height:
+        square = Image.new("RGB", (side, side), WHITE)
+        square.paste(main, ((side - main.width) // 2, (side - main.height) // 2))
+        main = square
+
+    outputs = {"main": main}
+    previous = image
+    for name in ("large", "medium", "thumbnail"):
+        previous = _fit(previous, VARIANTS[name]["max_side"])
+        outputs[name] = previous
+    if "AVIF" in Image.SAVE:  # Needs an AVIF-enabled Pillow build or plugin
+        outputs["large_avif"] = outputs["large"]
+
+    variants = {}
+    for name, variant in outputs.items():
+        spec = VARIANTS[name]
+        variants[name] = {
+            "data": _encode(variant, spec["format"], icc_profile),
+            "width": variant.width,
+            "height": variant.height,
+        }
+
+    return {
+        "width": width,
+        "height": height,
+        "zoom_eligible": max(width, height) >= ZOOM_MIN_SIDE,
+        "variants": variants,
+    }
+
+
+def variant_key(digest: str, name: str) -> str:
+    """Content-addressed storage key of a variant"""
+    return f"images/{digest[:2]}/{digest}/{name}.{VARIANTS[name]['ext']}"
+
+
+class ImagePipeline:
+    """Processes uploaded product images once per distinct content.
+
+    Images are keyed by the SHA-256 of the uploaded bytes. An image whose
+    main variant is already stored is not decoded or stored again, and
+    concurrent uploads of the same bytes share one processing run.
+    New content is fingerprinted first; a near-duplicate of a stored image
+    that is at least as large (re-encoded, resized, re-exported) is
+    answered with the stored image instead of being processed. Decoding
+    and encoding run in a process pool, off the event loop.
+    """
+
+    def __init__(self):
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.logger = logger.bind(component="image_pipeline")
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=settings.IMAGE_WORKERS or os.cpu_count() or 1,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    async def fingerprint(self, data: bytes) -> Dict[str, int]:
+        """Perceptual hashes of an image, computed in the process pool"""
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._get_pool(), fingerprint_image, data)
+        except Exception as e:
+            raise ValidationException(f"Could not decode image: {e}")
+
+    async def ingest(self, data: bytes, product_id: Optional[uuid.UUID] = None) -> Dict[str, Any]:
+        """Process and store an image unless identical content is already stored"""
+        if len(data) > settings.IMAGE_MAX_BYTES:
+            raise ValidationException(f"Image larger than {settings.IMAGE_MAX_BYTES} bytes")
+
+        digest = hashlib.sha256(data).hexdigest()
+        inflight = self._inflight.get(digest)
+        if inflight is not None:
+            try:
+                return {**await asyncio.shield(inflight), "duplicate": True}
+            except asyncio.CancelledError:
+                if not inflight.cancelled():
+                    raise
+                # The upload we waited on was abandoned: process this copy instead
+                return await self.ingest(data, product_id)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[digest] = future
+        try:
+            result = await self._ingest(digest, data, product_id)
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            # Waiters re-raise it; mark it retrieved for the no-waiter case
+            future.exception()
+            raise
+        except BaseException:
+            # Cancelled (client gone): release the waiters instead of leaving them hanging
+            future.cancel()
+            raise
+        finally:
+            del self._inflight[digest]
+
+    async def _ingest(self, digest: str, data: bytes, product_id: Optional[uuid.UUID]) -> Dict[str, Any]:
+        storage = get_storage()
+        urls = {name: storage.url(variant_key(digest, name)) for name in VARIANTS}
+
+        # main is written last, so its presence means the set is complete
+        if await storage.exists(variant_key(digest, "main")):
+            return {"hash": digest, "url": urls["main"], "duplicate": True}
+
+        fingerprint = await self.fingerprint(data)
+        matches = await self._near_duplicates(fingerprint)
+        reusable = self._reusable(fingerprint, matches)
+        if reusable is not None:
+            self.logger.info("Near-duplicate image reused", hash=digest, match=reusable["content_hash"], distance=reusable["distance"])
+            return {
+                "hash": reusable["content_hash"],
+                "url": reusable["url"],
+                "duplicate": True,
+                "near_duplicate_of": reusable["content_hash"],
+                "distance": reusable["distance"],
+            }
+
+        loop = asyncio.get_running_loop()
+        try:
+            processed = await loop.run_in_executor(self._get_pool(), process_image, data)
+        except ValueError as e:
+            raise ValidationException(str(e))
+        except Exception as e:
+            raise ValidationException(f"Could not decode image: {e}")
+
+        variants = processed["variants"]
+        await asyncio.gather(*(
+            storage.put(variant_key(digest, name), variant["data"], VARIANTS[name]["content_type"])
+            for name, variant in variants.items() if name != "main"
+        ))
+        await storage.put(variant_key(digest, "main"), variants["main"]["data"], VARIANTS["main"]["content_type"])
+        try:
+            await image_index.add(fingerprint, urls["main"], product_id)
+        except Exception as e:
+            self.logger.warning("Image fingerprint not indexed", hash=digest, error=str(e))
+
+        self.logger.info(
+            "Image processed",
+            hash=digest,
+            width=processed["width"],
+            height=processed["height"],
+            variants=len(variants)
+        )
+        # Reported, not acted on: similar-looking is not the same product photo
+        near = {"near_duplicate_of": matches[0]["content_hash"], "distance": matches[0]["distance"]} if matches else {}
+        return {
+            "hash": digest,
+            "url": urls["main"],
+            "duplicate": False,
+            **near,
+            "width": processed["width"],
+            "height": processed["height"],
+            "zoom_eligible": processed["zoom_eligible"],
+            "variants": {
+                name: {"url": urls[name], "width": v["width"], "height": v["height"], "bytes": len(v["data"])}
+                for name, v in variants.items()
+            },
+        }
+
+    async def _near_duplicates(self, fingerprint: Dict[str, int]) -> List[Dict[str, Any]]:
+        """Indexed images within the near-duplicate distances, closest first"""
+        try:
+            matches = await image_index.find_near_duplicates(fingerprint)
+        except Exception as e:
+            # The index is an optimization; uploads go on without it
+            self.logger.warning("Image index unavailable", error=str(e))
+            return []
+        return [match for match in matches if match["content_hash"] != fingerprint["content_hash"]]
+
+    def _reusable(self, fingerprint: Dict[str, int], matches: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Closest stored pipeline image this one can be replaced with, if reuse is enabled"""
+        if not settings.IMAGE_REUSE_NEAR_DUPLICATES:
+            return None
+        own_prefix = get_storage().url("images/")
+        area = fingerprint["width"] * fingerprint["height"]
+        for match in matches:
+            # Catalog-scan entries point at supplier URLs; only our own variants are reused
+            if match["url"] and match["url"].startswith(own_prefix) and match["width"] * match["height"] >= area:
+                return match
+        return None
+
+    async def ingest_many(self, images: List[bytes], product_id: Optional[uuid.UUID] = None) -> List[Dict[str, Any]]:
+        return await asyncio.gather(*(self.ingest(data, product_id) for data in images))
+
+
+image_pipeline = ImagePipeline()
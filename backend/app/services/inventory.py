@@ -0,0 +1,373 @@
+"""Inventory reservation engine and product stock reconciliation"""
+
+from typing import Dict, List, Optional, Any, Iterable
+from collections import defaultdict
+import asyncio
+import uuid
+import structlog
+
+from sqlalchemy import text, select
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.redis import get_redis
+from app.core.exceptions import ValidationException
+from app.models.database import Inventory
+from app.services.stock_propagation import stock_propagator
+
+logger = structlog.get_logger()
+
+DIRTY_PRODUCTS_KEY = "inventory:dirty_products"
+
+# SQLSTATEs worth retrying: serialization failure, deadlock
+RETRYABLE_SQLSTATES = {"40001", "40P01"}
+
+# One statement per order: pick, for each product, the warehouse with the
+# most available stock that can cover the whole line, reserve it with a
+# conditional UPDATE and record the reservations. Under READ COMMITTED a
+# concurrently changed row is re-checked against the WHERE clause, so a
+# line either fits or comes back missing; stock can never go negative.
+_RESERVE = text("""
+WITH req AS (
+    SELECT product_id, sum(qty)::int AS qty
+    FROM unnest(CAST(:product_ids AS uuid[]), CAST(:quantities AS int[])) AS r(product_id, qty)
+    GROUP BY product_id
+),
+pick AS (
+    SELECT DISTINCT ON (req.product_id) req.product_id, req.qty, i.id AS inventory_id
+    FROM req
+    JOIN inventory i ON i.product_id = req.product_id
+    WHERE i.quantity - coalesce(i.reserved, 0) >= req.qty
+    ORDER BY req.product_id, i.quantity - coalesce(i.reserved, 0) DESC
+),
+upd AS (
+    UPDATE inventory i
+    SET reserved = coalesce(i.reserved, 0) + pick.qty
+    FROM pick
+    WHERE i.id = pick.inventory_id
+      AND i.quantity - coalesce(i.reserved, 0) >= pick.qty
+    RETURNING i.id, i.product_id, i.warehouse, pick.qty, i.quantity - i.reserved AS available
+),
+ins AS (
+    INSERT INTO inventory_reservations
+        (id, order_ref, inventory_id, product_id, warehouse, quantity, status, expires_at)
+    SELECT gen_random_uuid(), :order_ref, upd.id, upd.product_id, upd.warehouse, upd.qty, 'HELD',
+           now() + CAST(:ttl_seconds AS integer) * interval '1 second'
+    FROM upd
+    RETURNING id, inventory_id, product_id, warehouse, quantity
+)
+SELECT ins.id, ins.product_id, ins.warehouse, ins.quantity, upd.available
+FROM ins
+JOIN upd ON upd.id = ins.inventory_id
+""")
+
+# Held -> released; gives the stock back
+_RELEASE_SQL = """
+WITH rel AS (
+    UPDATE inventory_reservations
+    SET status = 'RELEASED', updated_at = now()
+    WHERE status = 'HELD' AND {condition}
+    RETURNING inventory_id, quantity
+),
+agg AS (
+    SELECT inventory_id, sum(quantity)::int AS qty FROM rel GROUP BY inventory_id
+)
+UPDATE inventory i
+SET reserved = greatest(coalesce(i.reserved, 0) - agg.qty, 0)
+FROM agg
+WHERE i.id = agg.inventory_id
+RETURNING i.product_id
+"""
+_RELEASE_ORDER = text(_RELEASE_SQL.format(condition="order_ref = :order_ref"))
+_RELEASE_EXPIRED = text(_RELEASE_SQL.format(condition="expires_at < now()"))
+
+# Held -> committed (shipped); takes the stock out of quantity and reserved
+_COMMIT = text("""
+WITH com AS (
+    UPDATE inventory_reservations
+    SET status = 'COMMITTED', updated_at = now()
+    WHERE status = 'HELD' AND order_ref = :order_ref
+    RETURNING inventory_id, quantity
+),
+agg AS (
+    SELECT inventory_id, sum(quantity)::int AS qty FROM com GROUP BY inventory_id
+)
+UPDATE inventory i
+SET quantity = i.quantity - agg.qty,
+    reserved = greatest(coalesce(i.reserved, 0) - agg.qty, 0)
+FROM agg
+WHERE i.id = agg.inventory_id
+RETURNING i.product_id
+""")
+
+# Denormalized Product totals from the per-warehouse rows
+_RECONCILE = text("""
+UPDATE products p
+SET total_stock = s.quantity, reserved_stock = s.reserved
+FROM (
+    SELECT product_id, sum(quantity)::int AS quantity, sum(coalesce(reserved, 0))::int AS reserved
+    FROM inventory
+    WHERE product_id = ANY(CAST(:product_ids AS uuid[]))
+    GROUP BY product_id
+) s
+WHERE p.id = s.product_id
+  AND (p.total_stock IS DISTINCT FROM s.quantity OR p.reserved_stock IS DISTINCT FROM s.reserved)
+""")
+
+
+def _sqlstate(error: DBAPIError) -> Optional[str]:
+    return getattr(error.orig, "sqlstate", None) or getattr(error.orig, "pgcode", None)
+
+
+class InventoryService:
+    """Reserves, releases and commits stock without read-modify-write.
+
+    Every change is a single conditional statement, so a transaction holds
+    an inventory row lock only for the duration of one UPDATE and commits
+    immediately. Product.total_stock/reserved_stock are not written on the
+    hot path (that would make the product row the contention point for
+    all of its warehouses); changed products are queued and reconciled in
+    batches by StockReconciler.
+    """
+
+    def __init__(self, session_factory=AsyncSessionLocal):
+        self.session_factory = session_factory
+        self.logger = logger.bind(component="inventory")
+
+    async def reserve(
+        self,
+        order_ref: str,
+        lines: List[Dict[str, Any]],
+        ttl_seconds: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Reserve every line of an order, or nothing.
+
+        Each line ({"product_id", "quantity"}) is served from a single
+        warehouse. Lines that lose a race are retried a few times before
+        the order is reported short.
+        """
+        requested: Dict[uuid.UUID, int] = defaultdict(int)
+        for line in lines:
+            if line["quantity"] <= 0:
+                raise ValidationException("Reservation quantity must be positive")
+            requested[uuid.UUID(str(line["product_id"]))] += line["quantity"]
+        if not requested:
+            raise ValidationException("No lines to reserve")
+
+        params = {
+            "order_ref": order_ref,
+            "product_ids": list(requested),
+            "quantities": list(requested.values()),
+            "ttl_seconds": ttl_seconds or settings.INVENTORY_RESERVATION_TTL_SECONDS,
+        }
+
+        shortages: List[uuid.UUID] = []
+        for attempt in range(settings.INVENTORY_RESERVE_ATTEMPTS):
+            try:
+                async with self.session_factory() as session:
+                    rows = (await session.execute(_RESERVE, params)).all()
+                    reserved = {row.product_id for row in rows}
+                    shortages = [pid for pid in requested if pid not in reserved]
+                    if shortages:
+                        # All or nothing: give back the lines that did fit
+                        await session.rollback()
+                        continue
+                    await session.commit()
+            except DBAPIError as e:
+                if _sqlstate(e) not in RETRYABLE_SQLSTATES:
+                    raise
+                shortages = list(requested)
+                await asyncio.sleep(0.005 * (attempt + 1))
+                continue
+
+            await mark_dirty(requested, low_stock=[
+                row.product_id for row in rows
+                if row.available <= settings.STOCK_PROPAGATION_LOW_STOCK
+            ])
+            return {
+                "order_ref": order_ref,
+                "reserved": True,
+                "reservations": [
+                    {
+                        "id": row.id,
+                        "product_id": row.product_id,
+                        "warehouse": row.warehouse,
+                        "quantity": row.quantity
+                    }
+                    for row in rows
+                ],
+                "shortages": []
+            }
+
+        return {"order_ref": order_ref, "reserved": False, "reservations": [], "shortages": shortages}
+
+    async def release(self, order_ref: str) -> int:
+        """Return held stock for an order (cancelled checkout)"""
+        return await self._transition(_RELEASE_ORDER, {"order_ref": order_ref})
+
+    async def commit(self, order_ref: str) -> int:
+        """Consume held stock for an order (shipped)"""
+        return await self._transition(_COMMIT, {"order_ref": order_ref})
+
+    async def release_expired(self) -> int:
+        """Release held reservations past their expiry"""
+        return await self._transition(_RELEASE_EXPIRED, {})
+
+    async def adjust_stock(self, product_id: uuid.UUID, warehouse: str, delta: int) -> Optional[int]:
+        """Add or remove on-hand stock (receiving, counts); never below reserved"""
+        async with self.session_factory() as session:
+            async with session.begin():
+                row = (await session.execute(
+                    text(
+                        "UPDATE inventory SET quantity = quantity + :delta "
+                        "WHERE product_id = :product_id AND warehouse = :warehouse "
+                        "AND quantity + :delta >= coalesce(reserved, 0) "
+                        "RETURNING quantity, quantity - coalesce(reserved, 0) AS available"
+                    ),
+                    {"product_id": product_id, "warehouse": warehouse, "delta": delta}
+                )).first()
+        if row is None:
+            return None
+
+        low = row.available <= settings.STOCK_PROPAGATION_LOW_STOCK
+        await mark_dirty([product_id], low_stock=[product_id] if low else [])
+        return row.quantity
+
+    async def get_availability(self, session: AsyncSession, product_id: uuid.UUID) -> Dict[str, Any]:
+        """Per-warehouse stock straight from the inventory rows"""
+        result = await session.execute(
+            select(Inventory.warehouse, Inventory.quantity, Inventory.reserved)
+            .where(Inventory.product_id == product_id)
+            .order_by(Inventory.warehouse)
+        )
+        warehouses = [
+            {
+                "warehouse": row.warehouse,
+                "quantity": row.quantity,
+                "reserved": row.reserved or 0,
+                "available": row.quantity - (row.reserved or 0)
+            }
+            for row in result
+        ]
+        return {
+            "product_id": product_id,
+            "available": sum(w["available"] for w in warehouses),
+            "warehouses": warehouses
+        }
+
+    async def _transition(self, statement, params: Dict[str, Any]) -> int:
+        async with self.session_factory() as session:
+            async with session.begin():
+                product_ids = [row.product_id for row in await session.execute(statement, params)]
+        await mark_dirty(product_ids)
+        return len(product_ids)
+
+
+# Products whose totals need reconciling when Redis is unreachable
+_local_dirty: set = set()
+
+
+async def mark_dirty(product_ids: Iterable[uuid.UUID], low_stock: Iterable[uuid.UUID] = ()):
+    """Queue products for Product total reconciliation and marketplace stock updates"""
+    product_ids = list(product_ids)
+    members = {str(product_id) for product_id in product_ids}
+    if not members:
+        return
+    await stock_propagator.notify(product_ids, low_stock)
+    try:
+        await get_redis().sadd(DIRTY_PRODUCTS_KEY, *members)
+    except Exception as e:
+        logger.warning("Could not queue stock reconciliation", error=str(e))
+        _local_dirty.update(members)
+
+
+class StockReconciler:
+    """Copies per-warehouse totals into Product.total_stock/reserved_stock.
+
+    Runs every INVENTORY_RECONCILE_SECONDS over the products queued by
+    mark_dirty, and over the whole catalog every
+    INVENTORY_FULL_RECONCILE_SECONDS as a safety net. Also releases
+    expired reservations.
+    """
+
+    def __init__(self, session_factory=AsyncSessionLocal):
+        self.session_factory = session_factory
+        self.inventory = InventoryService(session_factory)
+        self._task: Optional[asyncio.Task] = None
+        self.logger = logger.bind(component="stock_reconciler")
+
+    async def reconcile_dirty(self) -> int:
+        """Reconcile queued products; returns the number of products updated"""
+        members = set(_local_dirty)
+        _local_dirty.clear()
+        try:
+            popped = await get_redis().spop(DIRTY_PRODUCTS_KEY, settings.INVENTORY_RECONCILE_BATCH)
+            members.update(popped or [])
+        except Exception as e:
+            self.logger.warning("Could not read stock reconciliation queue", error=str(e))
+        if not members:
+            return 0
+
+        product_ids = [uuid.UUID(member) for member in members]
+        try:
+            return await self.reconcile(product_ids)
+        except Exception:
+            # Requeue so nothing is lost
+            _local_dirty.update(members)
+            raise
+
+    async def reconcile(self, product_ids: List[uuid.UUID]) -> int:
+        updated = 0
+        for i in range(0, len(product_ids), settings.BULK_DB_CHUNK_SIZE):
+            chunk = product_ids[i:i + settings.BULK_DB_CHUNK_SIZE]
+            async with self.session_factory() as session:
+                async with session.begin():
+                    result = await session.execute(_RECONCILE, {"product_ids": chunk})
+                    updated += result.rowcount
+        return updated
+
+    async def reconcile_all(self) -> int:
+        async with self.session_factory() as session:
+            product_ids = list(await session.scalars(select(Inventory.product_id).distinct()))
+        return await self.reconcile(product_ids)
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _loop(self):
+        loop = asyncio.get_running_loop()
+        next_full = loop.time()
+        while True:
+            try:
+                await self.inventory.release_expired()
+                if loop.time() >= next_full:
+                    updated = await self.reconcile_all()
+                    next_full = loop.time() + settings.INVENTORY_FULL_RECONCILE_SECONDS
+                    if updated:
+                        self.logger.warning("Full reconciliation corrected product totals", products=updated)
+                else:
+                    await self.reconcile_dirty()
+                    while await self._queue_size():
+                        await self.reconcile_dirty()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.error("Stock reconciliation failed", error=str(e))
+            await asyncio.sleep(settings.INVENTORY_RECONCILE_SECONDS)
+
+    async def _queue_size(self) -> int:
+        try:
+            return await get_redis().scard(DIRTY_PRODUCTS_KEY)
+        except Exception:
+            return 0
+
+
+stock_reconciler = StockReconciler()
@@ -0,0 +1,263 @@
+"""Write-behind buffer for listing views, clicks and conversions"""
+
+from typing import Dict, List, Optional, Iterable, Tuple
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+import asyncio
+import uuid
+import structlog
+
+from sqlalchemy import update, delete, values, column, func, Integer
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.redis import get_redis
+from app.models.database import Listing, ListingCounterFlush
+from app.services.sales_rollup import record_listing_activity
+
+logger = structlog.get_logger()
+
+COUNTERS = ("views", "clicks", "conversions")
+
+PENDING_KEY = "listing_counters:pending"
+INFLIGHT_KEY = "listing_counters:inflight"
+INFLIGHT_ID_KEY = "listing_counters:inflight_id"
+LOCK_KEY = "listing_counters:flush_lock"
+
+# Delete the lock only if we still own it
+_RELEASE_LOCK = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+def _field(listing_id: uuid.UUID, counter: str) -> str:
+    return f"{listing_id}:{counter}"
+
+
+def _chunks(items: List, size: int):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+class ListingCounterBuffer:
+    """Absorbs counter increments and writes them to Postgres in batches.
+
+    Increments land in a per-process dict (no I/O on the request path).
+    Every COUNTER_LOCAL_FLUSH_SECONDS the process adds its deltas to a
+    shared Redis hash. Every COUNTER_DB_FLUSH_SECONDS one worker (holding
+    a Redis lock) renames that hash to an in-flight batch with a flush ID
+    and applies it with one UPDATE ... FROM (VALUES ...) per chunk.
+
+    The flush ID is recorded in listing_counter_flushes in the same
+    transaction as the UPDATE. A batch that was applied but not cleared
+    from Redis (crash, lost connection) is retried with the same ID and
+    skipped, so delivery is at-least-once and application exactly-once.
+    """
+
+    def __init__(self, session_factory=AsyncSessionLocal):
+        self.session_factory = session_factory
+        self.local: Dict[Tuple[uuid.UUID, str], int] = defaultdict(int)
+        self._tasks: List[asyncio.Task] = []
+        self.logger = logger.bind(component="listing_counters")
+
+    def incr(self, listing_id: uuid.UUID, counter: str, amount: int = 1):
+        """Add to a counter; takes effect in Postgres on the next flush"""
+        if counter not in COUNTERS:
+            raise ValueError(f"Unknown counter '{counter}'")
+        self.local[(listing_id, counter)] += amount
+
+    async def pending(self, listing_ids: Iterable[uuid.UUID]) -> Dict[uuid.UUID, Dict[str, int]]:
+        """Deltas not yet in Postgres: this process, Redis and the in-flight batch.
+
+        Between a flush committing and its batch being cleared from Redis
+        (a single round trip) the batch is counted twice.
+        """
+        listing_ids = list(dict.fromkeys(listing_ids))
+        deltas = {listing_id: dict.fromkeys(COUNTERS, 0) for listing_id in listing_ids}
+        fields = [_field(listing_id, counter) for listing_id in listing_ids for counter in COUNTERS]
+        if not fields:
+            return deltas
+
+        for listing_id in listing_ids:
+            for counter in COUNTERS:
+                deltas[listing_id][counter] += self.local.get((listing_id, counter), 0)
+
+        try:
+            async with get_redis().pipeline(transaction=False) as pipe:
+                pipe.hmget(PENDING_KEY, fields)
+                pipe.hmget(INFLIGHT_KEY, fields)
+                shared = await pipe.execute()
+        except Exception as e:
+            self.logger.warning("Could not read buffered counters", error=str(e))
+            return deltas
+
+        for found in shared:
+            for i, value in enumerate(found):
+                if value:
+                    listing_id = listing_ids[i // len(COUNTERS)]
+                    deltas[listing_id][COUNTERS[i % len(COUNTERS)]] += int(value)
+        return deltas
+
+    async def merge(self, listings: List[Listing]) -> List[Listing]:
+        """Add unflushed deltas to loaded listings without marking them dirty"""
+        deltas = await self.pending(listing.id for listing in listings)
+        for listing in listings:
+            for counter, delta in deltas[listing.id].items():
+                if delta:
+                    set_committed_value(listing, counter, (getattr(listing, counter) or 0) + delta)
+        return listings
+
+    async def push(self):
+        """Move this process's deltas into the shared Redis hash"""
+        if not self.local:
+            return
+        batch, self.local = self.local, defaultdict(int)
+
+        try:
+            async with get_redis().pipeline(transaction=True) as pipe:
+                for (listing_id, counter), amount in batch.items():
+                    pipe.hincrby(PENDING_KEY, _field(listing_id, counter), amount)
+                await pipe.execute()
+        except Exception as e:
+            # Keep the deltas and retry on the next tick
+            for key, amount in batch.items():
+                self.local[key] += amount
+            self.logger.warning("Could not push counters to Redis", error=str(e))
+
+    async def flush(self) -> int:
+        """Apply the shared batch to Postgres; returns the number of listings updated"""
+        redis = get_redis()
+        token = str(uuid.uuid4())
+        if not await redis.set(LOCK_KEY, token, nx=True, ex=settings.COUNTER_FLUSH_LOCK_SECONDS):
+            return 0
+
+        try:
+            # Retry an unfinished batch before starting a new one
+            if not await redis.exists(INFLIGHT_KEY):
+                if not await redis.exists(PENDING_KEY):
+                    return 0
+                async with redis.pipeline(transaction=True) as pipe:
+                    pipe.rename(PENDING_KEY, INFLIGHT_KEY)
+                    pipe.set(INFLIGHT_ID_KEY, str(uuid.uuid4()))
+                    await pipe.execute()
+
+            flush_id = await redis.get(INFLIGHT_ID_KEY) or str(uuid.uuid4())
+            batch = await redis.hgetall(INFLIGHT_KEY)
+            rows = self._rows(batch)
+
+            applied = await self._apply(flush_id, rows) if rows else False
+
+            async with redis.pipeline(transaction=True) as pipe:
+                pipe.delete(INFLIGHT_KEY, INFLIGHT_ID_KEY)
+                await pipe.execute()
+
+            if not applied and rows:
+                self.logger.info("Skipped already applied counter flush", flush_id=flush_id)
+                return 0
+            return len(rows)
+        finally:
+            await redis.eval(_RELEASE_LOCK, 1, LOCK_KEY, token)
+
+    def _rows(self, batch: Dict[str, str]) -> List[Dict]:
+        rows: Dict[uuid.UUID, Dict] = {}
+        for field, value in batch.items():
+            listing_id, _, counter = field.rpartition(":")
+            if counter not in COUNTERS:
+                continue
+            listing_id = uuid.UUID(listing_id)
+            row = rows.setdefault(listing_id, {"id": listing_id, **dict.fromkeys(COUNTERS, 0)})
+            row[counter] += int(value)
+        return list(rows.values())
+
+    async def _apply(self, flush_id: str, rows: List[Dict]) -> bool:
+        """Run the batched UPDATE and record the flush ID in one transaction"""
+        async with self.session_factory() as session:
+            async with session.begin():
+                recorded = await session.scalar(
+                    insert(ListingCounterFlush)
+                    .values(flush_id=flush_id, listings=len(rows))
+                    .on_conflict_do_nothing(index_elements=["flush_id"])
+                    .returning(ListingCounterFlush.flush_id)
+                )
+                if recorded is None:
+                    return False
+
+                for chunk in _chunks(rows, settings.BULK_DB_CHUNK_SIZE):
+                    await session.execute(self._increment_statement(chunk))
+                    await record_listing_activity(session, chunk)
+
+        self.logger.info("Flushed listing counters", flush_id=flush_id, listings=len(rows))
+        return True
+
+    def _increment_statement(self, rows: List[Dict]):
+        """UPDATE listings SET views = views + v.views, ... FROM (VALUES ...) v"""
+        source = values(
+            column("id", Listing.__table__.c.id.type),
+            *[column(counter, Integer) for counter in COUNTERS],
+            name="v"
+        ).data([tuple(row[name] for name in ["id", *COUNTERS]) for row in rows])
+
+        changes = {
+            counter: func.coalesce(getattr(Listing, counter), 0) + source.c[counter]
+            for counter in COUNTERS
+        }
+        # Counters are not edits; keep updated_at from firing its onupdate
+        changes["updated_at"] = Listing.updated_at
+
+        return (
+            update(Listing)
+            .where(Listing.id == source.c.id)
+            .values(changes)
+            .execution_options(synchronize_session=False)
+        )
+
+    async def prune_flushes(self, older_than: Optional[timedelta] = None):
+        """Drop flush IDs old enough that no retry can still reference them"""
+        cutoff = datetime.now(timezone.utc) - (older_than or timedelta(days=7))
+        async with self.session_factory() as session:
+            async with session.begin():
+                await session.execute(
+                    delete(ListingCounterFlush).where(ListingCounterFlush.applied_at < cutoff)
+                )
+
+    async def start(self):
+        """Start the push and flush loops"""
+        if self._tasks:
+            return
+        try:
+            await self.prune_flushes()
+        except Exception as e:
+            self.logger.warning("Could not prune counter flush IDs", error=str(e))
+        self._tasks = [
+            asyncio.create_task(self._loop(self.push, settings.COUNTER_LOCAL_FLUSH_SECONDS)),
+            asyncio.create_task(self._loop(self.flush, settings.COUNTER_DB_FLUSH_SECONDS)),
+        ]
+
+    async def stop(self):
+        """Stop the loops and hand any remaining deltas to Redis"""
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        await self.push()
+        try:
+            await self.flush()
+        except Exception as e:
+            self.logger.warning("Final counter flush failed", error=str(e))
+
+    async def _loop(self, step, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await step()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.error("Counter flush step failed", step=step.__name__, error=str(e))
+
+
+listing_counters = ListingCounterBuffer()
@@ -0,0 +1,197 @@
+"""Listing service layer"""
+
+from typing import Dict, Optional, Any
+from datetime import datetime, time
+import uuid
+import structlog
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.exceptions import ValidationException
+from app.models.database import Listing, ListingStatus, MarketplaceType, Review
+from app.services.attribute_filters import containment_clause
+from app.schemas.listings import BulkListingOperation, BulkListingJob
+from app.services.bulk_listings import bulk_listing_engine
+from app.services.listing_counters import listing_counters
+from app.services.sales_rollup import read_rollup, parse_period, ratio
+
+logger = structlog.get_logger()
+
+
+class ListingService:
+    """Business logic for listings"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.logger = logger.bind(component="listing_service")
+
+    async def get_listing(self, listing_id: uuid.UUID) -> Optional[Listing]:
+        """Get a listing by ID, with counters including unflushed increments"""
+        listing = await self.db.get(Listing, listing_id)
+        if listing:
+            await listing_counters.merge([listing])
+        return listing
+
+    async def list_listings(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """List listings with filtering and pagination.
+
+        The `marketplace_data` filter is a containment document and uses
+        the GIN index on listings.marketplace_data.
+        """
+        filters = filters or {}
+        conditions = []
+
+        try:
+            if filters.get("marketplace"):
+                conditions.append(Listing.marketplace == MarketplaceType(filters["marketplace"]))
+            if filters.get("status"):
+                conditions.append(Listing.status == ListingStatus(filters["status"]))
+        except ValueError as e:
+            raise ValidationException(str(e))
+        if filters.get("product_id"):
+            conditions.append(Listing.product_id == filters["product_id"])
+        if filters.get("marketplace_data"):
+            conditions.append(containment_clause(Listing.marketplace_data, filters["marketplace_data"]))
+
+        total = await self.db.scalar(select(func.count()).select_from(Listing).where(*conditions))
+        result = await self.db.execute(
+            select(Listing)
+            .where(*conditions)
+            .order_by(Listing.created_at.desc())
+            .offset(skip)
+            .limit(limit)
+        )
+
+        items = await listing_counters.merge(result.scalars().all())
+
+        return {
+            "items": items,
+            "total": total or 0,
+            "skip": skip,
+            "limit": limit
+        }
+
+    async def get_listing_performance(
+        self,
+        listing_id: uuid.UUID,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Performance for a date range, read from the sales_daily rollup.
+
+        Metrics are kept per product and marketplace, which is the
+        listing's scope. Buy box and rank are not tracked per day, so the
+        listing's current values are reported.
+        """
+        listing = await self.db.get(Listing, listing_id)
+        if not listing:
+            return None
+
+        start, end = parse_period(start_date, end_date)
+        per_marketplace = await read_rollup(
+            self.db, listing.product_id, start, end, marketplace=listing.marketplace
+        )
+        metrics = per_marketplace.get(listing.marketplace.value, {})
+        views = metrics.get("views", 0)
+        clicks = metrics.get("clicks", 0)
+        orders = metrics.get("orders", 0)
+        revenue = metrics.get("revenue", 0.0)
+        review_count = metrics.get("review_count", 0)
+
+        return {
+            "listing_id": listing_id,
+            "period_start": datetime.combine(start, time.min),
+            "period_end": datetime.combine(end, time.max),
+            "impressions": views,
+            "clicks": clicks,
+            "click_through_rate": ratio(clicks, views),
+            "conversions": orders,
+            "conversion_rate": ratio(orders, clicks),
+            "revenue": round(revenue, 2),
+            "average_order_value": round(revenue / orders, 2) if orders else 0.0,
+            "buy_box_percentage": 100.0 if listing.is_buy_box_winner else 0.0,
+            "rank_average": float(listing.rank) if listing.rank is not None else None,
+            "review_count": review_count,
+            "average_rating": (
+                round(metrics["rating_sum"] / review_count, 2) if review_count else None
+            )
+        }
+
+    def record_event(self, listing_id: uuid.UUID, counter: str, count: int = 1):
+        """Count views, clicks or conversions through the write-behind buffer"""
+        try:
+            listing_counters.incr(listing_id, counter, count)
+        except ValueError as e:
+            raise ValidationException(str(e))
+
+    async def get_listing_reviews(
+        self,
+        listing_id: uuid.UUID,
+        skip: int = 0,
+        limit: int = 50,
+        rating_filter: Optional[int] = None,
+        since: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        """Reviews for a listing, newest first.
+
+        reviews is partitioned by month on review_date; ordering by it lets
+        PostgreSQL scan partitions newest-first and stop once the page is
+        full, and `since` prunes older partitions outright.
+        """
+        conditions = [Review.listing_id == listing_id]
+        if rating_filter:
+            conditions.append(Review.rating == rating_filter)
+        if since:
+            conditions.append(Review.review_date >= since)
+
+        result = await self.db.execute(
+            select(Review)
+            .where(*conditions)
+            .order_by(Review.review_date.desc())
+            .offset(skip)
+            .limit(limit)
+        )
+        reviews = result.scalars().all()
+
+        return {
+            "items": [
+                {
+                    "id": review.id,
+                    "rating": review.rating,
+                    "title": review.title,
+                    "body": review.body,
+                    "reviewer_name": review.reviewer_name,
+                    "sentiment": review.sentiment,
+                    "language": review.language,
+                    "verified_purchase": review.verified_purchase,
+                    "helpful_votes": review.helpful_votes,
+                    "review_date": review.review_date
+                }
+                for review in reviews
+            ],
+            "skip": skip,
+            "limit": limit
+        }
+
+    def create_bulk_job(self, operation: BulkListingOperation) -> BulkListingJob:
+        """Register a bulk job so progress can be polled before it starts"""
+        return bulk_listing_engine.create_job(operation)
+
+    async def bulk_operations(
+        self,
+        operation: BulkListingOperation,
+        job: Optional[BulkListingJob] = None
+    ) -> BulkListingJob:
+        """Execute a bulk operation; runs on its own database session"""
+        job = job or bulk_listing_engine.create_job(operation)
+        return await bulk_listing_engine.run(job, operation)
+
+    def get_bulk_job(self, job_id: str) -> Optional[BulkListingJob]:
+        """Get progress and per-listing results of a bulk job"""
+        return bulk_listing_engine.get_job(job_id)
@@ -0,0 +1,117 @@
+"""Shared OpenAI client: embeddings, completions and streamed completions
+
+Every call passes a circuit breaker per endpoint (embeddings, chat per
+model), so an OpenAI outage fails fast with CircuitOpenException, and the
+shared concurrency/token limiter.
+"""
+
+from typing import Dict, List, Optional, Any, AsyncIterator
+import time
+
+from app.core.config import settings
+from app.core.exceptions import ValidationException
+from app.core.lazy import lazy_import
+from app.core.resilience import circuit_breaker
+from app.services.llm_limiter import llm_limiter, estimate_tokens
+
+openai = lazy_import("openai")
+
+_client = None
+
+
+def get_openai_client():
+    """The process-wide AsyncOpenAI client (one connection pool for all callers)"""
+    global _client
+    if _client is None:
+        if not settings.OPENAI_API_KEY:
+            raise ValidationException("OpenAI API key not configured")
+        _client = openai.AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            timeout=settings.LLM_REQUEST_TIMEOUT_SECONDS,
+            max_retries=settings.LLM_MAX_RETRIES
+        )
+    return _client
+
+
+async def embed(texts: List[str]) -> List[List[float]]:
+    """EMBEDDING_MODEL vectors for texts, in order"""
+    async with circuit_breaker("openai:embeddings").guard():
+        async with llm_limiter.acquire(sum(len(t) for t in texts) // 4, kind="embeddings") as grant:
+            response = await get_openai_client().embeddings.create(model=settings.EMBEDDING_MODEL, input=texts)
+            if response.usage:
+                grant.record(response.usage.total_tokens)
+    return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+
+async def chat_completion(
+    messages: List[Dict[str, str]],
+    model: Optional[str] = None,
+    max_tokens: int = 1000,
+    temperature: float = 0.7
+) -> Dict[str, Any]:
+    """Completion text with the model that served it and token usage"""
+    model = model or settings.OPENAI_MODEL
+    async with circuit_breaker(f"openai:chat:{model}").guard():
+        async with llm_limiter.acquire(estimate_tokens(messages, max_tokens), kind=f"chat:{model}") as grant:
+            response = await get_openai_client().chat.completions.create(
+                model=model,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=temperature
+            )
+            usage = response.usage
+            if usage:
+                grant.record(usage.total_tokens, usage.completion_tokens)
+    return {
+        "content": response.choices[0].message.content or "",
+        "model": response.model,
+        "prompt_tokens": usage.prompt_tokens if usage else 0,
+        "completion_tokens": usage.completion_tokens if usage else 0,
+    }
+
+
+async def complete(
+    messages: List[Dict[str, str]],
+    model: Optional[str] = None,
+    max_tokens: int = 1000,
+    temperature: float = 0.7
+) -> str:
+    return (await chat_completion(messages, model, max_tokens, temperature))["content"]
+
+
+async def stream(
+    messages: List[Dict[str, str]],
+    model: Optional[str] = None,
+    max_tokens: int = 1000,
+    temperature: float = 0.7
+) -> AsyncIterator[str]:
+    """Yield completion text as the model produces it"""
+    model = model or settings.OPENAI_MODEL
+    prompt_tokens = estimate_tokens(messages, 0)
+    async with circuit_breaker(f"openai:chat:{model}").guard():
+        async with llm_limiter.acquire(prompt_tokens + max_tokens, kind=f"chat:{model}") as grant:
+            # Only time spent waiting on the provider counts as latency; a
+            # slow reader of the stream must not look like a slow model
+            started = time.monotonic()
+            response = await get_openai_client().chat.completions.create(
+                model=model,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                stream=True
+            )
+            provider_seconds = time.monotonic() - started
+            chunks = 0
+            iterator = response.__aiter__()
+            while True:
+                started = time.monotonic()
+                try:
+                    chunk = await iterator.__anext__()
+                except StopAsyncIteration:
+                    break
+                finally:
+                    provider_seconds += time.monotonic() - started
+                if chunk.choices and chunk.choices[0].delta.content:
+                    chunks += 1  # Roughly one token per streamed chunk
+                    yield chunk.choices[0].delta.content
+            grant.record(prompt_tokens + chunks, chunks, provider_seconds)
@@ -0,0 +1,253 @@
+"""Adaptive concurrency and tokens-per-minute budget for LLM calls"""
+
+from typing import Dict, List, Optional, Any, Tuple
+from contextvars import ContextVar
+import asyncio
+import heapq
+import itertools
+import time
+import structlog
+
+from prometheus_client import Counter, Gauge
+
+from app.core.config import settings
+from app.core.resilience import is_transient
+
+logger = structlog.get_logger()
+
+# Priority of the calling code; agents set it from AgentTask.priority,
+# everything else (customer chat) runs at the default
+current_priority: ContextVar[str] = ContextVar("llm_priority", default="high")
+
+PRIORITY_RANK = {"critical": 0, "high": 1, "medium": 2, "low": 3}
+
+LIMIT = Gauge("llm_concurrency_limit", "Current adaptive limit on concurrent LLM calls")
+IN_FLIGHT = Gauge("llm_in_flight", "LLM calls in flight")
+WAITING = Gauge("llm_waiting", "LLM calls waiting for a slot or token budget")
+BACKOFFS = Counter("llm_limit_decreases_total", "Multiplicative limit decreases", ["reason"])  # overload, latency
+
+
+class _Grant:
+    """A slot plus a token reservation, reconciled with actual usage on release"""
+
+    def __init__(self, priority: str, tokens: int, kind: str):
+        self.priority = priority
+        self.reserved = tokens
+        self.kind = kind
+        self.used: Optional[int] = None
+        self.generated: Optional[int] = None
+        self.latency: Optional[float] = None
+        self.started = time.monotonic()
+
+    def record(self, tokens: int, generated: Optional[int] = None, latency: Optional[float] = None):
+        """Actual prompt + completion tokens of the call, and the completion
+        tokens with the time the provider took for them (default: the time
+        since the slot was granted). Calls without generated tokens
+        (embeddings) give no latency signal."""
+        self.used = tokens
+        self.generated = generated
+        self.latency = latency
+
+
+class LLMLimiter:
+    """AIMD limit on concurrent LLM calls plus a priority-aware TPM budget.
+
+    The concurrency limit grows by about one per limit's worth of healthy
+    calls (additive increase) and is multiplied by LLM_CONCURRENCY_BACKOFF
+    on 429s, 5xx and timeouts, or when seconds per generated token rise
+    above LLM_LATENCY_TOLERANCE times the long-run baseline of the same
+    call kind (model) (multiplicative decrease); at most one decrease per
+    LLM_BACKOFF_COOLDOWN_SECONDS, since one overload produces a burst of
+    failures.
+
+    Tokens come from one bucket refilled at LLM_TOKENS_PER_MINUTE. Lower
+    priorities may only draw while the bucket holds more than their
+    reserve (LLM_PRIORITY_RESERVE), so critical and high work keeps
+    headroom when batch agents are busy. Waiting calls are served in
+    priority order, then arrival order. Each call reserves its prompt
+    estimate plus max_tokens, and the difference to actual usage is
+    refunded on release.
+    """
+
+    def __init__(self):
+        self.limit = float(settings.LLM_CONCURRENCY_INITIAL)
+        self.in_flight = 0
+        self.tokens = float(settings.LLM_TOKENS_PER_MINUTE)
+        self._refilled_at = time.monotonic()
+        self._waiters: List[Tuple[int, int, int, str, str, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._baseline: Dict[str, float] = {}  # Seconds per generated token by call kind, slow EWMA
+        self._recent: Dict[str, float] = {}  # Seconds per generated token by call kind, fast EWMA
+        self._last_decrease = 0.0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.stats = {"calls": 0, "overloads": 0, "decreases": 0, "waited_seconds": 0.0}
+        self.logger = logger.bind(component="llm_limiter")
+        LIMIT.set(self.limit)
+
+    def _refill(self):
+        now = time.monotonic()
+        capacity = settings.LLM_TOKENS_PER_MINUTE
+        self.tokens = min(capacity, self.tokens + (now - self._refilled_at) * capacity / 60)
+        self._refilled_at = now
+
+    def _floor(self, priority: str) -> float:
+        """Tokens that must remain in the bucket after a call of this priority"""
+        return settings.LLM_TOKENS_PER_MINUTE * settings.LLM_PRIORITY_RESERVE.get(priority, 0.0)
+
+    def _can_start(self, priority: str, tokens: int) -> bool:
+        if self.in_flight >= max(1, int(self.limit)):
+            return False
+        # A call larger than the floor-to-capacity headroom still runs once the bucket is full
+        floor = self._floor(priority)
+        return self.tokens - tokens >= floor or self.tokens >= settings.LLM_TOKENS_PER_MINUTE - 1
+
+    def _start(self, priority: str, tokens: int, kind: str) -> _Grant:
+        self.in_flight += 1
+        self.tokens -= tokens
+        self.stats["calls"] += 1
+        IN_FLIGHT.set(self.in_flight)
+        return _Grant(priority, tokens, kind)
+
+    def acquire(self, tokens: int, priority: Optional[str] = None, kind: str = "chat") -> "_Acquire":
+        """async with limiter.acquire(estimated_tokens, kind=...) as grant: ...; grant.record(actual, generated)
+
+        kind separates latency baselines: a small model's seconds per token
+        say nothing about a large one's.
+        """
+        return _Acquire(self, min(tokens, settings.LLM_TOKENS_PER_MINUTE), priority or current_priority.get(), kind)
+
+    async def _acquire(self, tokens: int, priority: str, kind: str) -> _Grant:
+        self._refill()
+        if not self._waiters and self._can_start(priority, tokens):
+            return self._start(priority, tokens, kind)
+
+        future = asyncio.get_running_loop().create_future()
+        entry = (PRIORITY_RANK.get(priority, 2), next(self._sequence), tokens, priority, kind, future)
+        heapq.heappush(self._waiters, entry)
+        WAITING.set(len(self._waiters))
+        started = time.monotonic()
+        self._dispatch()
+        try:
+            return await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted just as the caller gave up: hand the slot back
+                self._release(future.result(), None, cancelled=True)
+            elif entry in self._waiters:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                WAITING.set(len(self._waiters))
+            raise
+        finally:
+            self.stats["waited_seconds"] += time.monotonic() - started
+
+    def _dispatch(self):
+        """Start waiting calls in priority order while slots and budget allow"""
+        self._refill()
+        while self._waiters:
+            _, _, tokens, priority, kind, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            if not self._can_start(priority, tokens):
+                break
+            heapq.heappop(self._waiters)
+            future.set_result(self._start(priority, tokens, kind))
+        WAITING.set(len(self._waiters))
+
+        if self._waiters and self.in_flight < max(1, int(self.limit)) and self._timer is None:
+            # Blocked on the token budget: retry once enough has refilled
+            _, _, tokens, priority, _, _ = self._waiters[0]
+            deficit = max(tokens + self._floor(priority) - self.tokens, 1.0)
+            delay = min(deficit * 60 / settings.LLM_TOKENS_PER_MINUTE, 60.0)
+            self._timer = asyncio.get_running_loop().call_later(delay, self._on_timer)
+
+    def _on_timer(self):
+        self._timer = None
+        self._dispatch()
+
+    def _release(self, grant: _Grant, error: Optional[BaseException], cancelled: bool = False):
+        self.in_flight -= 1
+        IN_FLIGHT.set(self.in_flight)
+        if grant.used is not None:
+            # Refund (or charge) the difference between reservation and usage
+            self.tokens = min(settings.LLM_TOKENS_PER_MINUTE, self.tokens + grant.reserved - grant.used)
+
+        if not cancelled:
+            if error is not None and is_transient(error):
+                self.stats["overloads"] += 1
+                self._decrease("overload")
+            elif error is None:
+                latency = grant.latency if grant.latency is not None else time.monotonic() - grant.started
+                self._observe(grant.kind, latency, grant.generated)
+        self._dispatch()
+
+    def _observe(self, kind: str, latency: float, generated: Optional[int]):
+        if generated:
+            per_token = latency / generated
+            recent = self._recent.get(kind)
+            baseline = self._baseline.get(kind)
+            self._recent[kind] = recent = per_token if recent is None else 0.8 * recent + 0.2 * per_token
+            self._baseline[kind] = baseline = per_token if baseline is None else 0.99 * baseline + 0.01 * per_token
+            if recent > baseline * settings.LLM_LATENCY_TOLERANCE:
+                self._decrease("latency")
+                return
+
+        if self.in_flight + 1 >= int(self.limit):
+            # Only grow when the current limit is actually being used
+            self.limit = min(settings.LLM_CONCURRENCY_MAX, self.limit + 1 / self.limit)
+            LIMIT.set(self.limit)
+
+    def _decrease(self, reason: str):
+        now = time.monotonic()
+        if now - self._last_decrease < settings.LLM_BACKOFF_COOLDOWN_SECONDS:
+            return
+        self._last_decrease = now
+        previous = self.limit
+        self.limit = max(settings.LLM_CONCURRENCY_MIN, self.limit * settings.LLM_CONCURRENCY_BACKOFF)
+        self.stats["decreases"] += 1
+        BACKOFFS.labels(reason).inc()
+        LIMIT.set(self.limit)
+        self.logger.warning("LLM concurrency reduced", reason=reason, previous=round(previous, 2), limit=round(self.limit, 2))
+
+    def get_stats(self) -> Dict[str, Any]:
+        self._refill()
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "waiting": len(self._waiters),
+            "tokens_available": int(self.tokens),
+            "tokens_per_minute": settings.LLM_TOKENS_PER_MINUTE,
+            "seconds_per_token": {
+                kind: {"baseline": round(baseline, 5), "recent": round(self._recent[kind], 5)}
+                for kind, baseline in self._baseline.items()
+            },
+            **self.stats,
+            "waited_seconds": round(self.stats["waited_seconds"], 2),
+        }
+
+
+class _Acquire:
+    """Awaitable context manager returned by LLMLimiter.acquire"""
+
+    def __init__(self, limiter: LLMLimiter, tokens: int, priority: str, kind: str):
+        self.limiter = limiter
+        self.tokens = tokens
+        self.priority = priority
+        self.kind = kind
+        self.grant: Optional[_Grant] = None
+
+    async def __aenter__(self) -> _Grant:
+        self.grant = await self.limiter._acquire(self.tokens, self.priority, self.kind)
+        return self.grant
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.limiter._release(self.grant, exc)
+
+
+def estimate_tokens(messages: List[Dict[str, str]], max_tokens: int) -> int:
+    """Prompt tokens (about four characters each) plus the completion budget"""
+    return sum(len(m["content"]) for m in messages) // 4 + max_tokens
+
+
+llm_limiter = LLMLimiter()
@@ -0,0 +1,102 @@
+"""Order service layer"""
+
+from typing import Dict, Optional, Any
+from datetime import datetime, timedelta, timezone
+import uuid
+import structlog
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.core.exceptions import ValidationException
+from app.models.database import Order, OrderStatus, MarketplaceType
+
+logger = structlog.get_logger()
+
+DEFAULT_ORDER_WINDOW = timedelta(days=30)
+MAX_ORDER_WINDOW = timedelta(days=366)
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Treat naive timestamps as UTC"""
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+class OrderService:
+    """Business logic for orders.
+
+    orders and order_items are partitioned by month on placed_at, so every
+    query here carries a placed_at bound and only scans the matching
+    partitions.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.logger = logger.bind(component="order_service")
+
+    async def get_order(
+        self,
+        order_id: uuid.UUID,
+        placed_at: Optional[datetime] = None
+    ) -> Optional[Order]:
+        """Get an order with its lines.
+
+        With `placed_at` the lookup hits a single partition; without it
+        every partition's primary key index is probed.
+        """
+        query = select(Order).options(selectinload(Order.items)).where(Order.id == order_id)
+        if placed_at is not None:
+            query = query.where(Order.placed_at == _as_utc(placed_at))
+        result = await self.db.execute(query)
+        return result.scalars().first()
+
+    async def list_orders(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """List orders placed in [since, until), newest first.
+
+        The window defaults to the last 30 days and is capped at a year so
+        a listing never degenerates into a scan of every partition.
+        """
+        filters = filters or {}
+        until = _as_utc(until) or datetime.now(timezone.utc)
+        since = _as_utc(since) or until - DEFAULT_ORDER_WINDOW
+        if since >= until:
+            raise ValidationException("'since' must be before 'until'")
+        if until - since > MAX_ORDER_WINDOW:
+            raise ValidationException("Order window may span at most 366 days")
+
+        conditions = [Order.placed_at >= since, Order.placed_at < until]
+        try:
+            if filters.get("marketplace"):
+                conditions.append(Order.marketplace == MarketplaceType(filters["marketplace"]))
+            if filters.get("status"):
+                conditions.append(Order.status == OrderStatus(filters["status"]))
+        except ValueError as e:
+            raise ValidationException(str(e))
+
+        total = await self.db.scalar(select(func.count()).select_from(Order).where(*conditions))
+        result = await self.db.execute(
+            select(Order)
+            .where(*conditions)
+            .order_by(Order.placed_at.desc())
+            .offset(skip)
+            .limit(limit)
+        )
+
+        return {
+            "items": result.scalars().all(),
+            "total": total or 0,
+            "skip": skip,
+            "limit": limit,
+            "since": since,
+            "until": until
+        }
@@ -0,0 +1,260 @@
+"""Monthly range partition maintenance for orders, order_items and reviews"""
+
+from typing import Dict, List, Any, Optional, Tuple
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from pathlib import Path
+import asyncio
+import json
+import re
+import uuid
+import structlog
+
+from sqlalchemy import text, types as sa_types
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+from app.core.database import engine as default_engine
+from app.core.lazy import lazy_import
+from app.models.database import Base
+
+pa = lazy_import("pyarrow")
+pq = lazy_import("pyarrow.parquet")
+
+logger = structlog.get_logger()
+
+# Parent table -> partition key. Children are listed before the tables they
+# reference: order_items partitions must go before the orders partition of
+# the same month, or the foreign key blocks the detach.
+PARTITIONED_TABLES = {
+    "order_items": "placed_at",
+    "orders": "placed_at",
+    "reviews": "review_date",
+}
+
+# Keeps maintenance to one worker at a time (pg_try_advisory_lock key)
+PARTITION_LOCK_ID = 0x9A871
+
+PARTITION_NAME_RE = re.compile(r"^(?P<table>\w+)_y(?P<year>\d{4})m(?P<month>\d{2})$")
+
+
+def month_start(day: date, offset: int = 0) -> date:
+    """First day of the month `offset` months from `day`"""
+    index = day.year * 12 + (day.month - 1) + offset
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_y{month.year}m{month.month:02d}"
+
+
+def _to_arrow_value(value):
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def _arrow_type(column_type):
+    """Parquet column type for a model column; UUIDs, enums and JSON are stored as strings"""
+    if isinstance(column_type, sa_types.Boolean):
+        return pa.bool_()
+    if isinstance(column_type, sa_types.Integer):
+        return pa.int64()
+    if isinstance(column_type, sa_types.Numeric):
+        return pa.float64()
+    if isinstance(column_type, sa_types.DateTime):
+        return pa.timestamp("us", tz="UTC" if column_type.timezone else None)
+    if isinstance(column_type, sa_types.Date):
+        return pa.date32()
+    return pa.string()
+
+
+def arrow_schema(table: str):
+    """Schema of a partitioned table's archive, taken from the model rather
+    than inferred from data (an all-NULL first batch would infer `null`)"""
+    return pa.schema([
+        pa.field(column.name, _arrow_type(column.type))
+        for column in Base.metadata.tables[table].columns
+    ])
+
+
+class PartitionManager:
+    """Creates future partitions and archives expired ones.
+
+    Each parent table has one partition per calendar month plus a DEFAULT
+    partition that catches rows outside the pre-created range (e.g. old
+    orders imported from a marketplace). Partitions older than
+    PARTITION_RETENTION_MONTHS are written to a zstd-compressed Parquet
+    file, then detached and dropped.
+    """
+
+    def __init__(self, engine: Optional[AsyncEngine] = None):
+        self.engine = engine or default_engine
+        self.archive_dir = Path(settings.PARTITION_ARCHIVE_DIR)
+        self._task: Optional[asyncio.Task] = None
+        self.logger = logger.bind(component="partitions")
+
+    async def maintain(self) -> Dict[str, Any]:
+        """Create upcoming partitions, then archive expired ones.
+
+        Skipped (returns None values) while another worker holds the
+        maintenance lock.
+        """
+        async with self.engine.connect() as lock_conn:
+            if not await lock_conn.scalar(
+                text("SELECT pg_try_advisory_lock(:id)"), {"id": PARTITION_LOCK_ID}
+            ):
+                return {"created": None, "archived": None}
+            try:
+                created = await self.ensure_partitions()
+                archived = await self.archive_expired()
+            finally:
+                await lock_conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": PARTITION_LOCK_ID})
+        return {"created": created, "archived": archived}
+
+    async def start(self):
+        """Start the periodic maintenance; a long-running process keeps
+        creating partitions before rows for the month reach DEFAULT"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _loop(self):
+        while True:
+            try:
+                result = await self.maintain()
+                if result["created"] is not None:
+                    self.logger.info("Partition maintenance done", **result)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.error("Partition maintenance failed", error=str(e))
+            await asyncio.sleep(settings.PARTITION_MAINTENANCE_SECONDS)
+
+    async def ensure_partitions(self, months_ahead: Optional[int] = None) -> List[str]:
+        """Create partitions from the current month up to months_ahead"""
+        months_ahead = settings.PARTITION_PREMAKE_MONTHS if months_ahead is None else months_ahead
+        today = datetime.now(timezone.utc).date()
+        created = []
+
+        async with self.engine.begin() as conn:
+            for table in PARTITIONED_TABLES:
+                await conn.execute(text(
+                    f"CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} DEFAULT"
+                ))
+                existing = await self._partitions(conn, table)
+                for offset in range(0, months_ahead + 1):
+                    start = month_start(today, offset)
+                    name = partition_name(table, start)
+                    if name in existing:
+                        continue
+                    await conn.execute(text(
+                        f"CREATE TABLE {name} PARTITION OF {table} "
+                        f"FOR VALUES FROM ('{start.isoformat()}') "
+                        f"TO ('{month_start(start, 1).isoformat()}')"
+                    ))
+                    created.append(name)
+
+        if created:
+            self.logger.info("Created partitions", partitions=created)
+        return created
+
+    async def archive_expired(self, retention_months: Optional[int] = None) -> List[str]:
+        """Detach, export to Parquet and drop partitions past retention"""
+        retention_months = settings.PARTITION_RETENTION_MONTHS if retention_months is None else retention_months
+        cutoff = month_start(datetime.now(timezone.utc).date(), -retention_months)
+        archived = []
+
+        for table in PARTITIONED_TABLES:
+            async with self.engine.connect() as conn:
+                partitions = await self._partitions(conn, table)
+
+            expired = sorted(
+                name for name, month in partitions.items()
+                if month is not None and month < cutoff
+            )
+            for name in expired:
+                await self.archive_partition(table, name)
+                archived.append(name)
+
+        return archived
+
+    async def archive_partition(self, table: str, name: str) -> Path:
+        """Write one partition to Parquet, then detach and drop it.
+
+        The export reads the still-attached partition, so a failed export
+        leaves the rows in place for the next run. The row count is checked
+        again under the detach lock; rows that arrived after the export
+        abort the drop.
+        """
+        path, exported = await self._export_parquet(table, name)
+
+        async with self.engine.begin() as conn:
+            await conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+            rows = (await conn.execute(text(f"SELECT count(*) FROM {name}"))).scalar_one()
+            if rows != exported:
+                raise RuntimeError(f"{name} changed during export ({exported} rows exported, {rows} now)")
+            await conn.execute(text(f"DROP TABLE {name}"))
+
+        self.logger.info("Archived partition", partition=name, path=str(path), rows=exported)
+        return path
+
+    async def _export_parquet(self, table: str, name: str) -> Tuple[Path, int]:
+        """Stream a partition into a compressed Parquet file; returns the path and row count"""
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        path = self.archive_dir / f"{name}.parquet"
+        tmp_path = path.with_suffix(".parquet.tmp")
+        schema = arrow_schema(table)
+        columns = ", ".join(schema.names)
+        rows = 0
+
+        writer = pq.ParquetWriter(str(tmp_path), schema, compression="zstd")
+        try:
+            async with self.engine.connect() as conn:
+                result = await conn.stream(
+                    text(f"SELECT {columns} FROM {name}").execution_options(yield_per=50000)
+                )
+                async for batch in result.mappings().partitions(50000):
+                    writer.write_table(pa.Table.from_pylist(
+                        [{k: _to_arrow_value(v) for k, v in row.items()} for row in batch],
+                        schema=schema
+                    ))
+                    rows += len(batch)
+        except BaseException:
+            writer.close()
+            tmp_path.unlink(missing_ok=True)
+            raise
+        writer.close()
+
+        tmp_path.replace(path)
+        return path, rows
+
+    async def _partitions(self, conn, table: str) -> Dict[str, Optional[date]]:
+        """Attached partitions of a table mapped to the month they cover"""
+        result = await conn.execute(
+            text(
+                "SELECT c.relname FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = to_regclass(:table)"
+            ),
+            {"table": table}
+        )
+        partitions = {}
+        for row in result:
+            match = PARTITION_NAME_RE.match(row.relname)
+            partitions[row.relname] = (
+                date(int(match["year"]), int(match["month"]), 1)
+                if match and match["table"] == table else None
+            )
+        return partitions
+
+
+partition_manager = PartitionManager()
@@ -0,0 +1,279 @@
+"""Materialized top-K similar-product table"""
+
+from typing import Dict, List, Optional, Any, Set, Tuple
+import asyncio
+import uuid
+import numpy as np
+import structlog
+
+from sqlalchemy import select, delete, insert, update, or_, func, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, engine as default_engine
+from app.models.database import Product, ProductNeighbor
+
+logger = structlog.get_logger()
+
+# Keeps recompute to one worker at a time (pg_try_advisory_lock key)
+NEIGHBOR_LOCK_ID = 0x4E16B
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize rows so a dot product equals cosine similarity"""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class ProductNeighborService:
+    """Serves and maintains the product_neighbors table.
+
+    Recompute works in batches of products whose embedding changed since
+    their neighbors were last computed. Each batch streams the catalog in
+    chunks and scores it with one matrix product per chunk, keeping a
+    running top-K per product with argpartition. The same pass finds other
+    products whose stored top-K the changed embeddings would now enter, so
+    those are recomputed as well.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.top_k = settings.SIMILAR_PRODUCTS_TOP_K
+        self.batch_size = settings.SIMILAR_PRODUCTS_BATCH_SIZE
+        self.chunk_size = settings.SIMILAR_PRODUCTS_CHUNK_SIZE
+        self.logger = logger.bind(component="product_neighbors")
+
+    async def get_neighbors(self, product_id: uuid.UUID, limit: int) -> Optional[List[Dict[str, Any]]]:
+        """Precomputed neighbors, or None if the table cannot answer"""
+        if limit > self.top_k:
+            return None
+
+        result = await self.db.execute(
+            select(
+                Product.id, Product.sku, Product.title, Product.brand,
+                ProductNeighbor.similarity
+            )
+            .join(Product, Product.id == ProductNeighbor.neighbor_id)
+            .where(ProductNeighbor.product_id == product_id)
+            .order_by(ProductNeighbor.rank)
+            .limit(limit)
+        )
+        rows = result.all()
+        if not rows:
+            return None
+
+        return [
+            {
+                "id": row.id,
+                "sku": row.sku,
+                "title": row.title,
+                "brand": row.brand,
+                "similarity": round(float(row.similarity), 4)
+            }
+            for row in rows
+        ]
+
+    async def refresh_stale(self, max_batches: Optional[int] = None) -> Dict[str, int]:
+        """Recompute neighbors for products whose embedding changed"""
+        stats = {"batches": 0, "changed": 0, "recomputed": 0}
+
+        while max_batches is None or stats["batches"] < max_batches:
+            result = await self.db.execute(
+                select(Product.id)
+                .where(Product.embedding.isnot(None))
+                .where(or_(
+                    Product.neighbors_updated_at.is_(None),
+                    Product.embedding_updated_at > Product.neighbors_updated_at
+                ))
+                .limit(self.batch_size)
+            )
+            changed_ids = [row.id for row in result]
+            if not changed_ids:
+                break
+
+            affected = await self._recompute(changed_ids, detect_affected=True)
+
+            # Products that listed a changed product may have lost it
+            result = await self.db.execute(
+                select(ProductNeighbor.product_id)
+                .where(ProductNeighbor.neighbor_id.in_(changed_ids))
+                .distinct()
+            )
+            affected.update(row.product_id for row in result)
+            affected.difference_update(changed_ids)
+
+            affected_ids = list(affected)
+            for i in range(0, len(affected_ids), self.batch_size):
+                await self._recompute(affected_ids[i:i + self.batch_size], detect_affected=False)
+
+            stats["batches"] += 1
+            stats["changed"] += len(changed_ids)
+            stats["recomputed"] += len(changed_ids) + len(affected_ids)
+
+        if stats["batches"]:
+            self.logger.info("Neighbor refresh finished", **stats)
+        return stats
+
+    async def _recompute(self, product_ids: List[uuid.UUID], detect_affected: bool) -> Set[uuid.UUID]:
+        """Recompute and store top-K for a batch; optionally return affected products"""
+        result = await self.db.execute(
+            select(Product.id, Product.embedding)
+            .where(Product.id.in_(product_ids))
+            .where(Product.embedding.isnot(None))
+        )
+        rows = result.all()
+        if not rows:
+            return set()
+
+        query_ids = [row.id for row in rows]
+        queries = _normalize(np.vstack([np.asarray(row.embedding, dtype=np.float32) for row in rows]))
+        query_pos = {pid: i for i, pid in enumerate(query_ids)}
+
+        thresholds: Dict[uuid.UUID, float] = {}
+        if detect_affected:
+            # Similarity of the K-th neighbor: a changed product scoring at
+            # least this high would enter that product's list
+            result = await self.db.execute(
+                select(ProductNeighbor.product_id, ProductNeighbor.similarity)
+                .where(ProductNeighbor.rank == self.top_k)
+            )
+            thresholds = {row.product_id: row.similarity for row in result}
+
+        batch = len(query_ids)
+        top_sims = np.full((batch, 0), -np.inf, dtype=np.float32)
+        top_idx = np.zeros((batch, 0), dtype=np.int64)
+        catalog_ids: List[uuid.UUID] = []
+        affected: Set[uuid.UUID] = set()
+
+        async for chunk_ids, chunk in self._stream_catalog():
+            offset = len(catalog_ids)
+            catalog_ids.extend(chunk_ids)
+            sims = queries @ chunk.T  # (batch, chunk)
+
+            # A product is never its own neighbor
+            for j, cid in enumerate(chunk_ids):
+                i = query_pos.get(cid)
+                if i is not None:
+                    sims[i, j] = -np.inf
+
+            if detect_affected:
+                best = sims.max(axis=0)
+                limits = np.array([thresholds.get(cid, -np.inf) for cid in chunk_ids], dtype=np.float32)
+                for j in np.nonzero(best >= limits)[0]:
+                    affected.add(chunk_ids[j])
+
+            top_sims, top_idx = self._merge_top_k(
+                top_sims, top_idx, sims,
+                np.broadcast_to(np.arange(offset, offset + len(chunk_ids)), sims.shape)
+            )
+
+        order = np.argsort(-top_sims, axis=1)
+        top_sims = np.take_along_axis(top_sims, order, axis=1)
+        top_idx = np.take_along_axis(top_idx, order, axis=1)
+
+        neighbor_rows = []
+        for i, pid in enumerate(query_ids):
+            rank = 0
+            for sim, idx in zip(top_sims[i], top_idx[i]):
+                if not np.isfinite(sim):
+                    continue
+                rank += 1
+                neighbor_rows.append({
+                    "product_id": pid,
+                    "rank": rank,
+                    "neighbor_id": catalog_ids[idx],
+                    "similarity": float(sim)
+                })
+
+        await self.db.execute(delete(ProductNeighbor).where(ProductNeighbor.product_id.in_(query_ids)))
+        if neighbor_rows:
+            await self.db.execute(insert(ProductNeighbor), neighbor_rows)
+        await self.db.execute(
+            update(Product)
+            .where(Product.id.in_(query_ids))
+            .values(neighbors_updated_at=func.now())
+        )
+        await self.db.commit()
+
+        affected.difference_update(query_ids)
+        return affected
+
+    def _merge_top_k(
+        self,
+        top_sims: np.ndarray,
+        top_idx: np.ndarray,
+        sims: np.ndarray,
+        idx: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Merge a scored chunk into the running (unsorted) top-K"""
+        all_sims = np.concatenate([top_sims, sims], axis=1)
+        all_idx = np.concatenate([top_idx, idx], axis=1)
+        k = min(self.top_k, all_sims.shape[1])
+        if k == all_sims.shape[1]:
+            return all_sims, all_idx
+
+        keep = np.argpartition(-all_sims, k - 1, axis=1)[:, :k]
+        return (
+            np.take_along_axis(all_sims, keep, axis=1),
+            np.take_along_axis(all_idx, keep, axis=1)
+        )
+
+    async def _stream_catalog(self):
+        """Yield (ids, normalized embedding matrix) chunks of the catalog"""
+        result = await self.db.stream(
+            select(Product.id, Product.embedding)
+            .where(Product.embedding.isnot(None))
+            .execution_options(yield_per=self.chunk_size)
+        )
+        async for partition in result.partitions(self.chunk_size):
+            ids = [row.id for row in partition]
+            matrix = np.vstack([np.asarray(row.embedding, dtype=np.float32) for row in partition])
+            yield ids, _normalize(matrix)
+
+
+class NeighborRefresher:
+    """Runs refresh_stale every SIMILAR_PRODUCTS_REFRESH_SECONDS, so changed
+    embeddings reach the neighbor table without a manual refresh"""
+
+    def __init__(self, session_factory=AsyncSessionLocal, engine=default_engine):
+        self.session_factory = session_factory
+        self.engine = engine
+        self._task: Optional[asyncio.Task] = None
+        self.logger = logger.bind(component="neighbor_refresher")
+
+    async def refresh(self) -> Optional[Dict[str, int]]:
+        """One refresh pass; None while another worker holds the lock"""
+        # refresh_stale commits per batch, so the lock lives on a connection of its own
+        async with self.engine.connect() as lock_conn:
+            if not await lock_conn.scalar(
+                text("SELECT pg_try_advisory_lock(:id)"), {"id": NEIGHBOR_LOCK_ID}
+            ):
+                return None
+            try:
+                async with self.session_factory() as session:
+                    return await ProductNeighborService(session).refresh_stale()
+            finally:
+                await lock_conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": NEIGHBOR_LOCK_ID})
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.error("Neighbor refresh failed", error=str(e))
+            await asyncio.sleep(settings.SIMILAR_PRODUCTS_REFRESH_SECONDS)
+
+
+neighbor_refresher = NeighborRefresher()
@@ -0,0 +1,258 @@
+"""Product service layer"""
+
+from typing import Dict, List, Optional, Any, AsyncIterator
+from datetime import datetime, time
+import os
+import uuid
+import structlog
+
+from sqlalchemy import select, update, func, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.exceptions import ValidationException
+from app.models.database import Product, ProductAsset, ProductStatus
+from app.services.attribute_filters import containment_clause
+from app.services.product_neighbors import ProductNeighborService
+from app.services.vector_index import VectorIndexManager
+from app.services.sales_rollup import read_rollup, parse_period, ratio
+from app.services.image_pipeline import image_pipeline
+from app.services.semantic_cache import invalidate_products
+from app.services.storage import get_storage
+
+logger = structlog.get_logger()
+
+
+def asset_filename(filename: str) -> str:
+    """Last path component of an upload name, checked before anything is stored"""
+    filename = os.path.basename(filename).strip()
+    if filename in ("", ".", ".."):
+        raise ValidationException(f"Invalid asset filename: {filename or 'empty'}")
+    if len(filename) > 255:
+        # product_assets.filename is String(255)
+        raise ValidationException("Asset filename longer than 255 characters")
+    return filename
+
+
+class ProductService:
+    """Business logic for products"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.logger = logger.bind(component="product_service")
+
+    async def get_product(self, product_id: uuid.UUID) -> Optional[Product]:
+        """Get a product by ID"""
+        return await self.db.get(Product, product_id)
+
+    async def list_products(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        search: Optional[str] = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """List products with filtering and pagination.
+
+        `attributes` / `specifications` filters are containment documents
+        (see app.services.attribute_filters) and use the GIN indexes.
+        """
+        filters = filters or {}
+        conditions = []
+
+        if filters.get("category"):
+            conditions.append(Product.category == filters["category"])
+        if filters.get("brand"):
+            conditions.append(Product.brand == filters["brand"])
+        if filters.get("status"):
+            try:
+                conditions.append(Product.status == ProductStatus(filters["status"]))
+            except ValueError:
+                raise ValidationException(f"Invalid product status: {filters['status']}")
+        if filters.get("attributes"):
+            conditions.append(containment_clause(Product.attributes, filters["attributes"]))
+        if filters.get("specifications"):
+            conditions.append(containment_clause(Product.specifications, filters["specifications"]))
+        if search:
+            pattern = f"%{search}%"
+            conditions.append(or_(Product.title.ilike(pattern), Product.sku.ilike(pattern)))
+
+        total = await self.db.scalar(select(func.count()).select_from(Product).where(*conditions))
+        result = await self.db.execute(
+            select(Product)
+            .where(*conditions)
+            .order_by(Product.created_at.desc())
+            .offset(skip)
+            .limit(limit)
+        )
+
+        return {
+            "items": result.scalars().all(),
+            "total": total or 0,
+            "skip": skip,
+            "limit": limit
+        }
+
+    async def update_embedding(self, product_id: uuid.UUID, embedding: List[float]) -> bool:
+        """Store a new embedding and queue the product for neighbor recompute"""
+        result = await self.db.execute(
+            update(Product)
+            .where(Product.id == product_id)
+            .values(embedding=embedding, embedding_updated_at=func.now())
+        )
+        await self.db.commit()
+        # Retrieval for this product changes, so do answers grounded in it
+        await invalidate_products([product_id])
+        return result.rowcount > 0
+
+    async def upload_images(self, product_id: uuid.UUID, files: List[Any]) -> Optional[List[Dict[str, Any]]]:
+        """Process uploaded images into their variants and attach them to the product.
+
+        Identical content is processed and stored once, and near-duplicates
+        of stored images are answered with the stored image (see
+        app.services.image_pipeline); the main variant URL is what goes
+        into Product.images.
+        """
+        product = await self.get_product(product_id)
+        if not product:
+            return None
+
+        # Uploads are spooled to disk; refuse oversized ones before reading them
+        for file in files:
+            if file.size and file.size > settings.IMAGE_MAX_BYTES:
+                raise ValidationException(f"Image larger than {settings.IMAGE_MAX_BYTES} bytes: {file.filename}")
+
+        images = await image_pipeline.ingest_many([await file.read() for file in files], product_id)
+
+        urls = list(product.images or [])
+        for image in images:
+            if image["url"] not in urls:
+                urls.append(image["url"])
+        if urls != (product.images or []):
+            product.images = urls
+            await self.db.commit()
+
+        return images
+
+    async def upload_asset(
+        self,
+        product_id: uuid.UUID,
+        filename: str,
+        content_type: str,
+        chunks: AsyncIterator[bytes]
+    ) -> Optional[ProductAsset]:
+        """Stream an asset straight from the request body into storage"""
+        product = await self.get_product(product_id)
+        if not product:
+            return None
+
+        filename = asset_filename(filename)
+        key = f"assets/{product_id}/{uuid.uuid4().hex}/{filename}"
+        stored = await get_storage().put_stream(key, chunks, content_type)
+
+        asset = ProductAsset(
+            product_id=product_id,
+            filename=filename,
+            storage_key=key,
+            url=stored["url"],
+            content_type=content_type,
+            size=stored["size"],
+            sha256=stored["sha256"]
+        )
+        self.db.add(asset)
+        await self.db.commit()
+        await self.db.refresh(asset)
+        return asset
+
+    async def find_similar_products(
+        self,
+        product_id: uuid.UUID,
+        limit: int = 10,
+        recall_target: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """Find the nearest products by embedding cosine distance.
+
+        Served from the precomputed neighbor table when possible; falls back
+        to a live ANN query for products not yet materialized.
+        """
+        neighbors = await ProductNeighborService(self.db).get_neighbors(product_id, limit)
+        if neighbors is not None:
+            return neighbors
+
+        product = await self.get_product(product_id)
+        if not product or product.embedding is None:
+            return []
+
+        # Tune ivfflat.probes / hnsw.ef_search for this transaction only
+        await VectorIndexManager().apply_search_params(self.db, recall_target, limit)
+
+        distance = Product.embedding.cosine_distance(product.embedding).label("distance")
+        result = await self.db.execute(
+            select(Product.id, Product.sku, Product.title, Product.brand, distance)
+            .where(Product.id != product_id)
+            .where(Product.embedding.isnot(None))
+            .order_by(distance)
+            .limit(limit)
+        )
+
+        return [
+            {
+                "id": row.id,
+                "sku": row.sku,
+                "title": row.title,
+                "brand": row.brand,
+                "similarity": round(1 - float(row.distance), 4)
+            }
+            for row in result
+        ]
+
+    async def get_product_analytics(
+        self,
+        product_id: uuid.UUID,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Sales, traffic and review metrics for a date range.
+
+        Reads only the sales_daily rollup (one row per marketplace and
+        day), never the order tables, so any range costs the same.
+        """
+        product = await self.get_product(product_id)
+        if not product:
+            return None
+
+        start, end = parse_period(start_date, end_date)
+        per_marketplace = await read_rollup(self.db, product_id, start, end)
+
+        totals = {
+            key: sum(metrics[key] for metrics in per_marketplace.values())
+            for key in ("units", "revenue", "orders", "views", "clicks", "review_count", "rating_sum")
+        }
+
+        return {
+            "product_id": product_id,
+            "period_start": datetime.combine(start, time.min),
+            "period_end": datetime.combine(end, time.max),
+            "total_views": totals["views"],
+            "total_orders": totals["orders"],
+            "total_revenue": round(totals["revenue"], 2),
+            "conversion_rate": ratio(totals["orders"], totals["views"]),
+            "average_rating": (
+                round(totals["rating_sum"] / totals["review_count"], 2)
+                if totals["review_count"] else None
+            ),
+            "review_count": totals["review_count"],
+            "marketplace_performance": {
+                marketplace: {
+                    "units": metrics["units"],
+                    "revenue": round(metrics["revenue"], 2),
+                    "orders": metrics["orders"],
+                    "views": metrics["views"],
+                    "clicks": metrics["clicks"],
+                    "conversion_rate": ratio(metrics["orders"], metrics["views"])
+                }
+                for marketplace, metrics in per_marketplace.items()
+            },
+            "top_keywords": list(product.keywords or [])[:10],
+            "competitor_analysis": None
+        }
@@ -0,0 +1,359 @@
+"""Vectorized bulk repricing of marketplace listings"""
+
+from typing import Dict, List, Optional, Any, Callable, Tuple
+import asyncio
+import time
+import structlog
+
+import numpy as np
+import orjson
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.redis import get_redis
+from app.core.exceptions import ValidationException
+from app.models.database import MarketplaceType
+from app.adapters.base import PriceUpdate, MarketplaceAdapterFactory
+
+logger = structlog.get_logger()
+
+# All repriceable listings of a marketplace as one row of arrays. Listings
+# with a running sale price are left to the promotion. The current buy-box
+# price is kept in marketplace_data by the marketplace sync.
+_LOAD = text("""
+SELECT
+    array_agg(l.id) AS ids,
+    array_agg(p.sku) AS skus,
+    array_agg(coalesce(l.currency, 'EUR')) AS currencies,
+    array_agg(l.price) AS price,
+    array_agg(coalesce(p.cost_price, 'NaN')) AS cost_price,
+    array_agg(coalesce(p.min_price, 'NaN')) AS min_price,
+    array_agg(coalesce(p.suggested_price, 'NaN')) AS suggested_price,
+    array_agg(coalesce((l.marketplace_data->>'buy_box_price')::float8, 'NaN')) AS buy_box_price,
+    array_agg(coalesce(l.is_buy_box_winner, false)) AS is_buy_box_winner
+FROM listings l
+JOIN products p ON p.id = l.product_id
+WHERE l.marketplace = :marketplace
+  AND l.status = 'ACTIVE'
+  AND l.external_id IS NOT NULL
+  AND (l.sale_price IS NULL OR l.sale_price >= l.price)
+""")
+
+# Only rows whose price is still the one the engine read are changed. The
+# feed bypasses update_listing, so the price drops out of the synced field
+# hashes and the next delta update resends it
+_WRITE = text("""
+UPDATE listings l
+SET price = v.price, synced_field_hashes = l.synced_field_hashes - 'price', updated_at = now()
+FROM unnest(CAST(:ids AS uuid[]), CAST(:old_prices AS float8[]), CAST(:prices AS float8[]))
+    AS v(id, old_price, price)
+WHERE l.id = v.id AND l.price = v.old_price
+RETURNING l.id
+""")
+
+# Listings whose last price feed was not accepted, sent again at their stored price
+_LOAD_FEED_FAILED = text("""
+SELECT l.id, p.sku, l.price, coalesce(l.currency, 'EUR') AS currency
+FROM listings l
+JOIN products p ON p.id = l.product_id
+WHERE l.marketplace = :marketplace
+  AND l.status = 'ACTIVE'
+  AND l.external_id IS NOT NULL
+  AND l.sync_status = 'price_feed_failed'
+""")
+
+# Feed states: price_feed_pending (submitted, report not yet read), synced,
+# price_feed_failed
+_SET_FEED_STATUS = text("""
+UPDATE listings
+SET sync_status = :status
+WHERE id = ANY(CAST(:ids AS uuid[]))
+""")
+
+_ORPHANED_FEEDS = text("""
+UPDATE listings
+SET sync_status = 'price_feed_failed'
+WHERE marketplace = :marketplace
+  AND sync_status = 'price_feed_pending'
+  AND NOT (id = ANY(CAST(:tracked AS uuid[])))
+""")
+
+# Feed id -> JSON list of the listing ids it carries, in feed order
+FEEDS_KEY = "repricing:feeds:{marketplace}"
+
+PRICE_COLUMNS = ("price", "cost_price", "min_price", "suggested_price", "buy_box_price")
+
+
+# Strategies: each returns a target price per listing (NaN = no opinion,
+# the current price is kept)
+
+def margin_strategy(columns: Dict[str, np.ndarray], params: Dict[str, float]) -> np.ndarray:
+    """Cost plus the target margin"""
+    return columns["cost_price"] * (1 + params["target_margin"])
+
+
+def suggested_strategy(columns: Dict[str, np.ndarray], params: Dict[str, float]) -> np.ndarray:
+    """Suggested retail price, else the margin target"""
+    suggested = columns["suggested_price"]
+    return np.where(np.isnan(suggested), margin_strategy(columns, params), suggested)
+
+
+def buy_box_strategy(columns: Dict[str, np.ndarray], params: Dict[str, float]) -> np.ndarray:
+    """Undercut the buy box unless already winning it; margin target without buy-box data"""
+    buy_box = columns["buy_box_price"]
+    target = np.where(np.isnan(buy_box), margin_strategy(columns, params), buy_box - params["undercut"])
+    return np.where(columns["is_buy_box_winner"], np.nan, target)
+
+
+STRATEGIES: Dict[str, Callable[[Dict[str, np.ndarray], Dict[str, float]], np.ndarray]] = {
+    "margin": margin_strategy,
+    "suggested": suggested_strategy,
+    "buy_box": buy_box_strategy,
+}
+
+
+def round_to_99(target: np.ndarray, floor: np.ndarray) -> np.ndarray:
+    """Largest x.99 at or below the target, one euro up if that falls under the floor"""
+    rounded = np.floor(target + 0.01) - 0.01
+    rounded = np.where(rounded < floor - 1e-9, rounded + 1, rounded)
+    # Prices under 0.99 are kept to the cent
+    return np.round(np.where(rounded > 0, rounded, target), 2)
+
+
+def compute_prices(
+    columns: Dict[str, np.ndarray],
+    strategy: str,
+    params: Dict[str, float]
+) -> np.ndarray:
+    """New price per listing: strategy, step limit, floor, .99 rounding"""
+    price = columns["price"]
+    target = STRATEGIES[strategy](columns, params)
+    hold = np.isnan(target)
+    target = np.where(hold, price, target)
+
+    # Limit the move per run
+    max_change = params["max_change"]
+    if max_change:
+        target = np.clip(target, price * (1 - max_change), price * (1 + max_change))
+
+    # Floor: min_price and the minimum margin over cost, whichever is higher
+    # (fmax ignores a missing side); the floor wins over the step limit
+    floor = np.fmax(columns["min_price"], columns["cost_price"] * (1 + params["min_margin"]))
+    target = np.fmax(target, floor)
+
+    # Without a target the current price stands unless it is under the floor
+    return np.where(hold & ~(price < floor), price, round_to_99(target, floor))
+
+
+def repricing_params(**overrides) -> Dict[str, float]:
+    params = {
+        "target_margin": settings.REPRICING_TARGET_MARGIN,
+        "min_margin": settings.REPRICING_MIN_MARGIN,
+        "undercut": settings.REPRICING_UNDERCUT,
+        "max_change": settings.REPRICING_MAX_CHANGE,
+    }
+    params.update({k: v for k, v in overrides.items() if v is not None})
+    return params
+
+
+class RepricingService:
+    """Reprices every active listing of a marketplace in one pass.
+
+    Listings are loaded as columns, priced with vectorized strategy and
+    rule functions, and only changed prices are written (one UPDATE) and
+    sent to the marketplace through bulk_update_prices. A submitted feed
+    only counts once its processing report is read on a later run;
+    listings it rejected are sent again at their stored price.
+    """
+
+    def __init__(self, session_factory=AsyncSessionLocal):
+        self.session_factory = session_factory
+        self.logger = logger.bind(component="repricing")
+
+    async def reprice(
+        self,
+        marketplace: MarketplaceType,
+        strategy: Optional[str] = None,
+        dry_run: bool = False,
+        **overrides
+    ) -> Dict[str, Any]:
+        strategy = strategy or settings.REPRICING_STRATEGY
+        if strategy not in STRATEGIES:
+            raise ValidationException(f"Unknown repricing strategy: {strategy}")
+        params = repricing_params(**overrides)
+        timings = {}
+
+        start = time.perf_counter()
+        async with self.session_factory() as session:
+            # Raw SQL compares against the enum name
+            row = (await session.execute(_LOAD, {"marketplace": marketplace.name})).one()
+        timings["load_s"] = round(time.perf_counter() - start, 2)
+
+        summary = {"marketplace": marketplace.value, "strategy": strategy, "listings": 0, "changed": 0}
+        if not row.ids:
+            return {**summary, **timings}
+
+        start = time.perf_counter()
+        columns = {name: np.asarray(getattr(row, name), dtype=np.float64) for name in PRICE_COLUMNS}
+        columns["is_buy_box_winner"] = np.asarray(row.is_buy_box_winner, dtype=bool)
+        new_prices = await asyncio.to_thread(compute_prices, columns, strategy, params)
+        changed = np.flatnonzero(np.abs(new_prices - columns["price"]) >= 0.005)
+        # The feed is keyed by SKU: a SKU listed twice on the marketplace keeps
+        # its first listing, the others are left for the next run
+        first = {}
+        for i in changed.tolist():
+            first.setdefault(row.skus[i], i)
+        duplicates = len(changed) - len(first)
+        changed = np.fromiter(first.values(), dtype=changed.dtype, count=len(first))
+        timings["compute_s"] = round(time.perf_counter() - start, 2)
+
+        old = columns["price"][changed]
+        new = new_prices[changed]
+        summary.update({
+            "listings": len(row.ids),
+            "changed": len(changed),
+            "duplicate_sku": duplicates,
+            "increased": int((new > old).sum()),
+            "decreased": int((new < old).sum()),
+        })
+
+        if dry_run:
+            summary["changes"] = [
+                {"listing_id": str(row.ids[i]), "sku": row.skus[i], "old_price": o, "new_price": n}
+                for i, o, n in zip(changed[:100].tolist(), old[:100].tolist(), new[:100].tolist())
+            ]
+            return {**summary, **timings}
+
+        # Prices are only written where they can also be sent
+        try:
+            adapter = MarketplaceAdapterFactory.create_from_settings(marketplace)
+            adapter.bulk_concurrency = settings.BULK_ADAPTER_CONCURRENCY
+        except Exception as e:
+            raise ValidationException(f"No price feed for {marketplace.value}: {e}")
+        if not adapter.supports_price_feed:
+            raise ValidationException(f"No price feed for {marketplace.value}")
+
+        # Outcome of feeds sent by earlier runs; rejected prices are sent again below
+        start = time.perf_counter()
+        summary.update(await self._check_feeds(adapter, marketplace))
+        timings["check_s"] = round(time.perf_counter() - start, 2)
+
+        start = time.perf_counter()
+        written = set()
+        if len(changed):
+            ids = [row.ids[i] for i in changed.tolist()]
+            async with self.session_factory() as session:
+                async with session.begin():
+                    result = await session.execute(_WRITE, {
+                        "ids": ids, "old_prices": old.tolist(), "prices": new.tolist()
+                    })
+                    written = {listing_id for (listing_id,) in result}
+        timings["write_s"] = round(time.perf_counter() - start, 2)
+
+        start = time.perf_counter()
+        updates = {
+            row.ids[i]: PriceUpdate(sku=row.skus[i], price=price, currency=row.currencies[i])
+            for i, price in zip(changed.tolist(), new.tolist())
+            if row.ids[i] in written
+        }
+        # The stored price of a listing whose feed failed never reached the
+        # marketplace, and no later run sees it as a change
+        async with self.session_factory() as session:
+            failed_rows = (await session.execute(_LOAD_FEED_FAILED, {"marketplace": marketplace.name})).all()
+        skus = {update.sku for update in updates.values()}
+        resent = 0
+        for failed_row in failed_rows:
+            if failed_row.id not in updates and failed_row.sku not in skus:
+                updates[failed_row.id] = PriceUpdate(
+                    sku=failed_row.sku, price=failed_row.price, currency=failed_row.currency
+                )
+                skus.add(failed_row.sku)
+                resent += 1
+
+        failed, feeds = await self._send(adapter, updates) if updates else ([], [])
+        by_sku = {update.sku: listing_id for listing_id, update in updates.items()}
+        failed_ids = {by_sku[sku] for sku in failed if sku in by_sku}
+        submitted_ids = [listing_id for listing_id in updates if listing_id not in failed_ids]
+        async with self.session_factory() as session:
+            async with session.begin():
+                await session.execute(_SET_FEED_STATUS, {"status": "price_feed_failed", "ids": list(failed_ids)})
+                await session.execute(_SET_FEED_STATUS, {"status": "price_feed_pending", "ids": submitted_ids})
+        await self._track_feeds(marketplace, feeds, by_sku)
+        timings["feed_s"] = round(time.perf_counter() - start, 2)
+
+        summary.update({
+            "written": len(written),
+            "resent": resent,
+            "submitted": len(submitted_ids),
+            "failed": len(failed_ids),
+        })
+        self.logger.info("Repricing completed", **summary, **timings)
+        return {**summary, **timings}
+
+    async def _send(self, adapter, updates: Dict[Any, PriceUpdate]) -> Tuple[List[str], List[Dict[str, Any]]]:
+        """bulk_update_prices in feed-sized batches; returns the failed SKUs and the submitted feeds"""
+        batch_size = settings.REPRICING_FEED_BATCH_SIZE
+        pending = list(updates.values())
+        failed = []
+        feeds = []
+
+        for i in range(0, len(pending), batch_size):
+            batch = pending[i:i + batch_size]
+            try:
+                response = await adapter.bulk_update_prices(batch) or {}
+            except Exception as e:
+                self.logger.warning("Price feed batch failed", marketplace=adapter.marketplace.value, error=str(e))
+                failed.extend(update.sku for update in batch)
+                continue
+            failed.extend(error["sku"] for error in response.get("errors", []))
+            feeds.extend(response.get("feeds", []))
+
+        return failed, feeds
+
+    async def _track_feeds(self, marketplace: MarketplaceType, feeds: List[Dict[str, Any]], by_sku: Dict[str, Any]):
+        """Remember which listings each submitted feed carries, in feed order"""
+        mapping = {
+            feed["feed_id"]: orjson.dumps([str(by_sku[sku]) for sku in feed["skus"]])
+            for feed in feeds if feed.get("feed_id")
+        }
+        if mapping:
+            await get_redis().hset(FEEDS_KEY.format(marketplace=marketplace.value), mapping=mapping)
+
+    async def _check_feeds(self, adapter, marketplace: MarketplaceType) -> Dict[str, int]:
+        """Apply the processing reports of finished feeds to their listings.
+
+        Accepted listings become synced, rejected ones price_feed_failed.
+        Pending listings no tracked feed carries (tracking lost) are treated
+        as failed, so their price is sent again.
+        """
+        key = FEEDS_KEY.format(marketplace=marketplace.value)
+        redis = get_redis()
+        tracked, confirmed, rejected, finished = [], [], [], []
+
+        for feed_id, listing_ids in (await redis.hgetall(key)).items():
+            listing_ids = orjson.loads(listing_ids)
+            try:
+                result = await adapter.price_feed_result(feed_id)
+            except Exception as e:
+                self.logger.warning("Price feed check failed", feed_id=feed_id, error=str(e))
+                result = None
+            if result is None:
+                tracked.extend(listing_ids)
+                continue
+            errors = result["errors"]
+            for position, listing_id in enumerate(listing_ids):
+                if errors is None or position in errors:
+                    rejected.append(listing_id)
+                else:
+                    confirmed.append(listing_id)
+            finished.append(feed_id)
+
+        async with self.session_factory() as session:
+            async with session.begin():
+                await session.execute(_SET_FEED_STATUS, {"status": "synced", "ids": confirmed})
+                await session.execute(_SET_FEED_STATUS, {"status": "price_feed_failed", "ids": rejected})
+                await session.execute(_ORPHANED_FEEDS, {"marketplace": marketplace.name, "tracked": tracked})
+        if finished:
+            await redis.hdel(key, *finished)
+        return {"feed_confirmed": len(confirmed), "feed_rejected": len(rejected)}
@@ -0,0 +1,309 @@
+"""Batched review sentiment and aspect mining on CPU"""
+
+from typing import Dict, List, Optional, Any, Tuple
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
+import multiprocessing
+import os
+import re
+import time
+import structlog
+
+import numpy as np
+import orjson
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+
+logger = structlog.get_logger()
+
+# Reviews never analysed, or whose title/body changed since (content_hash
+# is a generated column; ix_reviews_pending_analysis covers the predicate)
+_PENDING = text("""
+SELECT id, review_date, rating, title, body, content_hash
+FROM reviews
+WHERE sentiment IS NULL OR analyzed_hash IS DISTINCT FROM content_hash
+ORDER BY review_date DESC
+LIMIT :limit
+""")
+
+_WRITE = text("""
+UPDATE reviews r
+SET sentiment = v.sentiment, aspects = v.aspects::json, analyzed_hash = v.content_hash
+FROM unnest(
+    CAST(:ids AS uuid[]), CAST(:review_dates AS timestamptz[]), CAST(:sentiments AS float8[]),
+    CAST(:aspects AS text[]), CAST(:content_hashes AS text[])
+) AS v(id, review_date, sentiment, aspects, content_hash)
+WHERE r.id = v.id AND r.review_date = v.review_date
+""")
+
+# Aspect lexicon (German and English); sentences mentioning an aspect are
+# scored on their own and averaged per aspect
+ASPECT_KEYWORDS: Dict[str, List[str]] = {
+    "price": ["price", "expensive", "cheap", "value for money", "preis", "teuer", "günstig", "billig", "preis-leistung"],
+    "quality": ["quality", "build", "material", "qualität", "verarbeitung"],
+    "delivery": ["delivery", "shipping", "arrived", "lieferung", "versand", "geliefert", "angekommen"],
+    "packaging": ["packaging", "package", "verpackung", "karton", "verpackt"],
+    "size": ["size", "fit", "größe", "passform", "passt"],
+    "usability": ["easy to use", "setup", "handling", "bedienung", "einfach", "handhabung"],
+    "durability": ["broke", "broken", "durable", "stopped working", "kaputt", "defekt", "langlebig"],
+    "service": ["customer service", "support", "seller", "refund", "kundenservice", "verkäufer", "erstattung"],
+}
+
+_ASPECT_PATTERNS = {
+    aspect: re.compile(r"\b(?:" + "|".join(re.escape(k) for k in keywords) + r")\b", re.IGNORECASE)
+    for aspect, keywords in ASPECT_KEYWORDS.items()
+}
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+")
+
+# Per-process model state, set by _init_worker
+_session = None
+_tokenizer = None
+_input_names: Tuple[str, ...] = ()
+_label_values: Optional[np.ndarray] = None
+
+
+def export_quantized_model(model_name: str, output_path: str, opset: int = 14) -> str:
+    """Export a sequence-classification model to ONNX and quantize it to int8"""
+    import torch
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name).eval()
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    sample = tokenizer(["Sehr gutes Produkt", "Bad"], padding=True, return_tensors="pt")
+    names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic = {name: {0: "batch", 1: "sequence"} for name in names}
+
+    float_path = output_path.replace(".onnx", "-fp32.onnx")
+    torch.onnx.export(
+        model,
+        tuple(sample[name] for name in names),
+        float_path,
+        input_names=names,
+        output_names=["logits"],
+        dynamic_axes={**dynamic, "logits": {0: "batch"}},
+        opset_version=opset
+    )
+    quantize_dynamic(float_path, output_path, weight_type=QuantType.QInt8)
+    os.remove(float_path)
+    return output_path
+
+
+def _init_worker(model_path: str, tokenizer_name: str, threads: int):
+    """Load the tokenizer and the ONNX session once per worker process"""
+    global _session, _tokenizer, _input_names, _label_values
+    import onnxruntime
+    from transformers import AutoConfig, AutoTokenizer
+
+    options = onnxruntime.SessionOptions()
+    options.intra_op_num_threads = threads
+    options.inter_op_num_threads = 1
+    options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+    _session = onnxruntime.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+    _input_names = tuple(i.name for i in _session.get_inputs())
+    _tokenizer = AutoTokenizer.from_pretrained(tokenizer_name)
+
+    # Ordered labels (negative .. positive) mapped evenly onto -1..1; works
+    # for 3-class and 5-star models alike
+    labels = AutoConfig.from_pretrained(tokenizer_name).num_labels
+    _label_values = np.linspace(-1.0, 1.0, labels, dtype=np.float32)
+
+
+def _score(input_ids: List[List[int]]) -> np.ndarray:
+    """Sentiment for a batch of tokenized texts, padded to the longest one"""
+    width = max(len(ids) for ids in input_ids)
+    ids = np.full((len(input_ids), width), _tokenizer.pad_token_id, dtype=np.int64)
+    mask = np.zeros((len(input_ids), width), dtype=np.int64)
+    for row, tokens in enumerate(input_ids):
+        ids[row, :len(tokens)] = tokens
+        mask[row, :len(tokens)] = 1
+
+    feed = {"input_ids": ids, "attention_mask": mask}
+    if "token_type_ids" in _input_names:
+        feed["token_type_ids"] = np.zeros_like(ids)
+    logits = _session.run(None, feed)[0]
+
+    logits = logits - logits.max(axis=1, keepdims=True)
+    probs = np.exp(logits)
+    probs /= probs.sum(axis=1, keepdims=True)
+    return probs @ _label_values
+
+
+def analyze_texts(
+    texts: List[str],
+    max_length: int,
+    max_batch_tokens: int
+) -> List[Tuple[float, Dict[str, Any]]]:
+    """Sentiment and aspects per text; runs inside a worker process.
+
+    Reviews and their aspect sentences are tokenized without padding,
+    sorted by token length and cut into batches of at most
+    max_batch_tokens (rows x longest row), so little work goes to padding.
+    """
+    units: List[Tuple[int, Optional[str]]] = []
+    unit_texts: List[str] = []
+    for i, review in enumerate(texts):
+        units.append((i, None))
+        unit_texts.append(review)
+        for sentence in _SENTENCE_SPLIT.split(review):
+            for aspect, pattern in _ASPECT_PATTERNS.items():
+                if pattern.search(sentence):
+                    units.append((i, aspect))
+                    unit_texts.append(sentence)
+
+    input_ids = _tokenizer(unit_texts, truncation=True, max_length=max_length)["input_ids"]
+    order = sorted(range(len(units)), key=lambda k: len(input_ids[k]))
+    scores = np.zeros(len(units), dtype=np.float32)
+
+    batch: List[int] = []
+    for k in order:
+        # Sorted ascending, so the newest row is the longest in the batch
+        if batch and len(input_ids[k]) * (len(batch) + 1) > max_batch_tokens:
+            scores[batch] = _score([input_ids[b] for b in batch])
+            batch = []
+        batch.append(k)
+    if batch:
+        scores[batch] = _score([input_ids[b] for b in batch])
+
+    results: List[Tuple[float, Dict[str, Any]]] = [(0.0, {}) for _ in texts]
+    mentions: List[Dict[str, List[float]]] = [{} for _ in texts]
+    for (i, aspect), score in zip(units, scores.tolist()):
+        if aspect is None:
+            results[i] = (round(score, 4), {})
+        else:
+            mentions[i].setdefault(aspect, []).append(score)
+
+    return [
+        (sentiment, {
+            aspect: {"sentiment": round(sum(values) / len(values), 4), "mentions": len(values)}
+            for aspect, values in mentions[i].items()
+        })
+        for i, (sentiment, _) in enumerate(results)
+    ]
+
+
+def review_text(title: Optional[str], body: Optional[str]) -> str:
+    return "\n".join(part.strip() for part in (title, body) if part and part.strip())
+
+
+class ReviewMiner:
+    """Fills Review.sentiment and Review.aspects for new and edited reviews.
+
+    Inference runs an int8-quantized ONNX classifier on CPU in a process
+    pool (one single-threaded session per worker). Pending reviews are
+    read in chunks, split into length-sorted jobs across the workers and
+    written back with one UPDATE per chunk.
+    """
+
+    def __init__(self, session_factory=AsyncSessionLocal):
+        self.session_factory = session_factory
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = asyncio.Lock()
+        self.logger = logger.bind(component="review_mining")
+
+    @property
+    def workers(self) -> int:
+        return settings.REVIEW_MINING_WORKERS or os.cpu_count() or 1
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            if not os.path.exists(settings.REVIEW_MINING_MODEL_PATH):
+                export_quantized_model(settings.REVIEW_MINING_MODEL, settings.REVIEW_MINING_MODEL_PATH)
+            # spawn: workers must not inherit the event loop or DB connections
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(
+                    settings.REVIEW_MINING_MODEL_PATH,
+                    settings.REVIEW_MINING_MODEL,
+                    settings.REVIEW_MINING_THREADS_PER_WORKER
+                )
+            )
+        return self._pool
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    async def analyze(self, texts: List[str]) -> List[Tuple[float, Dict[str, Any]]]:
+        """Sentiment and aspects for each text, computed across the pool"""
+        loop = asyncio.get_running_loop()
+        async with self._pool_lock:
+            # May export the model on first use; keep that off the event loop
+            pool = await asyncio.to_thread(self._get_pool)
+
+        # Similar lengths go to the same job so batches inside it pad little
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        size = settings.REVIEW_MINING_JOB_SIZE
+        jobs = [order[i:i + size] for i in range(0, len(order), size)]
+
+        outputs = await asyncio.gather(*(
+            loop.run_in_executor(
+                pool,
+                analyze_texts,
+                [texts[i] for i in job],
+                settings.REVIEW_MINING_MAX_LENGTH,
+                settings.REVIEW_MINING_MAX_BATCH_TOKENS
+            )
+            for job in jobs
+        ))
+
+        results: List[Tuple[float, Dict[str, Any]]] = [(0.0, {})] * len(texts)
+        for job, output in zip(jobs, outputs):
+            for i, result in zip(job, output):
+                results[i] = result
+        return results
+
+    async def run(self, limit: Optional[int] = None) -> Dict[str, Any]:
+        """Analyse pending reviews until none are left (or limit is reached)"""
+        processed, started = 0, time.perf_counter()
+
+        while limit is None or processed < limit:
+            chunk = settings.REVIEW_MINING_CHUNK_SIZE
+            if limit is not None:
+                chunk = min(chunk, limit - processed)
+
+            async with self.session_factory() as session:
+                rows = (await session.execute(_PENDING, {"limit": chunk})).all()
+            if not rows:
+                break
+
+            texts = [review_text(row.title, row.body) for row in rows]
+            with_text = [i for i, t in enumerate(texts) if t]
+            analysed = dict(zip(with_text, await self.analyze([texts[i] for i in with_text])))
+
+            sentiments, aspects = [], []
+            for i, row in enumerate(rows):
+                # Rating-only reviews: the stars are the sentiment
+                sentiment, found = analysed.get(i, ((row.rating - 3) / 2, {}))
+                sentiments.append(sentiment)
+                aspects.append(orjson.dumps(found).decode())
+
+            async with self.session_factory() as session:
+                async with session.begin():
+                    await session.execute(_WRITE, {
+                        "ids": [row.id for row in rows],
+                        "review_dates": [row.review_date for row in rows],
+                        "sentiments": sentiments,
+                        "aspects": aspects,
+                        "content_hashes": [row.content_hash for row in rows],
+                    })
+            processed += len(rows)
+
+        elapsed = time.perf_counter() - started
+        summary = {
+            "processed": processed,
+            "elapsed_s": round(elapsed, 2),
+            "reviews_per_minute": round(processed / elapsed * 60) if processed else 0,
+        }
+        if processed:
+            self.logger.info("Review mining completed", **summary)
+        return summary
+
+
+review_miner = ReviewMiner()
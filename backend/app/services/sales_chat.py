@@ -0,0 +1,330 @@
+"""Sales chat: streamed answers grounded in the product catalog"""
+
+from typing import Dict, List, Optional, Any, AsyncIterator, Set, Tuple
+import asyncio
+import uuid
+import structlog
+
+import numpy as np
+import orjson
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.exceptions import ValidationException, CircuitOpenException
+from app.core.redis import get_redis
+from app.models.database import Product, ProductStatus
+from app.services import llm
+from app.services.semantic_cache import chat_cache
+from app.services.vector_index import VectorIndexManager
+
+logger = structlog.get_logger()
+
+LANGUAGE_NAMES = {"en": "English", "de": "German", "zh": "Chinese"}
+
+SYSTEM_PROMPT = (
+    "You are the sales assistant of Goodlink Germany, a B2B/B2C retailer of medical devices, "
+    "automotive parts and electronics. Answer in {language}. Recommend only products from the "
+    "catalog excerpt below and quote their SKU; if none fits, say so and ask a clarifying question. "
+    "Never invent prices, stock levels, certifications or delivery times.\n\n"
+    "Catalog excerpt:\n{products}"
+)
+
+SUMMARY_PROMPT = (
+    "Update the running summary of a sales conversation with the new messages. Keep the customer's "
+    "needs, constraints, products discussed (with SKUs) and open questions; drop small talk. "
+    "Reply with the summary only, at most {words} words."
+)
+
+# Served while the chat model's circuit is open: the retrieved products without the model's prose
+DEGRADED_REPLY = {
+    "en": "Our assistant is briefly unavailable. These products from our catalog match your question:\n{products}",
+    "de": "Unser Assistent ist kurz nicht erreichbar. Diese Produkte aus unserem Katalog passen zu Ihrer Frage:\n{products}",
+    "zh": "我们的助手暂时无法使用。以下是目录中与您的问题相关的产品：\n{products}",
+}
+UNAVAILABLE_REPLY = {
+    "en": "Our assistant is briefly unavailable. Please try again in a few minutes.",
+    "de": "Unser Assistent ist kurz nicht erreichbar. Bitte versuchen Sie es in einigen Minuten erneut.",
+    "zh": "我们的助手暂时无法使用，请几分钟后再试。",
+}
+
+
+def _cosine(a: List[float], b: List[float]) -> float:
+    a, b = np.asarray(a, dtype=np.float32), np.asarray(b, dtype=np.float32)
+    denominator = float(np.linalg.norm(a) * np.linalg.norm(b))
+    return float(a @ b) / denominator if denominator else 0.0
+
+
+def _describe(product: Dict[str, Any]) -> str:
+    price = f"EUR {product['price']:.2f}" if product["price"] is not None else "price on request"
+    stock = "in stock" if product["available"] > 0 else "out of stock"
+    line = f"- {product['title']} (SKU {product['sku']}, {product['brand']}, {price}, {stock})"
+    if product["description"]:
+        line += f": {product['description']}"
+    return line
+
+
+class SalesChat:
+    """Chat engine behind /chat.
+
+    Each turn embeds the customer's message (with the previous one, so
+    follow-ups keep their topic) and retrieves the closest active products
+    with one vector query. The products are cached on the conversation and
+    reused while the conversation stays on the same topic. The prompt holds
+    a rolling summary plus at most CHAT_WINDOW_MESSAGES +
+    CHAT_SUMMARY_BATCH_MESSAGES recent messages; older messages are folded
+    into the summary in the background after a reply, so prompt size stays
+    flat however long the conversation gets. Conversations live in Redis.
+    Answers are served from the semantic cache (app.services.semantic_cache)
+    when an earlier opening question in the same language, grounded in the
+    same products, was near-identical. While the OpenAI circuit breakers
+    are open, turns are answered from the conversation's products (or a
+    short apology) instead of waiting for timeouts; the done event then
+    carries degraded=True.
+    """
+
+    def __init__(self, session_factory=AsyncSessionLocal):
+        self.session_factory = session_factory
+        self._background: Set[asyncio.Task] = set()
+        self.logger = logger.bind(component="sales_chat")
+
+    @staticmethod
+    def _key(conversation_id: str) -> str:
+        return f"chat:{conversation_id}"
+
+    async def _load(self, conversation_id: str) -> Dict[str, Any]:
+        raw = await get_redis().get(self._key(conversation_id))
+        if raw:
+            return orjson.loads(raw)
+        return {"summary": "", "messages": [], "context": None}
+
+    async def _save(self, conversation_id: str, state: Dict[str, Any]):
+        await get_redis().set(
+            self._key(conversation_id), orjson.dumps(state), ex=settings.CHAT_CONVERSATION_TTL_SECONDS
+        )
+
+    def _lock(self, conversation_id: str):
+        # One turn at a time per conversation; a second one waits briefly
+        return get_redis().lock(
+            f"chat:{conversation_id}:lock",
+            timeout=settings.CHAT_TURN_TIMEOUT_SECONDS,
+            blocking_timeout=10
+        )
+
+    async def _release(self, lock):
+        try:
+            await lock.release()
+        except Exception:
+            # Expired after CHAT_TURN_TIMEOUT_SECONDS; nothing left to release
+            pass
+
+    async def get_conversation(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        raw = await get_redis().get(self._key(conversation_id))
+        if not raw:
+            return None
+        state = orjson.loads(raw)
+        return {
+            "conversation_id": conversation_id,
+            "summary": state["summary"],
+            "messages": state["messages"],
+            "products": (state["context"] or {}).get("products", []),
+        }
+
+    async def delete_conversation(self, conversation_id: str) -> bool:
+        return bool(await get_redis().delete(self._key(conversation_id)))
+
+    async def _retrieve(self, state: Dict[str, Any], message: str) -> Tuple[List[float], bool]:
+        """Refresh state["context"] for this turn.
+
+        Returns the turn's query embedding and whether the conversation's
+        cached products were reused.
+        """
+        previous = [m["content"] for m in state["messages"] if m["role"] == "user"][-1:]
+        query = "\n".join(previous + [message])[-settings.CHAT_MAX_MESSAGE_CHARS:]
+        embedding = (await llm.embed([query]))[0]
+
+        cached = state["context"]
+        if cached and cached["embedding"] and _cosine(cached["embedding"], embedding) >= settings.CHAT_CONTEXT_REUSE_SIMILARITY:
+            return embedding, True
+
+        async with self.session_factory() as session:
+            await VectorIndexManager().apply_search_params(session, limit=settings.CHAT_RETRIEVAL_TOP_K)
+            distance = Product.embedding.cosine_distance(embedding).label("distance")
+            result = await session.execute(
+                select(
+                    Product.id, Product.sku, Product.title, Product.brand, Product.description,
+                    Product.suggested_price, Product.total_stock, Product.reserved_stock, distance
+                )
+                .where(Product.status == ProductStatus.ACTIVE)
+                .where(Product.embedding.isnot(None))
+                .order_by(distance)
+                .limit(settings.CHAT_RETRIEVAL_TOP_K)
+            )
+            products = [
+                {
+                    "id": str(row.id),
+                    "sku": row.sku,
+                    "title": row.title,
+                    "brand": row.brand,
+                    "description": (row.description or "")[:settings.CHAT_PRODUCT_DESCRIPTION_CHARS],
+                    "price": row.suggested_price,
+                    "available": (row.total_stock or 0) - (row.reserved_stock or 0),
+                    "similarity": round(1 - float(row.distance), 4),
+                }
+                for row in result
+            ]
+
+        state["context"] = {"embedding": embedding, "products": products}
+        return embedding, False
+
+    def _prompt(self, state: Dict[str, Any], message: str, language: str) -> List[Dict[str, str]]:
+        products = state["context"]["products"]
+        system = SYSTEM_PROMPT.format(
+            language=LANGUAGE_NAMES[language],
+            products="\n".join(_describe(p) for p in products) or "(no matching products)"
+        )
+        if state["summary"]:
+            system += f"\n\nConversation so far (summary):\n{state['summary']}"
+        return [{"role": "system", "content": system}, *state["messages"], {"role": "user", "content": message}]
+
+    async def stream_reply(
+        self,
+        message: str,
+        conversation_id: Optional[str] = None,
+        language: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Answer one customer message, yielding context, token and done events"""
+        message = (message or "").strip()
+        if not message:
+            raise ValidationException("Message is empty")
+        if len(message) > settings.CHAT_MAX_MESSAGE_CHARS:
+            raise ValidationException(f"Message longer than {settings.CHAT_MAX_MESSAGE_CHARS} characters")
+        language = language or settings.DEFAULT_LANGUAGE
+        if language not in LANGUAGE_NAMES:
+            raise ValidationException(f"Unsupported language: {language}")
+        conversation_id = conversation_id or str(uuid.uuid4())
+
+        lock = self._lock(conversation_id)
+        if not await lock.acquire():
+            raise ValidationException("Conversation is busy with another message")
+        try:
+            state = await self._load(conversation_id)
+            try:
+                embedding, reused = await self._retrieve(state, message)
+            except CircuitOpenException:
+                # Embeddings are failing fast: stay with the conversation's products, if any
+                embedding, reused = None, True
+                state["context"] = state["context"] or {"embedding": None, "products": []}
+            product_ids = [p["id"] for p in state["context"]["products"]]
+            yield {
+                "type": "context",
+                "conversation_id": conversation_id,
+                "cached": reused,
+                "products": [
+                    {key: p[key] for key in ("id", "sku", "title", "price", "similarity")}
+                    for p in state["context"]["products"]
+                ],
+            }
+
+            # Opening questions repeat across customers (shipping, certification,
+            # compatibility); an earlier answer grounded in the same products is reused.
+            # Follow-ups depend on the conversation so far and always go to the model
+            opening = not state["messages"]
+            cached_answer = (
+                await chat_cache.lookup(embedding, language, product_ids)
+                if opening and embedding else None
+            )
+            degraded = False
+            if cached_answer is not None:
+                answer = cached_answer
+                yield {"type": "token", "content": answer}
+            else:
+                reply = []
+                try:
+                    async for token in llm.stream(
+                        self._prompt(state, message, language),
+                        model=settings.CHAT_MODEL or None,
+                        max_tokens=settings.CHAT_MAX_REPLY_TOKENS
+                    ):
+                        reply.append(token)
+                        yield {"type": "token", "content": token}
+                except CircuitOpenException:
+                    # Raised before the first token, so nothing partial was sent
+                    degraded = True
+                    products = state["context"]["products"]
+                    reply = [
+                        DEGRADED_REPLY[language].format(products="\n".join(_describe(p) for p in products))
+                        if products else UNAVAILABLE_REPLY[language]
+                    ]
+                    yield {"type": "token", "content": reply[0]}
+                answer = "".join(reply)
+                if opening and not degraded and embedding:
+                    # Only answers that do not depend on earlier turns are shared
+                    await chat_cache.store(embedding, answer, language, product_ids)
+
+            state["messages"].append({"role": "user", "content": message})
+            state["messages"].append({"role": "assistant", "content": answer})
+            await self._save(conversation_id, state)
+        finally:
+            await self._release(lock)
+
+        if len(state["messages"]) > settings.CHAT_WINDOW_MESSAGES + settings.CHAT_SUMMARY_BATCH_MESSAGES:
+            # Summarizing is not on the customer's critical path
+            task = asyncio.create_task(self._fold(conversation_id))
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+
+        yield {
+            "type": "done",
+            "conversation_id": conversation_id,
+            "cached_answer": cached_answer is not None,
+            "degraded": degraded
+        }
+
+    async def reply(
+        self,
+        message: str,
+        conversation_id: Optional[str] = None,
+        language: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """The whole answer at once, for channels that cannot stream (WhatsApp)"""
+        tokens, products = [], []
+        async for event in self.stream_reply(message, conversation_id, language):
+            if event["type"] == "context":
+                conversation_id, products = event["conversation_id"], event["products"]
+            elif event["type"] == "token":
+                tokens.append(event["content"])
+        return {"conversation_id": conversation_id, "reply": "".join(tokens), "products": products}
+
+    async def _fold(self, conversation_id: str):
+        """Move messages beyond the window into the rolling summary"""
+        lock = self._lock(conversation_id)
+        try:
+            if not await lock.acquire():
+                return
+            try:
+                state = await self._load(conversation_id)
+                overflow = len(state["messages"]) - settings.CHAT_WINDOW_MESSAGES
+                if overflow <= 0:
+                    return
+                old = state["messages"][:overflow]
+                transcript = "\n".join(f"{m['role']}: {m['content']}" for m in old)
+                state["summary"] = await llm.complete(
+                    [
+                        {"role": "system", "content": SUMMARY_PROMPT.format(words=settings.CHAT_SUMMARY_MAX_TOKENS * 3 // 4)},
+                        {"role": "user", "content": f"Summary so far:\n{state['summary'] or '(none)'}\n\nNew messages:\n{transcript}"},
+                    ],
+                    model=settings.CHAT_SUMMARY_MODEL,
+                    max_tokens=settings.CHAT_SUMMARY_MAX_TOKENS,
+                    temperature=0
+                )
+                state["messages"] = state["messages"][overflow:]
+                await self._save(conversation_id, state)
+            finally:
+                await self._release(lock)
+        except Exception as e:
+            # Messages stay in the window and are folded after the next turn
+            self.logger.warning("Conversation summary failed", conversation_id=conversation_id, error=str(e))
+
+
+sales_chat = SalesChat()
@@ -0,0 +1,317 @@
+"""Daily sales rollups per product, marketplace and day"""
+
+from typing import Dict, List, Optional, Any, Tuple
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+import asyncio
+import uuid
+import structlog
+
+from sqlalchemy import text, bindparam, select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.exceptions import ValidationException
+from app.models.database import SalesDaily, RollupWatermark, OrderStatus
+
+logger = structlog.get_logger()
+
+# Orders in these states do not count as sales
+EXCLUDED_STATUSES = [OrderStatus.CANCELLED.name, OrderStatus.REFUNDED.name]
+
+# Serializes rollup writers across workers (pg_advisory_xact_lock key)
+ROLLUP_LOCK_ID = 0x5A1E5
+
+# (product_id, day) keys to recompute, passed as parallel arrays
+_KEYS = "SELECT * FROM unnest(CAST(:product_ids AS uuid[]), CAST(:days AS date[]))"
+
+_ZERO_ORDER_METRICS = text(f"""
+UPDATE sales_daily SET units = 0, revenue = 0, orders = 0, updated_at = now()
+WHERE (product_id, day) IN ({_KEYS})
+""")
+
+_ORDER_METRICS = text(f"""
+INSERT INTO sales_daily (product_id, marketplace, day, units, revenue, orders)
+SELECT i.product_id, o.marketplace, (o.placed_at AT TIME ZONE :tz)::date,
+       sum(i.quantity), sum(i.total_price), count(DISTINCT o.id)
+FROM orders o
+JOIN order_items i ON i.order_id = o.id AND i.placed_at = o.placed_at
+WHERE o.placed_at >= :start AND o.placed_at < :end
+  AND o.status::text NOT IN :excluded
+  AND (i.product_id, (o.placed_at AT TIME ZONE :tz)::date) IN ({_KEYS})
+GROUP BY 1, 2, 3
+ON CONFLICT (product_id, marketplace, day) DO UPDATE SET
+    units = excluded.units,
+    revenue = excluded.revenue,
+    orders = excluded.orders,
+    updated_at = now()
+""").bindparams(bindparam("excluded", expanding=True))
+
+_ZERO_REVIEW_METRICS = text(f"""
+UPDATE sales_daily SET review_count = 0, rating_sum = 0, updated_at = now()
+WHERE (product_id, day) IN ({_KEYS})
+""")
+
+_REVIEW_METRICS = text(f"""
+INSERT INTO sales_daily (product_id, marketplace, day, review_count, rating_sum)
+SELECT l.product_id, l.marketplace, (r.review_date AT TIME ZONE :tz)::date,
+       count(*), sum(r.rating)
+FROM reviews r
+JOIN listings l ON l.id = r.listing_id
+WHERE r.review_date >= :start AND r.review_date < :end
+  AND (l.product_id, (r.review_date AT TIME ZONE :tz)::date) IN ({_KEYS})
+GROUP BY 1, 2, 3
+ON CONFLICT (product_id, marketplace, day) DO UPDATE SET
+    review_count = excluded.review_count,
+    rating_sum = excluded.rating_sum,
+    updated_at = now()
+""")
+
+_CHANGED_ORDER_KEYS = """
+SELECT DISTINCT i.product_id, (o.placed_at AT TIME ZONE :tz)::date
+FROM orders o
+JOIN order_items i ON i.order_id = o.id AND i.placed_at = o.placed_at
+WHERE coalesce(o.updated_at, o.created_at) > :since
+"""
+
+_CHANGED_REVIEW_KEYS = """
+SELECT DISTINCT l.product_id, (r.review_date AT TIME ZONE :tz)::date
+FROM reviews r
+JOIN listings l ON l.id = r.listing_id
+WHERE r.created_at > :since
+"""
+
+_ALL_ORDER_KEYS = """
+SELECT DISTINCT i.product_id, (o.placed_at AT TIME ZONE :tz)::date
+FROM orders o
+JOIN order_items i ON i.order_id = o.id AND i.placed_at = o.placed_at
+WHERE o.placed_at >= :start AND o.placed_at < :end
+UNION
+SELECT product_id, day FROM sales_daily
+WHERE day >= CAST(:start AS timestamptz) AT TIME ZONE :tz
+  AND day < CAST(:end AS timestamptz) AT TIME ZONE :tz
+"""
+
+_ALL_REVIEW_KEYS = """
+SELECT DISTINCT l.product_id, (r.review_date AT TIME ZONE :tz)::date
+FROM reviews r
+JOIN listings l ON l.id = r.listing_id
+WHERE r.review_date >= :start AND r.review_date < :end
+"""
+
+_LISTING_ACTIVITY = """
+INSERT INTO sales_daily (product_id, marketplace, day, views, clicks)
+SELECT l.product_id, l.marketplace, (now() AT TIME ZONE :tz)::date, sum(v.views), sum(v.clicks)
+FROM unnest(CAST(:ids AS uuid[]), CAST(:views AS int[]), CAST(:clicks AS int[])) AS v(id, views, clicks)
+JOIN listings l ON l.id = v.id
+GROUP BY 1, 2
+ON CONFLICT (product_id, marketplace, day) DO UPDATE SET
+    views = sales_daily.views + excluded.views,
+    clicks = sales_daily.clicks + excluded.clicks,
+    updated_at = now()
+"""
+
+
+def parse_period(
+    start_date: Optional[str],
+    end_date: Optional[str],
+    default_days: int = 30
+) -> Tuple[date, date]:
+    """Inclusive day range from ISO date strings; defaults to the last 30 days"""
+    try:
+        end = date.fromisoformat(end_date[:10]) if end_date else datetime.now(timezone.utc).date()
+        start = date.fromisoformat(start_date[:10]) if start_date else end - timedelta(days=default_days - 1)
+    except ValueError as e:
+        raise ValidationException(f"Invalid date: {e}")
+    if start > end:
+        raise ValidationException("start_date must not be after end_date")
+    return start, end
+
+
+def ratio(numerator: float, denominator: float) -> float:
+    return round(numerator / denominator, 4) if denominator else 0.0
+
+
+async def record_listing_activity(session: AsyncSession, rows: List[Dict[str, Any]]):
+    """Add flushed listing views and clicks to today's rollup rows.
+
+    Runs inside the listing counter flush transaction, so it is applied
+    exactly once per flush.
+    """
+    rows = [row for row in rows if row.get("views") or row.get("clicks")]
+    if not rows:
+        return
+    await session.execute(text(_LISTING_ACTIVITY), {
+        "tz": settings.ANALYTICS_TIMEZONE,
+        "ids": [row["id"] for row in rows],
+        "views": [row.get("views", 0) for row in rows],
+        "clicks": [row.get("clicks", 0) for row in rows],
+    })
+
+
+async def read_rollup(
+    session: AsyncSession,
+    product_id: uuid.UUID,
+    start: date,
+    end: date,
+    marketplace=None
+) -> Dict[str, Dict[str, float]]:
+    """Summed rollup metrics per marketplace for [start, end]"""
+    query = (
+        select(
+            SalesDaily.marketplace,
+            func.sum(SalesDaily.units).label("units"),
+            func.sum(SalesDaily.revenue).label("revenue"),
+            func.sum(SalesDaily.orders).label("orders"),
+            func.sum(SalesDaily.views).label("views"),
+            func.sum(SalesDaily.clicks).label("clicks"),
+            func.sum(SalesDaily.review_count).label("review_count"),
+            func.sum(SalesDaily.rating_sum).label("rating_sum"),
+        )
+        .where(
+            SalesDaily.product_id == product_id,
+            SalesDaily.day >= start,
+            SalesDaily.day <= end
+        )
+        .group_by(SalesDaily.marketplace)
+    )
+    if marketplace is not None:
+        query = query.where(SalesDaily.marketplace == marketplace)
+
+    result = await session.execute(query)
+    return {
+        row.marketplace.value: {
+            "units": int(row.units or 0),
+            "revenue": float(row.revenue or 0),
+            "orders": int(row.orders or 0),
+            "views": int(row.views or 0),
+            "clicks": int(row.clicks or 0),
+            "review_count": int(row.review_count or 0),
+            "rating_sum": int(row.rating_sum or 0),
+        }
+        for row in result
+    }
+
+
+class SalesRollupService:
+    """Maintains sales_daily (product x marketplace x day).
+
+    Order and review metrics are recomputed per affected (product, day)
+    from the source rows, so a refresh is idempotent and picks up
+    cancellations and edits; each recompute is bounded on the partition
+    key and only reads the partitions for those days. The incremental
+    refresh finds affected keys from orders and reviews changed since a
+    watermark (with an overlap for late commits). Views and clicks are
+    added by the listing counter flush via record_listing_activity.
+    """
+
+    def __init__(self, session_factory=AsyncSessionLocal):
+        self.session_factory = session_factory
+        self.tz = settings.ANALYTICS_TIMEZONE
+        self._task: Optional[asyncio.Task] = None
+        self.logger = logger.bind(component="sales_rollup")
+
+    async def refresh(self) -> int:
+        """Recompute keys touched since the last refresh; returns keys recomputed"""
+        async with self.session_factory() as session:
+            async with session.begin():
+                if not await session.scalar(
+                    text("SELECT pg_try_advisory_xact_lock(:id)"), {"id": ROLLUP_LOCK_ID}
+                ):
+                    return 0
+
+                scan_started = await session.scalar(text("SELECT now()"))
+                watermark = await session.get(RollupWatermark, "sales_daily")
+                if watermark is None:
+                    # History is loaded with backfill(); track changes from here on
+                    session.add(RollupWatermark(name="sales_daily", value=scan_started))
+                    self.logger.info("Sales rollup watermark initialised; run a backfill for history")
+                    return 0
+                since = watermark.value - timedelta(seconds=settings.ROLLUP_WATERMARK_OVERLAP_SECONDS)
+
+                order_keys = await self._keys(session, _CHANGED_ORDER_KEYS, {"since": since})
+                review_keys = await self._keys(session, _CHANGED_REVIEW_KEYS, {"since": since})
+                await self._recompute(session, order_keys, _ZERO_ORDER_METRICS, _ORDER_METRICS)
+                await self._recompute(session, review_keys, _ZERO_REVIEW_METRICS, _REVIEW_METRICS)
+
+                watermark.value = scan_started
+
+        recomputed = len(order_keys) + len(review_keys)
+        if recomputed:
+            self.logger.info("Refreshed sales rollup", orders=len(order_keys), reviews=len(review_keys))
+        return recomputed
+
+    async def backfill(self, since: date, until: date) -> int:
+        """Rebuild order and review metrics for [since, until], one month per transaction"""
+        total = 0
+        month = date(since.year, since.month, 1)
+        while month <= until:
+            next_month = date(month.year + month.month // 12, month.month % 12 + 1, 1)
+            start = max(month, since)
+            end = min(next_month, until + timedelta(days=1))
+            params = {"start": self._local_midnight(start), "end": self._local_midnight(end)}
+
+            async with self.session_factory() as session:
+                async with session.begin():
+                    await session.execute(
+                        text("SELECT pg_advisory_xact_lock(:id)"), {"id": ROLLUP_LOCK_ID}
+                    )
+                    order_keys = await self._keys(session, _ALL_ORDER_KEYS, params)
+                    review_keys = await self._keys(session, _ALL_REVIEW_KEYS, params)
+                    await self._recompute(session, order_keys, _ZERO_ORDER_METRICS, _ORDER_METRICS)
+                    await self._recompute(session, review_keys, _ZERO_REVIEW_METRICS, _REVIEW_METRICS)
+
+            total += len(order_keys) + len(review_keys)
+            self.logger.info("Backfilled sales rollup", month=month.isoformat(), keys=len(order_keys))
+            month = next_month
+        return total
+
+    async def _keys(self, session: AsyncSession, sql: str, params: Dict[str, Any]) -> List[Tuple[uuid.UUID, date]]:
+        result = await session.execute(text(sql), {"tz": self.tz, **params})
+        # Sorted by day so each recompute chunk covers a narrow time range
+        return sorted(((row[0], row[1]) for row in result), key=lambda key: (key[1], str(key[0])))
+
+    async def _recompute(self, session: AsyncSession, keys, zero_sql, insert_sql):
+        """Zero the metric columns for the keys, then insert fresh aggregates"""
+        for i in range(0, len(keys), settings.BULK_DB_CHUNK_SIZE):
+            chunk = keys[i:i + settings.BULK_DB_CHUNK_SIZE]
+            days = [day for _, day in chunk]
+            params = {
+                "tz": self.tz,
+                "product_ids": [product_id for product_id, _ in chunk],
+                "days": days,
+                # Bounds on the partition key so only those days' partitions are read
+                "start": self._local_midnight(min(days)),
+                "end": self._local_midnight(max(days) + timedelta(days=1)),
+                "excluded": EXCLUDED_STATUSES,
+            }
+            await session.execute(zero_sql, params)
+            await session.execute(insert_sql, params)
+
+    def _local_midnight(self, day: date) -> datetime:
+        """Start of a local day as an aware timestamp"""
+        return datetime.combine(day, datetime.min.time(), tzinfo=ZoneInfo(self.tz))
+
+    async def start(self):
+        """Start the periodic incremental refresh"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.error("Sales rollup refresh failed", error=str(e))
+            await asyncio.sleep(settings.ROLLUP_REFRESH_SECONDS)
+
+
+sales_rollup = SalesRollupService()
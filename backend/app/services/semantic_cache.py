@@ -0,0 +1,213 @@
+"""Semantic cache of LLM answers, keyed by query embedding"""
+
+from typing import Dict, List, Optional, Any, Iterable, Tuple, Set
+from collections import OrderedDict
+import time
+import structlog
+
+import numpy as np
+from prometheus_client import Counter
+
+from app.core.config import settings
+from app.core.redis import get_redis
+
+logger = structlog.get_logger()
+
+REQUESTS = Counter(
+    "semantic_cache_requests_total",
+    "Semantic cache lookups by outcome",
+    ["cache", "result"]  # hit, miss, stale
+)
+
+ScopeKey = Tuple[str, Tuple[str, ...]]
+
+
+def _version_key(product_id: str) -> str:
+    return f"product_version:{product_id}"
+
+
+async def _product_versions(product_ids: Tuple[str, ...]) -> Optional[Tuple[int, ...]]:
+    """Current change counters of the products, or None if Redis is unavailable"""
+    if not product_ids:
+        return ()
+    try:
+        values = await get_redis().mget([_version_key(p) for p in product_ids])
+    except Exception as e:
+        logger.warning("Product versions unavailable", error=str(e))
+        return None
+    return tuple(int(v or 0) for v in values)
+
+
+class _Scope:
+    """Flat inner-product index over the normalized query vectors of one scope.
+
+    Scopes hold at most SEMANTIC_CACHE_MAX_ENTRIES_PER_SCOPE entries, so an
+    exact search is a single small matrix-vector product.
+    """
+
+    def __init__(self, dimensions: int, capacity: int):
+        self.vectors = np.zeros((capacity, dimensions), dtype=np.float32)
+        self.entries: List[Optional[Dict[str, Any]]] = [None] * capacity
+        self.next = 0  # Ring buffer: the oldest entry is overwritten when full
+
+    def search(self, vector: np.ndarray, threshold: float, now: float) -> Optional[Tuple[int, float]]:
+        scores = self.vectors @ vector
+        for position in np.argsort(-scores):
+            if scores[position] < threshold:
+                return None
+            entry = self.entries[position]
+            if entry is not None and entry["expires_at"] > now:
+                return int(position), float(scores[position])
+        return None
+
+    def add(self, vector: np.ndarray, entry: Dict[str, Any]):
+        position = self.next % len(self.entries)
+        self.vectors[position] = vector
+        self.entries[position] = entry
+        self.next += 1
+
+    def remove(self, position: int):
+        self.vectors[position] = 0
+        self.entries[position] = None
+
+
+class SemanticCache:
+    """Serves earlier LLM answers to near-identical queries.
+
+    Entries are scoped by a string (language, marketplace) and the products
+    the answer was grounded in; within a scope the closest earlier query
+    above SEMANTIC_CACHE_SIMILARITY (cosine) is a hit. Entries expire after
+    SEMANTIC_CACHE_TTL_SECONDS and are dropped when any of their products
+    changes: invalidate_products bumps a per-product counter in Redis, which
+    every process compares on a hit, and drops local scopes at once.
+    Stock levels are not tracked as changes; the TTL bounds how stale an
+    availability statement can get.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._scopes: "OrderedDict[ScopeKey, _Scope]" = OrderedDict()
+        self._by_product: Dict[str, Set[ScopeKey]] = {}
+        self.stats = {"hits": 0, "misses": 0, "stale": 0, "stores": 0}
+        self.logger = logger.bind(component="semantic_cache", cache=name)
+        _caches.append(self)
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    @staticmethod
+    def _scope_key(scope: str, product_ids: Iterable[Any]) -> ScopeKey:
+        return scope, tuple(sorted({str(p) for p in product_ids}))
+
+    def _record(self, result: str):
+        self.stats[{"hit": "hits", "miss": "misses", "stale": "stale"}[result]] += 1
+        REQUESTS.labels(self.name, result).inc()
+
+    async def lookup(self, embedding: List[float], scope: str, product_ids: Iterable[Any] = ()) -> Optional[Any]:
+        """The cached answer for a near-identical query in this scope, if still valid"""
+        if not settings.SEMANTIC_CACHE_ENABLED:
+            return None
+        key = self._scope_key(scope, product_ids)
+        index = self._scopes.get(key)
+        found = index.search(self._normalize(embedding), settings.SEMANTIC_CACHE_SIMILARITY, time.time()) if index else None
+        if found is None:
+            self._record("miss")
+            return None
+
+        position, _ = found
+        versions = await _product_versions(key[1])
+        if versions != index.entries[position]["versions"]:
+            if versions is not None:
+                # A product changed since these entries were stored; newer ones may still match
+                for n, entry in enumerate(index.entries):
+                    if entry is not None and entry["versions"] != versions:
+                        index.remove(n)
+                found = index.search(self._normalize(embedding), settings.SEMANTIC_CACHE_SIMILARITY, time.time())
+            if versions is None or found is None:
+                self._record("stale")
+                return None
+            position, _ = found
+
+        self._scopes.move_to_end(key)
+        self._record("hit")
+        return index.entries[position]["value"]
+
+    async def store(self, embedding: List[float], value: Any, scope: str, product_ids: Iterable[Any] = ()):
+        if not settings.SEMANTIC_CACHE_ENABLED:
+            return
+        key = self._scope_key(scope, product_ids)
+        versions = await _product_versions(key[1])
+        if versions is None:
+            # Without versions the entry could not be invalidated elsewhere
+            return
+
+        vector = self._normalize(embedding)
+        index = self._scopes.get(key)
+        if index is None:
+            index = self._scopes[key] = _Scope(len(vector), settings.SEMANTIC_CACHE_MAX_ENTRIES_PER_SCOPE)
+            for product_id in key[1]:
+                self._by_product.setdefault(product_id, set()).add(key)
+            while len(self._scopes) > settings.SEMANTIC_CACHE_MAX_SCOPES:
+                self._drop(next(iter(self._scopes)))
+        self._scopes.move_to_end(key)
+
+        index.add(vector, {
+            "value": value,
+            "versions": versions,
+            "expires_at": time.time() + settings.SEMANTIC_CACHE_TTL_SECONDS,
+        })
+        self.stats["stores"] += 1
+
+    def _drop(self, key: ScopeKey):
+        self._scopes.pop(key, None)
+        for product_id in key[1]:
+            keys = self._by_product.get(product_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_product[product_id]
+
+    def drop_products(self, product_ids: Iterable[Any]):
+        for product_id in {str(p) for p in product_ids}:
+            for key in list(self._by_product.get(product_id, ())):
+                self._drop(key)
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"] + self.stats["stale"]
+        return {
+            "cache": self.name,
+            **self.stats,
+            "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else 0.0,
+            "scopes": len(self._scopes),
+            "entries": sum(e is not None for s in self._scopes.values() for e in s.entries),
+        }
+
+
+_caches: List[SemanticCache] = []
+
+
+async def invalidate_products(product_ids: Iterable[Any]):
+    """Invalidate cached answers grounded in these products, in every process"""
+    product_ids = {str(p) for p in product_ids}
+    if not product_ids:
+        return
+    for cache in _caches:
+        cache.drop_products(product_ids)
+    try:
+        async with get_redis().pipeline(transaction=False) as pipe:
+            for product_id in product_ids:
+                pipe.incr(_version_key(product_id))
+            await pipe.execute()
+    except Exception as e:
+        logger.warning("Product version bump failed", error=str(e))
+
+
+def cache_stats() -> List[Dict[str, Any]]:
+    return [cache.get_stats() for cache in _caches]
+
+
+chat_cache = SemanticCache("chat")
+content_cache = SemanticCache("content")
@@ -0,0 +1,283 @@
+"""Debounced propagation of stock levels to marketplace listings"""
+
+from typing import Dict, List, Optional, Iterable, Tuple
+from collections import defaultdict
+import asyncio
+import time
+import uuid
+import structlog
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.exceptions import CircuitOpenException
+from app.core.redis import get_redis
+from app.core.resilience import is_transient
+from app.models.database import MarketplaceType
+from app.adapters.base import InventoryUpdate, MarketplaceAdapterFactory
+
+logger = structlog.get_logger()
+
+DUE_KEY = "stock:propagation:due"  # product_id -> due time (sorted set)
+SENT_KEY = "stock:propagation:sent"  # "marketplace:sku" -> last quantity sent
+ATTEMPTS_KEY = "stock:propagation:attempts"  # product_id -> consecutive failed attempts
+
+# Live listings of the claimed products with their sellable quantity,
+# computed from the warehouse rows (Product totals are reconciled lazily)
+_TARGETS = text("""
+SELECT l.marketplace, p.id AS product_id, p.sku, greatest(coalesce(s.available, 0) - :safety_stock, 0) AS quantity
+FROM listings l
+JOIN products p ON p.id = l.product_id
+LEFT JOIN (
+    SELECT product_id, sum(quantity - coalesce(reserved, 0))::int AS available
+    FROM inventory
+    WHERE product_id = ANY(CAST(:product_ids AS uuid[]))
+    GROUP BY product_id
+) s ON s.product_id = l.product_id
+WHERE l.product_id = ANY(CAST(:product_ids AS uuid[]))
+  AND l.external_id IS NOT NULL
+  AND l.status = 'ACTIVE'
+""")
+
+
+class StockPropagator:
+    """Pushes stock changes to marketplaces, coalesced per SKU and marketplace.
+
+    A change schedules its product in a Redis sorted set, due
+    STOCK_PROPAGATION_DEBOUNCE_SECONDS after the first unsent change;
+    further changes inside the window do not move it. Products at or
+    below STOCK_PROPAGATION_LOW_STOCK are due immediately, so nearly
+    sold-out SKUs are never held back. When a product comes due, its
+    current quantity is read once and sent to every marketplace through
+    bulk_update_inventory, lowest quantities first, skipping
+    (marketplace, SKU) pairs whose last sent value is unchanged and
+    marketplaces without an adapter. Only transient failures (throttling,
+    5xx, timeouts, open circuits) are retried, with exponential back-off
+    from STOCK_PROPAGATION_RETRY_SECONDS up to
+    STOCK_PROPAGATION_RETRY_MAX_SECONDS; rejected updates are logged and
+    dropped.
+    """
+
+    def __init__(self, session_factory=AsyncSessionLocal):
+        self.session_factory = session_factory
+        self.local_due: Dict[str, float] = {}  # Used while Redis is unreachable
+        self._task: Optional[asyncio.Task] = None
+        self.logger = logger.bind(component="stock_propagation")
+
+    async def notify(self, product_ids: Iterable[uuid.UUID], low_stock: Iterable[uuid.UUID] = ()):
+        """Schedule products whose stock changed"""
+        now = time.time()
+        low = {str(product_id) for product_id in low_stock}
+        normal = {str(product_id) for product_id in product_ids} - low
+        if not low and not normal:
+            return
+
+        try:
+            async with get_redis().pipeline(transaction=False) as pipe:
+                if normal:
+                    pipe.zadd(DUE_KEY, {m: now + settings.STOCK_PROPAGATION_DEBOUNCE_SECONDS for m in normal}, nx=True)
+                if low:
+                    # Pull an already scheduled product forward
+                    pipe.zadd(DUE_KEY, {m: now for m in low}, lt=True)
+                await pipe.execute()
+        except Exception as e:
+            self.logger.warning("Could not schedule stock propagation", error=str(e))
+            for member in normal:
+                self.local_due.setdefault(member, now + settings.STOCK_PROPAGATION_DEBOUNCE_SECONDS)
+            for member in low:
+                self.local_due[member] = now
+
+    async def propagate_due(self) -> int:
+        """Send every product that is due; returns the number of updates sent"""
+        product_ids = await self._claim_due()
+        if not product_ids:
+            return 0
+        try:
+            return await self.propagate(product_ids)
+        except Exception as e:
+            # Claimed products are off the schedule: put them back or their stock waits for the next change
+            self.logger.error("Stock propagation failed", products=len(product_ids), error=str(e))
+            await self._retry(product_ids, len(product_ids))
+            return 0
+
+    async def propagate(self, product_ids: List[uuid.UUID]) -> int:
+        """Send the current quantity of the products to all their marketplaces"""
+        async with self.session_factory() as session:
+            result = await session.execute(_TARGETS, {
+                "product_ids": product_ids,
+                "safety_stock": settings.STOCK_PROPAGATION_SAFETY_STOCK
+            })
+            targets = result.all()
+
+        supported = set(MarketplaceAdapterFactory.get_supported_marketplaces())
+        by_marketplace: Dict[MarketplaceType, Dict[str, int]] = defaultdict(dict)
+        for row in targets:
+            # Raw SQL returns the enum name
+            marketplace = MarketplaceType[row.marketplace]
+            if marketplace in supported:
+                by_marketplace[marketplace][row.sku] = row.quantity
+
+        by_marketplace = await self._skip_unchanged(by_marketplace)
+        if not by_marketplace:
+            await self._reset_attempts(product_ids)
+            return 0
+
+        sent = await asyncio.gather(*(
+            self._send(marketplace, quantities)
+            for marketplace, quantities in by_marketplace.items()
+        ))
+
+        retry_skus = {sku for _, retry in sent for sku in retry}
+        retry = {row.product_id for row in targets if row.sku in retry_skus}
+        if retry:
+            await self._retry(retry, len(retry_skus))
+        await self._reset_attempts([product_id for product_id in product_ids if product_id not in retry])
+        return sum(count for count, _ in sent)
+
+    async def _send(self, marketplace: MarketplaceType, quantities: Dict[str, int]) -> Tuple[int, List[str]]:
+        """bulk_update_inventory in batches, lowest quantity first; returns sent count and SKUs to retry"""
+        ordered = sorted(quantities.items(), key=lambda item: item[1])
+        sent, retry = 0, []
+
+        try:
+            adapter = MarketplaceAdapterFactory.create_from_settings(marketplace)
+            adapter.bulk_concurrency = settings.BULK_ADAPTER_CONCURRENCY
+        except Exception as e:
+            # Configuration problem: retrying cannot fix it
+            self.logger.error("No adapter for stock propagation", marketplace=marketplace.value, error=str(e))
+            return 0, []
+
+        for i in range(0, len(ordered), settings.STOCK_PROPAGATION_BATCH_SIZE):
+            batch = ordered[i:i + settings.STOCK_PROPAGATION_BATCH_SIZE]
+            try:
+                response = await adapter.bulk_update_inventory(
+                    [InventoryUpdate(sku=sku, quantity=quantity) for sku, quantity in batch]
+                ) or {}
+            except Exception as e:
+                transient = isinstance(e, CircuitOpenException) or is_transient(e)
+                self.logger.warning(
+                    "Stock update batch failed", marketplace=marketplace.value, retry=transient, error=str(e)
+                )
+                if transient:
+                    retry.extend(sku for sku, _ in batch)
+                continue
+
+            errors = {error["sku"]: error.get("error") for error in response.get("errors", [])}
+            if errors:
+                # Per-SKU rejections come back as messages; resending the same quantity would fail again
+                self.logger.warning(
+                    "Stock updates rejected", marketplace=marketplace.value, skus=len(errors),
+                    sample=dict(list(errors.items())[:5])
+                )
+            succeeded = {sku: quantity for sku, quantity in batch if sku not in errors}
+            sent += len(succeeded)
+            await self._remember_sent(marketplace, succeeded)
+
+        return sent, retry
+
+    async def _claim_due(self) -> List[uuid.UUID]:
+        """Take due products off the schedule; ZREM decides between workers"""
+        now = time.time()
+        claimed = [member for member, due in self.local_due.items() if due <= now]
+        for member in claimed:
+            del self.local_due[member]
+
+        try:
+            redis = get_redis()
+            members = await redis.zrangebyscore(
+                DUE_KEY, "-inf", now, start=0, num=settings.STOCK_PROPAGATION_BATCH_SIZE
+            )
+            if members:
+                async with redis.pipeline(transaction=False) as pipe:
+                    for member in members:
+                        pipe.zrem(DUE_KEY, member)
+                    removed = await pipe.execute()
+                claimed.extend(member for member, ok in zip(members, removed) if ok)
+        except Exception as e:
+            self.logger.warning("Could not read stock propagation schedule", error=str(e))
+
+        return [uuid.UUID(member) for member in dict.fromkeys(claimed)]
+
+    async def _skip_unchanged(self, by_marketplace: Dict[MarketplaceType, Dict[str, int]]):
+        fields = [f"{m.value}:{sku}" for m, quantities in by_marketplace.items() for sku in quantities]
+        try:
+            last = dict(zip(fields, await get_redis().hmget(SENT_KEY, fields))) if fields else {}
+        except Exception:
+            return by_marketplace
+
+        changed = {}
+        for marketplace, quantities in by_marketplace.items():
+            pending = {
+                sku: quantity for sku, quantity in quantities.items()
+                if last.get(f"{marketplace.value}:{sku}") != str(quantity)
+            }
+            if pending:
+                changed[marketplace] = pending
+        return changed
+
+    async def _remember_sent(self, marketplace: MarketplaceType, quantities: Dict[str, int]):
+        if not quantities:
+            return
+        try:
+            await get_redis().hset(
+                SENT_KEY, mapping={f"{marketplace.value}:{sku}": quantity for sku, quantity in quantities.items()}
+            )
+        except Exception:
+            pass
+
+    async def _retry(self, product_ids: Iterable[uuid.UUID], skus: int):
+        """Reschedule products with a transiently failed SKU, backing off per consecutive failure"""
+        members = [str(product_id) for product_id in product_ids]
+        now = time.time()
+        try:
+            redis = get_redis()
+            async with redis.pipeline(transaction=False) as pipe:
+                for member in members:
+                    pipe.hincrby(ATTEMPTS_KEY, member, 1)
+                attempts = await pipe.execute()
+            due = {member: now + self._backoff(n) for member, n in zip(members, attempts)}
+            await redis.zadd(DUE_KEY, due, nx=True)
+        except Exception:
+            due = {member: now + self._backoff(1) for member in members}
+            for member, at in due.items():
+                self.local_due.setdefault(member, at)
+        self.logger.warning(
+            "Rescheduled failed stock updates", skus=skus, max_delay=round(max(due.values()) - now, 1)
+        )
+
+    @staticmethod
+    def _backoff(attempts: int) -> float:
+        delay = settings.STOCK_PROPAGATION_RETRY_SECONDS * 2 ** min(attempts - 1, 16)
+        return min(delay, settings.STOCK_PROPAGATION_RETRY_MAX_SECONDS)
+
+    async def _reset_attempts(self, product_ids: Iterable[uuid.UUID]):
+        members = [str(product_id) for product_id in product_ids]
+        if not members:
+            return
+        try:
+            await get_redis().hdel(ATTEMPTS_KEY, *members)
+        except Exception:
+            pass
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.propagate_due()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.error("Stock propagation failed", error=str(e))
+            await asyncio.sleep(settings.STOCK_PROPAGATION_TICK_SECONDS)
+
+
+stock_propagator = StockPropagator()
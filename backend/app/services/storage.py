@@ -0,0 +1,231 @@
+"""Asset storage: S3 (or MinIO) and local filesystem backends"""
+
+from typing import Dict, List, Optional, Any, AsyncIterator
+from abc import ABC, abstractmethod
+import asyncio
+import base64
+import hashlib
+import os
+
+import aiofiles
+import aiofiles.os
+
+from app.core.config import settings
+from app.core.exceptions import ValidationException
+from app.core.lazy import lazy_import
+
+boto3 = lazy_import("boto3")
+
+
+class AssetStorage(ABC):
+    """Content-addressed blob store for product assets"""
+
+    @abstractmethod
+    async def exists(self, key: str) -> bool:
+        pass
+
+    @abstractmethod
+    async def put(self, key: str, data: bytes, content_type: str) -> str:
+        """Store data under key and return its public URL"""
+        pass
+
+    @abstractmethod
+    async def put_stream(self, key: str, chunks: AsyncIterator[bytes], content_type: str) -> Dict[str, Any]:
+        """Store a stream of chunks without holding the whole object in memory.
+
+        Returns the URL, size and SHA-256 of what was stored; streams over
+        STORAGE_MAX_UPLOAD_BYTES are aborted with a ValidationException.
+        """
+        pass
+
+    def url(self, key: str) -> str:
+        base = settings.STORAGE_PUBLIC_URL.rstrip("/")
+        return f"{base}/{key}"
+
+
+class S3Storage(AssetStorage):
+    """AWS S3, or any S3-compatible store (MinIO) via STORAGE_ENDPOINT_URL"""
+
+    def __init__(self):
+        self.bucket = settings.AWS_BUCKET_NAME
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = boto3.client(
+                "s3",
+                region_name=settings.AWS_REGION,
+                endpoint_url=settings.STORAGE_ENDPOINT_URL,
+                aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+                aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY
+            )
+        return self._client
+
+    async def exists(self, key: str) -> bool:
+        try:
+            await asyncio.to_thread(self.client.head_object, Bucket=self.bucket, Key=key)
+            return True
+        except Exception:
+            return False
+
+    async def put(self, key: str, data: bytes, content_type: str) -> str:
+        # boto3 is blocking
+        await asyncio.to_thread(
+            self.client.put_object,
+            Bucket=self.bucket,
+            Key=key,
+            Body=data,
+            ContentType=content_type,
+            CacheControl="public, max-age=31536000, immutable"
+        )
+        return self.url(key)
+
+    async def put_stream(self, key: str, chunks: AsyncIterator[bytes], content_type: str) -> Dict[str, Any]:
+        """Multipart upload: parts of STORAGE_PART_SIZE, STORAGE_UPLOAD_CONCURRENCY in flight.
+
+        At most that many parts (plus the one being filled) are in memory,
+        whatever the object size. Each part carries its Content-MD5, which
+        S3 verifies; the SHA-256 of the whole object is computed as the
+        bytes pass. Objects smaller than one part are a single PUT.
+        """
+        part_size = settings.STORAGE_PART_SIZE
+        slots = asyncio.Semaphore(settings.STORAGE_UPLOAD_CONCURRENCY)
+        digest = hashlib.sha256()
+        buffer = bytearray()
+        size = 0
+        upload_id: Optional[str] = None
+        parts: List[asyncio.Task] = []
+
+        async def upload_part(number: int, data: bytes) -> Dict[str, Any]:
+            try:
+                response = await asyncio.to_thread(
+                    self.client.upload_part,
+                    Bucket=self.bucket,
+                    Key=key,
+                    UploadId=upload_id,
+                    PartNumber=number,
+                    Body=data,
+                    ContentMD5=base64.b64encode(hashlib.md5(data).digest()).decode()
+                )
+                return {"PartNumber": number, "ETag": response["ETag"]}
+            finally:
+                slots.release()
+
+        async def start_part(data: bytes):
+            nonlocal upload_id
+            if upload_id is None:
+                response = await asyncio.to_thread(
+                    self.client.create_multipart_upload,
+                    Bucket=self.bucket,
+                    Key=key,
+                    ContentType=content_type,
+                    CacheControl="public, max-age=31536000, immutable"
+                )
+                upload_id = response["UploadId"]
+            # Waits while the maximum number of parts is uploading
+            await slots.acquire()
+            for task in parts:
+                if task.done() and task.exception():
+                    slots.release()
+                    raise task.exception()
+            parts.append(asyncio.create_task(upload_part(len(parts) + 1, data)))
+
+        try:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > settings.STORAGE_MAX_UPLOAD_BYTES:
+                    raise ValidationException(f"Upload larger than {settings.STORAGE_MAX_UPLOAD_BYTES} bytes")
+                digest.update(chunk)
+                buffer += chunk
+                while len(buffer) >= part_size:
+                    with memoryview(buffer) as view:
+                        data = bytes(view[:part_size])
+                    del buffer[:part_size]
+                    await start_part(data)
+
+            if upload_id is None:
+                await self.put(key, bytes(buffer), content_type)
+            else:
+                if buffer:
+                    await start_part(bytes(buffer))
+                completed = await asyncio.gather(*parts)
+                await asyncio.to_thread(
+                    self.client.complete_multipart_upload,
+                    Bucket=self.bucket,
+                    Key=key,
+                    UploadId=upload_id,
+                    MultipartUpload={"Parts": completed}
+                )
+        except BaseException:
+            for task in parts:
+                task.cancel()
+            if upload_id is not None:
+                await asyncio.to_thread(
+                    self.client.abort_multipart_upload, Bucket=self.bucket, Key=key, UploadId=upload_id
+                )
+            raise
+
+        return {"key": key, "url": self.url(key), "size": size, "sha256": digest.hexdigest()}
+
+    def url(self, key: str) -> str:
+        if settings.STORAGE_PUBLIC_URL:
+            return super().url(key)
+        return f"https://{self.bucket}.s3.{settings.AWS_REGION}.amazonaws.com/{key}"
+
+
+class FilesystemStorage(AssetStorage):
+    """Files under STORAGE_ROOT, for local runs"""
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or settings.STORAGE_ROOT
+
+    def path(self, key: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(os.path.abspath(self.root) + os.sep):
+            raise ValueError(f"Invalid storage key: {key}")
+        return path
+
+    async def exists(self, key: str) -> bool:
+        return await aiofiles.os.path.exists(self.path(key))
+
+    async def put(self, key: str, data: bytes, content_type: str) -> str:
+        path = self.path(key)
+        await aiofiles.os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename, so readers never see a partial file
+        async with aiofiles.open(f"{path}.part", "wb") as f:
+            await f.write(data)
+        await aiofiles.os.replace(f"{path}.part", path)
+        return self.url(key)
+
+    async def put_stream(self, key: str, chunks: AsyncIterator[bytes], content_type: str) -> Dict[str, Any]:
+        path = self.path(key)
+        await aiofiles.os.makedirs(os.path.dirname(path), exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+
+        try:
+            async with aiofiles.open(f"{path}.part", "wb") as f:
+                async for chunk in chunks:
+                    size += len(chunk)
+                    if size > settings.STORAGE_MAX_UPLOAD_BYTES:
+                        raise ValidationException(f"Upload larger than {settings.STORAGE_MAX_UPLOAD_BYTES} bytes")
+                    digest.update(chunk)
+                    await f.write(chunk)
+        except BaseException:
+            await aiofiles.os.remove(f"{path}.part")
+            raise
+
+        await aiofiles.os.replace(f"{path}.part", path)
+        return {"key": key, "url": self.url(key), "size": size, "sha256": digest.hexdigest()}
+
+
+_storage: Optional[AssetStorage] = None
+
+
+def get_storage() -> AssetStorage:
+    """Get the configured storage backend"""
+    global _storage
+    if _storage is None:
+        _storage = FilesystemStorage() if settings.STORAGE_BACKEND == "filesystem" else S3Storage()
+    return _storage
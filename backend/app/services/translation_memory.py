@@ -0,0 +1,266 @@
+"""Segment-level translation memory in front of DeepL"""
+
+from typing import Dict, List, Optional, Any, Tuple
+import asyncio
+import hashlib
+import re
+import unicodedata
+import structlog
+
+import orjson
+from prometheus_client import Counter
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.exceptions import ValidationException
+from app.core.lazy import lazy_import
+from app.core.redis import get_redis
+
+deepl = lazy_import("deepl")
+
+logger = structlog.get_logger()
+
+SEGMENTS = Counter(
+    "translation_segments_total",
+    "Translated segments by where the translation came from",
+    ["result"]  # exact, normalized, miss
+)
+CHARACTERS = Counter(
+    "translation_characters_total",
+    "Source characters by where the translation came from",
+    ["source"]  # memory, deepl
+)
+
+# DeepL wants a regional variant for English targets
+DEEPL_TARGETS = {"en": "EN-GB", "de": "DE", "zh": "ZH"}
+
+# Sentence ends and line breaks separate segments; list markers stay with
+# the separator so "• Waterproof" and "- Waterproof" share an entry
+_SEPARATOR = re.compile(r"((?:(?<=[.!?;:])[ \t]+|\s*\n\s*)(?:(?:[-*•·]|\d+[.)])[ \t]+)?|^\s*(?:(?:[-*•·]|\d+[.)])[ \t]+)?)")
+_QUOTES = str.maketrans({"“": '"', "”": '"', "„": '"', "‘": "'", "’": "'", "‚": "'", "–": "-", "—": "-", " ": " "})
+_WHITESPACE = re.compile(r"\s+")
+_TRANSLATABLE = re.compile(r"[^\W\d_]")
+
+_LOOKUP = text("""
+SELECT source_hash, source_text, target_text
+FROM translation_memory
+WHERE source_lang = :source_lang AND target_lang = :target_lang
+  AND source_hash = ANY(CAST(:hashes AS text[]))
+""")
+
+_STORE = text("""
+INSERT INTO translation_memory (source_lang, target_lang, source_hash, source_text, target_text)
+SELECT :source_lang, :target_lang, v.source_hash, v.source_text, v.target_text
+FROM unnest(CAST(:hashes AS text[]), CAST(:sources AS text[]), CAST(:targets AS text[]))
+    AS v(source_hash, source_text, target_text)
+ON CONFLICT (source_lang, target_lang, source_hash) DO NOTHING
+""")
+
+
+def normalize(segment: str) -> str:
+    """Form used for matching: NFC, plain quotes and dashes, single spaces"""
+    segment = unicodedata.normalize("NFC", segment).translate(_QUOTES)
+    return _WHITESPACE.sub(" ", segment).strip()
+
+
+def segment_hash(segment: str) -> str:
+    return hashlib.md5(normalize(segment).encode()).hexdigest()
+
+
+def split_segments(source: str) -> List[Tuple[str, bool]]:
+    """(part, is_segment) pairs whose concatenation is the original text"""
+    parts = []
+    for n, part in enumerate(_SEPARATOR.split(source)):
+        if not part:
+            continue
+        # split() with a capturing group alternates text and separators
+        is_segment = n % 2 == 0 and bool(_TRANSLATABLE.search(part))
+        parts.append((part, is_segment))
+    return parts
+
+
+class TranslationMemory:
+    """Translates text segment by segment, reusing earlier translations.
+
+    Texts are split into sentence segments. Each unique segment is looked
+    up by the hash of its normalized form in Redis, then in the
+    translation_memory table; a stored segment that matches exactly is an
+    exact hit, one that differs only in whitespace, quotes or dashes a
+    normalized hit. Only misses go to DeepL, in batched requests, and are
+    stored for next time. Hits and characters saved are exported as
+    Prometheus counters and returned per call.
+    """
+
+    def __init__(self, session_factory=AsyncSessionLocal):
+        self.session_factory = session_factory
+        self._translator = None
+        self.logger = logger.bind(component="translation_memory")
+
+    def _get_translator(self):
+        if self._translator is None:
+            if not settings.DEEPL_API_KEY:
+                raise ValidationException("DeepL API key not configured")
+            self._translator = deepl.Translator(settings.DEEPL_API_KEY)
+        return self._translator
+
+    async def translate(self, source: str, target_lang: str, source_lang: str = "en") -> str:
+        translated, _ = await self.translate_many([source], target_lang, source_lang)
+        return translated[0]
+
+    async def translate_many(
+        self,
+        texts: List[str],
+        target_lang: str,
+        source_lang: str = "en"
+    ) -> Tuple[List[str], Dict[str, Any]]:
+        """Translate several texts; returns the translations and hit statistics"""
+        if target_lang not in DEEPL_TARGETS or source_lang not in DEEPL_TARGETS:
+            raise ValidationException(f"Unsupported language pair: {source_lang} -> {target_lang}")
+
+        plans = [split_segments(source or "") for source in texts]
+        if source_lang == target_lang:
+            return list(texts), {"segments": 0}
+
+        # Unique segments by normalized hash; the first spelling seen is sent
+        segments: Dict[str, str] = {}
+        for plan in plans:
+            for part, is_segment in plan:
+                if is_segment:
+                    segments.setdefault(segment_hash(part), part.strip())
+
+        stored = await self._lookup(source_lang, target_lang, list(segments))
+        translations = {key: target for key, (_, target) in stored.items()}
+        misses = {key: segment for key, segment in segments.items() if key not in stored}
+
+        if misses:
+            translated = await self._translate_remote(list(misses.values()), source_lang, target_lang)
+            new = dict(zip(misses, translated))
+            translations.update(new)
+            await self._store(source_lang, target_lang, {key: (misses[key], target) for key, target in new.items()})
+
+        # Statistics over every segment occurrence, not just unique ones
+        stats = {"segments": 0, "exact": 0, "normalized": 0, "misses": 0, "characters_saved": 0, "characters_sent": 0}
+        sent = set()
+        result = []
+        for plan in plans:
+            out = []
+            for part, is_segment in plan:
+                if not is_segment:
+                    out.append(part)
+                    continue
+
+                key = segment_hash(part)
+                core = part.strip()
+                stats["segments"] += 1
+                if key in stored or key in sent:
+                    kind = "exact" if key not in stored or stored[key][0] == core else "normalized"
+                    stats[kind] += 1
+                    stats["characters_saved"] += len(core)
+                else:
+                    sent.add(key)
+                    stats["misses"] += 1
+                    stats["characters_sent"] += len(core)
+
+                # Keep the segment's own surrounding whitespace
+                lead = part[:len(part) - len(part.lstrip())]
+                trail = part[len(part.rstrip()):]
+                out.append(lead + translations[key] + trail)
+            result.append("".join(out))
+
+        SEGMENTS.labels("exact").inc(stats["exact"])
+        SEGMENTS.labels("normalized").inc(stats["normalized"])
+        SEGMENTS.labels("miss").inc(stats["misses"])
+        CHARACTERS.labels("memory").inc(stats["characters_saved"])
+        CHARACTERS.labels("deepl").inc(stats["characters_sent"])
+
+        stats["hit_rate"] = round((stats["segments"] - stats["misses"]) / stats["segments"], 4) if stats["segments"] else 0.0
+        return result, stats
+
+    async def _lookup(self, source_lang: str, target_lang: str, keys: List[str]) -> Dict[str, Tuple[str, str]]:
+        """key -> (stored source, target) from Redis, then Postgres"""
+        if not keys:
+            return {}
+        found: Dict[str, Tuple[str, str]] = {}
+        redis_keys = [f"tm:{source_lang}:{target_lang}:{key}" for key in keys]
+
+        try:
+            for key, value in zip(keys, await get_redis().mget(redis_keys)):
+                if value:
+                    found[key] = tuple(orjson.loads(value))
+        except Exception as e:
+            self.logger.warning("Translation memory cache unavailable", error=str(e))
+
+        remaining = [key for key in keys if key not in found]
+        if remaining:
+            async with self.session_factory() as session:
+                result = await session.execute(_LOOKUP, {
+                    "source_lang": source_lang, "target_lang": target_lang, "hashes": remaining
+                })
+                from_db = {row.source_hash: (row.source_text, row.target_text) for row in result}
+            found.update(from_db)
+            await self._cache(source_lang, target_lang, from_db)
+
+        return found
+
+    async def _store(self, source_lang: str, target_lang: str, entries: Dict[str, Tuple[str, str]]):
+        if not entries:
+            return
+        async with self.session_factory() as session:
+            async with session.begin():
+                await session.execute(_STORE, {
+                    "source_lang": source_lang,
+                    "target_lang": target_lang,
+                    "hashes": list(entries),
+                    "sources": [source for source, _ in entries.values()],
+                    "targets": [target for _, target in entries.values()],
+                })
+        await self._cache(source_lang, target_lang, entries)
+
+    async def _cache(self, source_lang: str, target_lang: str, entries: Dict[str, Tuple[str, str]]):
+        if not entries:
+            return
+        try:
+            async with get_redis().pipeline(transaction=False) as pipe:
+                for key, entry in entries.items():
+                    pipe.set(
+                        f"tm:{source_lang}:{target_lang}:{key}",
+                        orjson.dumps(entry),
+                        ex=settings.TRANSLATION_MEMORY_CACHE_TTL_SECONDS
+                    )
+                await pipe.execute()
+        except Exception:
+            pass
+
+    async def _translate_remote(self, segments: List[str], source_lang: str, target_lang: str) -> List[str]:
+        """DeepL requests of at most TRANSLATION_BATCH_SEGMENTS segments and TRANSLATION_BATCH_CHARACTERS"""
+        translator = self._get_translator()
+        batches, batch, size = [], [], 0
+        for segment in segments:
+            if batch and (len(batch) >= settings.TRANSLATION_BATCH_SEGMENTS
+                          or size + len(segment) > settings.TRANSLATION_BATCH_CHARACTERS):
+                batches.append(batch)
+                batch, size = [], 0
+            batch.append(segment)
+            size += len(segment)
+        if batch:
+            batches.append(batch)
+
+        semaphore = asyncio.Semaphore(settings.TRANSLATION_CONCURRENCY)
+
+        async def send(batch: List[str]) -> List[str]:
+            async with semaphore:
+                # The DeepL SDK is blocking
+                results = await asyncio.to_thread(
+                    translator.translate_text,
+                    batch,
+                    source_lang=source_lang.upper(),
+                    target_lang=DEEPL_TARGETS[target_lang]
+                )
+                return [r.text for r in results]
+
+        translated = await asyncio.gather(*(send(batch) for batch in batches))
+        return [segment for batch in translated for segment in batch]
+
+
+translation_memory = TranslationMemory()
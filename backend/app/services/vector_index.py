@@ -0,0 +1,229 @@
+"""ANN index lifecycle management for product embeddings"""
+
+from typing import Dict, Any, Optional
+from enum import Enum
+import json
+import math
+import time
+import structlog
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.core.config import settings
+from app.core.database import engine as default_engine
+
+logger = structlog.get_logger()
+
+
+class VectorIndexType(str, Enum):
+    """Supported pgvector index methods"""
+    IVFFLAT = "ivfflat"
+    HNSW = "hnsw"
+
+
+# Recall target -> fraction of IVFFlat lists to probe. These are conservative
+# defaults; calibrate them for the live catalog with
+# benchmarks/vector_index_recall.py.
+IVFFLAT_PROBE_FRACTIONS = [
+    (0.80, 0.01),
+    (0.90, 0.03),
+    (0.95, 0.05),
+    (0.98, 0.10),
+    (0.99, 0.20),
+    (1.00, 1.00),
+]
+
+# Recall target -> hnsw.ef_search
+HNSW_EF_SEARCH = [
+    (0.80, 20),
+    (0.90, 40),
+    (0.95, 80),
+    (0.98, 160),
+    (0.99, 320),
+    (1.00, 1000),
+]
+
+
+# Build parameters read from the index comment, cached per process so the
+# similarity endpoint does not pay an extra catalog query on every call
+_BUILD_PARAMS_TTL_SECONDS = 300
+_build_params_cache: Dict[str, Any] = {"params": None, "loaded_at": 0.0}
+
+
+def _lookup(table, recall_target: float):
+    """Return the first table value whose recall covers the target"""
+    for recall, value in table:
+        if recall_target <= recall:
+            return value
+    return table[-1][1]
+
+
+def ivfflat_lists_for_rows(rows: int) -> int:
+    """Number of IVFFlat lists for a table size (lists ~ sqrt(rows))"""
+    return max(1, int(round(math.sqrt(max(rows, 1)))))
+
+
+class VectorIndexManager:
+    """Builds, re-clusters and tunes the ANN index on Product.embedding.
+
+    The parameters used for the last build are stored as a JSON comment on
+    the index itself, so the manager can tell when the catalog has grown
+    past the rebuild threshold without any extra bookkeeping table.
+    """
+
+    INDEX_NAME = "ix_products_embedding"
+    TABLE_NAME = "products"
+    COLUMN_NAME = "embedding"
+    OPCLASS = "vector_cosine_ops"
+
+    def __init__(self, engine: Optional[AsyncEngine] = None):
+        self.engine = engine or default_engine
+        self.index_type = VectorIndexType(settings.VECTOR_INDEX_TYPE)
+        self.logger = logger.bind(component="vector_index", index=self.INDEX_NAME)
+
+    async def get_status(self) -> Dict[str, Any]:
+        """Current row count and the parameters the index was built with"""
+        async with self.engine.connect() as conn:
+            rows = await conn.scalar(text(
+                f"SELECT count(*) FROM {self.TABLE_NAME} WHERE {self.COLUMN_NAME} IS NOT NULL"
+            ))
+            comment = await conn.scalar(
+                text("SELECT obj_description(to_regclass(:name), 'pg_class')"),
+                {"name": self.INDEX_NAME}
+            )
+            method = await conn.scalar(
+                text(
+                    "SELECT am.amname FROM pg_class c "
+                    "JOIN pg_am am ON am.oid = c.relam "
+                    "WHERE c.oid = to_regclass(:name)"
+                ),
+                {"name": self.INDEX_NAME}
+            )
+
+        build_info = {}
+        if comment:
+            try:
+                build_info = json.loads(comment)
+            except ValueError:
+                build_info = {}
+
+        return {
+            "index_name": self.INDEX_NAME,
+            "exists": method is not None,
+            "index_type": method,
+            "configured_type": self.index_type.value,
+            "rows": rows or 0,
+            "built_rows": build_info.get("rows"),
+            "build_params": build_info.get("params", {}),
+            "needs_rebuild": self._needs_rebuild(method, rows or 0, build_info),
+        }
+
+    def _needs_rebuild(self, method: Optional[str], rows: int, build_info: Dict[str, Any]) -> bool:
+        """Decide whether the index is missing, of the wrong type or stale"""
+        if method is None or method != self.index_type.value:
+            return True
+
+        # HNSW is maintained incrementally and does not need re-clustering
+        if self.index_type == VectorIndexType.HNSW:
+            return False
+
+        built_rows = build_info.get("rows")
+        if not built_rows:
+            return rows > 0
+        return rows >= built_rows * (1 + settings.VECTOR_INDEX_REBUILD_GROWTH)
+
+    def build_params(self, rows: int) -> Dict[str, int]:
+        """Index build parameters for the configured index type"""
+        if self.index_type == VectorIndexType.HNSW:
+            return {
+                "m": settings.VECTOR_HNSW_M,
+                "ef_construction": settings.VECTOR_HNSW_EF_CONSTRUCTION,
+            }
+        return {"lists": ivfflat_lists_for_rows(rows)}
+
+    async def rebuild(self, force: bool = False) -> Dict[str, Any]:
+        """Rebuild the index if it is stale (or always, with force=True).
+
+        The new index is built CONCURRENTLY under a temporary name and then
+        swapped in, so similarity queries keep working during the rebuild.
+        """
+        status = await self.get_status()
+        if not force and not status["needs_rebuild"]:
+            return {"rebuilt": False, **status}
+
+        rows = status["rows"]
+        params = self.build_params(rows)
+        with_clause = ", ".join(f"{key} = {value}" for key, value in params.items())
+        tmp_name = f"{self.INDEX_NAME}_new"
+        comment = json.dumps({"rows": rows, "params": params}).replace("'", "''")
+
+        self.logger.info(
+            "Rebuilding vector index",
+            index_type=self.index_type.value,
+            rows=rows,
+            params=params
+        )
+
+        # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+        async with self.engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {tmp_name}"))
+            await conn.execute(text(
+                f"CREATE INDEX CONCURRENTLY {tmp_name} ON {self.TABLE_NAME} "
+                f"USING {self.index_type.value} ({self.COLUMN_NAME} {self.OPCLASS}) "
+                f"WITH ({with_clause})"
+            ))
+            await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {self.INDEX_NAME}"))
+            await conn.execute(text(f"ALTER INDEX {tmp_name} RENAME TO {self.INDEX_NAME}"))
+            await conn.execute(text(f"COMMENT ON INDEX {self.INDEX_NAME} IS '{comment}'"))
+
+        _build_params_cache["params"] = None
+        self.logger.info("Vector index rebuilt", rows=rows, params=params)
+        return {"rebuilt": True, **(await self.get_status())}
+
+    def search_params(self, recall_target: Optional[float] = None, limit: int = 10,
+                      build_params: Optional[Dict[str, Any]] = None) -> Dict[str, int]:
+        """Translate a recall target into per-query search settings"""
+        recall_target = recall_target or settings.VECTOR_RECALL_TARGET
+        build_params = build_params or {}
+
+        if self.index_type == VectorIndexType.HNSW:
+            # ef_search below the requested limit silently truncates results
+            return {"hnsw.ef_search": max(limit, _lookup(HNSW_EF_SEARCH, recall_target))}
+
+        lists = build_params.get("lists") or settings.VECTOR_IVFFLAT_DEFAULT_LISTS
+        fraction = _lookup(IVFFLAT_PROBE_FRACTIONS, recall_target)
+        return {"ivfflat.probes": max(1, min(lists, math.ceil(lists * fraction)))}
+
+    async def apply_search_params(self, session: AsyncSession, recall_target: Optional[float] = None,
+                                  limit: int = 10) -> Dict[str, int]:
+        """SET LOCAL the search parameters on the session's current transaction"""
+        build_params = await self._cached_build_params(session)
+        params = self.search_params(recall_target, limit, build_params)
+        for name, value in params.items():
+            # SET does not accept bind parameters; values are ints we computed
+            await session.execute(text(f"SET LOCAL {name} = {int(value)}"))
+        return params
+
+    async def _cached_build_params(self, session: AsyncSession) -> Dict[str, Any]:
+        """Build parameters of the live index, cached for a few minutes"""
+        now = time.monotonic()
+        if (_build_params_cache["params"] is not None
+                and now - _build_params_cache["loaded_at"] < _BUILD_PARAMS_TTL_SECONDS):
+            return _build_params_cache["params"]
+
+        comment = await session.scalar(
+            text("SELECT obj_description(to_regclass(:name), 'pg_class')"),
+            {"name": self.INDEX_NAME}
+        )
+        build_params = {}
+        if comment:
+            try:
+                build_params = json.loads(comment).get("params", {})
+            except ValueError:
+                build_params = {}
+
+        _build_params_cache["params"] = build_params
+        _build_params_cache["loaded_at"] = now
+        return build_params
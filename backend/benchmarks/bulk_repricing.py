@@ -0,0 +1,58 @@
+"""Bulk repricing benchmark: price many synthetic listings with each strategy
+
+Generates --listings listings with cost, minimum, suggested and buy-box
+prices (no database) and times compute_prices for every strategy. The
+target is 500k listings in a few seconds, load and write excluded.
+
+Usage (from backend/):
+    python -m benchmarks.bulk_repricing --listings 500000
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from app.services.repricing import STRATEGIES, compute_prices, repricing_params
+
+
+def _synthetic_listings(listings: int, seed: int):
+    rng = np.random.default_rng(seed)
+    cost = np.round(rng.lognormal(2.5, 0.8, listings), 2)
+    price = np.round(cost * rng.uniform(1.1, 1.8, listings), 2)
+    buy_box = np.round(price * rng.uniform(0.85, 1.1, listings), 2)
+    columns = {
+        "price": price,
+        "cost_price": np.where(rng.random(listings) < 0.05, np.nan, cost),
+        "min_price": np.where(rng.random(listings) < 0.3, np.nan, np.round(cost * 1.08, 2)),
+        "suggested_price": np.where(rng.random(listings) < 0.5, np.nan, np.round(cost * 1.5, 2)),
+        "buy_box_price": np.where(rng.random(listings) < 0.2, np.nan, buy_box),
+        "is_buy_box_winner": rng.random(listings) < 0.25,
+    }
+    return columns
+
+
+def main(listings: int, seed: int):
+    columns = _synthetic_listings(listings, seed)
+    params = repricing_params(target_margin=0.3, min_margin=0.05, undercut=0.01, max_change=0.2)
+
+    print(f"{listings} listings\n")
+    print(f"{'strategy':<10} {'seconds':>8} {'changed':>9} {'up':>8} {'down':>8} {'under floor':>12}")
+    for strategy in STRATEGIES:
+        start = time.perf_counter()
+        new_prices = compute_prices(columns, strategy, params)
+        changed = np.abs(new_prices - columns["price"]) >= 0.005
+        elapsed = time.perf_counter() - start
+
+        floor = np.fmax(columns["min_price"], columns["cost_price"] * (1 + params["min_margin"]))
+        print(f"{strategy:<10} {elapsed:>8.2f} {int(changed.sum()):>9} "
+              f"{int((new_prices > columns['price']).sum()):>8} {int((new_prices < columns['price']).sum()):>8} "
+              f"{int((new_prices < floor - 1e-9).sum()):>12}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--listings", type=int, default=500000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    main(args.listings, args.seed)
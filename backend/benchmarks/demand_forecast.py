@@ -0,0 +1,61 @@
+"""Demand forecast benchmark: fit SES and Croston/SBA to many synthetic SKUs
+
+Generates --skus intermittent and smooth daily demand series of --days
+days (no database), then times forecast_demand and reorder_policy on
+the whole matrix. The target is 100k SKUs x 365 days in under a minute.
+
+Usage (from backend/):
+    python -m benchmarks.demand_forecast --skus 100000 --days 365
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from app.services.forecasting import MODEL_SBA, forecast_demand, reorder_policy
+
+
+def _synthetic_demand(skus: int, days: int, seed: int) -> np.ndarray:
+    """Mix of slow movers (rare, lumpy demand) and steady sellers"""
+    rng = np.random.default_rng(seed)
+    occurrence = rng.beta(0.6, 2.0, size=(skus, 1))  # Per-SKU chance of a sale on a given day
+    size = rng.gamma(2.0, 3.0, size=(skus, 1))  # Per-SKU mean units per selling day
+    happens = rng.random((skus, days)) < occurrence
+    return np.where(happens, rng.poisson(size, size=(skus, days)) + 1, 0).astype(np.float32)
+
+
+def main(skus: int, days: int, seed: int):
+    start = time.perf_counter()
+    demand = _synthetic_demand(skus, days, seed)
+    print(f"generated {skus} x {days} in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    fitted = forecast_demand(demand)
+    fit_s = time.perf_counter() - start
+
+    rng = np.random.default_rng(seed + 1)
+    start = time.perf_counter()
+    policy = reorder_policy(
+        fitted["daily_demand"],
+        fitted["demand_std"],
+        rng.integers(3, 60, size=skus),
+        rng.integers(0, 500, size=skus).astype(np.float64),
+        service_level=0.95,
+        review_days=7
+    )
+    policy_s = time.perf_counter() - start
+
+    print(f"fit     {fit_s:>7.2f}s ({skus / fit_s:,.0f} SKUs/s)")
+    print(f"policy  {policy_s:>7.2f}s")
+    print(f"sba     {int((fitted['model'] == MODEL_SBA).sum()):>7} of {skus}")
+    print(f"reorder {int((policy['order_quantity'] > 0).sum()):>7} of {skus}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--skus", type=int, default=100000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    main(args.skus, args.days, args.seed)
@@ -0,0 +1,76 @@
+"""Import-time profile of the API entry point
+
+Runs `python -X importtime -c "import app.main"` in a fresh interpreter,
+prints the total and the slowest top-level packages, and exits non-zero
+if a heavy ML/cloud SDK is imported at module load.
+
+Usage (from backend/):
+    python -m benchmarks.import_time --top 15
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+# Must only be imported by agents/adapters that use them, on first use
+HEAVY_MODULES = {
+    "torch", "transformers", "sentence_transformers", "langchain",
+    "langchain_openai", "cv2", "boto3", "botocore", "openai", "onnxruntime",
+}
+
+LINE_RE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def profile(target: str):
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=backend_dir,
+        capture_output=True,
+        text=True
+    )
+    if proc.returncode != 0:
+        # Import errors are printed after the importtime lines
+        print(proc.stderr.splitlines()[-1] if proc.stderr else "import failed")
+
+    self_us = defaultdict(int)
+    total_us = 0
+    modules = set()
+    for line in proc.stderr.splitlines():
+        match = LINE_RE.match(line)
+        if not match:
+            continue
+        own, cumulative, indent, name = match.groups()
+        modules.add(name)
+        self_us[name.split(".")[0]] += int(own)
+        # Top-level entries (one leading space) sum to the total import time
+        if len(indent) == 1:
+            total_us += int(cumulative)
+
+    return proc.returncode, total_us, self_us, modules
+
+
+def main(target: str, top: int) -> int:
+    returncode, total_us, self_us, modules = profile(target)
+
+    print(f"import {target}: {total_us / 1000:.1f} ms total")
+    print(f"\n{'package':<32} {'self ms':>9}")
+    for name, us in sorted(self_us.items(), key=lambda item: -item[1])[:top]:
+        print(f"{name:<32} {us / 1000:>9.1f}")
+
+    heavy = sorted({name.split(".")[0] for name in modules} & HEAVY_MODULES)
+    if heavy:
+        print(f"\nFAIL: heavy modules imported at startup: {', '.join(heavy)}")
+        return 1
+    return returncode
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--target", default="app.main")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+    sys.exit(main(args.target, args.top))
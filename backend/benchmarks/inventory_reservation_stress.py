@@ -0,0 +1,155 @@
+"""Inventory reservation stress test: many workers reserving one hot SKU
+
+Creates a scratch product with a single warehouse row holding --stock
+units, then runs --workers concurrent workers that each try to reserve
+one unit --attempts times. Compares the conditional-UPDATE engine
+(InventoryService.reserve) with the read-modify-write pattern it
+replaces (SELECT ... FOR UPDATE, then UPDATE inventory and the product
+totals in the same transaction), and checks that neither oversells.
+
+Usage (from backend/):
+    python -m benchmarks.inventory_reservation_stress --workers 64 --stock 5000
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.core.database import create_engine
+from app.services.inventory import InventoryService
+
+
+async def _setup(session_factory, stock: int) -> uuid.UUID:
+    product_id = uuid.uuid4()
+    async with session_factory() as session:
+        async with session.begin():
+            await session.execute(text(
+                "INSERT INTO products (id, sku, brand, category, title, total_stock, reserved_stock) "
+                "VALUES (:id, :sku, 'bench', 'bench', 'Reservation benchmark', :stock, 0)"
+            ), {"id": product_id, "sku": f"bench-reserve-{product_id}", "stock": stock})
+            await session.execute(text(
+                "INSERT INTO inventory (id, product_id, warehouse, quantity, reserved) "
+                "VALUES (gen_random_uuid(), :id, 'main', :stock, 0)"
+            ), {"id": product_id, "stock": stock})
+    return product_id
+
+
+async def _reset(session_factory, product_id: uuid.UUID, stock: int):
+    async with session_factory() as session:
+        async with session.begin():
+            await session.execute(text("DELETE FROM inventory_reservations WHERE product_id = :id"), {"id": product_id})
+            await session.execute(text(
+                "UPDATE inventory SET quantity = :stock, reserved = 0 WHERE product_id = :id"
+            ), {"id": product_id, "stock": stock})
+            await session.execute(text(
+                "UPDATE products SET total_stock = :stock, reserved_stock = 0 WHERE id = :id"
+            ), {"id": product_id, "stock": stock})
+
+
+async def _cleanup(session_factory, product_id: uuid.UUID):
+    async with session_factory() as session:
+        async with session.begin():
+            await session.execute(text("DELETE FROM inventory_reservations WHERE product_id = :id"), {"id": product_id})
+            await session.execute(text("DELETE FROM inventory WHERE product_id = :id"), {"id": product_id})
+            await session.execute(text("DELETE FROM products WHERE id = :id"), {"id": product_id})
+
+
+async def _reserve_locking(session_factory, product_id: uuid.UUID) -> bool:
+    """The pattern being replaced: lock, check in Python, write both tables"""
+    async with session_factory() as session:
+        async with session.begin():
+            row = (await session.execute(text(
+                "SELECT id, quantity, reserved FROM inventory "
+                "WHERE product_id = :id ORDER BY quantity - reserved DESC LIMIT 1 FOR UPDATE"
+            ), {"id": product_id})).first()
+            if row is None or row.quantity - row.reserved < 1:
+                return False
+            await session.execute(text(
+                "UPDATE inventory SET reserved = :reserved WHERE id = :inventory_id"
+            ), {"reserved": row.reserved + 1, "inventory_id": row.id})
+            await session.execute(text(
+                "UPDATE products SET reserved_stock = reserved_stock + 1 WHERE id = :id"
+            ), {"id": product_id})
+            return True
+
+
+async def _run(mode: str, session_factory, product_id: uuid.UUID, workers: int, attempts: int):
+    service = InventoryService(session_factory)
+    latencies = []
+    succeeded = 0
+
+    async def worker(worker_id: int):
+        nonlocal succeeded
+        for i in range(attempts):
+            start = time.perf_counter()
+            if mode == "conditional":
+                result = await service.reserve(
+                    f"bench-{worker_id}-{i}", [{"product_id": product_id, "quantity": 1}]
+                )
+                ok = result["reserved"]
+            else:
+                ok = await _reserve_locking(session_factory, product_id)
+            latencies.append((time.perf_counter() - start) * 1000)
+            succeeded += ok
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(w) for w in range(workers)))
+    elapsed = time.perf_counter() - start
+
+    async with session_factory() as session:
+        row = (await session.execute(text(
+            "SELECT quantity, reserved FROM inventory WHERE product_id = :id"
+        ), {"id": product_id})).one()
+
+    latencies.sort()
+    return {
+        "succeeded": succeeded,
+        "attempted": workers * attempts,
+        "elapsed": elapsed,
+        "throughput": workers * attempts / elapsed,
+        "p50": statistics.median(latencies),
+        "p99": latencies[int(len(latencies) * 0.99) - 1],
+        "reserved": row.reserved,
+        "quantity": row.quantity,
+    }
+
+
+async def main(workers: int, attempts: int, stock: int):
+    engine = create_engine(
+        settings.DATABASE_URL,
+        pool_size=workers,
+        max_overflow=0,
+        statement_timeout_ms=settings.DATABASE_STATEMENT_TIMEOUT_MS,
+        application_name="goodlink-bench-reservations"
+    )
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    product_id = await _setup(session_factory, stock)
+
+    try:
+        print(f"{workers} workers x {attempts} attempts against {stock} units of one SKU\n")
+        print(f"{'mode':<12} {'ok':>7} {'res/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'reserved':>9} {'oversold':>9}")
+        for mode in ("locking", "conditional"):
+            await _reset(session_factory, product_id, stock)
+            r = await _run(mode, session_factory, product_id, workers, attempts)
+            oversold = r["reserved"] > r["quantity"] or r["succeeded"] != r["reserved"]
+            print(f"{mode:<12} {r['succeeded']:>7} {r['throughput']:>9.0f} {r['p50']:>8.2f} "
+                  f"{r['p99']:>8.2f} {r['reserved']:>9} {'YES' if oversold else 'no':>9}")
+            assert r["succeeded"] == min(stock, r["attempted"]), r
+    finally:
+        await _cleanup(session_factory, product_id)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=64)
+    parser.add_argument("--attempts", type=int, default=100, help="Reservations per worker")
+    parser.add_argument("--stock", type=int, default=5000)
+    args = parser.parse_args()
+    asyncio.run(main(args.workers, args.attempts, args.stock))
@@ -0,0 +1,110 @@
+"""Attribute filter benchmark: JSON text extraction vs. JSONB @> with GIN
+
+Builds a scratch table with N rows of product-like attributes, stored both
+as JSON and JSONB, then times the same filters written as per-row JSON
+extraction (the old plan: sequential scan) and as JSONB containment
+backed by a jsonb_path_ops GIN index (what the list endpoints compile to).
+
+Usage (from backend/):
+    python -m benchmarks.jsonb_attribute_filter --rows 1000000
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import text
+
+from app.core.database import engine
+
+SCHEMA = "bench_jsonb"
+
+FILTERS = [
+    # (description, json extraction predicate, containment document)
+    ("color=red",
+     "attributes_json->>'color' = 'red'",
+     '{"color": "red"}'),
+    ("voltage=12 and fba=true",
+     "(attributes_json->>'voltage')::int = 12 AND (attributes_json->>'fba')::boolean",
+     '{"voltage": 12, "fba": true}'),
+    ("dimensions.unit=mm (rare)",
+     "attributes_json->'dimensions'->>'unit' = 'mm'",
+     '{"dimensions": {"unit": "mm"}}'),
+]
+
+
+async def _setup(conn, rows: int):
+    await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    await conn.execute(text(f"""
+        CREATE TABLE {SCHEMA}.products AS
+        SELECT g AS id, doc::json AS attributes_json, doc AS attributes
+        FROM (
+            SELECT g, jsonb_build_object(
+                'color', (ARRAY['red','blue','black','white','green','silver'])[1 + g % 6],
+                'voltage', (ARRAY[5, 12, 24, 230])[1 + (g / 7) % 4],
+                'fba', (g % 3 = 0),
+                'brand_line', 'line-' || (g % 500),
+                'dimensions', jsonb_build_object(
+                    'unit', CASE WHEN g % 1000 = 0 THEN 'mm' ELSE 'cm' END,
+                    'length', g % 120
+                )
+            ) AS doc
+            FROM generate_series(1, :rows) AS g
+        ) s
+    """), {"rows": rows})
+    await conn.execute(text(
+        f"CREATE INDEX ON {SCHEMA}.products USING gin (attributes jsonb_path_ops)"
+    ))
+    await conn.execute(text(f"ANALYZE {SCHEMA}.products"))
+
+
+async def _time(conn, sql: str, params: dict, repeats: int):
+    timings = []
+    count = 0
+    for _ in range(repeats):
+        start = time.perf_counter()
+        count = await conn.scalar(text(sql), params)
+        timings.append((time.perf_counter() - start) * 1000)
+    return count, statistics.median(timings)
+
+
+async def main(rows: int, repeats: int, keep: bool):
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text("SET statement_timeout = 0"))
+
+        start = time.perf_counter()
+        await _setup(conn, rows)
+        print(f"setup: {rows} rows in {time.perf_counter() - start:.1f}s\n")
+
+        print(f"{'filter':<28} {'matches':>9} {'json ms':>10} {'jsonb @> ms':>12} {'speedup':>8}")
+        for name, predicate, document in FILTERS:
+            json_count, json_ms = await _time(
+                conn,
+                f"SELECT count(*) FROM {SCHEMA}.products WHERE {predicate}",
+                {}, repeats
+            )
+            jsonb_count, jsonb_ms = await _time(
+                conn,
+                f"SELECT count(*) FROM {SCHEMA}.products WHERE attributes @> CAST(:doc AS jsonb)",
+                {"doc": document}, repeats
+            )
+            assert json_count == jsonb_count, (name, json_count, jsonb_count)
+            print(f"{name:<28} {jsonb_count:>9} {json_ms:>10.1f} {jsonb_ms:>12.1f} "
+                  f"{json_ms / max(jsonb_ms, 0.001):>7.1f}x")
+
+        if not keep:
+            await conn.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch schema")
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.repeats, args.keep))
@@ -0,0 +1,72 @@
+"""Near-duplicate image index benchmark: multi-index hashing vs a linear scan
+
+Builds --images random 64-bit pHashes with a near-duplicate planted for
+every query (no database, no images) and compares a linear Hamming scan
+with MultiIndex, the in-memory form of the chunked lookup that
+image_fingerprints serves from Postgres. Both must return the same
+matches; the candidate count is what the SQL lookup would fetch.
+
+Usage (from backend/):
+    python -m benchmarks.near_duplicate_index --images 200000 --queries 500
+"""
+
+import argparse
+import random
+import time
+
+from app.services.image_index import CHUNKS, MultiIndex, chunk_neighbours, hamming, hash_chunks
+
+
+def _flip(value: int, bits: int, rng: random.Random) -> int:
+    for bit in rng.sample(range(64), bits):
+        value ^= 1 << bit
+    return value
+
+
+def main(images: int, queries: int, distance: int, seed: int):
+    rng = random.Random(seed)
+    hashes = [rng.getrandbits(64) for _ in range(images)]
+    targets = rng.sample(range(images), queries)
+    probes = [_flip(hashes[n], rng.randint(0, distance), rng) for n in targets]
+
+    start = time.perf_counter()
+    index = MultiIndex()
+    for n, value in enumerate(hashes):
+        index.add(value, n)
+    build = time.perf_counter() - start
+    print(f"{images} hashes, {queries} queries, radius {distance}; index built in {build:.2f}s\n")
+
+    start = time.perf_counter()
+    linear = [[n for n, value in enumerate(hashes) if hamming(value, probe) <= distance] for probe in probes]
+    linear_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    mih = [sorted(n for _, n in index.search(probe, distance)) for probe in probes]
+    mih_time = time.perf_counter() - start
+
+    # Rows the chunked SQL lookup fetches before verifying the full distance
+    candidates = 0
+    for probe in probes:
+        found = set()
+        for table, chunk in zip(index.tables, hash_chunks(probe)):
+            for neighbour in chunk_neighbours(chunk, distance // CHUNKS):
+                found.update(table.get(neighbour, ()))
+        candidates += len(found)
+
+    assert all(target in matches for target, matches in zip(targets, linear))
+    assert mih == linear
+
+    print(f"{'method':<22} {'ms/query':>9} {'speedup':>8}")
+    for name, seconds in (("linear scan", linear_time), ("multi-index hashing", mih_time)):
+        print(f"{name:<22} {seconds / queries * 1000:>9.3f} {linear_time / seconds:>7.1f}x")
+    print(f"\nCandidates per query: {candidates / queries:.1f} of {images}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--images", type=int, default=200000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--distance", type=int, default=6, help="Hamming radius (IMAGE_PHASH_MAX_DISTANCE)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    main(args.images, args.queries, args.distance, args.seed)
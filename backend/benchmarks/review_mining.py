@@ -0,0 +1,74 @@
+"""Review mining throughput on CPU: quantized ONNX model across a process pool
+
+Generates --reviews synthetic German and English reviews of mixed length
+(no database) and runs ReviewMiner.analyze with 1 worker and with
+--workers workers, reporting reviews per minute. The target is thousands
+of reviews per minute without a GPU. --export (re)creates the int8 model
+at REVIEW_MINING_MODEL_PATH first.
+
+Usage (from backend/):
+    python -m benchmarks.review_mining --reviews 5000 --workers 8
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from app.core.config import settings
+from app.services.review_mining import ReviewMiner, export_quantized_model
+
+SENTENCES = [
+    "Great product, works exactly as described.",
+    "The delivery was fast and the packaging was intact.",
+    "Price is a bit high for what you get.",
+    "Broke after two weeks, very disappointed.",
+    "Customer service answered quickly and sent a refund.",
+    "Size fits perfectly.",
+    "Sehr gute Qualität, die Verarbeitung ist top.",
+    "Die Lieferung hat leider zehn Tage gedauert.",
+    "Für den Preis absolut empfehlenswert.",
+    "Nach einem Monat kaputt, der Kundenservice reagiert nicht.",
+    "Einfach zu bedienen und schnell eingerichtet.",
+    "Verpackung war beschädigt, Produkt aber in Ordnung.",
+]
+
+
+def _synthetic_reviews(count: int, seed: int):
+    rng = random.Random(seed)
+    # Mostly short reviews with a long tail, like real marketplaces
+    return [
+        " ".join(rng.choice(SENTENCES) for _ in range(min(1 + int(rng.expovariate(0.35)), 30)))
+        for _ in range(count)
+    ]
+
+
+async def main(reviews: int, workers: int, export: bool, seed: int):
+    if export:
+        export_quantized_model(settings.REVIEW_MINING_MODEL, settings.REVIEW_MINING_MODEL_PATH)
+    texts = _synthetic_reviews(reviews, seed)
+
+    print(f"{reviews} reviews, model {settings.REVIEW_MINING_MODEL_PATH}\n")
+    print(f"{'workers':>7} {'seconds':>8} {'reviews/min':>12}")
+    for count in sorted({1, workers}):
+        settings.REVIEW_MINING_WORKERS = count
+        miner = ReviewMiner()
+        try:
+            await miner.analyze(texts[:count * 8])  # Start workers and load the model
+            start = time.perf_counter()
+            results = await miner.analyze(texts)
+            elapsed = time.perf_counter() - start
+        finally:
+            miner.close()
+        assert len(results) == reviews
+        print(f"{count:>7} {elapsed:>8.2f} {reviews / elapsed * 60:>12.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reviews", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--export", action="store_true")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    asyncio.run(main(args.reviews, args.workers, args.export, args.seed))
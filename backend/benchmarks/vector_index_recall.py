@@ -0,0 +1,105 @@
+"""Recall/latency benchmark for the product embedding ANN index
+
+Compares ANN results at several ivfflat.probes / hnsw.ef_search settings
+against brute-force ground truth (index scans disabled) for a sample of
+catalog products.
+
+Usage (from backend/):
+    python -m benchmarks.vector_index_recall --samples 200 --k 10
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Dict, List, Tuple
+
+from sqlalchemy import text
+
+from app.core.database import engine
+from app.services.vector_index import VectorIndexManager, VectorIndexType
+
+KNN_SQL = text(
+    "SELECT id FROM products "
+    "WHERE embedding IS NOT NULL AND id != :id "
+    "ORDER BY embedding <=> (SELECT embedding FROM products WHERE id = :id) "
+    "LIMIT :k"
+)
+
+
+async def _sample_ids(samples: int) -> List[str]:
+    async with engine.connect() as conn:
+        result = await conn.execute(
+            text(
+                "SELECT id FROM products WHERE embedding IS NOT NULL "
+                "ORDER BY random() LIMIT :n"
+            ),
+            {"n": samples}
+        )
+        return [row.id for row in result]
+
+
+async def _run_queries(ids: List[str], k: int, settings_sql: List[str]) -> Tuple[Dict[str, set], List[float]]:
+    """Run the k-NN query for every sample id under the given SET LOCALs"""
+    results = {}
+    latencies = []
+    async with engine.connect() as conn:
+        for product_id in ids:
+            async with conn.begin():
+                for statement in settings_sql:
+                    await conn.execute(text(statement))
+                start = time.perf_counter()
+                rows = await conn.execute(KNN_SQL, {"id": product_id, "k": k})
+                latencies.append((time.perf_counter() - start) * 1000)
+                results[product_id] = {row.id for row in rows}
+    return results, latencies
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def main(samples: int, k: int):
+    manager = VectorIndexManager()
+    status = await manager.get_status()
+    print(f"index={status['index_type']} rows={status['rows']} params={status['build_params']}")
+
+    ids = await _sample_ids(samples)
+    if not ids:
+        print("No products with embeddings found")
+        return
+
+    truth, exact_latencies = await _run_queries(
+        ids, k, ["SET LOCAL enable_indexscan = off", "SET LOCAL enable_bitmapscan = off"]
+    )
+    print(f"brute force: p50={statistics.median(exact_latencies):.2f}ms "
+          f"p95={_percentile(exact_latencies, 95):.2f}ms")
+
+    if status["index_type"] == VectorIndexType.HNSW.value:
+        setting, values = "hnsw.ef_search", [k, 20, 40, 80, 160, 320]
+    else:
+        lists = status["build_params"].get("lists") or 100
+        setting = "ivfflat.probes"
+        values = sorted({1, 2, 4, 8, 16, 32, 64, lists // 10 or 1, lists // 5 or 1, lists})
+
+    print(f"\n{setting:>16} {'recall@' + str(k):>10} {'p50 ms':>9} {'p95 ms':>9}")
+    for value in values:
+        found, latencies = await _run_queries(ids, k, [f"SET LOCAL {setting} = {int(value)}"])
+        recalls = [
+            len(found[pid] & truth[pid]) / len(truth[pid])
+            for pid in ids if truth[pid]
+        ]
+        print(f"{value:>16} {statistics.mean(recalls):>10.3f} "
+              f"{statistics.median(latencies):>9.2f} {_percentile(latencies, 95):>9.2f}")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.samples, args.k))